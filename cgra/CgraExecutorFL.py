@@ -0,0 +1,886 @@
+"""
+=========================================================================
+CgraExecutorFL.py
+=========================================================================
+Fast functional (untimed) executor of a single CGRA.
+
+Unlike CgraFL, which walks the DFG, CgraExecutorFL consumes the very same
+IntraCgraPkt stream that is fed into CgraRTL (i.e., CMD_STORE_REQUEST,
+CMD_CONST, CMD_CONFIG*, CMD_LAUNCH, CMD_LOAD_REQUEST, etc.) and interprets
+the ctrl signals of each tile like the RTL does:
+  - the routing crossbar forwards the tile inports to the tile outports
+    and to the FU inports,
+  - the register cluster picks the FU operands from the routing crossbar
+    or the register banks, and writes the banks from the routing/FU
+    crossbar,
+  - the FU performs the operation (see lib/opt_type.py) and the FU
+    crossbar forwards the results,
+  - the prologue counts, count per iteration, lower bound and total ctrl
+    steps drive the ctrl memory address and the COMPLETE signal, and a
+    CMD_LAUNCH starts over the kernel indicated by its data_addr (see
+    num_resident_kernels of TileRTL).
+
+The ctrl step of each tile is performed atomically, round by round: in
+each round, every launched tile tries to complete its current ctrl step
+with the data that arrived in the previous rounds. The channels between
+tiles are unbounded, so only the dataflow order is preserved rather than
+the cycle-level timing. This is orders of magnitude faster than the RTL
+simulation, and yields the same data memory and the same packets towards
+the CPU (e.g., CMD_COMPLETE, CMD_LOAD_RESPONSE) as long as the kernel does
+not rely on the back pressure of the channels.
+
+Only scalar (i.e., vector_factor_power == 0) integer operations are
+supported, including the fused ones of fu/double, fu/triple and fu/quadra.
+The vector, floating-point and stateful (e.g., OPT_LOOP_CONTROL)
+operations are not, use unsupported_operations() to skip such kernels.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from collections import deque
+from pymtl3 import *
+from ..lib.cmd_type import *
+from ..lib.opt_type import *
+from ..lib.util.common import *
+from ..lib.util.ctrl_delta_helper import CtrlDeltaFormat
+from ..lib.util.data_struct_attr import *
+
+# Write-register sources (see RegisterClusterRTL).
+_WRITE_FROM_ROUTING_XBAR = PORT_ROUTING_CROSSBAR + 1
+_WRITE_FROM_FU_XBAR = PORT_FU_CROSSBAR + 1
+
+# Operations combining the first two operands, whose predicate is the AND
+# of the two operand predicates.
+_BINARY_OPTS = {
+  int(OPT_ADD): lambda a, b, mask: a + b,
+  int(OPT_SUB): lambda a, b, mask: a - b,
+  int(OPT_MUL): lambda a, b, mask: a * b,
+  int(OPT_OR) : lambda a, b, mask: a | b,
+  int(OPT_XOR): lambda a, b, mask: a ^ b,
+  int(OPT_AND): lambda a, b, mask: a & b,
+  int(OPT_LLS): lambda a, b, mask: a << b if b < mask.bit_length() else 0,
+  int(OPT_LRS): lambda a, b, mask: a >> b,
+  int(OPT_EQ) : lambda a, b, mask: int(a == b),
+  int(OPT_NE) : lambda a, b, mask: int(a != b),
+  int(OPT_LT) : lambda a, b, mask: int(a < b),
+  int(OPT_DIV): lambda a, b, mask: a // b,
+  int(OPT_REM): lambda a, b, mask: a % b,
+}
+
+# Operations on the first operand.
+_UNARY_OPTS = {
+  int(OPT_INC)    : lambda a, mask: a + 1,
+  int(OPT_PAS)    : lambda a, mask: a,
+  int(OPT_BIT_NOT): lambda a, mask: ~a,
+  int(OPT_NOT)    : lambda a, mask: int(a == 0),
+}
+
+# Fused operations of two FUs in sequence (see TwoSeqCombo): the first
+# one takes the FU inports 0 and 1, the second one takes the result of the
+# first one and the FU inport 2.
+_SEQ_COMBO_OPTS = {
+  int(OPT_MUL_ADD): (int(OPT_MUL), int(OPT_ADD)),
+  int(OPT_MUL_SUB): (int(OPT_MUL), int(OPT_SUB)),
+  int(OPT_MUL_LLS): (int(OPT_MUL), int(OPT_LLS)),
+  int(OPT_MUL_LRS): (int(OPT_MUL), int(OPT_LRS)),
+}
+
+# Fused operations of three FUs (see ThreeCombo): the first two take the
+# FU inports 0/1 and 2/3, the third one combines their results.
+_THREE_COMBO_OPTS = {
+  int(OPT_MUL_ADD_LLS): (int(OPT_MUL), int(OPT_ADD), int(OPT_LLS)),
+  int(OPT_MUL_SUB_LLS): (int(OPT_MUL), int(OPT_SUB), int(OPT_LLS)),
+  int(OPT_MUL_SUB_LRS): (int(OPT_MUL), int(OPT_SUB), int(OPT_LRS)),
+}
+
+_OPT_START = int(OPT_START)
+_OPT_NAH = int(OPT_NAH)
+_OPT_CONST = int(OPT_CONST)
+_OPT_ADD_CONST = int(OPT_ADD_CONST)
+_OPT_SUB_CONST = int(OPT_SUB_CONST)
+_OPT_MUL_CONST = int(OPT_MUL_CONST)
+_OPT_DIV_CONST = int(OPT_DIV_CONST)
+_OPT_MUL_CONST_ADD = int(OPT_MUL_CONST_ADD)
+_OPT_INC_NE_CONST_NOT_GRT = int(OPT_INC_NE_CONST_NOT_GRT)
+_OPT_EQ_CONST = int(OPT_EQ_CONST)
+_OPT_NE_CONST = int(OPT_NE_CONST)
+_OPT_PHI = int(OPT_PHI)
+_OPT_PHI_CONST = int(OPT_PHI_CONST)
+_OPT_GRT_PRED = int(OPT_GRT_PRED)
+_OPT_GRT_ALWAYS = int(OPT_GRT_ALWAYS)
+_OPT_GRT_ONCE = int(OPT_GRT_ONCE)
+_OPT_SEL = int(OPT_SEL)
+_OPT_RET = int(OPT_RET)
+_OPT_LD = int(OPT_LD)
+_OPT_ADD_CONST_LD = int(OPT_ADD_CONST_LD)
+_OPT_LD_CONST = int(OPT_LD_CONST)
+_OPT_STR = int(OPT_STR)
+_OPT_STR_CONST = int(OPT_STR_CONST)
+
+_MEM_OPTS = {_OPT_LD, _OPT_LD_CONST, _OPT_ADD_CONST_LD, _OPT_STR,
+             _OPT_STR_CONST}
+
+_SUPPORTED_OPTS = set(_BINARY_OPTS) | set(_UNARY_OPTS) | \
+                  set(_SEQ_COMBO_OPTS) | set(_THREE_COMBO_OPTS) | \
+                  _MEM_OPTS | \
+                  {_OPT_START, _OPT_NAH, _OPT_CONST, _OPT_ADD_CONST,
+                   _OPT_SUB_CONST, _OPT_MUL_CONST, _OPT_DIV_CONST,
+                   _OPT_MUL_CONST_ADD, _OPT_INC_NE_CONST_NOT_GRT,
+                   _OPT_EQ_CONST, _OPT_NE_CONST, _OPT_PHI, _OPT_PHI_CONST,
+                   _OPT_GRT_PRED, _OPT_GRT_ALWAYS, _OPT_GRT_ONCE, _OPT_SEL,
+                   _OPT_RET}
+
+def _opt_symbol(operation):
+  return OPT_SYMBOL_DICT.get(OpCodeType(operation), str(operation))
+
+#-------------------------------------------------------------------------
+# Decoded ctrl signal
+#-------------------------------------------------------------------------
+
+class _Ctrl:
+  __slots__ = ('operation', 'fu_in', 'routing', 'fu_xbar',
+               'vector_factor_power', 'write_reg_from', 'write_reg_idx',
+               'read_reg_from', 'read_reg_idx')
+
+  def __init__(s, ctrl, num_tile_inports, num_fu_outports):
+    s.operation = int(ctrl.operation)
+    # Index of each FU inport (0 is used if not specified, like the RTL).
+    s.fu_in = [int(x) - 1 if int(x) > 0 else 0 for x in ctrl.fu_in]
+    # (outport, inport) pairs of the routing/FU crossbars.
+    s.routing = [(o, (int(x) - 1) % num_tile_inports)
+                 for o, x in enumerate(ctrl.routing_xbar_outport) if int(x) > 0]
+    s.fu_xbar = [(o, (int(x) - 1) % num_fu_outports)
+                 for o, x in enumerate(ctrl.fu_xbar_outport) if int(x) > 0]
+    s.vector_factor_power = int(ctrl.vector_factor_power)
+    s.write_reg_from = [int(x) for x in ctrl.write_reg_from]
+    s.write_reg_idx = [int(x) for x in ctrl.write_reg_idx]
+    s.read_reg_from = [int(x) for x in ctrl.read_reg_from]
+    s.read_reg_idx = [int(x) for x in ctrl.read_reg_idx]
+
+#-------------------------------------------------------------------------
+# Tile state
+#-------------------------------------------------------------------------
+
+class _Tile:
+
+  def __init__(s, tile_id, ctrl_mem_size, num_ctrl, total_steps,
+               num_tile_inports, num_fu_inports, num_fu_outports,
+               num_registers_per_reg_bank, empty_ctrl, num_kernels = 1):
+    s.tile_id = tile_id
+    # Tile groups joined via CMD_CONFIG_TILE_GROUP.
+    s.groups = 0
+    s.ctrl = [empty_ctrl for _ in range(ctrl_mem_size)]
+    s.raddr = 0
+    s.lower = 0
+    s.count_per_iter = num_ctrl
+    s.total_steps = total_steps
+    # The shadow bank (see has_shadow_ctrl_mem of TileRTL).
+    s.shadow_ctrl = [empty_ctrl for _ in range(ctrl_mem_size)]
+    s.shadow_lower = 0
+    s.shadow_count_per_iter = num_ctrl
+    s.shadow_total_steps = total_steps
+    # [lower, count_per_iter, total_steps] of each resident kernel, the
+    # ones of the active kernel are mirrored above.
+    s.kernels = [[0, num_ctrl, total_steps] for _ in range(num_kernels)]
+    s.active_kernel = 0
+    s.times = 0
+    s.started = False
+    s.sent_complete = False
+    s.prologue_fu = [0] * ctrl_mem_size
+    s.prologue_fu_init = [0] * ctrl_mem_size
+    s.prologue_routing = [[0] * num_tile_inports for _ in range(ctrl_mem_size)]
+    s.prologue_routing_done = [[0] * num_tile_inports for _ in range(ctrl_mem_size)]
+    s.prologue_fu_xbar = [[0] * num_fu_outports for _ in range(ctrl_mem_size)]
+    s.prologue_fu_xbar_done = [[0] * num_fu_outports for _ in range(ctrl_mem_size)]
+    s.shadow_prologue_fu_init = [0] * ctrl_mem_size
+    s.shadow_prologue_routing = [[0] * num_tile_inports for _ in range(ctrl_mem_size)]
+    s.shadow_prologue_fu_xbar = [[0] * num_fu_outports for _ in range(ctrl_mem_size)]
+    s.regs = [[(0, 0)] * num_registers_per_reg_bank
+              for _ in range(num_fu_inports)]
+    s.consts = []
+    s.const_rd = 0
+    s.phi_first = True
+    s.already_grt_once = False
+    s.already_ret = False
+    s.inports = [deque() for _ in range(num_tile_inports)]
+    # Payloads sent by the FU (i.e., RET) towards the ctrl memory.
+    s.to_ctrl_mem = deque()
+
+  def save_kernel(s):
+    s.kernels[s.active_kernel] = [s.lower, s.count_per_iter, s.total_steps]
+
+  def restore_prologue(s):
+    s.prologue_fu = list(s.prologue_fu_init)
+    for dones in s.prologue_routing_done + s.prologue_fu_xbar_done:
+      dones[:] = [0] * len(dones)
+
+  def halted(s):
+    return s.sent_complete or \
+           (s.total_steps > 0 and s.times == s.total_steps)
+
+#-------------------------------------------------------------------------
+# CgraExecutorFL
+#-------------------------------------------------------------------------
+
+class CgraExecutorFL:
+
+  def __init__(s, IntraCgraPktType, width, height, ctrl_mem_size,
+               data_mem_size_global, num_registers_per_reg_bank,
+               num_ctrl, total_steps, cgra_topology = MESH, cgra_id = 0,
+               num_resident_kernels = 1):
+
+    s.IntraCgraPktType = IntraCgraPktType
+    s.CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+    s.DataType = s.CgraPayloadType.get_field_type(kAttrData)
+    s.CtrlType = s.CgraPayloadType.get_field_type(kAttrCtrl)
+    s.width = width
+    s.height = height
+    s.num_tiles = width * height
+    s.ctrl_mem_size = ctrl_mem_size
+    s.cgra_id = cgra_id
+    s.num_resident_kernels = num_resident_kernels
+    s.data_mask = (1 << s.DataType.get_field_type(kAttrPayload).nbits) - 1
+    s.addr_mask = (1 << clog2(data_mem_size_global)) - 1
+
+    num_tile_inports = 8 if cgra_topology == KING_MESH else 4
+    s.num_tile_inports = num_tile_inports
+    s.num_tile_outports = num_tile_inports
+    # Same number of FU inports/outports as the tiles of CgraRTL.
+    s.num_fu_inports = 4
+    s.num_fu_outports = 2
+
+    s.ctrl_delta = CtrlDeltaFormat(s.CtrlType)
+    s.empty_ctrl = _Ctrl(s.CtrlType(), num_tile_inports, s.num_fu_outports)
+    s.tiles = [_Tile(i, ctrl_mem_size, num_ctrl, total_steps,
+                     num_tile_inports, s.num_fu_inports, s.num_fu_outports,
+                     num_registers_per_reg_bank, s.empty_ctrl,
+                     num_resident_kernels)
+               for i in range(s.num_tiles)]
+    s.neighbors = [s._get_neighbors(i, cgra_topology)
+                   for i in range(s.num_tiles)]
+    # Only the tiles on the left-most column and bottom row connect to the
+    # data memory.
+    s.has_mem_port = [i % width == 0 or i // width == 0
+                      for i in range(s.num_tiles)]
+
+    s.mem = {}
+    # The address and the remaining words of the ongoing DMA store.
+    s.dma_wr_addr = 0
+    s.dma_wr_count = 0
+    s.send_to_cpu = []
+    s.num_rounds = 0
+    s.num_ctrl_steps = 0
+
+  # Returns, for each tile outport, the (dst tile, dst inport) it is
+  # connected to, or None for the boundary.
+  def _get_neighbors(s, i, cgra_topology):
+    x = i % s.width
+    y = i // s.width
+    offsets = {PORT_NORTH: (0, 1, PORT_SOUTH),
+               PORT_SOUTH: (0, -1, PORT_NORTH),
+               PORT_WEST : (-1, 0, PORT_EAST),
+               PORT_EAST : (1, 0, PORT_WEST)}
+    if cgra_topology == KING_MESH:
+      offsets.update({PORT_NORTHWEST: (-1, 1, PORT_SOUTHEAST),
+                      PORT_NORTHEAST: (1, 1, PORT_SOUTHWEST),
+                      PORT_SOUTHEAST: (1, -1, PORT_NORTHWEST),
+                      PORT_SOUTHWEST: (-1, -1, PORT_NORTHEAST)})
+    neighbors = [None] * s.num_tile_outports
+    for port, (dx, dy, dst_port) in offsets.items():
+      if 0 <= x + dx < s.width and 0 <= y + dy < s.height:
+        neighbors[port] = ((y + dy) * s.width + x + dx, dst_port)
+    return neighbors
+
+  #-----------------------------------------------------------------------
+  # Data memory
+  #-----------------------------------------------------------------------
+
+  def load(s, addr):
+    return s.mem.get(addr & s.addr_mask, (0, 0))
+
+  def store(s, addr, value):
+    s.mem[addr & s.addr_mask] = value
+
+  def read_data_mem(s, addr):
+    payload, predicate = s.load(addr)
+    return s.DataType(payload, predicate)
+
+  #-----------------------------------------------------------------------
+  # Packets from the CPU
+  #-----------------------------------------------------------------------
+
+  def recv_from_cpu(s, pkt):
+    payload = pkt.payload
+    cmd = int(payload.cmd)
+    if cmd == CMD_STORE_REQUEST:
+      s.store(int(payload.data_addr),
+              (int(payload.data.payload), int(payload.data.predicate)))
+    elif cmd == CMD_LOAD_REQUEST:
+      s._send_load_response(int(payload.data_addr))
+    elif cmd == CMD_DMA_STORE_REQUEST:
+      s.dma_wr_addr = int(payload.data_addr)
+      s.dma_wr_count = int(payload.data.payload)
+    elif cmd == CMD_DMA_STORE_DATA:
+      # The words beyond the length are dropped, same as the RTL.
+      if s.dma_wr_count > 0:
+        s.store(s.dma_wr_addr,
+                (int(payload.data.payload), int(payload.data.predicate)))
+        s.dma_wr_addr += 1
+        s.dma_wr_count -= 1
+    elif cmd == CMD_DMA_LOAD_REQUEST:
+      base = int(payload.data_addr)
+      for i in range(int(payload.data.payload)):
+        s._send_load_response((base + i) & s.addr_mask)
+    elif cmd == CMD_READ_MEM_STATS:
+      # The crossbars are not modeled, same as the RTL without has_stats.
+      s.send_to_cpu.append(s.IntraCgraPktType(
+          0, s.num_tiles, s.cgra_id, s.cgra_id,
+          payload = s.CgraPayloadType(CMD_LOAD_RESPONSE, s.DataType(0, 1),
+                                      int(payload.data_addr), 0, 0)))
+    elif int(pkt.dst_group) == TILE_GROUP_UNICAST:
+      s._recv_tile_cmd(s.tiles[int(pkt.dst)], payload, cmd)
+    else:
+      # Multicast towards the tiles of the group.
+      group = int(pkt.dst_group)
+      for tile in s.tiles:
+        if group == TILE_GROUP_ALL or (tile.groups >> group) & 1:
+          s._recv_tile_cmd(tile, payload, cmd)
+
+  def _send_load_response(s, addr):
+    payload, predicate = s.load(addr)
+    s.send_to_cpu.append(s.IntraCgraPktType(
+        0, s.num_tiles, s.cgra_id, s.cgra_id,
+        payload = s.CgraPayloadType(CMD_LOAD_RESPONSE,
+                                    s.DataType(payload, predicate),
+                                    addr, 0, 0)))
+
+  def _recv_tile_cmd(s, tile, payload, cmd):
+    data = int(payload.data.payload)
+    addr = int(payload.ctrl_addr) % s.ctrl_mem_size
+    kernel = int(payload.data_addr) % s.num_resident_kernels
+    if cmd == CMD_CONST:
+      tile.consts.append((data, int(payload.data.predicate)))
+    elif cmd == CMD_CONFIG:
+      tile.ctrl[addr] = _Ctrl(payload.ctrl, s.num_tile_inports,
+                              s.num_fu_outports)
+    elif cmd == CMD_CONFIG_DELTA:
+      for i, ctrl in enumerate(s.ctrl_delta.decode(payload.ctrl, data)):
+        tile.ctrl[(addr + i) % s.ctrl_mem_size] = \
+            _Ctrl(ctrl, s.num_tile_inports, s.num_fu_outports)
+    elif cmd == CMD_CONFIG_SHADOW:
+      tile.shadow_ctrl[addr] = _Ctrl(payload.ctrl, s.num_tile_inports,
+                                     s.num_fu_outports)
+    elif cmd == CMD_CONFIG_PROLOGUE_FU:
+      tile.prologue_fu[addr] = data
+      tile.prologue_fu_init[addr] = data
+    elif cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR:
+      inport = int(payload.ctrl.routing_xbar_outport[0]) % s.num_tile_inports
+      tile.prologue_routing[addr][inport] = data
+    elif cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR:
+      outport = int(payload.ctrl.fu_xbar_outport[0]) % s.num_fu_outports
+      tile.prologue_fu_xbar[addr][outport] = data
+    elif cmd == CMD_CONFIG_TOTAL_CTRL_COUNT:
+      tile.kernels[kernel][2] = data
+      if kernel == tile.active_kernel:
+        tile.total_steps = data
+    elif cmd == CMD_CONFIG_COUNT_PER_ITER:
+      tile.kernels[kernel][1] = data
+      if kernel == tile.active_kernel:
+        tile.count_per_iter = data
+    elif cmd == CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT:
+      tile.shadow_total_steps = data
+    elif cmd == CMD_CONFIG_SHADOW_COUNT_PER_ITER:
+      tile.shadow_count_per_iter = data
+    elif cmd == CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND:
+      tile.shadow_lower = data % s.ctrl_mem_size
+    elif cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU:
+      tile.shadow_prologue_fu_init[addr] = data
+    elif cmd == CMD_CONFIG_SHADOW_PROLOGUE_ROUTING_CROSSBAR:
+      inport = int(payload.ctrl.routing_xbar_outport[0]) % s.num_tile_inports
+      tile.shadow_prologue_routing[addr][inport] = data
+    elif cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU_CROSSBAR:
+      outport = int(payload.ctrl.fu_xbar_outport[0]) % s.num_fu_outports
+      tile.shadow_prologue_fu_xbar[addr][outport] = data
+    elif cmd == CMD_SWAP_CTRL_BANK:
+      tile.ctrl, tile.shadow_ctrl = tile.shadow_ctrl, tile.ctrl
+      tile.lower, tile.shadow_lower = tile.shadow_lower, tile.lower
+      tile.count_per_iter, tile.shadow_count_per_iter = \
+          tile.shadow_count_per_iter, tile.count_per_iter
+      tile.total_steps, tile.shadow_total_steps = \
+          tile.shadow_total_steps, tile.total_steps
+      tile.prologue_fu_init, tile.shadow_prologue_fu_init = \
+          tile.shadow_prologue_fu_init, tile.prologue_fu_init
+      tile.prologue_routing, tile.shadow_prologue_routing = \
+          tile.shadow_prologue_routing, tile.prologue_routing
+      tile.prologue_fu_xbar, tile.shadow_prologue_fu_xbar = \
+          tile.shadow_prologue_fu_xbar, tile.prologue_fu_xbar
+      tile.save_kernel()
+      tile.raddr = tile.lower
+      tile.times = 0
+      tile.restore_prologue()
+      tile.started = True
+      tile.sent_complete = False
+    elif cmd == CMD_CONFIG_CTRL_LOWER_BOUND:
+      tile.kernels[kernel][0] = data % s.ctrl_mem_size
+      if kernel == tile.active_kernel:
+        tile.lower = data % s.ctrl_mem_size
+        tile.raddr = tile.lower
+    elif cmd == CMD_CONFIG_TILE_GROUP:
+      tile.groups = data & ((1 << NUM_TILE_GROUPS) - 1)
+    elif cmd == CMD_LAUNCH:
+      # A single kernel that is still running carries on (see
+      # CtrlMemDynamicRTL), e.g., when it runs forever.
+      if s.num_resident_kernels == 1 and tile.started and \
+         not tile.sent_complete:
+        return
+      # Starts over the kernel, with its prologue counts restored.
+      tile.active_kernel = kernel
+      tile.lower, tile.count_per_iter, tile.total_steps = tile.kernels[kernel]
+      tile.raddr = tile.lower
+      tile.times = 0
+      tile.restore_prologue()
+      tile.started = True
+      tile.sent_complete = False
+    elif cmd == CMD_RESUME:
+      tile.started = True
+      tile.sent_complete = False
+    elif cmd == CMD_TERMINATE:
+      tile.started = False
+      tile.times = 0
+    elif cmd == CMD_READ_PERF_COUNTERS:
+      # The cycles are not modeled, same as the RTL without
+      # has_perf_counters.
+      s.send_to_cpu.append(s.IntraCgraPktType(
+          tile.tile_id, s.num_tiles, s.cgra_id, s.cgra_id,
+          payload = s.CgraPayloadType(CMD_LOAD_RESPONSE, s.DataType(0, 1),
+                                      data & s.addr_mask, 0, 0)))
+    # The other commands (e.g., CMD_PAUSE) do not affect the functional
+    # behavior.
+
+  #-----------------------------------------------------------------------
+  # Ctrl step of a tile
+  #-----------------------------------------------------------------------
+
+  def _pop_const(s, tile):
+    if tile.const_rd < len(tile.consts) - 1:
+      tile.const_rd += 1
+    else:
+      tile.const_rd = 0
+
+  # Performs the FU operation. Returns None if the operation cannot be
+  # performed yet, otherwise (outputs, pop_const, mem_write, to_ctrl_mem).
+  def _execute_fu(s, tile, ctrl, operation, operands):
+    if ctrl.vector_factor_power != 0 or operation not in _SUPPORTED_OPTS:
+      raise ValueError(
+          f"CgraExecutorFL does not support {s._describe(ctrl, operation)} "
+          f"on tile {tile.tile_id}, see unsupported_operations()")
+    mask = s.data_mask
+    if operation == _OPT_NAH:
+      return [], False, None, None
+
+    in0 = operands[ctrl.fu_in[0]]
+    in1 = operands[ctrl.fu_in[1]]
+    const = tile.consts[tile.const_rd] if tile.consts else None
+
+    if operation in _BINARY_OPTS:
+      if in0 is None or in1 is None:
+        return None
+      payload = _BINARY_OPTS[operation](in0[0], in1[0], mask) & mask
+      return [(payload, in0[1] & in1[1])], False, None, None
+
+    if operation in _UNARY_OPTS:
+      if in0 is None:
+        return None
+      return [(_UNARY_OPTS[operation](in0[0], mask) & mask, in0[1])], \
+             False, None, None
+
+    if operation == _OPT_ADD_CONST or operation == _OPT_SUB_CONST or \
+       operation == _OPT_MUL_CONST:
+      if in0 is None or const is None:
+        return None
+      if operation == _OPT_ADD_CONST:
+        return [((in0[0] + const[0]) & mask, in0[1] & const[1])], \
+               True, None, None
+      if operation == _OPT_SUB_CONST:
+        return [((in0[0] - const[0]) & mask, in0[1] & const[1])], \
+               False, None, None
+      return [((in0[0] * const[0]) & mask, in0[1])], True, None, None
+
+    if operation == _OPT_DIV_CONST:
+      if in0 is None or const is None:
+        return None
+      return [((in0[0] // const[0]) & mask, in0[1])], True, None, None
+
+    if operation in _SEQ_COMBO_OPTS or operation in _THREE_COMBO_OPTS or \
+       operation == _OPT_MUL_CONST_ADD or \
+       operation == _OPT_INC_NE_CONST_NOT_GRT:
+      return s._execute_combo(operation, operands, const)
+
+    if operation == _OPT_EQ_CONST or operation == _OPT_NE_CONST:
+      if in0 is None or const is None:
+        return None
+      result = (in0[0] == const[0]) == (operation == _OPT_EQ_CONST)
+      return [(int(result), in0[1])], True, None, None
+
+    if operation == _OPT_CONST:
+      if const is None:
+        return None
+      return [const], True, None, None
+
+    if operation == _OPT_PHI:
+      if in0 is None or in1 is None:
+        return None
+      if in0[1]:
+        return [(in0[0], 1)], False, None, None
+      if in1[1]:
+        return [(in1[0], 1)], False, None, None
+      return [(in0[0], 0)], False, None, None
+
+    if operation == _OPT_PHI_CONST:
+      if tile.phi_first:
+        if const is None:
+          return None
+        return [const], True, None, None
+      if in0 is None:
+        return None
+      return [in0], const is not None, None, None
+
+    if operation == _OPT_GRT_PRED:
+      if in0 is None or in1 is None:
+        return None
+      return [(in0[0], in0[1] & in1[1] if in1[0] != 0 else 0)], \
+             False, None, None
+
+    if operation == _OPT_GRT_ALWAYS:
+      if in0 is None:
+        return None
+      return [(in0[0], 1)], False, None, None
+
+    if operation == _OPT_GRT_ONCE:
+      if in0 is None:
+        return None
+      return [(in0[0], int(not tile.already_grt_once))], False, None, None
+
+    if operation == _OPT_SEL:
+      in2 = operands[ctrl.fu_in[2]]
+      if in0 is None or in1 is None or in2 is None:
+        return None
+      picked = in1 if in0[0] == 1 else in2
+      return [(picked[0], in0[1] & in1[1] & in2[1])], False, None, None
+
+    if operation == _OPT_RET:
+      if in0 is None:
+        return None
+      if not tile.already_ret and in0[1]:
+        return [], False, None, in0
+      return [], False, None, None
+
+    # OPT_LD, OPT_LD_CONST, OPT_ADD_CONST_LD, OPT_STR or OPT_STR_CONST.
+    return s._execute_mem(tile, ctrl, operation, operands, in0, in1, const)
+
+  # Performs a fused operation by chaining the single FU operations like
+  # the combos do. The combos are wired to fixed FU inports, i.e., fu_in
+  # of the ctrl signal is ignored.
+  def _execute_combo(s, operation, operands, const):
+    mask = s.data_mask
+    chain = lambda opt, a, b: _BINARY_OPTS[opt](a, b, mask) & mask
+
+    if operation == _OPT_INC_NE_CONST_NOT_GRT:
+      # Inc -> NeConst -> Not (outport 0), and Inc granted by the NeConst
+      # (outport 1), see FourIncCmpNotGrantRTL.
+      in0 = operands[0]
+      if in0 is None or const is None:
+        return None
+      inc = (in0[0] + 1) & mask
+      ne = int(inc != const[0])
+      return [(int(ne == 0), in0[1]), (inc, in0[1] if ne else 0)], \
+             True, None, None
+
+    if operation in _THREE_COMBO_OPTS:
+      if any(operands[i] is None for i in range(4)):
+        return None
+      opt0, opt1, opt2 = _THREE_COMBO_OPTS[operation]
+      payload = chain(opt2, chain(opt0, operands[0][0], operands[1][0]),
+                      chain(opt1, operands[2][0], operands[3][0]))
+      predicate = operands[0][1] & operands[1][1] & \
+                  operands[2][1] & operands[3][1]
+      # Both outports carry the result, see ThreeCombo.
+      return [(payload, predicate), (payload, predicate)], False, None, None
+
+    in0, in1, in2 = operands[0], operands[1], operands[2]
+    if operation == _OPT_MUL_CONST_ADD:
+      if in0 is None or in2 is None or const is None:
+        return None
+      payload = chain(int(OPT_ADD), (in0[0] * const[0]) & mask, in2[0])
+      return [(payload, in0[1] & in2[1])], True, None, None
+
+    if in0 is None or in1 is None or in2 is None:
+      return None
+    opt0, opt1 = _SEQ_COMBO_OPTS[operation]
+    payload = chain(opt1, chain(opt0, in0[0], in1[0]), in2[0])
+    return [(payload, in0[1] & in1[1] & in2[1])], False, None, None
+
+  def _execute_mem(s, tile, ctrl, operation, operands, in0, in1, const):
+    # Tiles without memory port stall on memory accesses, like the RTL.
+    if not s.has_mem_port[tile.tile_id]:
+      return None
+
+    if operation == _OPT_LD:
+      if in0 is None:
+        return None
+      if not in0[1]:
+        return [(0, 0)], False, None, None
+      return [s.load(in0[0])], False, None, None
+
+    if operation == _OPT_ADD_CONST_LD:
+      if in0 is None or const is None:
+        return None
+      if not in0[1]:
+        return [(0, 0)], True, None, None
+      return [s.load(in0[0] + const[0])], True, None, None
+
+    if operation == _OPT_LD_CONST:
+      if const is None:
+        return None
+      payload, predicate = s.load(const[0])
+      return [(payload, predicate & const[1])], True, None, None
+
+    if operation == _OPT_STR:
+      if in0 is None or in1 is None:
+        return None
+      # The address always comes from the first FU inport.
+      addr = operands[0][0] if operands[0] is not None else 0
+      return [], False, (addr, (in1[0], in0[1] & in1[1])), None
+
+    # OPT_STR_CONST.
+    if in0 is None or const is None:
+      return None
+    if in0[1] & const[1]:
+      return [], True, (const[0], (in0[0], 1)), None
+    return [], True, None, None
+
+  # Checks whether the missing inputs of a crossbar can be skipped thanks
+  # to the prologue counts of the current ctrl address.
+  def _prologue_allows(s, counts, dones, inports, present):
+    for inport in inports:
+      if not present(inport) and dones[inport] >= counts[inport]:
+        return False
+    return True
+
+  def _consume_prologue(s, counts, dones, inports):
+    for inport in set(inports):
+      if dones[inport] < counts[inport]:
+        dones[inport] += 1
+
+  # Tries to complete the current ctrl step of the tile. The data sent to
+  # the other tiles are appended into `outgoing`, so that they are only
+  # visible in the next round. Returns whether the tile made progress.
+  def _step(s, tile, outgoing):
+    if not tile.started or tile.halted():
+      return False
+    addr = tile.raddr
+    ctrl = tile.ctrl[addr]
+    if ctrl.operation == _OPT_START:
+      return False
+
+    # Routing crossbar.
+    inports = tile.inports
+    routing_inports = [inport for _, inport in ctrl.routing]
+    routing_fired = all(inports[inport] for inport in routing_inports)
+    if not routing_fired and \
+       not s._prologue_allows(tile.prologue_routing[addr],
+                              tile.prologue_routing_done[addr],
+                              routing_inports,
+                              lambda inport: inports[inport]):
+      return False
+    routed = {}
+    if routing_fired:
+      for outport, inport in ctrl.routing:
+        routed[outport] = inports[inport][0]
+
+    # Register cluster.
+    num_tile_outports = s.num_tile_outports
+    operands = [None] * s.num_fu_inports
+    for i in range(s.num_fu_inports):
+      value = routed.get(num_tile_outports + i)
+      if value is None and ctrl.read_reg_from[i]:
+        value = tile.regs[i][ctrl.read_reg_idx[i]]
+      operands[i] = value
+
+    # FU.
+    operation = _OPT_NAH if tile.prologue_fu[addr] != 0 else ctrl.operation
+    result = s._execute_fu(tile, ctrl, operation, operands)
+    if result is None:
+      return False
+    fu_outs, pop_const, mem_write, to_ctrl_mem = result
+
+    # FU crossbar.
+    fu_xbar_inports = [fu_outport for _, fu_outport in ctrl.fu_xbar]
+    present = lambda fu_outport: fu_outport < len(fu_outs)
+    fu_xbar_fired = all(present(x) for x in fu_xbar_inports)
+    if not fu_xbar_fired and \
+       not s._prologue_allows(tile.prologue_fu_xbar[addr],
+                              tile.prologue_fu_xbar_done[addr],
+                              fu_xbar_inports, present):
+      return False
+    fu_routed = {}
+    if fu_xbar_fired:
+      for outport, fu_outport in ctrl.fu_xbar:
+        fu_routed[outport] = fu_outs[fu_outport]
+
+    # Commits the ctrl step.
+    if routing_fired:
+      for inport in set(routing_inports):
+        inports[inport].popleft()
+    s._consume_prologue(tile.prologue_routing[addr],
+                        tile.prologue_routing_done[addr], routing_inports)
+    s._consume_prologue(tile.prologue_fu_xbar[addr],
+                        tile.prologue_fu_xbar_done[addr], fu_xbar_inports)
+
+    # Tile outports (the routing and FU crossbars are OR-ed).
+    neighbors = s.neighbors[tile.tile_id]
+    for outport in range(num_tile_outports):
+      value = routed.get(outport)
+      fu_value = fu_routed.get(outport)
+      if value is None:
+        value = fu_value
+      elif fu_value is not None:
+        value = (value[0] | fu_value[0], value[1] | fu_value[1])
+      if value is not None and neighbors[outport] is not None:
+        outgoing.append((neighbors[outport], value))
+
+    # Register writes.
+    for i in range(s.num_fu_inports):
+      write_reg_from = ctrl.write_reg_from[i]
+      value = None
+      if write_reg_from == _WRITE_FROM_ROUTING_XBAR:
+        value = routed.get(num_tile_outports + i)
+      elif write_reg_from == _WRITE_FROM_FU_XBAR:
+        value = fu_routed.get(num_tile_outports + i)
+      if value is not None:
+        tile.regs[i][ctrl.write_reg_idx[i]] = value
+
+    if pop_const:
+      s._pop_const(tile)
+    if mem_write is not None:
+      s.store(*mem_write)
+    if to_ctrl_mem is not None:
+      tile.already_ret = True
+      tile.to_ctrl_mem.append(s.CgraPayloadType(
+          CMD_COMPLETE, s.DataType(*to_ctrl_mem), 0, 0, 0))
+    if operation == _OPT_PHI_CONST:
+      tile.phi_first = False
+    elif operation == _OPT_GRT_ONCE:
+      tile.already_grt_once = True
+
+    # Ctrl memory.
+    if tile.total_steps == 0 or tile.times < tile.total_steps:
+      tile.times += 1
+    if addr == tile.lower + tile.count_per_iter - 1:
+      tile.raddr = tile.lower
+    else:
+      tile.raddr = (addr + 1) % s.ctrl_mem_size
+    if tile.prologue_fu[addr] > 0:
+      tile.prologue_fu[addr] -= 1
+    s.num_ctrl_steps += 1
+    return True
+
+  # Sends the packets of the ctrl memory (i.e., RET results and COMPLETE)
+  # towards the CPU.
+  def _send_from_ctrl_mem(s, tile):
+    if not tile.started or tile.sent_complete:
+      return False
+    if tile.to_ctrl_mem:
+      payload = tile.to_ctrl_mem.popleft()
+    elif tile.total_steps > 0 and tile.times == tile.total_steps:
+      payload = s.CgraPayloadType(CMD_COMPLETE, 0, 0, 0, 0)
+    else:
+      return False
+    if payload.cmd == CMD_COMPLETE:
+      tile.sent_complete = True
+    s.send_to_cpu.append(s.IntraCgraPktType(tile.tile_id, s.num_tiles,
+                                            s.cgra_id, 0, payload = payload))
+    return True
+
+  #-----------------------------------------------------------------------
+  # Execution
+  #-----------------------------------------------------------------------
+
+  # Performs one round: delivers at most one CPU packet, then lets each
+  # tile complete at most one ctrl step. Returns whether anything happened.
+  def tick(s, cpu_pkt = None):
+    progressed = cpu_pkt is not None
+    if cpu_pkt is not None:
+      s.recv_from_cpu(cpu_pkt)
+    outgoing = []
+    for tile in s.tiles:
+      progressed |= s._step(tile, outgoing)
+    for tile in s.tiles:
+      progressed |= s._send_from_ctrl_mem(tile)
+    for (dst, dst_port), value in outgoing:
+      s.tiles[dst].inports[dst_port].append(value)
+    s.num_rounds += 1
+    return progressed
+
+  # Feeds the packets like the test harness of CgraRTL does: the query
+  # packets (e.g., CMD_LOAD_REQUEST) are only issued once all the ctrl
+  # packets are sent and `num_complete_before_query` CMD_COMPLETE are
+  # received. Runs until `num_expected_pkts` packets are sent to the CPU,
+  # or nothing can make progress anymore. Returns the packets sent to the
+  # CPU.
+  def execute(s, src_ctrl_pkts, src_query_pkts = [],
+              num_complete_before_query = 0, num_expected_pkts = None,
+              max_rounds = 1000000):
+    ctrl_pkts = deque(src_ctrl_pkts)
+    query_pkts = deque(src_query_pkts)
+    while s.num_rounds < max_rounds:
+      if num_expected_pkts is not None and \
+         len(s.send_to_cpu) >= num_expected_pkts:
+        break
+      cpu_pkt = None
+      if ctrl_pkts:
+        cpu_pkt = ctrl_pkts.popleft()
+      elif query_pkts and \
+           s.num_complete_received() >= num_complete_before_query:
+        cpu_pkt = query_pkts.popleft()
+      # Stops once the CGRA is stuck (or done) without pending packets.
+      if not s.tick(cpu_pkt):
+        break
+    return s.send_to_cpu
+
+  # Returns the (sorted) operations configured by the packets that cannot
+  # be executed, so that the callers can skip such kernels up front rather
+  # than failing in the middle of the execution.
+  def unsupported_operations(s, src_ctrl_pkts):
+    unsupported = set()
+    for pkt in src_ctrl_pkts:
+      payload = pkt.payload
+      cmd = int(payload.cmd)
+      if cmd == CMD_CONFIG or cmd == CMD_CONFIG_SHADOW:
+        ctrls = [payload.ctrl]
+      elif cmd == CMD_CONFIG_DELTA:
+        ctrls = s.ctrl_delta.decode(payload.ctrl,
+                                    int(payload.data.payload))
+      else:
+        continue
+      for ctrl in ctrls:
+        operation = int(ctrl.operation)
+        if int(ctrl.vector_factor_power) != 0 or \
+           operation not in _SUPPORTED_OPTS:
+          unsupported.add(s._describe(ctrl, operation))
+    return sorted(unsupported)
+
+  def _describe(s, ctrl, operation):
+    if int(ctrl.vector_factor_power) != 0:
+      return f"{_opt_symbol(operation)} (vector_factor_power = " \
+             f"{int(ctrl.vector_factor_power)})"
+    return _opt_symbol(operation)
+
+  def num_complete_received(s):
+    return sum(1 for pkt in s.send_to_cpu if pkt.payload.cmd == CMD_COMPLETE)
+
+  def line_trace(s):
+    return " | ".join(f"{tile.tile_id}@{tile.raddr}x{tile.times}"
+                      for tile in s.tiles)
+
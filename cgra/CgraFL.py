@@ -2,7 +2,32 @@
 =========================================================================
 CgraFL.py
 =========================================================================
-CgraFL -- running DFG nodes one by one.
+CgraFL -- running DFG nodes in a compiled and batched manner.
+
+The DFG (see lib/util/dfg_helper.py) is compiled once by CompiledDFG into
+an index-based schedule: each node refers to its consts and successors by
+position rather than by id, and the input slot that each output value is
+delivered to is resolved ahead of time. The nodes are then evaluated over
+NumPy vectors, so a batch of independent input sets (i.e., different
+src_const and data_spm contents) runs in a single pass over the schedule.
+
+Predicates follow the FUs rather than the former node-by-node CgraFL,
+which always produced true predicates and only let OPT_BRH (no longer
+part of lib/opt_type.py) push a predicate to its successors:
+  - the output predicate of a node is the AND of its operand predicates
+    (the consts are always true), except for OPT_NAH (always true) and
+    OPT_PHI, OPT_GRT_PRED and OPT_GRT_ALWAYS, which behave as PhiRTL and
+    GrantRTL;
+  - a node with opt_predicate additionally ANDs the predicates of its
+    in_predicate nodes, i.e., their latest outputs, which are true until
+    those nodes first fire (e.g., earlier in the schedule than them);
+  - an input set exits once the live_out_ctrl node produces a false
+    predicate, and the nodes after it in the schedule are skipped in that
+    last iteration.
+The fused operations (e.g., OPT_MUL_ADD) chain the single operations the
+same way the combos of fu/double and fu/triple do.
+
+NumPy is only required by CgraFL, not by the rest of the repo.
 
 Author : Cheng Tan
   Date : Feb 13, 2020
@@ -11,120 +36,268 @@ Author : Cheng Tan
 from pymtl3 import *
 from ..lib.opt_type import *
 from ..lib.messages import *
+from ..lib.util.data_struct_attr import *
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+# Operations combining the first two operands, whose predicate is the AND
+# of the two operand predicates. The *_CONST variants behave the same, as
+# the consts are already part of the operands of a DFG node.
+_BINARY_OPTS = {
+  int(OPT_ADD)      : lambda a, b: a + b,
+  int(OPT_ADD_CONST): lambda a, b: a + b,
+  int(OPT_SUB)      : lambda a, b: a - b,
+  int(OPT_SUB_CONST): lambda a, b: a - b,
+  int(OPT_MUL)      : lambda a, b: a * b,
+  int(OPT_MUL_CONST): lambda a, b: a * b,
+  int(OPT_OR)       : lambda a, b: a | b,
+  int(OPT_XOR)      : lambda a, b: a ^ b,
+  int(OPT_AND)      : lambda a, b: a & b,
+  int(OPT_EQ)       : lambda a, b: a == b,
+  int(OPT_EQ_CONST) : lambda a, b: a == b,
+  int(OPT_NE)       : lambda a, b: a != b,
+  int(OPT_NE_CONST) : lambda a, b: a != b,
+  int(OPT_LT)       : lambda a, b: a < b,
+  int(OPT_LTE)      : lambda a, b: a <= b,
+  int(OPT_GT)       : lambda a, b: a > b,
+  int(OPT_GTE)      : lambda a, b: a >= b,
+}
+
+# Operations on the first operand.
+_UNARY_OPTS = {
+  int(OPT_INC)    : lambda a: a + np.uint64(1),
+  int(OPT_PAS)    : lambda a: a,
+  int(OPT_RET)    : lambda a: a,
+  int(OPT_BIT_NOT): lambda a: ~a,
+  int(OPT_NOT)    : lambda a: a == 0,
+}
+
+_OPT_NAH = int(OPT_NAH)
+_OPT_LLS = int(OPT_LLS)
+_OPT_LRS = int(OPT_LRS)
+_OPT_PHI = int(OPT_PHI)
+_OPT_PHI_CONST = int(OPT_PHI_CONST)
+_OPT_GRT_PRED = int(OPT_GRT_PRED)
+_OPT_GRT_ALWAYS = int(OPT_GRT_ALWAYS)
+_OPT_SEL = int(OPT_SEL)
+_OPT_LD = int(OPT_LD)
+_OPT_STR = int(OPT_STR)
+_OPT_START = int(OPT_START)
+
+# Fused operations of two FUs in sequence (see TwoSeqCombo), i.e.,
+# opt1(opt0(a, b), c).
+_SEQ_COMBO_OPTS = {
+  int(OPT_MUL_ADD): (int(OPT_MUL), int(OPT_ADD)),
+  int(OPT_MUL_SUB): (int(OPT_MUL), int(OPT_SUB)),
+  int(OPT_MUL_LLS): (int(OPT_MUL), _OPT_LLS),
+  int(OPT_MUL_LRS): (int(OPT_MUL), _OPT_LRS),
+}
+
+# Fused operations of three FUs (see ThreeCombo), i.e.,
+# opt2(opt0(a, b), opt1(c, d)).
+_THREE_COMBO_OPTS = {
+  int(OPT_MUL_ADD_LLS): (int(OPT_MUL), int(OPT_ADD), _OPT_LLS),
+  int(OPT_MUL_SUB_LLS): (int(OPT_MUL), int(OPT_SUB), _OPT_LLS),
+  int(OPT_MUL_SUB_LRS): (int(OPT_MUL), int(OPT_SUB), _OPT_LRS),
+}
+
+_SUPPORTED_OPTS = set(_BINARY_OPTS) | set(_UNARY_OPTS) | \
+                  set(_SEQ_COMBO_OPTS) | set(_THREE_COMBO_OPTS) | \
+                  {_OPT_START, _OPT_NAH, _OPT_LLS, _OPT_LRS, _OPT_PHI,
+                   _OPT_PHI_CONST, _OPT_GRT_PRED, _OPT_GRT_ALWAYS, _OPT_SEL,
+                   _OPT_LD, _OPT_STR}
+
+#------------------------------------------------------------------------
+# CompiledDFG
+#------------------------------------------------------------------------
+# Assuming that the elements in FuDFG are already ordered well, i.e., the
+# order of FuDFG.nodes is the schedule of each iteration, and the values
+# towards earlier nodes are consumed in the next iteration.
+
+class CompiledDFG:
+
+  def __init__(s, FuDFG, data_bitwidth = 32):
+    if np is None:
+      raise ImportError("CgraFL requires NumPy, please `pip install numpy`")
+    unsupported = [f"{OPT_SYMBOL_DICT.get(node.opt, int(node.opt))} of node "
+                   f"{node.id}" for node in FuDFG.nodes
+                   if int(node.opt) not in _SUPPORTED_OPTS]
+    if unsupported:
+      raise ValueError(f"CgraFL does not support operation "
+                       f"{', '.join(unsupported)}")
+
+    nodes = FuDFG.nodes
+    s.num_nodes = len(nodes)
+    s.node_ids = [node.id for node in nodes]
+    s.opts = [int(node.opt) for node in nodes]
+    s.const_index = [list(node.const_index) for node in nodes]
+    s.num_inputs = [node.num_input for node in nodes]
+    s.mask = np.uint64((1 << data_bitwidth) - 1)
+    s.data_bitwidth = data_bitwidth
+
+    # Resolves the (successor position, input slot) of each output value
+    # in the delivery order, the same order Node.updateInput() fills the
+    # input slots.
+    cursor = [0] * s.num_nodes
+    s.fanout = []
+    for i in range(s.num_nodes):
+      edges = []
+      for dst in FuDFG.get_successors(i):
+        edges.append((dst, cursor[dst]))
+        cursor[dst] = (cursor[dst] + 1) % max(1, s.num_inputs[dst])
+      s.fanout.append(edges)
+
+    # Positions of the nodes whose predicates gate each predicated node.
+    s.predicate_src = [[FuDFG.node_index[node_id]
+                        for node_id in node.input_predicate_node]
+                       if node.opt_predicate != 0 else []
+                       for node in nodes]
+    s.has_predicate_src = any(s.predicate_src)
+
+    s.live_out_val = [node.live_out_val != 0 for node in nodes]
+    s.live_out_ctrl = [node.live_out_ctrl != 0 for node in nodes]
+
+  # Returns the payload of a binary operation (including the shifts).
+  def _binary(s, opt, a, b):
+    if opt == _OPT_LLS or opt == _OPT_LRS:
+      shift = np.minimum(b, np.uint64(s.data_bitwidth))
+      if opt == _OPT_LLS:
+        payload = np.where(shift < s.data_bitwidth, a << shift, 0)
+      else:
+        payload = np.where(shift < s.data_bitwidth, a >> shift, 0)
+    else:
+      payload = _BINARY_OPTS[opt](a, b)
+    return payload.astype(np.uint64) & s.mask
+
+  # Evaluates a node over the batch. Returns (payload, predicate) vectors.
+  def _evaluate(s, i, operands, spm, lanes, active):
+    opt = s.opts[i]
+    payloads = [payload for payload, _ in operands]
+    predicates = [predicate for _, predicate in operands]
+    batch = len(lanes)
+
+    if opt in _BINARY_OPTS or opt == _OPT_LLS or opt == _OPT_LRS:
+      return s._binary(opt, payloads[0], payloads[1]), \
+             predicates[0] & predicates[1]
+
+    if opt in _UNARY_OPTS:
+      return _UNARY_OPTS[opt](payloads[0]).astype(np.uint64), predicates[0]
+
+    if opt in _SEQ_COMBO_OPTS:
+      opt0, opt1 = _SEQ_COMBO_OPTS[opt]
+      return s._binary(opt1, s._binary(opt0, payloads[0], payloads[1]),
+                       payloads[2]), \
+             predicates[0] & predicates[1] & predicates[2]
+
+    if opt in _THREE_COMBO_OPTS:
+      opt0, opt1, opt2 = _THREE_COMBO_OPTS[opt]
+      return s._binary(opt2, s._binary(opt0, payloads[0], payloads[1]),
+                       s._binary(opt1, payloads[2], payloads[3])), \
+             predicates[0] & predicates[1] & predicates[2] & predicates[3]
+
+    # The value with the true predicate is picked, with the later (i.e.,
+    # loop-carried) one first, as the first operand is the initial value.
+    if opt == _OPT_PHI or opt == _OPT_PHI_CONST:
+      picked = predicates[1]
+      return np.where(picked, payloads[1], payloads[0]), \
+             predicates[0] | predicates[1]
+
+    if opt == _OPT_GRT_PRED:
+      return payloads[0], predicates[0] & predicates[1] & (payloads[1] != 0)
+
+    if opt == _OPT_GRT_ALWAYS:
+      return payloads[0], np.ones(batch, dtype = bool)
+
+    if opt == _OPT_SEL:
+      return np.where(payloads[0] == 1, payloads[1], payloads[2]), \
+             predicates[0] & predicates[1] & predicates[2]
+
+    if opt == _OPT_LD:
+      addr = (payloads[0] % np.uint64(spm.shape[1])).astype(np.intp)
+      return spm[lanes, addr], predicates[0]
+
+    if opt == _OPT_STR:
+      addr = (payloads[0] % np.uint64(spm.shape[1])).astype(np.intp)
+      commit = active & predicates[0] & predicates[1]
+      spm[lanes[commit], addr[commit]] = payloads[1][commit]
+      return payloads[1], predicates[0] & predicates[1]
+
+    # OPT_NAH or OPT_START, as the other operations are rejected by the
+    # constructor.
+    return np.zeros(batch, dtype = np.uint64), np.ones(batch, dtype = bool)
+
+  # Runs the DFG over a batch of input sets. src_const is either a list of
+  # consts (shared by all the input sets) or a 2D array with one row per
+  # input set, and so is data_spm. Each input set iterates until the
+  # live_out_ctrl node produces a false predicate (or max_iterations).
+  # Returns (live_out_payload, live_out_predicate, data_spm, iterations),
+  # each with one row per input set.
+  def run(s, src_const, data_spm, batch_size = None, max_iterations = 10000):
+    src_const = np.atleast_2d(np.asarray(src_const, dtype = np.uint64))
+    spm = np.atleast_2d(np.array(data_spm, dtype = np.uint64))
+    if batch_size is None:
+      batch_size = max(src_const.shape[0], spm.shape[0])
+    src_const = np.broadcast_to(src_const, (batch_size, src_const.shape[1]))
+    spm = np.array(np.broadcast_to(spm, (batch_size, spm.shape[1])))
+
+    lanes = np.arange(batch_size)
+    ones = np.ones(batch_size, dtype = bool)
+    in_payload = [np.zeros((n, batch_size), dtype = np.uint64)
+                  for n in s.num_inputs]
+    in_predicate = [np.zeros((n, batch_size), dtype = bool)
+                    for n in s.num_inputs]
+    # Latest output predicate of each node, only tracked if some nodes are
+    # predicated.
+    out_predicate = [ones] * s.num_nodes
+    live_out_payload = np.zeros(batch_size, dtype = np.uint64)
+    live_out_predicate = np.zeros(batch_size, dtype = bool)
+    active = np.ones(batch_size, dtype = bool)
+    iterations = np.zeros(batch_size, dtype = np.int64)
+    num_iterations = 0
+
+    while active.any() and num_iterations < max_iterations:
+      iterations += active
+      num_iterations += 1
+      for i in range(s.num_nodes):
+        # Consts go in first, then the outputs from the predecessors.
+        operands = [(src_const[:, k], ones) for k in s.const_index[i]]
+        operands += [(in_payload[i][k], in_predicate[i][k])
+                     for k in range(s.num_inputs[i])]
+        payload, predicate = s._evaluate(i, operands, spm, lanes, active)
+        payload = payload & s.mask
+        for src in s.predicate_src[i]:
+          predicate = predicate & out_predicate[src]
+        if s.has_predicate_src:
+          out_predicate[i] = np.where(active, predicate, out_predicate[i])
+
+        # Only the input sets that are still running are updated.
+        for dst, slot in s.fanout[i]:
+          in_payload[dst][slot] = np.where(active, payload,
+                                           in_payload[dst][slot])
+          in_predicate[dst][slot] = np.where(active, predicate,
+                                             in_predicate[dst][slot])
+        if s.live_out_val[i]:
+          live_out_payload = np.where(active, payload, live_out_payload)
+          live_out_predicate = np.where(active, predicate, live_out_predicate)
+        # The input sets whose exit condition becomes false stop right away.
+        if s.live_out_ctrl[i]:
+          active = active & predicate
+
+    return live_out_payload, live_out_predicate, spm, iterations
 
 #------------------------------------------------------------------------
-# Assuming that the elements in FuDFG are already ordered well.
+# CgraFL
 #------------------------------------------------------------------------
-def CgraFL( FuDFG, DataType, CtrlType, src_const ):#, data_spm ):
-
-  live_out_val  = DataType( 0, 0 )
-  live_out_ctrl = DataType( 0, 0 )
-
-  data_spm = FuDFG.data_spm
-  print("data SPM: ", data_spm)
-
-  while live_out_ctrl.predicate == Bits1( 0 ):
-    for node in FuDFG.nodes:
-      current_input = []
-      current_input_predicate = 0
-#      print("id: ", node.id, " node.num_const: ", node.num_const, "; node.num_input: ", node.num_input)
-      # Assume const goes in first, then the output from predecessor.
-      if node.num_const != 0:
-        for i in range( node.num_const ):
-          current_input.append( src_const[node.const_index[i]] );
-      if node.num_input != 0:
-        for value in node.input_value:
-          current_input.append(value);
- 
-      result  = [ DataType( 0, 1 ) for _ in node.num_output ]
-      if node.opt_predicate == 1:
-        current_input_predicate = node.input_predicate
-        #current_input_predicate = node.input_predicate
-      print( "id: ", node.id, ", current_input: ", current_input, ", current_input_predicate: ", current_input_predicate )
-      if node.opt == OPT_ADD:
-        result[0].payload = current_input[0].payload + current_input[1].payload
-      elif node.opt == OPT_SUB:
-        result[0].payload = current_input[0].payload - current_input[1].payload
-      elif node.opt == OPT_MUL:
-        result[0].payload = current_input[0].payload * current_input[1].payload
-      elif node.opt == OPT_PHI:
-        if current_input[1].predicate == Bits1( 1 ):
-          result[0].payload = current_input[1].payload
-        else:
-          result[0].payload = current_input[0].payload
-      elif node.opt == OPT_LD:
-        result[0].payload = data_spm[current_input[0].payload]
-      elif node.opt == OPT_EQ:
-#        if current_input[0].payload == current_input[1].payload:
-        # FIXME: need to specify the constant input for each node
-        if current_input[0].payload == current_input[1].payload:
-          result[0] = DataType( 1, 1)
-        else:
-          result[0] = DataType( 0, 1)
-      elif node.opt == OPT_BRH:
-        # Br node does not output any meaningful value but a predication
-        result[0].payload  = 0
-        # Cmp result goes into [0]
-        if current_input[0].payload == 0:
-          result[0].predicate = Bits1( 1 )
-          for j in range( node.num_output[0] ):
-            FuDFG.get_node(node.output_node[0][j]).updatePredicate( 1 )
-          for j in range( node.num_output[1] ):
-            FuDFG.get_node(node.output_node[1][j]).updatePredicate( 0 )
-        else:
-          result[0].predicate  = Bits1( 0 )
-          for j in range( node.num_output[0] ):
-            FuDFG.get_node(node.output_node[0][j]).updatePredicate( 0 )
-          for j in range( node.num_output[1] ):
-            FuDFG.get_node(node.output_node[1][j]).updatePredicate( 1 )
-
-        # if len(node.num_output) > 1:
-        #   result[1] = DataType( 0, 0 )
-        #   result[1].payload = 0
-        #   if current_input[0].payload == 0:
-        #     result[1].predicate = Bits1( 0 )
-        #   else:
-        #     result[1].predicate = Bits1( 1 )
-
-      # Currently, treat BRH node as the exit node that could contain live_out_ctrl
-      if node.live_out_ctrl != 0:
-        if node.opt_predicate == 1:
-          for i in range(len( node.num_output )):
-            result[i].predicate = result[i].predicate and current_input_predicate
-        # case of 'FALSE' ([0]->'FALSE' path; [1]->'TRUE' path)
-        if result[0].predicate == 1:
-          live_out_ctrl.predicate = Bits1( 0 )
-        # Terminate the execution when BRANCH leads to a 'TRUE'
-        else:
-          live_out_ctrl.predicate = Bits1( 1 )
-        if node.opt_predicate == 1:
-          live_out_ctrl.predicate = live_out_ctrl.predicate and current_input_predicate
-  
-      # We allow single live out value in the DFG.
-      if node.live_out_val != 0:
-        live_out_val.payload   = result[0].payload
-        live_out_val.predicate = result[0].predicate
-
-      if node.opt_predicate == 1:
-        for i in range(len( node.num_output )):
-          result[i].predicate = result[i].predicate and current_input_predicate
-
-      # BRH only updates predicate rather than values.
-      if node.opt != OPT_BRH:
-        for i in range( len( node.num_output ) ):
-  #        print( "see node.num_output[i]: ", node.num_output[i] )
-          for j in range( node.num_output[i] ):
-            node.updateOutput( i, j, result[i] )
-            FuDFG.get_node(node.output_node[i][j]).updateInput( result[i] )
-
-      print( "id: ", node.id, " current output: ", result )
-      if live_out_ctrl.predicate == Bits1( 1 ):
-        break
-  
-
-    print( "[ current iteration live_out_val: ", live_out_val, " ]" )
-    print( "--------------------------------------" )
-  
-  print( "final live_out: ", live_out_val )
-  return live_out_val.payload, data_spm
+# Runs a single input set. Returns the live out payload and the data SPM.
+
+def CgraFL(FuDFG, DataType, CtrlType, src_const):
+  data_bitwidth = DataType.get_field_type(kAttrPayload).nbits
+  compiled = CompiledDFG(FuDFG, data_bitwidth)
+  live_out_payload, _, data_spm, _ = \
+      compiled.run([int(const.payload) for const in src_const],
+                   FuDFG.data_spm)
+  return int(live_out_payload[0]), [int(x) for x in data_spm[0]]
 
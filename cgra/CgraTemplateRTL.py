@@ -13,10 +13,10 @@ from ..lib.basic.val_rdy.queues import BypassQueueRTL
 from ..lib.opt_type import *
 from ..lib.util.common import *
 from ..mem.data.DataMemControllerRTL import DataMemControllerRTL
-from ..noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_ring_pos
-from ..noc.PyOCN.pymtl3_net.ringnet.RingNetworkRTL import RingNetworkRTL
+from ..noc.CtrlNetworkRTL import CtrlNetworkRTL
 from ..tile.TileRTL import TileRTL
 from ..lib.util.data_struct_attr import *
+from ..lib.util.line_trace_helper import *
 from ..lib.messages import *
 
 
@@ -32,7 +32,16 @@ class CgraTemplateRTL(Component):
                 total_steps, mem_access_is_combinational,
                 FunctionUnit, FuList, TileList, LinkList,
                 dataSPM, controller2addr_map, idTo2d_map,
-                is_multi_cgra = True):
+                is_multi_cgra = True,
+                ctrl_network = CTRL_BIDIRECTIONAL_RING,
+                bank_mapping = BANK_MAPPING_BLOCK,
+                has_mem_stats = False,
+                has_perf_counters = True,
+                global_reduce = GLOBAL_REDUCE_CENTRALIZED,
+                noc_arbiter = NOC_ARBITER_ROUND_ROBIN,
+                has_shadow_ctrl_mem = False,
+                num_resident_kernels = 1,
+                num_ctrl_patterns = 0):
 
     DataType = CgraPayloadType.get_field_type(kAttrData)
     PredicateType = DataType.get_field_type(kAttrPredicate)
@@ -56,8 +65,6 @@ class CgraTemplateRTL(Component):
     s.num_mesh_ports = 8
     s.num_tiles = len(TileList)
     num_cgras = multi_cgra_rows * multi_cgra_columns
-    # An additional router for controller to receive CMD_COMPLETE signal from Ring to CPU.
-    CtrlRingPos = mk_ring_pos(s.num_tiles + 1)
     CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
     DataAddrType = mk_bits(clog2(data_mem_size_global))
     assert(data_mem_size_per_bank * num_banks_per_cgra <= \
@@ -86,7 +93,11 @@ class CgraTemplateRTL(Component):
                       total_steps, 4, 2, s.num_mesh_ports,
                       s.num_mesh_ports, num_cgras, s.num_tiles,
                       num_registers_per_reg_bank,
-                      FuList = FuList)
+                      FuList = FuList,
+                      has_perf_counters = has_perf_counters,
+                      has_shadow_ctrl_mem = has_shadow_ctrl_mem,
+                      num_resident_kernels = num_resident_kernels,
+                      num_ctrl_patterns = num_ctrl_patterns)
               for i in range(s.num_tiles)]
     # FIXME: Need to enrish data-SPM-related user-controlled parameters, e.g., number of banks.
     s.data_mem = DataMemControllerRTL(NocPktType,
@@ -99,13 +110,22 @@ class CgraTemplateRTL(Component):
                                       multi_cgra_columns,
                                       s.num_tiles,
                                       mem_access_is_combinational,
-                                      idTo2d_map)
+                                      idTo2d_map,
+                                      bank_mapping = bank_mapping,
+                                      has_stats = has_mem_stats)
     s.controller = ControllerRTL(NocPktType,
                                  multi_cgra_rows, multi_cgra_columns,
-                                 s.num_tiles, controller2addr_map, idTo2d_map)
+                                 s.num_tiles, controller2addr_map, idTo2d_map,
+                                 global_reduce = global_reduce,
+                                 noc_arbiter = noc_arbiter)
     # An additional router for controller to receive CMD_COMPLETE signal from Ring to CPU.
-    # The last argument of 1 is for the latency per hop.
-    s.ctrl_ring = RingNetworkRTL(CtrlPktType, CtrlRingPos, s.num_tiles + 1, 1)
+    # The ctrl network also multicasts the packets towards tile groups,
+    # and its topology is selected by ctrl_network (see CtrlNetworkRTL).
+    # The columns are derived from TileList, as per_cgra_columns is
+    # optional for the single CGRA.
+    s.ctrl_network = CtrlNetworkRTL(CtrlPktType, s.num_tiles,
+                                    max(tile.dimX for tile in TileList) + 1,
+                                    ctrl_network)
 
     s.cgra_id = InPort(CgraIdType)
 
@@ -147,14 +167,14 @@ class CgraTemplateRTL(Component):
       s.tile[i].cgra_id //= s.cgra_id
       s.tile[i].tile_id //= i
 
-    # Connects ring with each control memory.
+    # Connects ctrl network with each control memory.
     for i in range(s.num_tiles):
-      s.ctrl_ring.send[i] //= s.tile[i].recv_from_controller_pkt
-    s.ctrl_ring.send[s.num_tiles] //= s.controller.recv_from_ctrl_ring_pkt
+      s.ctrl_network.send[i] //= s.tile[i].recv_from_controller_pkt
+    s.ctrl_network.send[s.num_tiles] //= s.controller.recv_from_ctrl_ring_pkt
 
     for i in range(s.num_tiles):
-      s.ctrl_ring.recv[i] //= s.tile[i].send_to_controller_pkt
-    s.ctrl_ring.recv[s.num_tiles] //= s.controller.send_to_ctrl_ring_pkt
+      s.ctrl_network.recv[i] //= s.tile[i].send_to_controller_pkt
+    s.ctrl_network.recv[s.num_tiles] //= s.controller.send_to_ctrl_ring_pkt
 
     for link in LinkList:
 
@@ -224,6 +244,11 @@ class CgraTemplateRTL(Component):
 
   # Line trace
   def line_trace(s):
+    if trace_is_off():
+      return ""
+    if trace_is_summary():
+      res = " | ".join([f"t{i}: {x.line_trace()}" for (i,x) in enumerate(s.tile)])
+      return f"{res} || data_mem: {s.data_mem.line_trace()}"
     res = "||\n".join([(("[tile"+str(i)+"]: ") + x.line_trace() + x.ctrl_mem.line_trace())
                        for (i,x) in enumerate(s.tile)])
     res += "\n :: [" + s.data_mem.line_trace() + "]    \n"
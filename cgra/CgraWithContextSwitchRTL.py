@@ -17,6 +17,7 @@ from ..noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_ring_pos
 from ..noc.PyOCN.pymtl3_net.ringnet.RingNetworkRTL import RingNetworkRTL
 from ..tile.TileWithContextSwitchRTL import TileWithContextSwitchRTL
 from ..lib.util.data_struct_attr import *
+from ..lib.util.line_trace_helper import *
 from ..lib.messages import *
 
 
@@ -254,6 +255,11 @@ class CgraWithContextSwitchRTL(Component):
 
   # Line trace
   def line_trace(s):
+    if trace_is_off():
+      return ""
+    if trace_is_summary():
+      res = " | ".join([f"t{i}: {x.line_trace()}" for (i,x) in enumerate(s.tile)])
+      return f"[cgra{s.cgra_id}] {res} || data_mem: {s.data_mem.line_trace()}"
     res = "||\n".join([(("\n[cgra"+str(s.cgra_id)+"_tile"+str(i)+"]: ") + x.line_trace() + x.ctrl_mem.line_trace())
                        for (i,x) in enumerate(s.tile)])
     res += "\n :: [" + s.ctrl_ring.line_trace() + "]    \n"
@@ -0,0 +1,286 @@
+"""
+==========================================================================
+CgraExecutorFL_test.py
+==========================================================================
+Test cases for the functional executor of a single CGRA, one per command
+(and per fused operation) rather than per kernel.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import pytest
+
+from pymtl3 import *
+from ..CgraExecutorFL import CgraExecutorFL
+from ...lib.cmd_type import *
+from ...lib.messages import *
+from ...lib.opt_type import *
+from ...lib.util.ctrl_delta_helper import CtrlDeltaFormat
+
+#-------------------------------------------------------------------------
+# Common configurations/setups
+#-------------------------------------------------------------------------
+
+x_tiles = 2
+y_tiles = 2
+num_tiles = x_tiles * y_tiles
+num_tile_inports = 4
+num_tile_outports = 4
+num_fu_inports = 4
+num_fu_outports = 2
+num_routing_outports = num_tile_outports + num_fu_inports
+ctrl_mem_size = 8
+data_mem_size_global = 64
+num_registers_per_reg_bank = 4
+num_cgra_columns = 1
+num_cgra_rows = 1
+
+DataType = mk_data(32, 1)
+DataAddrType = mk_bits(clog2(data_mem_size_global))
+CtrlType = mk_ctrl(num_fu_inports, num_fu_outports, num_tile_inports,
+                   num_tile_outports, num_registers_per_reg_bank)
+CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                  CtrlAddrType)
+IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns, num_cgra_rows,
+                                     num_tiles, CgraPayloadType)
+
+FuInType = mk_bits(clog2(num_fu_inports + 1))
+FuOutType = mk_bits(clog2(num_fu_outports + 1))
+RegIdxType = mk_bits(clog2(num_registers_per_reg_bank))
+
+def mk_executor(num_ctrl, total_steps, num_resident_kernels = 1):
+  return CgraExecutorFL(IntraCgraPktType, x_tiles, y_tiles, ctrl_mem_size,
+                        data_mem_size_global, num_registers_per_reg_bank,
+                        num_ctrl, total_steps,
+                        num_resident_kernels = num_resident_kernels)
+
+def mk_pkt(cmd, dst = 0, data = 0, data_addr = 0, ctrl = None,
+           ctrl_addr = 0):
+  payload = CgraPayloadType(cmd, data = DataType(data, 1),
+                            data_addr = data_addr, ctrl_addr = ctrl_addr)
+  if ctrl is not None:
+    payload.ctrl = ctrl
+  return IntraCgraPktType(0, dst, payload = payload)
+
+# Builds the ctrl signal of tile 0 that performs `operation` on the given
+# register banks (index 0 of each bank) and writes the FU outport
+# `to_reg_outport` into the register `to_reg_idx` of `to_reg_bank`.
+def mk_ctrl_signal(operation, read_banks = [], to_reg_bank = None,
+                   to_reg_idx = 0, to_reg_outport = 0, read_reg_idx = 0):
+  fu_xbar_code = [FuOutType(0) for _ in range(num_routing_outports)]
+  write_reg_from_code = [b2(0) for _ in range(num_fu_inports)]
+  write_reg_idx_code = [RegIdxType(0) for _ in range(num_fu_inports)]
+  read_reg_from_code = [b1(0) for _ in range(num_fu_inports)]
+  read_reg_idx_code = [RegIdxType(0) for _ in range(num_fu_inports)]
+  if to_reg_bank is not None:
+    fu_xbar_code[num_tile_outports + to_reg_bank] = \
+        FuOutType(to_reg_outport + 1)
+    # 2 indicates the FU xbar port.
+    write_reg_from_code[to_reg_bank] = b2(2)
+    write_reg_idx_code[to_reg_bank] = RegIdxType(to_reg_idx)
+  for bank in read_banks:
+    read_reg_from_code[bank] = b1(1)
+    read_reg_idx_code[bank] = RegIdxType(read_reg_idx)
+  return CtrlType(operation,
+                  [FuInType(x + 1) for x in range(num_fu_inports)],
+                  fu_xbar_outport = fu_xbar_code,
+                  write_reg_from = write_reg_from_code,
+                  write_reg_idx = write_reg_idx_code,
+                  read_reg_from = read_reg_from_code,
+                  read_reg_idx = read_reg_idx_code)
+
+# Two ctrl signals storing the first const into the address given by the
+# second const.
+store_const_program = [
+    mk_ctrl_signal(OPT_CONST, to_reg_bank = 0),
+    mk_ctrl_signal(OPT_STR_CONST, read_banks = [0]),
+]
+
+# Two ctrl signals returning the first const to the CPU.
+return_const_program = [
+    mk_ctrl_signal(OPT_CONST, to_reg_bank = 0),
+    mk_ctrl_signal(OPT_RET, read_banks = [0]),
+]
+
+def mk_config_pkts(program, base = 0, cmd = CMD_CONFIG):
+  return [mk_pkt(cmd, ctrl = ctrl, ctrl_addr = base + i)
+          for i, ctrl in enumerate(program)]
+
+def mk_const_pkts(consts):
+  return [mk_pkt(CMD_CONST, data = const) for const in consts]
+
+def responses(executor, cmd):
+  return [(int(pkt.payload.data_addr), int(pkt.payload.data.payload),
+           int(pkt.payload.data.predicate))
+          for pkt in executor.send_to_cpu if pkt.payload.cmd == cmd]
+
+#-------------------------------------------------------------------------
+# Data memory commands
+#-------------------------------------------------------------------------
+
+def test_dma_store_and_load():
+  executor = mk_executor(1, 1)
+  pkts = [mk_pkt(CMD_DMA_STORE_REQUEST, data = 3, data_addr = 4)] + \
+         [mk_pkt(CMD_DMA_STORE_DATA, data = value)
+          for value in [10, 11, 12, 13]] + \
+         [mk_pkt(CMD_DMA_LOAD_REQUEST, data = 4, data_addr = 4)]
+  executor.execute(pkts)
+  # The words beyond the DMA length are dropped.
+  assert responses(executor, CMD_LOAD_RESPONSE) == \
+         [(4, 10, 1), (5, 11, 1), (6, 12, 1), (7, 0, 0)]
+
+def test_store_and_load_request():
+  executor = mk_executor(1, 1)
+  executor.execute([mk_pkt(CMD_STORE_REQUEST, data = 42, data_addr = 9)],
+                   [mk_pkt(CMD_LOAD_REQUEST, data_addr = 9)])
+  assert responses(executor, CMD_LOAD_RESPONSE) == [(9, 42, 1)]
+
+#-------------------------------------------------------------------------
+# Ctrl commands
+#-------------------------------------------------------------------------
+
+def test_config_and_launch():
+  executor = mk_executor(2, 2)
+  executor.execute(mk_const_pkts([7, 5]) +
+                   mk_config_pkts(store_const_program) +
+                   [mk_pkt(CMD_LAUNCH)])
+  assert executor.read_data_mem(5) == DataType(7, 1)
+  assert executor.num_complete_received() == 1
+
+def test_config_delta():
+  executor = mk_executor(2, 2)
+  ctrl_delta = CtrlDeltaFormat(CtrlType)
+  delta_pkts = [mk_pkt(cmd, data = count, ctrl = ctrl, ctrl_addr = addr)
+                for cmd, addr, count, ctrl in ctrl_delta.encode(
+                    dict(enumerate(store_const_program)))]
+  assert all(pkt.payload.cmd == CMD_CONFIG_DELTA for pkt in delta_pkts)
+  executor.execute(mk_const_pkts([7, 5]) + delta_pkts +
+                   [mk_pkt(CMD_LAUNCH)])
+  assert executor.read_data_mem(5) == DataType(7, 1)
+  assert executor.num_complete_received() == 1
+
+def test_shadow_swap():
+  executor = mk_executor(2, 2)
+  # The active bank returns the first const, the shadow bank stores the
+  # second const into the address given by the third one.
+  executor.execute(mk_const_pkts([7, 9, 6]) +
+                   mk_config_pkts(return_const_program) +
+                   mk_config_pkts(store_const_program,
+                                  cmd = CMD_CONFIG_SHADOW) +
+                   [mk_pkt(CMD_CONFIG_SHADOW_COUNT_PER_ITER, data = 2),
+                    mk_pkt(CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT, data = 2),
+                    mk_pkt(CMD_LAUNCH)])
+  assert responses(executor, CMD_COMPLETE) == [(0, 7, 1)]
+  assert executor.read_data_mem(6) == DataType(0, 0)
+
+  # The swap starts over the shadow bank without another CMD_LAUNCH.
+  executor.execute([mk_pkt(CMD_SWAP_CTRL_BANK)])
+  assert executor.read_data_mem(6) == DataType(9, 1)
+  assert executor.num_complete_received() == 2
+
+def test_resident_kernels():
+  executor = mk_executor(2, 2, num_resident_kernels = 2)
+  # Kernel 0 (ctrl 0-1) stores a const, kernel 1 (ctrl 2-3) returns one.
+  pkts = mk_const_pkts([7, 9, 6]) + \
+         mk_config_pkts(store_const_program) + \
+         mk_config_pkts(return_const_program, base = 2) + \
+         [mk_pkt(CMD_CONFIG_CTRL_LOWER_BOUND, data = 2, data_addr = 1),
+          mk_pkt(CMD_CONFIG_COUNT_PER_ITER, data = 2, data_addr = 1),
+          mk_pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = 2, data_addr = 1)]
+  executor.execute(pkts + [mk_pkt(CMD_LAUNCH, data_addr = 1)])
+  assert responses(executor, CMD_COMPLETE) == [(0, 7, 1)]
+  assert executor.read_data_mem(6) == DataType(0, 0)
+
+  # Launching kernel 0 does not need to reconfigure anything.
+  executor.execute([mk_pkt(CMD_LAUNCH, data_addr = 0)])
+  assert executor.read_data_mem(6) == DataType(9, 1)
+  assert executor.num_complete_received() == 2
+
+def test_terminate_and_resume():
+  executor = mk_executor(2, 0)
+  # Runs forever (i.e., total ctrl steps is 0) until terminated.
+  executor.execute(mk_const_pkts([7, 5]) +
+                   mk_config_pkts(store_const_program) +
+                   [mk_pkt(CMD_LAUNCH)], max_rounds = 20)
+  assert executor.read_data_mem(5) == DataType(7, 1)
+  assert executor.num_complete_received() == 0
+  executor.execute([mk_pkt(CMD_TERMINATE)], max_rounds = 40)
+  num_ctrl_steps = executor.num_ctrl_steps
+  executor.execute([], max_rounds = 60)
+  assert executor.num_ctrl_steps == num_ctrl_steps
+
+def test_relaunch_running_kernel():
+  executor = mk_executor(2, 0)
+  executor.execute(mk_const_pkts([7, 5]) +
+                   mk_config_pkts(store_const_program) +
+                   [mk_pkt(CMD_LAUNCH)], max_rounds = 20)
+  times = executor.tiles[0].times
+  # The second launch (without a terminate) does not start over the
+  # running kernel.
+  executor.execute([mk_pkt(CMD_LAUNCH)], max_rounds = 21)
+  assert executor.tiles[0].times >= times
+
+#-------------------------------------------------------------------------
+# Operations
+#-------------------------------------------------------------------------
+
+# Loads the inputs into the register banks 0-3 via OPT_CONST, performs the
+# operation on them, and returns the FU outport `outport` to the CPU.
+def run_operation(operation, inputs, const = None, outport = 0):
+  inputs = inputs + [0] * (num_fu_inports - len(inputs))
+  program = [mk_ctrl_signal(OPT_CONST, to_reg_bank = i)
+             for i in range(num_fu_inports)] + \
+            [mk_ctrl_signal(operation, read_banks = range(num_fu_inports),
+                            to_reg_bank = 0, to_reg_idx = 1,
+                            to_reg_outport = outport),
+             mk_ctrl_signal(OPT_RET, read_banks = [0], read_reg_idx = 1)]
+  consts = inputs + ([] if const is None else [const])
+  executor = mk_executor(len(program), len(program))
+  assert executor.unsupported_operations(mk_config_pkts(program)) == []
+  executor.execute(mk_const_pkts(consts) + mk_config_pkts(program) +
+                   [mk_pkt(CMD_LAUNCH)])
+  complete = responses(executor, CMD_COMPLETE)
+  assert len(complete) == 1
+  return complete[0][1:]
+
+@pytest.mark.parametrize('operation, inputs, const, outport, expected', [
+  (OPT_DIV,                  [17, 5],        None, 0, (3, 1)),
+  (OPT_REM,                  [17, 5],        None, 0, (2, 1)),
+  (OPT_DIV_CONST,            [17],           4,    0, (4, 1)),
+  (OPT_MUL_ADD,              [3, 4, 5],      None, 0, (17, 1)),
+  (OPT_MUL_SUB,              [3, 4, 5],      None, 0, (7, 1)),
+  (OPT_MUL_CONST_ADD,        [3, 0, 5],      6,    0, (23, 1)),
+  (OPT_MUL_LLS,              [3, 1, 2],      None, 0, (12, 1)),
+  (OPT_MUL_LRS,              [12, 2, 3],     None, 0, (3, 1)),
+  (OPT_MUL_ADD_LLS,          [3, 1, 1, 1],   None, 0, (12, 1)),
+  (OPT_MUL_SUB_LLS,          [3, 1, 3, 1],   None, 0, (12, 1)),
+  (OPT_MUL_SUB_LRS,          [16, 1, 3, 1],  None, 0, (4, 1)),
+  (OPT_MUL_SUB_LRS,          [16, 1, 3, 1],  None, 1, (4, 1)),
+  # Inc -> NeConst -> Not: 4 + 1 == 5.
+  (OPT_INC_NE_CONST_NOT_GRT, [4],            5,    0, (1, 1)),
+  # Inc granted by NeConst: 2 + 1 != 5.
+  (OPT_INC_NE_CONST_NOT_GRT, [2],            5,    1, (3, 1)),
+])
+def test_operation(operation, inputs, const, outport, expected):
+  assert run_operation(operation, inputs, const, outport) == expected
+
+def test_unsupported_operations():
+  executor = mk_executor(2, 2)
+  ctrl_delta = CtrlDeltaFormat(CtrlType)
+  vector_add = mk_ctrl_signal(OPT_ADD)
+  vector_add.vector_factor_power = b3(1)
+  program = {0: mk_ctrl_signal(OPT_FADD), 1: vector_add}
+  delta_pkts = [mk_pkt(cmd, data = count, ctrl = ctrl, ctrl_addr = addr)
+                for cmd, addr, count, ctrl in ctrl_delta.encode(program)]
+  pkts = mk_config_pkts([mk_ctrl_signal(OPT_LOOP_CONTROL)],
+                        cmd = CMD_CONFIG_SHADOW) + delta_pkts
+  assert executor.unsupported_operations(pkts) == \
+         sorted([OPT_SYMBOL_DICT[OPT_FADD],
+                 OPT_SYMBOL_DICT[OPT_LOOP_CONTROL],
+                 f"{OPT_SYMBOL_DICT[OPT_ADD]} (vector_factor_power = 1)"])
+
+  # Executing them anyway fails with the same description.
+  with pytest.raises(ValueError, match = "FADD|fadd|on tile 0"):
+    executor.execute(mk_const_pkts([1]) + delta_pkts + [mk_pkt(CMD_LAUNCH)])
@@ -0,0 +1,162 @@
+"""
+==========================================================================
+CgraFL_test.py
+==========================================================================
+Test cases for the compiled and batched DFG interpreter.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import json
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ..CgraFL import CgraFL, CompiledDFG
+from ...lib.messages import *
+from ...lib.opt_type import *
+from ...lib.util.dfg_helper import DFG
+
+# Corresponding DFG:
+#
+#   0(phi) <----------┐
+#     |               |
+#   1(+ 1) ---┐       |
+#     |       |       |
+#   2(N >)    |       |
+#     |       |       |
+#   3(grant_predicate)┘
+#
+# i.e., for (i = init; i + 1 < N; ++i);
+# The live out value is 1(+ 1), which ends up as N.
+kLoopDFG = [
+  {"id": 0, "fu": "Phi",   "opt": "OPT_PHI",       "opt_predicate": 0,
+   "in_const": [0], "in": [3],    "in_predicate": [], "out": [[1]]},
+  {"id": 1, "fu": "Adder", "opt": "OPT_ADD",       "opt_predicate": 0,
+   "in_const": [1], "in": [0],    "in_predicate": [], "out": [[2, 3]],
+   "live_out_val": 1},
+  {"id": 2, "fu": "Comp",  "opt": "OPT_GT",        "opt_predicate": 0,
+   "in_const": [2], "in": [1],    "in_predicate": [], "out": [[3]]},
+  {"id": 3, "fu": "Grant", "opt": "OPT_GRT_PRED",  "opt_predicate": 0,
+   "in_const": [],  "in": [1, 2], "in_predicate": [], "out": [[0]],
+   "live_out_ctrl": 1},
+]
+
+def build_loop_dfg(tmp_path, src_const, data_spm):
+  json_file_name = tmp_path / "loop_dfg.json"
+  with open(json_file_name, 'w') as json_file:
+    json.dump(kLoopDFG, json_file)
+  return DFG(json_file_name, src_const, data_spm)
+
+def test_batched_loop(tmp_path):
+  dfg = build_loop_dfg(tmp_path, [], [0] * 4)
+  compiled = CompiledDFG(dfg)
+
+  # Each row is one input set of [init, step, N].
+  batch_size = 1000
+  init = np.arange(batch_size) % 7
+  upper = init + 1 + np.arange(batch_size) % 13
+  src_const = np.stack([init, np.ones(batch_size, dtype = int), upper], axis = 1)
+
+  live_out, _, _, iterations = compiled.run(src_const, dfg.data_spm)
+  assert (live_out == upper).all()
+  assert (iterations == upper - init).all()
+
+def test_single_input_set(tmp_path):
+  DataType = mk_data(32, 1)
+  src_const = [DataType(2, 1), DataType(1, 1), DataType(10, 1)]
+  dfg = build_loop_dfg(tmp_path, src_const, [0] * 4)
+  live_out, data_spm = CgraFL(dfg, DataType, None, src_const)
+  assert live_out == 10
+  assert data_spm == [0] * 4
+
+
+# Same loop as kLoopDFG, plus 6(x +), whose predicate is gated by the one
+# of 5(grant_predicate), i.e., only true when i + 1 == K:
+#
+#   1(+ 1) ---> 4(== K) ---> 5(grant_predicate) - - -> 6(x +)
+#     |_____________________________^________________________^
+#
+# The live out value is 6(x +), i.e., c * d + i + 1, as of the last
+# iteration before the exit (where i + 1 == N - 1).
+kPredicatedDFG = [dict(node) for node in kLoopDFG]
+del kPredicatedDFG[1]["live_out_val"]
+kPredicatedDFG[1]["out"] = [[2, 3, 4, 5, 6]]
+kPredicatedDFG += [
+  {"id": 4, "fu": "Comp",  "opt": "OPT_EQ_CONST",  "opt_predicate": 0,
+   "in_const": [3],    "in": [1],    "in_predicate": [],  "out": [[5]]},
+  {"id": 5, "fu": "Grant", "opt": "OPT_GRT_PRED",  "opt_predicate": 0,
+   "in_const": [],     "in": [1, 4], "in_predicate": [],  "out": [[]]},
+  {"id": 6, "fu": "Mul",   "opt": "OPT_MUL_ADD",   "opt_predicate": 1,
+   "in_const": [4, 5], "in": [1],    "in_predicate": [5], "out": [[]],
+   "live_out_val": 1},
+]
+
+def test_predicated_node(tmp_path):
+  json_file_name = tmp_path / "predicated_dfg.json"
+  with open(json_file_name, 'w') as json_file:
+    json.dump(kPredicatedDFG, json_file)
+  dfg = DFG(json_file_name, [], [0] * 4)
+
+  # Each row is one input set of [init, step, N, K, c, d].
+  src_const = [[0, 1, 6, 5, 10, 10], [0, 1, 6, 3, 10, 10]]
+  live_out, predicate, _, _ = CompiledDFG(dfg).run(src_const, dfg.data_spm)
+  assert list(live_out) == [105, 105]
+  assert list(predicate) == [True, False]
+
+  # Without the predicate source, the value is always valid.
+  dfg.nodes[6].opt_predicate = 0
+  live_out, predicate, _, _ = CompiledDFG(dfg).run(src_const, dfg.data_spm)
+  assert list(live_out) == [105, 105]
+  assert list(predicate) == [True, True]
+
+# Same as kPredicatedDFG, with 6(x +) scheduled before 3(grant_predicate),
+# so that it also runs in the last iteration (where i + 1 == N), when
+# 5(grant_predicate) still holds the predicate of the previous iteration.
+kEarlyPredicatedDFG = kPredicatedDFG[:3] + kPredicatedDFG[6:] + \
+                      kPredicatedDFG[3:6]
+
+def test_predicate_source_latest_output(tmp_path):
+  json_file_name = tmp_path / "early_predicated_dfg.json"
+  with open(json_file_name, 'w') as json_file:
+    json.dump(kEarlyPredicatedDFG, json_file)
+  dfg = DFG(json_file_name, [], [0] * 4)
+
+  # Each row is one input set of [init, step, N, K, c, d]. With N = 1,
+  # 5(grant_predicate) never fires, so the predicate of 6(x +) is true.
+  src_const = [[0, 1, 1, 7, 10, 10], [0, 1, 6, 5, 10, 10],
+               [0, 1, 6, 6, 10, 10]]
+  live_out, predicate, _, iterations = \
+      CompiledDFG(dfg).run(src_const, dfg.data_spm)
+  assert list(iterations) == [1, 6, 6]
+  assert list(live_out) == [101, 106, 106]
+  assert list(predicate) == [True, True, False]
+
+def test_operand_predicate(tmp_path):
+  # 6(x +) takes i + 1 from 5(grant_predicate) instead, so the predicate
+  # comes along with the operand rather than through in_predicate.
+  dfg_json = [dict(node) for node in kPredicatedDFG]
+  dfg_json[1]["out"] = [[2, 3, 4, 5]]
+  dfg_json[5]["out"] = [[6]]
+  dfg_json[6].update({"opt_predicate": 0, "in": [5], "in_predicate": []})
+  json_file_name = tmp_path / "operand_predicate_dfg.json"
+  with open(json_file_name, 'w') as json_file:
+    json.dump(dfg_json, json_file)
+  dfg = DFG(json_file_name, [], [0] * 4)
+
+  src_const = [[0, 1, 6, 5, 10, 10], [0, 1, 6, 3, 10, 10]]
+  live_out, predicate, _, _ = CompiledDFG(dfg).run(src_const, dfg.data_spm)
+  assert list(live_out) == [105, 105]
+  assert list(predicate) == [True, False]
+
+def test_unsupported_operation(tmp_path):
+  dfg_json = [dict(node) for node in kLoopDFG]
+  json_file_name = tmp_path / "unsupported_dfg.json"
+  with open(json_file_name, 'w') as json_file:
+    json.dump(dfg_json, json_file)
+  dfg = DFG(json_file_name, [], [0] * 4)
+  # Not reachable from the DFG json, see opt_map of map_helper.
+  dfg.nodes[2].opt = OPT_LOOP_CONTROL
+  with pytest.raises(ValueError, match = "of node 2"):
+    CompiledDFG(dfg)
@@ -9,10 +9,13 @@ Author : Cheng Tan
   Date : Aug 30, 2025
 """
 
+import pytest
+
 from pymtl3.passes.backends.verilog import (VerilogVerilatorImportPass)
 from pymtl3.stdlib.test_utils import (run_sim,
                                       config_model_with_cmdline_opts)
 
+from ..CgraExecutorFL import CgraExecutorFL
 from ..CgraRTL import CgraRTL
 from ...fu.double.SeqMulAdderRTL import SeqMulAdderRTL
 from ...fu.flexible.FlexibleFuRTL import FlexibleFuRTL
@@ -35,6 +38,7 @@ from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.config_assembler import ConfigAssembler
 
 
 #-------------------------------------------------------------------------
@@ -140,6 +144,51 @@ class TestHarness(Component):
   def line_trace(s):
     return s.dut.line_trace()
 
+#-------------------------------------------------------------------------
+# Functional execution
+#-------------------------------------------------------------------------
+# Runs the same packets on CgraExecutorFL instead of CgraRTL and checks
+# the packets sent to the CPU the same way the test sink does.
+
+def run_functional(src_ctrl_pkt, src_query_pkt, complete_signal_sink_out,
+                   kCtrlCountPerIter, kTotalCtrlSteps):
+  executor = CgraExecutorFL(IntraCgraPktType, x_tiles, y_tiles,
+                            ctrl_mem_size, data_mem_size_global,
+                            num_registers_per_reg_bank,
+                            kCtrlCountPerIter, kTotalCtrlSteps,
+                            cgra_id = cgra_id)
+  # Skips explicitly the kernels using operations (e.g., vector or
+  # floating-point ones) that the functional executor cannot perform.
+  unsupported = executor.unsupported_operations(src_ctrl_pkt)
+  if unsupported:
+    pytest.skip(f"CgraExecutorFL does not support {', '.join(unsupported)}")
+  complete_count_value = \
+          sum(1 for pkt in complete_signal_sink_out \
+              if pkt.payload.cmd == CMD_COMPLETE)
+  received = executor.execute(src_ctrl_pkt, src_query_pkt,
+                              complete_count_value,
+                              len(complete_signal_sink_out))
+  assert len(received) == len(complete_signal_sink_out), \
+         f"Expects {len(complete_signal_sink_out)} packets, but only " \
+         f"received {len(received)}:\n{executor.line_trace()}"
+  for expected, actual in zip(complete_signal_sink_out, received):
+    assert actual.payload.data == expected.payload.data and \
+           actual.payload.cmd == expected.payload.cmd, \
+           f"Expects {expected}, but received {actual}"
+  return executor
+
+# Reassembles the hand-built config program, which is expected to be no
+# longer and to load no slower than the original one.
+def assemble_config(src_ctrl_pkt, kCtrlCountPerIter, kTotalCtrlSteps):
+  assembler = ConfigAssembler(IntraCgraPktType, x_tiles * y_tiles,
+                              tile_ports, num_fu_inports,
+                              kCtrlCountPerIter, kTotalCtrlSteps)
+  assembled = assembler.add_pkts(src_ctrl_pkt).assemble()
+  assert len(assembled) <= len(src_ctrl_pkt)
+  assert assembler.estimate_latency(assembled) <= \
+         assembler.estimate_latency(src_ctrl_pkt)
+  return assembled
+
 # Common configurations/setups.
 FuList = [AdderRTL,
           MulRTL,
@@ -327,7 +376,8 @@ for (int i = 2; i < ?; ++i) {
 // expected sum = 2212 + 3 = 2215 (0x8a7)
 '''
 
-def sim_fir_terminate(cmdline_opts, mem_access_is_combinational):
+def sim_fir_terminate(cmdline_opts, mem_access_is_combinational,
+                      functional = False, assemble = False):
 
   src_ctrl_pkt = []
   complete_signal_sink_out = []
@@ -829,6 +879,15 @@ def sim_fir_terminate(cmdline_opts, mem_access_is_combinational):
   complete_signal_sink_out.extend(expected_complete_sink_out_pkg)
   complete_signal_sink_out.extend(expected_mem_sink_out_pkt)
 
+  if assemble:
+    src_ctrl_pkt = assemble_config(src_ctrl_pkt, kCtrlCountPerIter,
+                                   kTotalCtrlSteps)
+
+  if functional:
+    run_functional(src_ctrl_pkt, src_query_pkt, complete_signal_sink_out,
+                   kCtrlCountPerIter, kTotalCtrlSteps)
+    return
+
   th = TestHarness(DUT, FunctionUnit, FuList,
                    IntraCgraPktType,
                    cgra_id, x_tiles, y_tiles,
@@ -848,7 +907,8 @@ def sim_fir_terminate(cmdline_opts, mem_access_is_combinational):
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
 
-def sim_fir_return(cmdline_opts, mem_access_is_combinational):
+def sim_fir_return(cmdline_opts, mem_access_is_combinational,
+                   functional = False, assemble = False):
   src_ctrl_pkt = []
   complete_signal_sink_out = []
   src_query_pkt = []
@@ -1376,6 +1436,15 @@ def sim_fir_return(cmdline_opts, mem_access_is_combinational):
   complete_signal_sink_out.extend(expected_complete_sink_out_pkg)
   complete_signal_sink_out.extend(expected_mem_sink_out_pkt)
 
+  if assemble:
+    src_ctrl_pkt = assemble_config(src_ctrl_pkt, kCtrlCountPerIter,
+                                   kTotalCtrlSteps)
+
+  if functional:
+    run_functional(src_ctrl_pkt, src_query_pkt, complete_signal_sink_out,
+                   kCtrlCountPerIter, kTotalCtrlSteps)
+    return
+
   th = TestHarness(DUT, FunctionUnit, FuList,
                    IntraCgraPktType,
                    cgra_id, x_tiles, y_tiles,
@@ -2586,6 +2655,32 @@ def test_homogeneous_4x4_fir_combinational_mem_access_return(cmdline_opts):
 def test_homogeneous_4x4_fir_multi_cycle_mem_access_return(cmdline_opts):
   sim_fir_return(cmdline_opts, mem_access_is_combinational = False)
 
+def test_homogeneous_4x4_fir_functional_terminate():
+  sim_fir_terminate(None, mem_access_is_combinational = True,
+                    functional = True)
+
+def test_homogeneous_4x4_fir_functional_return():
+  sim_fir_return(None, mem_access_is_combinational = True,
+                 functional = True)
+
+def test_homogeneous_4x4_fir_functional_assembled_terminate():
+  sim_fir_terminate(None, mem_access_is_combinational = True,
+                    functional = True, assemble = True)
+
+def test_homogeneous_4x4_fir_functional_assembled_return():
+  sim_fir_return(None, mem_access_is_combinational = True,
+                 functional = True, assemble = True)
+
+# Runs the assembled stream on the RTL against the same expected sink, so
+# the assembler's reordering is checked beyond the functional executor.
+def test_homogeneous_4x4_fir_combinational_mem_access_assembled_terminate(cmdline_opts):
+  sim_fir_terminate(cmdline_opts, mem_access_is_combinational = True,
+                    assemble = True)
+
+def test_homogeneous_4x4_fir_combinational_mem_access_assembled_return(cmdline_opts):
+  sim_fir_return(cmdline_opts, mem_access_is_combinational = True,
+                 assemble = True)
+
 def test_homogeneous_4x4_fir_combinational_mem_access_terminate(cmdline_opts):
   sim_fir_vector_terminate(cmdline_opts, mem_access_is_combinational = True)
 
@@ -10,8 +10,7 @@ Author : Cheng Tan
 """
 
 from pymtl3.passes.backends.verilog import (VerilogVerilatorImportPass)
-from pymtl3.stdlib.test_utils import (run_sim,
-                                      config_model_with_cmdline_opts)
+from pymtl3.stdlib.test_utils import config_model_with_cmdline_opts
 
 from ..CgraRTL import CgraRTL
 from ...fu.double.SeqMulAdderRTL import SeqMulAdderRTL
@@ -35,6 +34,7 @@ from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.sim_recorder import run_sim_with_recorder
 from ...lib.util.common import *
 
 
@@ -144,7 +144,8 @@ class TestHarness(Component):
 
 def init_param(topology, FuList = [MemUnitRTL, AdderRTL],
                x_tiles = 2, y_tiles = 2, data_bitwidth = 32,
-               test_name = 'default', total_execute_ctrl_count = 1):
+               test_name = 'default', total_execute_ctrl_count = 1,
+               multicast = False):
   tile_ports = 4
   assert(topology == MESH or topology == KING_MESH)
   if topology == MESH:
@@ -326,6 +327,16 @@ def init_param(topology, FuList = [MemUnitRTL, AdderRTL],
                             0, # vc_id
                             CgraPayloadType(CMD_COMPLETE)) for i in range(num_tiles)]
 
+      if multicast:
+        # All the tiles receive the same packets, which are delivered to
+        # every tile at once instead.
+        src_opt_per_tile = [[IntraCgraPktType(pkt.src, 0, pkt.src_cgra_id, pkt.dst_cgra_id,
+                                              pkt.src_cgra_x, pkt.src_cgra_y,
+                                              pkt.dst_cgra_x, pkt.dst_cgra_y,
+                                              pkt.opaque, pkt.vc_id, pkt.payload,
+                                              TILE_GROUP_ALL)
+                             for pkt in src_opt_per_tile[0]]]
+
       for opt_per_tile in src_opt_per_tile:
         src_ctrl_pkt.extend(opt_per_tile)
       ctrl_steps = ctrl_mem_size
@@ -613,7 +624,7 @@ def test_homogeneous_2x2(cmdline_opts):
                        ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
                         'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
-  run_sim(th)
+  run_sim_with_recorder(th)
 
 def test_homogeneous_2x2_ctrl_count_2(cmdline_opts):
   topology = "Mesh"
@@ -635,7 +646,30 @@ def test_homogeneous_2x2_ctrl_count_2(cmdline_opts):
                        ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
                         'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
-  run_sim(th)
+  run_sim_with_recorder(th)
+
+def test_homogeneous_4x4_multicast(cmdline_opts):
+  topology = "Mesh"
+  FuList = [AdderRTL,
+            MulRTL,
+            LogicRTL,
+            ShifterRTL,
+            PhiRTL,
+            CompRTL,
+            GrantRTL,
+            MemUnitRTL,
+            SelRTL,
+            RetRTL,
+           ]
+  th = init_param(topology, FuList, x_tiles = 4, y_tiles = 4,
+                  multicast = True)
+
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                       ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                        'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim_with_recorder(th)
 
 def test_heterogeneous_king_mesh_2x2(cmdline_opts):
   topology = "KingMesh"
@@ -646,7 +680,7 @@ def test_heterogeneous_king_mesh_2x2(cmdline_opts):
                       ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
                        'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
-  run_sim(th)
+  run_sim_with_recorder(th)
 
 def test_heterogeneous_with_loop_control(cmdline_opts):
   topology = "KingMesh"
@@ -657,7 +691,7 @@ def test_heterogeneous_with_loop_control(cmdline_opts):
                       ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
                        'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
-  run_sim(th)
+  run_sim_with_recorder(th)
 
 def test_vector_king_mesh_2x2(cmdline_opts):
   topology = "KingMesh"
@@ -679,7 +713,7 @@ def test_vector_king_mesh_2x2(cmdline_opts):
                       ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
                        'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
-  run_sim(th)
+  run_sim_with_recorder(th)
 
 def test_vector_mesh_4x4(cmdline_opts):
   topology = "Mesh"
@@ -702,7 +736,7 @@ def test_vector_mesh_4x4(cmdline_opts):
                       ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
                        'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
-  run_sim(th)
+  run_sim_with_recorder(th)
 
 def test_systolic_3x3(cmdline_opts):
   topology = "Mesh"
@@ -729,4 +763,4 @@ def test_systolic_3x3(cmdline_opts):
                       ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
                        'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
-  run_sim(th)
+  run_sim_with_recorder(th)
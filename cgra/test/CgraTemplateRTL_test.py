@@ -37,6 +37,8 @@ from ...lib.util.cgra.DataSPM import DataSPM
 from ...lib.util.cgra.cgra_helper import get_links
 from ...multi_cgra.parser.Parser import Parser
 import os
+import pytest
+import yaml
 
 fuType2RTL = {}
 fuType2RTL["Phi"  ] = PhiRTL
@@ -67,7 +69,8 @@ class TestHarness(Component):
                 mem_access_is_combinational,
                 TileList, LinkList, dataSPM,
                 controller2addr_map, idTo2d_map,
-                complete_signal_sink_out):
+                complete_signal_sink_out,
+                ctrl_network = CTRL_BIDIRECTIONAL_RING):
 
     CgraPayloadType = CtrlPktType.get_field_type(kAttrPayload)
     DataAddrType = mk_bits(clog2(data_mem_size_global))
@@ -87,7 +90,8 @@ class TestHarness(Component):
                 mem_access_is_combinational,
                 FunctionUnit, FuList,
                 TileList, LinkList, dataSPM, controller2addr_map,
-                idTo2d_map, is_multi_cgra = False)
+                idTo2d_map, is_multi_cgra = False,
+                ctrl_network = ctrl_network)
 
     # Connections
     s.dut.cgra_id //= cgra_id
@@ -284,7 +288,8 @@ def test_cgra_universal(cmdline_opts, arch_yaml_path = "arch.yaml"):
                    num_registers_per_reg_bank,
                    src_ctrl_pkt, ctrl_mem_size,
                    mem_access_is_combinational, tiles, links, dataSPM,
-                   controller2addr_map, idTo2d_map, complete_signal_sink_out)
+                   controller2addr_map, idTo2d_map, complete_signal_sink_out,
+                   paramCGRA.ctrlNetwork)
 
   th.elaborate()
   th.dut.set_metadata(VerilogTranslationPass.explicit_module_name,
@@ -303,3 +308,16 @@ def test_cgra_universal(cmdline_opts, arch_yaml_path = "arch.yaml"):
           th.set_param(targetTile, FuList=targetFuList)
 
   run_sim(th)
+
+# Runs the same kernel on a copy of arch.yaml, which only differs in the
+# intra-CGRA ctrl network, i.e., cgra_defaults: ctrl_network.
+@pytest.mark.parametrize('ctrl_network', ['tree', 'mesh'])
+def test_cgra_universal_ctrl_network(cmdline_opts, tmp_path, ctrl_network):
+  arch_file = os.path.join(os.path.dirname(__file__), "arch.yaml")
+  with open(arch_file, 'r') as f:
+    yaml_data = yaml.safe_load(f)
+  yaml_data['cgra_defaults']['ctrl_network'] = ctrl_network
+  arch_yaml_path = str(tmp_path / "arch.yaml")
+  with open(arch_yaml_path, 'w') as f:
+    yaml.safe_dump(yaml_data, f)
+  test_cgra_universal(cmdline_opts, arch_yaml_path)
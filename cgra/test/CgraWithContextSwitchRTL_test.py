@@ -10,8 +10,7 @@ Author : Cheng Tan
 """
 
 from pymtl3.passes.backends.verilog import (VerilogVerilatorImportPass)
-from pymtl3.stdlib.test_utils import (run_sim,
-                                      config_model_with_cmdline_opts)
+from pymtl3.stdlib.test_utils import config_model_with_cmdline_opts
 
 from ..CgraWithContextSwitchRTL import CgraWithContextSwitchRTL
 from ...fu.double.SeqMulAdderRTL import SeqMulAdderRTL
@@ -36,6 +35,7 @@ from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.sim_recorder import run_sim_with_recorder
 
 
 #-------------------------------------------------------------------------
@@ -1490,7 +1490,7 @@ def sim_fir_return_two_tasks(cmdline_opts, mem_access_is_combinational):
                        ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
                         'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
-  run_sim(th)
+  run_sim_with_recorder(th)
 
 def test_sim_fir_combinational_mem_access_return_two_tasks(cmdline_opts):
   sim_fir_return_two_tasks(cmdline_opts, mem_access_is_combinational = True)
@@ -0,0 +1,23 @@
+"""
+=========================================================================
+conftest.py
+=========================================================================
+Shared pytest hooks.
+
+Setting VECTORCGRA_VL_CACHE_DIR enables the content-addressed Verilator
+build cache (see lib/util/verilator_cache.py) for --test-verilog runs.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import os
+
+def pytest_configure(config):
+  cache_dir = os.environ.get("VECTORCGRA_VL_CACHE_DIR")
+  if cache_dir:
+    from .lib.util.verilator_cache import (DEFAULT_CACHE_MAX_MB,
+                                           enable_verilator_build_cache)
+    max_mb = int(os.environ.get("VECTORCGRA_VL_CACHE_MAX_MB",
+                                DEFAULT_CACHE_MAX_MB))
+    enable_verilator_build_cache(cache_dir, max_mb)
@@ -19,7 +19,10 @@ from ..noc.PyOCN.pymtl3_net.channel.ChannelRTL import ChannelRTL
 from ..noc.PyOCN.pymtl3_net.xbar.XbarRTL import XbarRTL
 
 from .GlobalReduceUnitRTL import GlobalReduceUnitRTL
+from .NocArbiterRTL import NocArbiterRTL
 from ..lib.util.data_struct_attr import *
+from ..lib.util.line_trace_helper import *
+from ..lib.util.reduce_tree_helper import *
 
 class ControllerRTL(Component):
 
@@ -29,7 +32,12 @@ class ControllerRTL(Component):
                 multi_cgra_columns,
                 num_tiles,
                 controller2addr_map,
-                idTo2d_map):
+                idTo2d_map,
+                num_reduce_slots = NUM_GLOBAL_REDUCE_SLOTS,
+                global_reduce = GLOBAL_REDUCE_CENTRALIZED,
+                num_noc_ports = 1,
+                noc_arbiter = NOC_ARBITER_ROUND_ROBIN,
+                noc_arbiter_weights = None):
 
     # Derives types from InterCgraPktType.
     CgraPayloadType = InterCgraPktType.get_field_type(kAttrPayload)
@@ -51,7 +59,25 @@ class ControllerRTL(Component):
     XType = mk_bits(max(clog2(multi_cgra_columns), 1))
     YType = mk_bits(max(clog2(multi_cgra_rows), 1))
     TileIdType = mk_bits(clog2(num_tiles + 1))
-    ControllerXbarPktType = mk_controller_noc_xbar_pkt(InterCgraPktType)
+    ControllerXbarPktType = mk_controller_noc_xbar_pkt(InterCgraPktType,
+                                                       num_noc_ports)
+    NocPortType = ControllerXbarPktType.get_field_type(kAttrDst)
+    ReduceSlotType = mk_bits(max(clog2(num_reduce_slots), 1))
+    # The reduction id (i.e., data_addr) is truncated to index the slots.
+    assert(num_reduce_slots & (num_reduce_slots - 1) == 0)
+    assert(clog2(num_reduce_slots) <= DataAddrType.nbits)
+    # Each reduce slot has its own inport on the crossbar.
+    num_xbar_inports = CONTROLLER_CROSSBAR_INPORTS - 1 + num_reduce_slots
+    # Traffic class of each crossbar inport (see NOC_CLASS_*), in the
+    # order of the inport indices in update_received_msg().
+    inport_classes = [NOC_CLASS_REQUEST,  # load request
+                      NOC_CLASS_RESPONSE, # load response
+                      NOC_CLASS_REQUEST,  # store request
+                      NOC_CLASS_CONFIG,   # ctrl and data from cpu
+                      NOC_CLASS_REQUEST,  # commands from ring
+                     ] + [NOC_CLASS_RESPONSE for _ in range(num_reduce_slots)]
+    assert(num_noc_ports >= 1)
+    assert(noc_arbiter in NOC_ARBITERS)
 
     # Interface
     s.cgra_id = InPort(CgraIdType)
@@ -59,6 +85,9 @@ class ControllerRTL(Component):
     # Request from/to other CGRA via NoC.
     s.recv_from_inter_cgra_noc = RecvIfcRTL(InterCgraPktType)
     s.send_to_inter_cgra_noc = SendIfcRTL(InterCgraPktType)
+    # Additional injection ports towards the NoC, see num_noc_ports.
+    s.send_to_inter_cgra_noc_extra = [SendIfcRTL(InterCgraPktType)
+                                      for _ in range(num_noc_ports - 1)]
 
     s.recv_from_cpu_pkt = RecvIfcRTL(IntraCgraPktType)
     s.send_to_ctrl_ring_pkt = SendIfcRTL(IntraCgraPktType)
@@ -87,15 +116,44 @@ class ControllerRTL(Component):
     # Crossbar with 4 inports (load and store requests towards remote
     # memory, load response from local memory, ctrl&data packet from cpu,
     # and command signal from inter-tile, i.e., intra-cgra, ring) and 1 
-    # outport (only allow one request be sent out per cycle).
-    s.crossbar = XbarRTL(ControllerXbarPktType, CONTROLLER_CROSSBAR_INPORTS, 1)
+    # outport (only allow one request be sent out per cycle) per
+    # injection port. The other arbitration policies than the round
+    # robin one are provided by NocArbiterRTL.
+    if noc_arbiter == NOC_ARBITER_ROUND_ROBIN:
+      s.crossbar = XbarRTL(ControllerXbarPktType, num_xbar_inports, num_noc_ports)
+    else:
+      s.crossbar = NocArbiterRTL(ControllerXbarPktType, num_xbar_inports,
+                                 num_noc_ports, noc_arbiter, inport_classes,
+                                 noc_arbiter_weights)
     s.recv_from_cpu_pkt_queue = NormalQueueRTL(IntraCgraPktType)
     s.send_to_cpu_pkt_queue = NormalQueueRTL(IntraCgraPktType)
 
-    # Global reduce unit.
-    # TODO: We need multiple GlobalReduceUnitRTL to enable more than 1 reduction
-    # across the fabric: https://github.com/tancheng/VectorCGRA/issues/184.
-    s.global_reduce_unit = GlobalReduceUnitRTL(InterCgraPktType)
+    # Global reduce units, one per reduction in flight across the fabric
+    # (https://github.com/tancheng/VectorCGRA/issues/184), indexed by the
+    # reduction id carried in data_addr.
+    s.global_reduce_units = [GlobalReduceUnitRTL(InterCgraPktType)
+                             for _ in range(num_reduce_slots)]
+    s.reduce_slot = Wire(ReduceSlotType)
+
+    # Reduction tree, i.e., the parent of each controller, only used in
+    # GLOBAL_REDUCE_TREE mode. Otherwise, all the reduce units act as the
+    # root.
+    assert(global_reduce in GLOBAL_REDUCE_MODES)
+    s.reduce_in_tree = Wire(1)
+    s.reduce_parent_lut = [Wire(CgraIdType) for _ in range(multi_cgra_columns * multi_cgra_rows)]
+    if global_reduce == GLOBAL_REDUCE_TREE:
+      s.reduce_in_tree //= 1
+      reduce_root = reduce_tree_root(idTo2d_map)
+      for cgra_id, parent in reduce_tree_parents(idTo2d_map).items():
+        s.reduce_parent_lut[cgra_id] //= CgraIdType(reduce_root if parent is None else parent)
+      for i in range(num_reduce_slots):
+        s.global_reduce_units[i].is_root //= lambda: s.cgra_id == CgraIdType(reduce_root)
+    else:
+      s.reduce_in_tree //= 0
+      for cgra_id in range(multi_cgra_columns * multi_cgra_rows):
+        s.reduce_parent_lut[cgra_id] //= CgraIdType(0)
+      for i in range(num_reduce_slots):
+        s.global_reduce_units[i].is_root //= 1
 
     # LUT for global data address mapping.
     addr_offset_nbits = 0
@@ -121,7 +179,27 @@ class ControllerRTL(Component):
       s.idTo2d_x_lut[cgra_id] //= XType(xy[0])
       s.idTo2d_y_lut[cgra_id] //= YType(xy[1])
 
-    s.addr_dst_id = Wire(CgraIdType)
+    # Injection port of each crossbar inport. The traffic classes are only
+    # arbitrated by the crossbar, the vc_id is left to the NoC (e.g., the
+    # dateline of the ring).
+    s.inport_noc_port = [Wire(NocPortType) for _ in range(num_xbar_inports)]
+    for i in range(num_xbar_inports):
+      s.inport_noc_port[i] //= NocPortType(min(inport_classes[i], num_noc_ports - 1))
+
+    # Packets towards each injection port.
+    s.noc_send_val = [Wire(1) for _ in range(num_noc_ports)]
+    s.noc_send_rdy = [Wire(1) for _ in range(num_noc_ports)]
+    s.noc_send_msg = [Wire(InterCgraPktType) for _ in range(num_noc_ports)]
+    for p, noc_port in enumerate([s.send_to_inter_cgra_noc] +
+                                 s.send_to_inter_cgra_noc_extra):
+      noc_port.val //= s.noc_send_val[p]
+      noc_port.msg //= s.noc_send_msg[p]
+      s.noc_send_rdy[p] //= noc_port.rdy
+
+    s.addr_dst_id = [Wire(CgraIdType) for _ in range(num_noc_ports)]
+    # The dst CGRA of the ongoing DMA store, i.e., where the following
+    # CMD_DMA_STORE_DATA (without address) go.
+    s.dma_dst_id = [Wire(CgraIdType) for _ in range(num_noc_ports)]
 
     # Connections.
     # Requests towards others, 1 cycle delay to improve timing.
@@ -138,6 +216,14 @@ class ControllerRTL(Component):
     s.recv_from_cpu_pkt //= s.recv_from_cpu_pkt_queue.recv
     s.send_to_cpu_pkt //= s.send_to_cpu_pkt_queue.send
 
+    if num_reduce_slots > 1:
+      @update
+      def update_reduce_slot():
+        s.reduce_slot @= trunc(s.recv_from_inter_cgra_noc.msg.payload.data_addr,
+                               ReduceSlotType)
+    else:
+      s.reduce_slot //= 0
+
     @update
     def update_received_msg():
       kLoadRequestInportIdx = 0
@@ -148,10 +234,10 @@ class ControllerRTL(Component):
       kFromReduceUnitIdx = 5
 
       s.send_to_cpu_pkt_queue.recv.val @= 0
-      s.send_to_cpu_pkt_queue.recv.msg @= IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+      s.send_to_cpu_pkt_queue.recv.msg @= IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
       s.recv_from_ctrl_ring_pkt.rdy @= 0
 
-      for i in range(CONTROLLER_CROSSBAR_INPORTS):
+      for i in range(num_xbar_inports):
         s.crossbar.recv[i].val @= 0
         s.crossbar.recv[i].msg @= ControllerXbarPktType(0, 0)
 
@@ -171,7 +257,18 @@ class ControllerRTL(Component):
                                                  0, # remote_src_port, only used for inter-cgra remote load request/response.
                                                  0, # opaque
                                                  0, # vc_id. No need to specify vc_id for self produce-consume pkt thanks to the additional VC buffer.
-                                                 s.recv_from_ctrl_ring_pkt.msg.payload))
+                                                 s.recv_from_ctrl_ring_pkt.msg.payload,
+                                                 0)) # dst_group
+      # In the tree mode, the local participants' data are always merged
+      # by the local reduce unit first.
+      if s.reduce_in_tree & \
+         ((s.recv_from_ctrl_ring_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD) | \
+          (s.recv_from_ctrl_ring_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL) | \
+          (s.recv_from_ctrl_ring_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX) | \
+          (s.recv_from_ctrl_ring_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN)):
+        s.crossbar.recv[kFromInterTileRingIdx].msg.inter_cgra_pkt.dst @= s.cgra_id
+        s.crossbar.recv[kFromInterTileRingIdx].msg.inter_cgra_pkt.dst_x @= s.idTo2d_x_lut[s.cgra_id]
+        s.crossbar.recv[kFromInterTileRingIdx].msg.inter_cgra_pkt.dst_y @= s.idTo2d_y_lut[s.cgra_id]
 
       # For the load request from local tiles.
       s.crossbar.recv[kLoadRequestInportIdx].val @= s.recv_from_tile_load_request_pkt_queue.send.val
@@ -195,11 +292,31 @@ class ControllerRTL(Component):
           ControllerXbarPktType(0, # dst (always 0 to align with the single outport of the crossbar, i.e., NoC)
                                 s.recv_from_tile_load_response_pkt_queue.send.msg)
 
-      # For the load response (i.e., the data towards other) from local memory.
-      s.crossbar.recv[kFromReduceUnitIdx].val @= \
-          s.global_reduce_unit.send.val
-      s.global_reduce_unit.send.rdy @= s.crossbar.recv[kFromReduceUnitIdx].rdy
-      s.crossbar.recv[kFromReduceUnitIdx].msg @= s.global_reduce_unit.send.msg
+      # For the reduced data (towards the participants) from the global
+      # reduce units.
+      for i in range(num_reduce_slots):
+        s.crossbar.recv[kFromReduceUnitIdx + i].val @= \
+            s.global_reduce_units[i].send.val
+        s.global_reduce_units[i].send.rdy @= s.crossbar.recv[kFromReduceUnitIdx + i].rdy
+        s.crossbar.recv[kFromReduceUnitIdx + i].msg.inter_cgra_pkt @= \
+            s.global_reduce_units[i].send.msg.inter_cgra_pkt
+        # The partial result (i.e., still carrying the data cmd) goes to
+        # the parent controller in the tree mode.
+        if (s.global_reduce_units[i].send.msg.inter_cgra_pkt.payload.cmd == CMD_GLOBAL_REDUCE_ADD) | \
+           (s.global_reduce_units[i].send.msg.inter_cgra_pkt.payload.cmd == CMD_GLOBAL_REDUCE_MUL) | \
+           (s.global_reduce_units[i].send.msg.inter_cgra_pkt.payload.cmd == CMD_GLOBAL_REDUCE_MAX) | \
+           (s.global_reduce_units[i].send.msg.inter_cgra_pkt.payload.cmd == CMD_GLOBAL_REDUCE_MIN):
+          s.crossbar.recv[kFromReduceUnitIdx + i].msg.inter_cgra_pkt.src @= s.cgra_id
+          s.crossbar.recv[kFromReduceUnitIdx + i].msg.inter_cgra_pkt.dst @= s.reduce_parent_lut[s.cgra_id]
+          s.crossbar.recv[kFromReduceUnitIdx + i].msg.inter_cgra_pkt.src_x @= s.idTo2d_x_lut[s.cgra_id]
+          s.crossbar.recv[kFromReduceUnitIdx + i].msg.inter_cgra_pkt.src_y @= s.idTo2d_y_lut[s.cgra_id]
+          s.crossbar.recv[kFromReduceUnitIdx + i].msg.inter_cgra_pkt.dst_x @= \
+              s.idTo2d_x_lut[s.reduce_parent_lut[s.cgra_id]]
+          s.crossbar.recv[kFromReduceUnitIdx + i].msg.inter_cgra_pkt.dst_y @= \
+              s.idTo2d_y_lut[s.reduce_parent_lut[s.cgra_id]]
+          # num_tiles indicates the packet is from/to the controller.
+          s.crossbar.recv[kFromReduceUnitIdx + i].msg.inter_cgra_pkt.src_tile_id @= num_tiles
+          s.crossbar.recv[kFromReduceUnitIdx + i].msg.inter_cgra_pkt.dst_tile_id @= num_tiles
 
       # For the ctrl and data preloading.
       s.crossbar.recv[kFromCpuCtrlAndDataIdx].val @= \
@@ -218,7 +335,12 @@ class ControllerRTL(Component):
                                                  0, # remote_src_port, only used for inter-cgra remote load request/response.
                                                  0, # opaque
                                                  0, # vc_id
-                                                 s.recv_from_cpu_pkt_queue.send.msg.payload))
+                                                 s.recv_from_cpu_pkt_queue.send.msg.payload,
+                                                 s.recv_from_cpu_pkt_queue.send.msg.dst_group))
+
+      # Steers each traffic class towards its injection port.
+      for i in range(num_xbar_inports):
+        s.crossbar.recv[i].msg.dst @= s.inport_noc_port[i]
 
       # TODO: For the other cmd types.
 
@@ -231,29 +353,36 @@ class ControllerRTL(Component):
       s.send_to_mem_store_request_queue.recv.val @= 0
       s.send_to_tile_load_response_queue.recv.val @= 0
 
-      s.send_to_mem_load_request_queue.recv.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
-      s.send_to_mem_store_request_queue.recv.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
-      s.send_to_tile_load_response_queue.recv.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+      s.send_to_mem_load_request_queue.recv.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+      s.send_to_mem_store_request_queue.recv.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+      s.send_to_tile_load_response_queue.recv.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
 
       s.recv_from_inter_cgra_noc.rdy @= 0
       s.send_to_ctrl_ring_pkt.val @= 0
-      s.send_to_ctrl_ring_pkt.msg @= IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
-      s.global_reduce_unit.recv_count.val @= 0
-      s.global_reduce_unit.recv_count.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
-      s.global_reduce_unit.recv_data.val @= 0
-      s.global_reduce_unit.recv_data.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+      s.send_to_ctrl_ring_pkt.msg @= IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+      for i in range(num_reduce_slots):
+        s.global_reduce_units[i].recv_count.val @= 0
+        s.global_reduce_units[i].recv_count.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        s.global_reduce_units[i].recv_data.val @= 0
+        s.global_reduce_units[i].recv_data.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        s.global_reduce_units[i].recv_result.val @= 0
+        s.global_reduce_units[i].recv_result.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
 
       # For the load request from NoC.
       received_pkt = s.recv_from_inter_cgra_noc.msg
       if s.recv_from_inter_cgra_noc.val:
-        if s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_LOAD_REQUEST:
+        if (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_LOAD_REQUEST) | \
+           (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_DMA_LOAD_REQUEST) | \
+           (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_READ_MEM_STATS):
           s.send_to_mem_load_request_queue.recv.val @= 1
 
           if s.send_to_mem_load_request_queue.recv.rdy:
             s.recv_from_inter_cgra_noc.rdy @= 1
             s.send_to_mem_load_request_queue.recv.msg @= received_pkt
 
-        elif s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_STORE_REQUEST:
+        elif (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_STORE_REQUEST) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_DMA_STORE_REQUEST) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_DMA_STORE_DATA):
           s.send_to_mem_store_request_queue.recv.msg @= received_pkt
           s.send_to_mem_store_request_queue.recv.val @= 1
 
@@ -279,14 +408,16 @@ class ControllerRTL(Component):
                                  s.recv_from_inter_cgra_noc.msg.dst_y, # dst_cgra_y
                                  0, # opaque
                                  0, # vc_id
-                                 s.recv_from_inter_cgra_noc.msg.payload)
+                                 s.recv_from_inter_cgra_noc.msg.payload,
+                                 0) # dst_group
 
           else:
             s.recv_from_inter_cgra_noc.rdy @= s.send_to_tile_load_response_queue.recv.rdy
             s.send_to_tile_load_response_queue.recv.msg @= received_pkt
             s.send_to_tile_load_response_queue.recv.val @= 1
 
-        elif s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_COMPLETE:
+        elif (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_COMPLETE) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CTRL_PATTERN_OVERFLOW):
           s.recv_from_inter_cgra_noc.rdy @= s.send_to_cpu_pkt_queue.recv.rdy
           s.send_to_cpu_pkt_queue.recv.val @= 1
           s.send_to_cpu_pkt_queue.recv.msg @= \
@@ -300,17 +431,38 @@ class ControllerRTL(Component):
                                s.recv_from_inter_cgra_noc.msg.dst_y, # dst_cgra_y
                                0, # opaque
                                0, # vc_id
-                               s.recv_from_inter_cgra_noc.msg.payload)
-
-        elif s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD:
-          s.recv_from_inter_cgra_noc.rdy @= s.global_reduce_unit.recv_data.rdy
-          s.global_reduce_unit.recv_data.val @= 1
-          s.global_reduce_unit.recv_data.msg @= s.recv_from_inter_cgra_noc.msg
+                               s.recv_from_inter_cgra_noc.msg.payload,
+                               0) # dst_group
+
+        elif (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN):
+          for i in range(num_reduce_slots):
+            if s.reduce_slot == ReduceSlotType(i):
+              s.recv_from_inter_cgra_noc.rdy @= s.global_reduce_units[i].recv_data.rdy
+              s.global_reduce_units[i].recv_data.val @= 1
+              s.global_reduce_units[i].recv_data.msg @= s.recv_from_inter_cgra_noc.msg
 
         elif s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_COUNT:
-          s.recv_from_inter_cgra_noc.rdy @= s.global_reduce_unit.recv_count.rdy
-          s.global_reduce_unit.recv_count.val @= 1
-          s.global_reduce_unit.recv_count.msg @= s.recv_from_inter_cgra_noc.msg
+          for i in range(num_reduce_slots):
+            if s.reduce_slot == ReduceSlotType(i):
+              s.recv_from_inter_cgra_noc.rdy @= s.global_reduce_units[i].recv_count.rdy
+              s.global_reduce_units[i].recv_count.val @= 1
+              s.global_reduce_units[i].recv_count.msg @= s.recv_from_inter_cgra_noc.msg
+
+        # The final result from the parent controller in the tree mode.
+        elif s.reduce_in_tree & \
+             (s.recv_from_inter_cgra_noc.msg.dst_tile_id == num_tiles) & \
+             ((s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD_RESPONSE) | \
+              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL_RESPONSE) | \
+              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX_RESPONSE) | \
+              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN_RESPONSE)):
+          for i in range(num_reduce_slots):
+            if s.reduce_slot == ReduceSlotType(i):
+              s.recv_from_inter_cgra_noc.rdy @= s.global_reduce_units[i].recv_result.rdy
+              s.global_reduce_units[i].recv_result.val @= 1
+              s.global_reduce_units[i].recv_result.msg @= s.recv_from_inter_cgra_noc.msg
 
         elif (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
@@ -319,14 +471,29 @@ class ControllerRTL(Component):
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_SHADOW) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_DELTA) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CLEAR_CTRL_PATTERNS) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CLEAR_SHADOW_CTRL_PATTERNS) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_SHADOW_COUNT_PER_ITER) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU_CROSSBAR) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_ROUTING_CROSSBAR) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_SWAP_CTRL_BANK) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONST) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD_RESPONSE) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL_RESPONSE) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX_RESPONSE) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN_RESPONSE) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_PAUSE) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_PRESERVE) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_RESUME) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_RECORD_PHI_ADDR) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_TERMINATE) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_TILE_GROUP) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_READ_PERF_COUNTERS) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_LAUNCH):
           s.recv_from_inter_cgra_noc.rdy @= s.send_to_ctrl_ring_pkt.rdy
           s.send_to_ctrl_ring_pkt.val @= s.recv_from_inter_cgra_noc.val
@@ -341,7 +508,8 @@ class ControllerRTL(Component):
                                s.recv_from_inter_cgra_noc.msg.dst_y, # dst_cgra_y
                                0, # opaque
                                0, # vc_id
-                               s.recv_from_inter_cgra_noc.msg.payload)
+                               s.recv_from_inter_cgra_noc.msg.payload,
+                               s.recv_from_inter_cgra_noc.msg.dst_group)
 
         # else:
         #   # TODO: Handle other cmd types.
@@ -349,21 +517,45 @@ class ControllerRTL(Component):
 
     @update
     def update_sending_to_noc_msg():
-      s.send_to_inter_cgra_noc.val @= s.crossbar.send[0].val
-      s.crossbar.send[0].rdy @= s.send_to_inter_cgra_noc.rdy
-      s.send_to_inter_cgra_noc.msg @= s.crossbar.send[0].msg.inter_cgra_pkt
-      # addr_dst_id = 0
-      if (s.crossbar.send[0].msg.inter_cgra_pkt.payload.cmd == CMD_LOAD_REQUEST) | \
-         (s.crossbar.send[0].msg.inter_cgra_pkt.payload.cmd == CMD_STORE_REQUEST):
-        s.send_to_inter_cgra_noc.msg.dst @= s.addr_dst_id
-        s.send_to_inter_cgra_noc.msg.dst_x @= s.idTo2d_x_lut[s.addr_dst_id]
-        s.send_to_inter_cgra_noc.msg.dst_y @= s.idTo2d_y_lut[s.addr_dst_id]
+      for p in range(num_noc_ports):
+        s.noc_send_val[p] @= s.crossbar.send[p].val
+        s.crossbar.send[p].rdy @= s.noc_send_rdy[p]
+        s.noc_send_msg[p] @= s.crossbar.send[p].msg.inter_cgra_pkt
+        # addr_dst_id = 0
+        if (s.crossbar.send[p].msg.inter_cgra_pkt.payload.cmd == CMD_LOAD_REQUEST) | \
+           (s.crossbar.send[p].msg.inter_cgra_pkt.payload.cmd == CMD_STORE_REQUEST) | \
+           (s.crossbar.send[p].msg.inter_cgra_pkt.payload.cmd == CMD_DMA_LOAD_REQUEST) | \
+           (s.crossbar.send[p].msg.inter_cgra_pkt.payload.cmd == CMD_DMA_STORE_REQUEST):
+          s.noc_send_msg[p].dst @= s.addr_dst_id[p]
+          s.noc_send_msg[p].dst_x @= s.idTo2d_x_lut[s.addr_dst_id[p]]
+          s.noc_send_msg[p].dst_y @= s.idTo2d_y_lut[s.addr_dst_id[p]]
+        elif s.crossbar.send[p].msg.inter_cgra_pkt.payload.cmd == CMD_DMA_STORE_DATA:
+          s.noc_send_msg[p].dst @= s.dma_dst_id[p]
+          s.noc_send_msg[p].dst_x @= s.idTo2d_x_lut[s.dma_dst_id[p]]
+          s.noc_send_msg[p].dst_y @= s.idTo2d_y_lut[s.dma_dst_id[p]]
 
     @update
     def capture_addr_dst_id():
-      s.addr_dst_id @= s.addr2controller_lut[trunc(s.crossbar.send[0].msg.inter_cgra_pkt.payload.data_addr >> addr_offset_nbits, CgraIdType)]
+      for p in range(num_noc_ports):
+        s.addr_dst_id[p] @= s.addr2controller_lut[trunc(s.crossbar.send[p].msg.inter_cgra_pkt.payload.data_addr >> addr_offset_nbits, CgraIdType)]
+
+    # The DMA store words follow their request from the CPU in order (via
+    # the same injection port), so they go to the CGRA owning the base
+    # address of the request.
+    @update_ff
+    def update_dma_dst_id():
+      for p in range(num_noc_ports):
+        if s.reset:
+          s.dma_dst_id[p] <<= 0
+        elif s.crossbar.send[p].val & s.noc_send_rdy[p] & \
+             (s.crossbar.send[p].msg.inter_cgra_pkt.payload.cmd == CMD_DMA_STORE_REQUEST):
+          s.dma_dst_id[p] <<= s.addr_dst_id[p]
 
   def line_trace(s):
+    if trace_is_off():
+      return ""
+    if trace_is_summary():
+      return f"cpu: {int(s.recv_from_cpu_pkt.val)}/{int(s.recv_from_cpu_pkt.rdy)}, ring: {int(s.send_to_ctrl_ring_pkt.val)}/{int(s.send_to_ctrl_ring_pkt.rdy)}, noc_in: {int(s.recv_from_inter_cgra_noc.val)}/{int(s.recv_from_inter_cgra_noc.rdy)}, noc_out: {int(s.send_to_inter_cgra_noc.val)}/{int(s.send_to_inter_cgra_noc.rdy)}"
     recv_from_cpu_pkt_str = "recv_from_cpu_pkt: " + str(s.recv_from_cpu_pkt.msg)
     recv_from_cpu_pkt_queue_str = "recv_from_cpu_pkt_queue.send: " + str(s.recv_from_cpu_pkt_queue.send.msg)
     crossbar_recv_str = "crossbar_recv.val:" + str(s.crossbar.recv[3].val) + " crossbar_recv.rdy:" + str(s.crossbar.recv[3].rdy) + " crossbar_recv.msg: " + str(s.crossbar.recv[3].msg)
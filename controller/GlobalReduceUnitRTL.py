@@ -6,6 +6,15 @@ A global reduce unit to record the count that data needs to be reduced,
 and received the corresponding data. The unit will send the reduced data
 back to the controller.
 
+The operation (i.e., add, mul, max, or min) follows the cmd of the
+received data, and max/min compare the payloads as signed (i.e., two's
+complement) values.
+
+Unless the unit is the root (is_root) of a reduction tree, once all the
+data are received, it sends the partial result (with the cmd and the
+src/dst of the first received data) to the parent, and waits for the
+final result (recv_result) before sending it back to the participants.
+
 Author : Cheng Tan
   Date : Sep 8, 2025
 '''
@@ -25,11 +34,18 @@ class GlobalReduceUnitRTL(Component):
 
     CgraPayloadType = InterCgraPktType.get_field_type(kAttrPayload)
     DataType = CgraPayloadType.get_field_type(kAttrData)
+    PayloadType = DataType.get_field_type(kAttrPayload)
+    # Flipping the sign bit turns the signed comparison into an unsigned
+    # one.
+    sign_bit = PayloadType(1 << (PayloadType.nbits - 1))
+    max_signed_payload = (1 << (PayloadType.nbits - 1)) - 1
     ControllerXbarPktType = mk_controller_noc_xbar_pkt(InterCgraPktType)
     # Interfaces.
     s.recv_count = RecvIfcRTL(InterCgraPktType)
     s.recv_data = RecvIfcRTL(InterCgraPktType)
     s.send = SendIfcRTL(ControllerXbarPktType)
+    s.is_root = InPort(1)
+    s.recv_result = RecvIfcRTL(InterCgraPktType)
 
     # Components
     s.queue = NormalQueueRTL(InterCgraPktType, 16)
@@ -38,6 +54,13 @@ class GlobalReduceUnitRTL(Component):
     s.sending_count = Wire(DataType)
     s.reduce_add_value = Wire(DataType)
     s.reduce_mul_value = Wire(DataType)
+    s.reduce_max_value = Wire(DataType)
+    s.reduce_min_value = Wire(DataType)
+    s.reduce_value = Wire(DataType)
+    s.received_all = Wire(1)
+    s.partial_sent = Wire(1)
+    s.result_val = Wire(1)
+    s.result = Wire(DataType)
 
     # Connections.
     s.recv_count.rdy //= 1
@@ -46,7 +69,7 @@ class GlobalReduceUnitRTL(Component):
     def set_recv_rdy():
       s.recv_data.rdy @= 0
       s.queue.recv.val @= 0
-      s.queue.recv.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+      s.queue.recv.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
       if s.target_count.payload > s.receiving_count.payload:
         s.recv_data.rdy @= s.queue.recv.rdy
         s.queue.recv.msg @= s.recv_data.msg
@@ -63,7 +86,8 @@ class GlobalReduceUnitRTL(Component):
           s.target_count <<= DataType(s.recv_count.msg.payload.data.payload, 0, 0, 0)
         if s.recv_data.val & s.recv_data.rdy:
           s.receiving_count <<= DataType(s.receiving_count.payload + 1, 0, 0, 0)
-        if s.send.rdy & s.send.val:
+        # The partial result towards the parent is not a response.
+        if s.send.rdy & s.send.val & (s.is_root | s.partial_sent):
           s.sending_count <<= DataType(s.sending_count.payload + 1, 0, 0, 0)
         elif (s.sending_count == s.receiving_count) & \
              (s.sending_count == s.target_count) & \
@@ -71,19 +95,48 @@ class GlobalReduceUnitRTL(Component):
           s.sending_count <<= DataType(0, 0, 0, 0)
           s.receiving_count <<= DataType(0, 0, 0, 0)
 
+    @update
+    def update_reduce_value():
+      s.received_all @= (s.target_count.payload > 0) & \
+                        (s.receiving_count.payload == s.target_count.payload)
+      s.reduce_value @= s.reduce_add_value
+      if s.queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL:
+        s.reduce_value @= s.reduce_mul_value
+      elif s.queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX:
+        s.reduce_value @= s.reduce_max_value
+      elif s.queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN:
+        s.reduce_value @= s.reduce_min_value
+
     @update
     def update_send():
       s.send.msg @= ControllerXbarPktType(0, 0)
       s.send.val @= 0
       s.queue.send.rdy @= 0
-      if (s.target_count.payload > 0) & (s.receiving_count.payload == s.target_count.payload):
+      s.recv_result.rdy @= 0
+      if s.received_all & ~s.is_root & ~s.partial_sent:
+        # Sends the partial result towards the parent, the dst is
+        # updated by the controller.
+        s.send.msg.inter_cgra_pkt @= s.queue.send.msg
+        s.send.msg.inter_cgra_pkt.payload.data @= s.reduce_value
+        s.send.val @= s.queue.send.val
+      elif s.received_all & ~s.is_root & ~s.result_val:
+        s.recv_result.rdy @= 1
+      elif s.received_all:
         # Updates the cmd type, result value, and src/dst.
         if s.queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD:
           s.send.msg.inter_cgra_pkt.payload.cmd @= CMD_GLOBAL_REDUCE_ADD_RESPONSE
-          s.send.msg.inter_cgra_pkt.payload.data @= s.reduce_add_value
         elif s.queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL:
           s.send.msg.inter_cgra_pkt.payload.cmd @= CMD_GLOBAL_REDUCE_MUL_RESPONSE
-          s.send.msg.inter_cgra_pkt.payload.data @= s.reduce_mul_value
+        elif s.queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX:
+          s.send.msg.inter_cgra_pkt.payload.cmd @= CMD_GLOBAL_REDUCE_MAX_RESPONSE
+        elif s.queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN:
+          s.send.msg.inter_cgra_pkt.payload.cmd @= CMD_GLOBAL_REDUCE_MIN_RESPONSE
+        if s.is_root:
+          s.send.msg.inter_cgra_pkt.payload.data @= s.reduce_value
+        else:
+          s.send.msg.inter_cgra_pkt.payload.data @= s.result
+        # Keeps the reduction id.
+        s.send.msg.inter_cgra_pkt.payload.data_addr @= s.queue.send.msg.payload.data_addr
         s.send.msg.inter_cgra_pkt.src @= s.queue.send.msg.dst
         s.send.msg.inter_cgra_pkt.dst @= s.queue.send.msg.src
         s.send.msg.inter_cgra_pkt.src_x @= s.queue.send.msg.dst_x
@@ -95,11 +148,27 @@ class GlobalReduceUnitRTL(Component):
         s.queue.send.rdy @= s.send.rdy
         s.send.val @= s.queue.send.val
 
+    @update_ff
+    def update_tree_state():
+      if s.reset | ((s.sending_count == s.target_count) & \
+                    (s.target_count.payload > 0)):
+        s.partial_sent <<= 0
+        s.result_val <<= 0
+        s.result <<= DataType(0, 0, 0, 0)
+      else:
+        if s.send.val & s.send.rdy & ~s.is_root & ~s.partial_sent:
+          s.partial_sent <<= 1
+        if s.recv_result.val & s.recv_result.rdy:
+          s.result_val <<= 1
+          s.result <<= s.recv_result.msg.payload.data
+
     @update_ff
     def accumulate_value():
       if s.reset | (s.sending_count == s.target_count):
         s.reduce_add_value <<= DataType(0, 0, 0, 0)
         s.reduce_mul_value <<= DataType(1, 0, 0, 0)
+        s.reduce_max_value <<= DataType(sign_bit, 0, 0, 0)
+        s.reduce_min_value <<= DataType(max_signed_payload, 0, 0, 0)
       else:
         if s.recv_data.val & \
            s.recv_data.rdy:
@@ -113,6 +182,30 @@ class GlobalReduceUnitRTL(Component):
                                             s.recv_data.msg.payload.data.predicate,
                                             0,
                                             0)
+          elif s.recv_data.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX:
+            if (s.recv_data.msg.payload.data.payload ^ sign_bit) > \
+               (s.reduce_max_value.payload ^ sign_bit):
+              s.reduce_max_value <<= DataType(s.recv_data.msg.payload.data.payload,
+                                              s.recv_data.msg.payload.data.predicate,
+                                              0,
+                                              0)
+            else:
+              s.reduce_max_value <<= DataType(s.reduce_max_value.payload,
+                                              s.recv_data.msg.payload.data.predicate,
+                                              0,
+                                              0)
+          elif s.recv_data.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN:
+            if (s.recv_data.msg.payload.data.payload ^ sign_bit) < \
+               (s.reduce_min_value.payload ^ sign_bit):
+              s.reduce_min_value <<= DataType(s.recv_data.msg.payload.data.payload,
+                                              s.recv_data.msg.payload.data.predicate,
+                                              0,
+                                              0)
+            else:
+              s.reduce_min_value <<= DataType(s.reduce_min_value.payload,
+                                              s.recv_data.msg.payload.data.predicate,
+                                              0,
+                                              0)
 
   def line_trace( s ):
     input_str = 'count:' + str(s.recv_count) + ', data:' + str(s.recv_data) + ", receiving_count:" + str(s.receiving_count)
@@ -0,0 +1,155 @@
+"""
+==========================================================================
+NocArbiterRTL.py
+==========================================================================
+Arbiter of the packets from the controller towards the inter-CGRA NoC,
+i.e., the alternative of the controller crossbar (XbarRTL) with the
+same interfaces. Each outport (i.e., injection port, indicated by the
+dst of the packets) is arbitrated independently, according to the
+policy (see NOC_ARBITER_* in common.py) and the traffic class of each
+inport (see NOC_CLASS_*):
+  - the inports of the highest class (fixed priority ranks the inports
+    of the same class by their index) among the requesting ones are
+    eligible;
+  - the eligible inports take turns from the round robin pointer, and
+    an inport keeps the pointer till it is granted for its weight in a
+    row (weighted round robin only, otherwise the weight is 1).
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from ..lib.basic.val_rdy.ifcs import RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import SendIfcRTL
+from ..lib.util.common import *
+from ..lib.util.data_struct_attr import *
+
+class NocArbiterRTL(Component):
+
+  def construct(s, PktType, num_inports, num_outports, policy,
+                inport_classes, weights = None):
+
+    assert(policy in NOC_ARBITERS)
+    assert(len(inport_classes) == num_inports)
+    if weights is None:
+      weights = [NOC_CLASS_WEIGHTS[inport_class]
+                 if policy == NOC_ARBITER_WEIGHTED_ROUND_ROBIN else 1
+                 for inport_class in inport_classes]
+    assert(len(weights) == num_inports)
+    assert(min(weights) >= 1)
+    if policy == NOC_ARBITER_FIXED_PRIORITY:
+      ranks = [inport_class * num_inports + i
+               for i, inport_class in enumerate(inport_classes)]
+    elif policy == NOC_ARBITER_VC_CLASSES:
+      ranks = list(inport_classes)
+    else:
+      ranks = [0 for _ in range(num_inports)]
+
+    # Constants.
+    InportType = mk_bits(max(clog2(num_inports), 1))
+    RankType = mk_bits(max(clog2(max(ranks) + 1), 1))
+    WeightType = mk_bits(clog2(max(weights) + 1))
+    DstType = PktType.get_field_type(kAttrDst)
+    s.policy = policy
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PktType) for _ in range(num_inports)]
+    s.send = [SendIfcRTL(PktType) for _ in range(num_outports)]
+
+    # Static rank (lower goes first) and weight of each inport.
+    s.rank = [Wire(RankType) for _ in range(num_inports)]
+    s.weight = [Wire(WeightType) for _ in range(num_inports)]
+    for i in range(num_inports):
+      s.rank[i] //= RankType(ranks[i])
+      s.weight[i] //= WeightType(weights[i])
+
+    # Arbitration of each outport.
+    s.req = [[Wire(1) for _ in range(num_inports)]
+             for _ in range(num_outports)]
+    s.eligible = [[Wire(1) for _ in range(num_inports)]
+                  for _ in range(num_outports)]
+    s.has_req = [Wire(1) for _ in range(num_outports)]
+    s.top_rank = [Wire(RankType) for _ in range(num_outports)]
+    s.grant_val = [Wire(1) for _ in range(num_outports)]
+    s.grant = [Wire(InportType) for _ in range(num_outports)]
+    s.grant_from_ptr = [Wire(1) for _ in range(num_outports)]
+    s.grant_weight = [Wire(WeightType) for _ in range(num_outports)]
+    s.grant_count = [Wire(WeightType) for _ in range(num_outports)]
+    s.ptr = [Wire(InportType) for _ in range(num_outports)]
+    s.served = [Wire(WeightType) for _ in range(num_outports)]
+
+    @update
+    def arbitrate():
+      for o in range(num_outports):
+        s.has_req[o] @= 0
+        s.top_rank[o] @= 0
+        for i in range(num_inports):
+          s.req[o][i] @= s.recv[i].val & (s.recv[i].msg.dst == DstType(o))
+          if s.req[o][i] & (~s.has_req[o] | (s.rank[i] < s.top_rank[o])):
+            s.top_rank[o] @= s.rank[i]
+          if s.req[o][i]:
+            s.has_req[o] @= 1
+
+        for i in range(num_inports):
+          s.eligible[o][i] @= s.req[o][i] & (s.rank[i] == s.top_rank[o])
+
+        # The first eligible inport from the pointer, otherwise the first
+        # eligible one.
+        s.grant_val[o] @= 0
+        s.grant[o] @= 0
+        for i in range(num_inports):
+          if s.eligible[o][i] & ~s.grant_val[o]:
+            s.grant_val[o] @= 1
+            s.grant[o] @= InportType(i)
+        s.grant_from_ptr[o] @= 0
+        for i in range(num_inports):
+          if s.eligible[o][i] & (InportType(i) >= s.ptr[o]) & \
+             ~s.grant_from_ptr[o]:
+            s.grant_from_ptr[o] @= 1
+            s.grant[o] @= InportType(i)
+
+        s.grant_weight[o] @= 1
+        for i in range(num_inports):
+          if s.grant[o] == InportType(i):
+            s.grant_weight[o] @= s.weight[i]
+        s.grant_count[o] @= 1
+        if s.grant[o] == s.ptr[o]:
+          s.grant_count[o] @= s.served[o] + WeightType(1)
+
+    @update
+    def update_send_recv():
+      for o in range(num_outports):
+        s.send[o].val @= s.grant_val[o]
+        s.send[o].msg @= s.recv[0].msg
+        for i in range(num_inports):
+          if s.grant[o] == InportType(i):
+            s.send[o].msg @= s.recv[i].msg
+      for i in range(num_inports):
+        s.recv[i].rdy @= 0
+        for o in range(num_outports):
+          if s.grant_val[o] & (s.grant[o] == InportType(i)):
+            s.recv[i].rdy @= s.send[o].rdy
+
+    @update_ff
+    def update_ptr():
+      for o in range(num_outports):
+        if s.reset:
+          s.ptr[o] <<= 0
+          s.served[o] <<= 0
+        elif s.send[o].val & s.send[o].rdy:
+          if s.grant_count[o] < s.grant_weight[o]:
+            s.ptr[o] <<= s.grant[o]
+            s.served[o] <<= s.grant_count[o]
+          elif s.grant[o] == InportType(num_inports - 1):
+            s.ptr[o] <<= 0
+            s.served[o] <<= 0
+          else:
+            s.ptr[o] <<= s.grant[o] + InportType(1)
+            s.served[o] <<= 0
+
+  def line_trace(s):
+    recv_str = "|".join([str(int(recv.val)) for recv in s.recv])
+    send_str = "|".join([f"{int(grant)}" if int(send.val) else "."
+                         for send, grant in zip(s.send, s.grant)])
+    return f"{recv_str}->({send_str})"
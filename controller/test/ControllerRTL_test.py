@@ -8,6 +8,7 @@ Author : Cheng Tan
   Date : Dec 15, 2024
 '''
 
+import pytest
 from pymtl3.stdlib.test_utils import config_model_with_cmdline_opts
 
 from ..ControllerRTL import ControllerRTL
@@ -15,6 +16,7 @@ from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.line_trace_helper import print_line_trace
 
 
 #-------------------------------------------------------------------------
@@ -39,7 +41,10 @@ class TestHarness(Component):
                 num_rd_tiles,
                 num_cgra_columns,
                 num_cgra_rows,
-                num_tiles):
+                num_tiles,
+                global_reduce = GLOBAL_REDUCE_CENTRALIZED,
+                noc_arbiter = NOC_ARBITER_ROUND_ROBIN,
+                to_noc_cmp_fn = lambda a, b : a == b):
 
     num_cgras = num_cgra_columns * num_cgra_rows
     PktType = mk_inter_cgra_pkt(num_cgra_columns,
@@ -63,14 +68,17 @@ class TestHarness(Component):
     s.sink_to_mem_store_request = TestSinkRTL(PktType, expected_to_mem_store_request_msgs, cmp_fn = cmp_fn)
 
     s.src_from_noc = TestSrcRTL(PktType, from_noc_pkts)
-    s.sink_to_noc = TestSinkRTL(PktType, expected_to_noc_pkts)
+    s.sink_to_noc = TestSinkRTL(PktType, expected_to_noc_pkts,
+                                cmp_fn = to_noc_cmp_fn)
 
     s.dut = ControllerRTL(PktType,
                           1, # Number of controllers globally (x/y dimension).
                           num_cgras,
                           num_tiles,
                           controller2addr_map,
-                          idTo2d_map)
+                          idTo2d_map,
+                          global_reduce = global_reduce,
+                          noc_arbiter = noc_arbiter)
 
     # Connections
     s.dut.cgra_id //= cgra_id
@@ -118,12 +126,11 @@ def run_sim(test_harness, max_cycles = 20):
 
   # Run simulation
   ncycles = 0
-  print()
-  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  print_line_trace(ncycles, test_harness)
   while not test_harness.done() and ncycles < max_cycles:
     test_harness.sim_tick()
     ncycles += 1
-    print("{}:{}".format(ncycles, test_harness.line_trace()))
+    print_line_trace(ncycles, test_harness)
 
   # Check timeout
   assert ncycles < max_cycles
@@ -261,8 +268,15 @@ expected_to_noc_pkts = [
     InterCgraPktType(0,   3,  0,    0,    3,    0,    0,       0,    0, 0,  0, CgraPayloadType(CMD_STORE_REQUEST, data = DataType(150, 1), data_addr = 15)),
 ]
 
-def test_simple(cmdline_opts):
+# The traffic classes must not leak into the vc_id of the outgoing
+# packets, which is owned by the NoC (e.g., the dateline of the ring).
+# The other arbiters reorder the classes, so only the vc_id is checked.
+@pytest.mark.parametrize('noc_arbiter', NOC_ARBITERS)
+def test_simple(cmdline_opts, noc_arbiter):
   print("[LOG] controller2addr_map: ", controller2addr_map)
+  to_noc_cmp_fn = lambda a, b : a == b
+  if noc_arbiter != NOC_ARBITER_ROUND_ROBIN:
+    to_noc_cmp_fn = lambda a, b : a.vc_id == b.vc_id
   th = TestHarness(CgraPayloadType,
                    cgra_id,
                    from_tile_load_request_pkts,
@@ -278,8 +292,86 @@ def test_simple(cmdline_opts):
                    num_rd_tiles,
                    num_cgra_columns,
                    num_cgra_rows,
+                   num_tiles,
+                   noc_arbiter = noc_arbiter,
+                   to_noc_cmp_fn = to_noc_cmp_fn)
+  th.elaborate()
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+
+def test_concurrent_global_reduce(cmdline_opts):
+  # Two reductions (ids 0 and 1 in data_addr) are in flight at the same
+  # time, each with its own count and operation.
+  from_noc_pkts = [
+                     # src  dst src_x src_y dst_x dst_y src_tile dst_tile opq vc                 cmd
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    4,       0,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_COUNT, data = DataType(2, 1), data_addr = 0)),
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    4,       0,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_COUNT, data = DataType(2, 1), data_addr = 1)),
+      InterCgraPktType(1,   0,  1,    0,    0,    0,    2,       0,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD,   data = DataType(5, 1), data_addr = 0)),
+      InterCgraPktType(2,   0,  2,    0,    0,    0,    0,       0,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_MAX,   data = DataType(9, 1), data_addr = 1)),
+      InterCgraPktType(1,   0,  1,    0,    0,    0,    3,       0,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_MAX,   data = DataType(4, 1), data_addr = 1)),
+      InterCgraPktType(3,   0,  3,    0,    0,    0,    1,       0,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD,   data = DataType(7, 1), data_addr = 0)),
+  ]
+
+  # The reduction 1 completes first and starts sending back its responses
+  # without waiting for the reduction 0, then both drain in turn.
+  expected_to_noc_pkts = [
+                     # src  dst src_x src_y dst_x dst_y src_tile dst_tile opq vc                 cmd
+      InterCgraPktType(0,   2,  0,    0,    2,    0,    0,       0,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_MAX_RESPONSE, data = DataType(9,  1), data_addr = 1)),
+      InterCgraPktType(0,   1,  0,    0,    1,    0,    0,       2,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD_RESPONSE, data = DataType(12, 1), data_addr = 0)),
+      InterCgraPktType(0,   1,  0,    0,    1,    0,    0,       3,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_MAX_RESPONSE, data = DataType(9,  1), data_addr = 1)),
+      InterCgraPktType(0,   3,  0,    0,    3,    0,    0,       1,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD_RESPONSE, data = DataType(12, 1), data_addr = 0)),
+  ]
+
+  th = TestHarness(CgraPayloadType,
+                   cgra_id,
+                   [], [], [], [], [], [],
+                   from_noc_pkts,
+                   expected_to_noc_pkts,
+                   controller2addr_map,
+                   idTo2d_map,
+                   num_rd_tiles,
+                   num_cgra_columns,
+                   num_cgra_rows,
                    num_tiles)
   th.elaborate()
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
 
+
+def test_tree_global_reduce(cmdline_opts):
+  # In the tree mode, the cgra 2 merges the data of its local tile 1
+  # (looped back via NoC) and the partial result of its child cgra 3,
+  # forwards the partial result to its parent cgra 0, and then sends the
+  # final result from the cgra 0 back to both.
+  cgra_id = 2
+  from_noc_pkts = [
+                     # src  dst src_x src_y dst_x dst_y src_tile dst_tile opq vc                 cmd
+      InterCgraPktType(0,   2,  0,    0,    2,    0,    4,       0,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_COUNT, data = DataType(2, 1), data_addr = 0)),
+      InterCgraPktType(2,   2,  2,    0,    2,    0,    1,       4,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD,   data = DataType(10, 1), data_addr = 0)),
+      InterCgraPktType(3,   2,  3,    0,    2,    0,    4,       4,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD,   data = DataType(20, 1), data_addr = 0)),
+      InterCgraPktType(0,   2,  0,    0,    2,    0,    4,       4,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD_RESPONSE, data = DataType(60, 1), data_addr = 0)),
+  ]
+
+  expected_to_noc_pkts = [
+                     # src  dst src_x src_y dst_x dst_y src_tile dst_tile opq vc                 cmd
+      InterCgraPktType(2,   0,  2,    0,    0,    0,    4,       4,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD,          data = DataType(30, 1), data_addr = 0)),
+      InterCgraPktType(2,   2,  2,    0,    2,    0,    4,       1,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD_RESPONSE, data = DataType(60, 1), data_addr = 0)),
+      InterCgraPktType(2,   3,  2,    0,    3,    0,    4,       4,       0,  0, 0, CgraPayloadType(CMD_GLOBAL_REDUCE_ADD_RESPONSE, data = DataType(60, 1), data_addr = 0)),
+  ]
+
+  th = TestHarness(CgraPayloadType,
+                   cgra_id,
+                   [], [], [], [], [], [],
+                   from_noc_pkts,
+                   expected_to_noc_pkts,
+                   controller2addr_map,
+                   idTo2d_map,
+                   num_rd_tiles,
+                   num_cgra_columns,
+                   num_cgra_rows,
+                   num_tiles,
+                   global_reduce = GLOBAL_REDUCE_TREE)
+  th.elaborate()
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
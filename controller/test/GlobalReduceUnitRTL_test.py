@@ -8,6 +8,8 @@ Author : Cheng Tan
   Date : Sep 8, 2025
 '''
 
+import pytest
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
 from pymtl3.stdlib.test_utils import config_model_with_cmdline_opts
 
 from ..GlobalReduceUnitRTL import GlobalReduceUnitRTL
@@ -16,6 +18,7 @@ from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.cmd_type import *
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.line_trace_helper import print_line_trace
 
 #-------------------------------------------------------------------------
 # TestHarness
@@ -24,11 +27,13 @@ from ...lib.opt_type import *
 class TestHarness(Component):
 
   def construct(s, InterCgraPktType,
-                input_count, input_data, expected_output):
+                input_count, input_data, expected_output,
+                is_root = 1, input_result = []):
 
     ControllerXbarPktType = mk_controller_noc_xbar_pkt(InterCgraPktType)
     s.src_count = TestSrcRTL(InterCgraPktType, input_count)
     s.src_data = TestSrcRTL(InterCgraPktType, input_data)
+    s.src_result = TestSrcRTL(InterCgraPktType, input_result)
 
     s.sink = TestSinkRTL(ControllerXbarPktType, expected_output)
 
@@ -38,10 +43,13 @@ class TestHarness(Component):
     s.dut.recv_count //= s.src_count.send
     s.dut.recv_data //= s.src_data.send
     s.dut.send //= s.sink.recv
+    s.dut.recv_result //= s.src_result.send
+    s.dut.is_root //= is_root
 
   def done(s):
     return s.src_count.done()  and \
            s.src_data.done() and \
+           s.src_result.done() and \
            s.sink.done()
 
   def line_trace(s):
@@ -60,12 +68,11 @@ def run_sim(test_harness, max_cycles = 100):
 
   # Runs simulation.
   ncycles = 0
-  print()
-  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  print_line_trace(ncycles, test_harness)
   while not test_harness.done() and ncycles < max_cycles:
     test_harness.sim_tick()
     ncycles += 1
-    print("{}:{}".format(ncycles, test_harness.line_trace()))
+    print_line_trace(ncycles, test_harness)
 
   # Checks timeout.
   assert ncycles < max_cycles
@@ -174,3 +181,126 @@ def test_simple(cmdline_opts):
   th.elaborate()
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
+
+# The payloads are compared as signed values.
+@pytest.mark.parametrize('a, b', [(4, 9), (-1, 3), (-7, -2)])
+def test_max_min(a, b, cmdline_opts):
+  num_cgra_columns = 4
+  num_cgra_rows = 1
+  num_tiles = 4
+  num_rd_tiles = 3
+
+  DataType = mk_data(32, 1)
+  DataAddrType = mk_bits(clog2(16))
+  CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+  CtrlAddrType = mk_bits(clog2(16))
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+  InterCgraPktType = mk_inter_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       num_rd_tiles,
+                                       CgraPayloadType)
+  ControllerXbarPktType = mk_controller_noc_xbar_pkt(InterCgraPktType)
+
+  input_count = [
+    InterCgraPktType(payload = CgraPayloadType(CMD_GLOBAL_REDUCE_COUNT, data = DataType(2, 0, 0, 0), data_addr = 3)),
+  ]
+
+  input_data = [
+                   # src dst src_x src_y dst_x dst_y src_tile_id dst_tile_id
+    InterCgraPktType(1, 0, 1, 0, 0, 0, 2, 4, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_MAX, data = DataType(a, 1, 0, 0), data_addr = 3)),
+    InterCgraPktType(2, 0, 2, 0, 0, 0, 3, 4, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_MAX, data = DataType(b, 1, 0, 0), data_addr = 3)),
+    InterCgraPktType(1, 0, 1, 0, 0, 0, 2, 4, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_MIN, data = DataType(a, 1, 0, 0), data_addr = 3)),
+    InterCgraPktType(2, 0, 2, 0, 0, 0, 3, 4, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_MIN, data = DataType(b, 1, 0, 0), data_addr = 3)),
+  ]
+
+  expected_output = [
+                                                          # Reversed src/dst, same reduction id.
+    ControllerXbarPktType(inter_cgra_pkt = InterCgraPktType(0, 1, 0, 0, 1, 0, 4, 2, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_MAX_RESPONSE, data = DataType(max(a, b), 1, 0, 0), data_addr = 3))),
+    ControllerXbarPktType(inter_cgra_pkt = InterCgraPktType(0, 2, 0, 0, 2, 0, 4, 3, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_MAX_RESPONSE, data = DataType(max(a, b), 1, 0, 0), data_addr = 3))),
+    ControllerXbarPktType(inter_cgra_pkt = InterCgraPktType(0, 1, 0, 0, 1, 0, 4, 2, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_MIN_RESPONSE, data = DataType(min(a, b), 1, 0, 0), data_addr = 3))),
+    ControllerXbarPktType(inter_cgra_pkt = InterCgraPktType(0, 2, 0, 0, 2, 0, 4, 3, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_MIN_RESPONSE, data = DataType(min(a, b), 1, 0, 0), data_addr = 3))),
+  ]
+
+  th = TestHarness(InterCgraPktType,
+                   input_count,
+                   input_data,
+                   expected_output)
+  th.elaborate()
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+def test_tree_node(cmdline_opts):
+  num_cgra_columns = 4
+  num_cgra_rows = 1
+  num_tiles = 4
+  num_rd_tiles = 3
+
+  DataType = mk_data(32, 1)
+  DataAddrType = mk_bits(clog2(16))
+  CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+  CtrlAddrType = mk_bits(clog2(16))
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+  InterCgraPktType = mk_inter_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       num_rd_tiles,
+                                       CgraPayloadType)
+  ControllerXbarPktType = mk_controller_noc_xbar_pkt(InterCgraPktType)
+
+  # Merges a local tile and a child (cgra 3), i.e., the unit of cgra 2.
+  input_count = [
+    InterCgraPktType(payload = CgraPayloadType(CMD_GLOBAL_REDUCE_COUNT, data = DataType(2, 0, 0, 0), data_addr = 1)),
+  ]
+
+  input_data = [
+                   # src dst src_x src_y dst_x dst_y src_tile_id dst_tile_id
+    InterCgraPktType(2, 2, 2, 0, 2, 0, 1, 4, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_ADD, data = DataType(4, 1, 0, 0), data_addr = 1)),
+    InterCgraPktType(3, 2, 3, 0, 2, 0, 4, 4, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_ADD, data = DataType(6, 1, 0, 0), data_addr = 1)),
+  ]
+
+  # The final result from the parent.
+  input_result = [
+    InterCgraPktType(0, 2, 0, 0, 2, 0, 4, 4, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_ADD_RESPONSE, data = DataType(30, 1, 0, 0), data_addr = 1)),
+  ]
+
+  expected_output = [
+    # The partial result, with the src/dst of the first received data.
+    ControllerXbarPktType(inter_cgra_pkt = InterCgraPktType(2, 2, 2, 0, 2, 0, 1, 4, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_ADD, data = DataType(10, 1, 0, 0), data_addr = 1))),
+    # The final result towards the participants.
+    ControllerXbarPktType(inter_cgra_pkt = InterCgraPktType(2, 2, 2, 0, 2, 0, 4, 1, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_ADD_RESPONSE, data = DataType(30, 1, 0, 0), data_addr = 1))),
+    ControllerXbarPktType(inter_cgra_pkt = InterCgraPktType(2, 3, 2, 0, 3, 0, 4, 4, payload = CgraPayloadType(CMD_GLOBAL_REDUCE_ADD_RESPONSE, data = DataType(30, 1, 0, 0), data_addr = 1))),
+  ]
+
+  th = TestHarness(InterCgraPktType,
+                   input_count,
+                   input_data,
+                   expected_output,
+                   is_root = 0,
+                   input_result = input_result)
+  th.elaborate()
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+def test_translate(tmp_path, monkeypatch):
+  DataType = mk_data(32, 1)
+  CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, mk_bits(4), CtrlType,
+                                    mk_bits(4))
+  InterCgraPktType = mk_inter_cgra_pkt(4, 1, 4, 3, CgraPayloadType)
+  monkeypatch.chdir(tmp_path)
+  dut = GlobalReduceUnitRTL(InterCgraPktType)
+  dut.set_metadata(VerilogTranslationPass.explicit_module_name,
+                   'GlobalReduceUnitRTL')
+  dut.elaborate()
+  dut.set_metadata(VerilogTranslationPass.enable, True)
+  dut.apply(VerilogTranslationPass())
+  with open(dut.get_metadata(
+      VerilogTranslationPass.translated_filename)) as f:
+    assert 'module GlobalReduceUnitRTL' in f.read()
@@ -0,0 +1,163 @@
+'''
+=========================================================================
+NocArbiterRTL_test.py
+=========================================================================
+Test for NocArbiterRTL with each arbitration policy.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+'''
+
+import pytest
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
+from pymtl3.stdlib.test_utils import config_model_with_cmdline_opts
+
+from ..NocArbiterRTL import NocArbiterRTL
+from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.messages import *
+from ...lib.opt_type import *
+from ...lib.util.line_trace_helper import print_line_trace
+
+#-------------------------------------------------------------------------
+# TestHarness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, PktType, num_outports, policy, inport_classes,
+                src_msgs, sink_msgs, weights = None):
+
+    num_inports = len(inport_classes)
+    s.srcs = [TestSrcRTL(PktType, src_msgs[i])
+              for i in range(num_inports)]
+    s.sinks = [TestSinkRTL(PktType, sink_msgs[o])
+               for o in range(num_outports)]
+
+    s.dut = NocArbiterRTL(PktType, num_inports, num_outports, policy,
+                          inport_classes, weights)
+
+    # Connections
+    for i in range(num_inports):
+      s.srcs[i].send //= s.dut.recv[i]
+    for o in range(num_outports):
+      s.dut.send[o] //= s.sinks[o].recv
+
+  def done(s):
+    return all(src.done() for src in s.srcs) and \
+           all(sink.done() for sink in s.sinks)
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+#-------------------------------------------------------------------------
+# run_rtl_sim
+#-------------------------------------------------------------------------
+
+def run_sim(test_harness, max_cycles = 40):
+
+  # Creates a simulator.
+  test_harness.apply(DefaultPassGroup())
+  test_harness.sim_reset()
+
+  # Runs simulation.
+  ncycles = 0
+  print_line_trace(ncycles, test_harness)
+  while not test_harness.done() and ncycles < max_cycles:
+    test_harness.sim_tick()
+    ncycles += 1
+    print_line_trace(ncycles, test_harness)
+
+  # Checks timeout.
+  assert ncycles < max_cycles
+
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+num_cgra_columns = 2
+num_cgra_rows = 1
+num_tiles = 4
+num_rd_tiles = 3
+
+DataType = mk_data(32, 1)
+DataAddrType = mk_bits(4)
+CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                  mk_bits(4))
+InterCgraPktType = mk_inter_cgra_pkt(num_cgra_columns, num_cgra_rows,
+                                     num_tiles, num_rd_tiles,
+                                     CgraPayloadType)
+
+# Two inports of the requests, one of the responses, and one of the
+# ctrl/data from the cpu.
+inport_classes = [NOC_CLASS_REQUEST, NOC_CLASS_RESPONSE,
+                  NOC_CLASS_REQUEST, NOC_CLASS_CONFIG]
+
+# The packet id (i.e., 10 * inport + index) is carried in data.
+def mk_pkt(XbarPktType, inport, index, outport = 0):
+  return XbarPktType(outport,
+                     InterCgraPktType(payload = CgraPayloadType(
+                         CMD_STORE_REQUEST,
+                         data = DataType(10 * inport + index, 1))))
+
+# The expected order of the packet ids on the single outport, with 3
+# packets on each inport.
+expected_order = {
+  NOC_ARBITER_ROUND_ROBIN: [0, 10, 20, 30, 1, 11, 21, 31, 2, 12, 22, 32],
+  # The response first, then the requests, and the cpu at last.
+  NOC_ARBITER_FIXED_PRIORITY: [10, 11, 12, 0, 1, 2, 20, 21, 22, 30, 31, 32],
+  # The weights are 2, 4, 2, 1, i.e., NOC_CLASS_WEIGHTS.
+  NOC_ARBITER_WEIGHTED_ROUND_ROBIN: [0, 1, 10, 11, 12, 20, 21, 30, 2, 22, 31, 32],
+  # The requests of the same class take turns.
+  NOC_ARBITER_VC_CLASSES: [10, 11, 12, 20, 0, 21, 1, 22, 2, 30, 31, 32],
+}
+
+@pytest.mark.parametrize('policy', NOC_ARBITERS)
+def test_policy(policy, cmdline_opts):
+  XbarPktType = mk_controller_noc_xbar_pkt(InterCgraPktType)
+  src_msgs = [[mk_pkt(XbarPktType, inport, index) for index in range(3)]
+              for inport in range(len(inport_classes))]
+  sink_msgs = [[mk_pkt(XbarPktType, pkt_id // 10, pkt_id % 10)
+                for pkt_id in expected_order[policy]]]
+  th = TestHarness(XbarPktType, 1, policy, inport_classes, src_msgs,
+                   sink_msgs)
+  th.elaborate()
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+def test_multiple_outports(cmdline_opts):
+  # The responses go through the outport 0 without waiting for the
+  # others on the outport 1.
+  XbarPktType = mk_controller_noc_xbar_pkt(InterCgraPktType, 2)
+  src_msgs = [[mk_pkt(XbarPktType, inport, index,
+                      min(inport_classes[inport], 1))
+               for index in range(3)]
+              for inport in range(len(inport_classes))]
+  sink_msgs = [[mk_pkt(XbarPktType, 1, index, 0) for index in range(3)],
+               [mk_pkt(XbarPktType, pkt_id // 10, pkt_id % 10, 1)
+                for pkt_id in [0, 20, 1, 21, 2, 22, 30, 31, 32]]]
+  th = TestHarness(XbarPktType, 2, NOC_ARBITER_VC_CLASSES, inport_classes,
+                   src_msgs, sink_msgs)
+  th.elaborate()
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+@pytest.mark.parametrize('policy', NOC_ARBITERS)
+def test_translate(policy, tmp_path, monkeypatch):
+  XbarPktType = mk_controller_noc_xbar_pkt(InterCgraPktType, 2)
+  monkeypatch.chdir(tmp_path)
+  dut = NocArbiterRTL(XbarPktType, len(inport_classes), 2, policy,
+                      inport_classes)
+  dut.set_metadata(VerilogTranslationPass.explicit_module_name,
+                   'NocArbiterRTL_' + policy)
+  dut.elaborate()
+  dut.set_metadata(VerilogTranslationPass.enable, True)
+  dut.apply(VerilogTranslationPass())
+  with open(dut.get_metadata(
+      VerilogTranslationPass.translated_filename)) as f:
+    assert 'module NocArbiterRTL_' + policy in f.read()
@@ -0,0 +1,166 @@
+"""
+==========================================================================
+noc_arbiter_bench.py
+==========================================================================
+Benchmark of the arbitration towards the inter-CGRA NoC (see
+ControllerRTL and NocArbiterRTL). The CPU streams ctrl signals (i.e.,
+CMD_CONFIG) towards a remote CGRA, while the local tiles issue remote
+load requests and the local memory returns load responses at a fixed
+interval. The NoC takes one packet per injection port every
+noc_interval cycles to model the congestion.
+
+For each number of injection ports and arbitration policy, it reports
+the average/max latency (from being accepted by the controller to being
+injected into the NoC) of the load requests and responses, and the
+cycles taken by the whole config stream.
+
+Usage (from the parent directory of the repo):
+  python -m VectorCGRA.controller.test.noc_arbiter_bench [--configs 64]
+                                                         [--loads 16]
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import argparse
+from .ControllerRTL_test import *
+from ..ControllerRTL import ControllerRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+
+kRemoteCgraId = 1
+
+class BenchHarness(Component):
+
+  def construct(s, num_noc_ports, noc_arbiter, num_configs, num_loads,
+                load_interval, noc_interval):
+
+    # The load requests target the memory of the remote CGRA.
+    load_request_pkts = [
+        InterCgraPktType(opaque = i,
+                         payload = CgraPayloadType(CMD_LOAD_REQUEST,
+                                                   data_addr = 4 + i % 4))
+        for i in range(num_loads)]
+    load_response_pkts = [
+        InterCgraPktType(0, kRemoteCgraId, 0, 0, kRemoteCgraId, 0,
+                         opaque = i,
+                         payload = CgraPayloadType(CMD_LOAD_RESPONSE,
+                                                   DataType(i, 1),
+                                                   data_addr = i % 4))
+        for i in range(num_loads)]
+    config_pkts = [
+        IntraCgraPktType(0, 0, 0, kRemoteCgraId,
+                         payload = CgraPayloadType(CMD_CONFIG,
+                                                   ctrl_addr = i % ctrl_mem_size))
+        for i in range(num_configs)]
+
+    s.src_load_request = TestSrcRTL(InterCgraPktType, load_request_pkts,
+                                    interval_delay = load_interval)
+    s.src_load_response = TestSrcRTL(InterCgraPktType, load_response_pkts,
+                                     interval_delay = load_interval)
+    s.src_cpu = TestSrcRTL(IntraCgraPktType, config_pkts)
+
+    s.dut = ControllerRTL(InterCgraPktType, num_cgra_rows,
+                          num_cgra_columns, num_tiles,
+                          controller2addr_map, idTo2d_map,
+                          num_noc_ports = num_noc_ports,
+                          noc_arbiter = noc_arbiter)
+
+    # The NoC takes one packet every noc_interval cycles.
+    CounterType = mk_bits(clog2(noc_interval + 1))
+    s.noc_counter = Wire(CounterType)
+
+    @update_ff
+    def update_noc_counter():
+      if s.reset | (s.noc_counter == CounterType(noc_interval - 1)):
+        s.noc_counter <<= 0
+      else:
+        s.noc_counter <<= s.noc_counter + CounterType(1)
+
+    # Connections.
+    s.dut.cgra_id //= cgra_id
+    s.src_load_request.send //= s.dut.recv_from_tile_load_request_pkt
+    s.src_load_response.send //= s.dut.recv_from_tile_load_response_pkt
+    s.src_cpu.send //= s.dut.recv_from_cpu_pkt
+    for noc_port in [s.dut.send_to_inter_cgra_noc] + \
+                    s.dut.send_to_inter_cgra_noc_extra:
+      noc_port.rdy //= lambda: s.noc_counter == CounterType(0)
+
+    s.dut.recv_from_tile_store_request_pkt.val //= 0
+    s.dut.recv_from_tile_store_request_pkt.msg //= InterCgraPktType()
+    s.dut.recv_from_inter_cgra_noc.val //= 0
+    s.dut.recv_from_inter_cgra_noc.msg //= InterCgraPktType()
+    s.dut.recv_from_ctrl_ring_pkt.val //= 0
+    s.dut.recv_from_ctrl_ring_pkt.msg //= IntraCgraPktType()
+    s.dut.send_to_mem_load_request.rdy //= 1
+    s.dut.send_to_tile_load_response.rdy //= 1
+    s.dut.send_to_mem_store_request.rdy //= 1
+    s.dut.send_to_ctrl_ring_pkt.rdy //= 1
+    s.dut.send_to_cpu_pkt.rdy //= 1
+
+def bench(num_noc_ports, noc_arbiter, num_configs, num_loads,
+          load_interval, noc_interval):
+  th = BenchHarness(num_noc_ports, noc_arbiter, num_configs, num_loads,
+                    load_interval, noc_interval)
+  th.elaborate()
+  th.apply(DefaultPassGroup())
+  th.sim_reset()
+
+  noc_ports = [th.dut.send_to_inter_cgra_noc] + \
+              th.dut.send_to_inter_cgra_noc_extra
+  tracked = {th.dut.recv_from_tile_load_request_pkt: CMD_LOAD_REQUEST,
+             th.dut.recv_from_tile_load_response_pkt: CMD_LOAD_RESPONSE}
+  accepted = {}
+  latencies = {CMD_LOAD_REQUEST: [], CMD_LOAD_RESPONSE: []}
+  num_injected_configs = 0
+  config_cycles = 0
+  max_cycles = 20 * noc_interval * (num_configs + 2 * num_loads)
+  ncycles = 0
+  while (num_injected_configs < num_configs or
+         any(len(lat) < num_loads for lat in latencies.values())) and \
+        ncycles < max_cycles:
+    for recv, cmd in tracked.items():
+      if recv.val & recv.rdy:
+        accepted[(cmd, int(recv.msg.opaque))] = ncycles
+    for noc_port in noc_ports:
+      if noc_port.val & noc_port.rdy:
+        cmd = int(noc_port.msg.payload.cmd)
+        if cmd in latencies:
+          latencies[cmd].append(
+              ncycles - accepted.pop((cmd, int(noc_port.msg.opaque))))
+        elif cmd == CMD_CONFIG:
+          num_injected_configs += 1
+          config_cycles = ncycles + 1
+    th.sim_tick()
+    ncycles += 1
+  assert ncycles < max_cycles
+
+  return {cmd: (sum(lat) / len(lat), max(lat))
+          for cmd, lat in latencies.items()}, config_cycles
+
+def main():
+  parser = argparse.ArgumentParser(description = __doc__.split("\n")[4])
+  parser.add_argument('--configs', type = int, default = 64)
+  parser.add_argument('--loads', type = int, default = 16)
+  parser.add_argument('--load-interval', type = int, default = 3)
+  parser.add_argument('--noc-interval', type = int, default = 2)
+  parser.add_argument('--ports', nargs = '+', type = int, default = [1, 2])
+  parser.add_argument('--arbiters', nargs = '+', default = NOC_ARBITERS,
+                      choices = NOC_ARBITERS)
+  args = parser.parse_args()
+
+  print(f"{'ports':>5} {'arbiter':>18} {'req avg':>8} {'req max':>8} "
+        f"{'resp avg':>8} {'resp max':>8} {'config':>8}")
+  for num_noc_ports in args.ports:
+    for noc_arbiter in args.arbiters:
+      latencies, config_cycles = bench(num_noc_ports, noc_arbiter,
+                                       args.configs, args.loads,
+                                       args.load_interval,
+                                       args.noc_interval)
+      req_avg, req_max = latencies[CMD_LOAD_REQUEST]
+      resp_avg, resp_max = latencies[CMD_LOAD_RESPONSE]
+      print(f"{num_noc_ports:>5} {noc_arbiter:>18} {req_avg:>8.2f} "
+            f"{req_max:>8} {resp_avg:>8.2f} {resp_max:>8} "
+            f"{config_cycles:>8}", flush = True)
+
+if __name__ == '__main__':
+  main()
@@ -14,7 +14,7 @@ from pymtl3 import *
 
 # Total number of commands that are supported/recognized by controller.
 # Needs to be updated once more commands are added/supported.
-NUM_CMDS = 23
+NUM_CMDS = 45
 
 CMD_LAUNCH                           = 0
 CMD_PAUSE                            = 1
@@ -39,6 +39,53 @@ CMD_GLOBAL_REDUCE_MUL                = 19
 CMD_GLOBAL_REDUCE_ADD_RESPONSE       = 20
 CMD_GLOBAL_REDUCE_MUL_RESPONSE       = 21
 CMD_PRESERVE                         = 22
+CMD_CONFIG_TILE_GROUP                = 23
+# Bulk data memory access: the request carries the base address in
+# data_addr and the number of words in data. A DMA store is followed by
+# that many CMD_DMA_STORE_DATA words, and a DMA load is answered by that
+# many CMD_LOAD_RESPONSE words.
+CMD_DMA_STORE_REQUEST                = 24
+CMD_DMA_STORE_DATA                   = 25
+CMD_DMA_LOAD_REQUEST                 = 26
+# Reads the crossbar statistics counter (id in data) of the data memory,
+# answered by a CMD_LOAD_RESPONSE carrying the counter value.
+CMD_READ_MEM_STATS                   = 27
+# Reads the performance counter (id in data, see PERF_*) of the dst tile,
+# answered by a CMD_LOAD_RESPONSE carrying the counter value.
+CMD_READ_PERF_COUNTERS               = 28
+# Global reductions (besides add and mul), the reduction id is carried
+# in data_addr, see ControllerRTL.
+CMD_GLOBAL_REDUCE_MAX                = 29
+CMD_GLOBAL_REDUCE_MIN                = 30
+CMD_GLOBAL_REDUCE_MAX_RESPONSE       = 31
+CMD_GLOBAL_REDUCE_MIN_RESPONSE       = 32
+# Double-buffered ctrl memory (see CtrlMemDynamicRTL): the ctrl signals
+# and counts of the next kernel go to the shadow bank while the active
+# one executes, and the swap makes the shadow bank active and launches
+# it.
+CMD_CONFIG_SHADOW                    = 33
+CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT   = 34
+CMD_CONFIG_SHADOW_COUNT_PER_ITER     = 35
+CMD_SWAP_CTRL_BANK                   = 36
+# Compressed CMD_CONFIG carrying several ctrl signals (see
+# ctrl_delta_helper.py).
+CMD_CONFIG_DELTA                     = 37
+# Empties the routing pattern table of the ctrl memory (see
+# CtrlPatternRegFileRTL).
+CMD_CLEAR_CTRL_PATTERNS              = 38
+# The lower bound and the prologue counts of the shadow bank, which are
+# swapped along with its ctrl signals and counts.
+CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND          = 39
+CMD_CONFIG_SHADOW_PROLOGUE_FU               = 40
+CMD_CONFIG_SHADOW_PROLOGUE_FU_CROSSBAR      = 41
+CMD_CONFIG_SHADOW_PROLOGUE_ROUTING_CROSSBAR = 42
+# Empties the routing pattern table of the shadow bank, while
+# CMD_CLEAR_CTRL_PATTERNS empties the one of the active bank.
+CMD_CLEAR_SHADOW_CTRL_PATTERNS       = 43
+# Reported by a ctrl memory (towards the CPU) once a ctrl signal, whose
+# address is carried in ctrl_addr, is rejected by a full routing pattern
+# table.
+CMD_CTRL_PATTERN_OVERFLOW            = 44
 
 CMD_SYMBOL_DICT = {
   CMD_LAUNCH:                           "(LAUNCH_KERNEL)",
@@ -63,6 +110,28 @@ CMD_SYMBOL_DICT = {
   CMD_GLOBAL_REDUCE_MUL:                "(GLOBAL_REDUCE_MUL)",
   CMD_GLOBAL_REDUCE_ADD_RESPONSE:       "(GLOBAL_REDUCE_ADD_RESPONSE)",
   CMD_GLOBAL_REDUCE_MUL_RESPONSE:       "(GLOBAL_REDUCE_MUL_RESPONSE)",
-  CMD_PRESERVE:                         "(PRESERVE_ACCUMULATED_VALUE)"
+  CMD_PRESERVE:                         "(PRESERVE_ACCUMULATED_VALUE)",
+  CMD_CONFIG_TILE_GROUP:                "(CONFIG_TILE_GROUP)",
+  CMD_DMA_STORE_REQUEST:                "(DMA_STORE_REQUEST)",
+  CMD_DMA_STORE_DATA:                   "(DMA_STORE_DATA)",
+  CMD_DMA_LOAD_REQUEST:                 "(DMA_LOAD_REQUEST)",
+  CMD_READ_MEM_STATS:                   "(READ_MEM_STATS)",
+  CMD_READ_PERF_COUNTERS:               "(READ_PERF_COUNTERS)",
+  CMD_GLOBAL_REDUCE_MAX:                "(GLOBAL_REDUCE_MAX)",
+  CMD_GLOBAL_REDUCE_MIN:                "(GLOBAL_REDUCE_MIN)",
+  CMD_GLOBAL_REDUCE_MAX_RESPONSE:       "(GLOBAL_REDUCE_MAX_RESPONSE)",
+  CMD_GLOBAL_REDUCE_MIN_RESPONSE:       "(GLOBAL_REDUCE_MIN_RESPONSE)",
+  CMD_CONFIG_SHADOW:                    "(PRELOADING_SHADOW_KERNEL_CONFIG)",
+  CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT:   "(PRELOAD_SHADOW_CONFIG_COUNT)",
+  CMD_CONFIG_SHADOW_COUNT_PER_ITER:     "(PRELOAD_SHADOW_CONFIG_COUNT_PER_ITER)",
+  CMD_SWAP_CTRL_BANK:                   "(SWAP_CTRL_BANK_AND_LAUNCH)",
+  CMD_CONFIG_DELTA:                     "(PRELOADING_KERNEL_CONFIG_DELTA)",
+  CMD_CLEAR_CTRL_PATTERNS:              "(CLEAR_CTRL_PATTERNS)",
+  CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND:          "(PRELOAD_SHADOW_CONFIG_LOWER_ADDR)",
+  CMD_CONFIG_SHADOW_PROLOGUE_FU:               "(PRELOADING_SHADOW_PROLOGUE_FU)",
+  CMD_CONFIG_SHADOW_PROLOGUE_FU_CROSSBAR:      "(PRELOADING_SHADOW_PROLOGUE_FU_CROSSBAR)",
+  CMD_CONFIG_SHADOW_PROLOGUE_ROUTING_CROSSBAR: "(PRELOADING_SHADOW_PROLOGUE_ROUTING_CROSSBAR)",
+  CMD_CLEAR_SHADOW_CTRL_PATTERNS:       "(CLEAR_SHADOW_CTRL_PATTERNS)",
+  CMD_CTRL_PATTERN_OVERFLOW:            "(CTRL_PATTERN_OVERFLOW)"
 }
 
@@ -10,15 +10,67 @@ Convention: The fields/constructor arguments should appear in the order
 Author : Cheng Tan
   Date : Dec 3, 2019
 """
+import functools
+import inspect
 from pymtl3 import *
 from .cmd_type import *
 from .opt_type import *
+from .util.common import *
 from .util.data_struct_attr import *
 
+#=========================================================================
+# Message type cache
+#=========================================================================
+# Every component derives its own payload/packet types during construct()
+# (e.g., each FU of each tile rebuilds the same data/ctrl types). The cache
+# returns the same bitstruct class for identical factory parameters, so
+# elaboration does not keep creating identical classes and type
+# comparisons boil down to identity checks.
+
+_msg_type_cache = {}
+_msg_type_cache_stats = {}
+
+def cache_msg_type(factory):
+  name = factory.__name__
+  signature = inspect.signature(factory)
+  _msg_type_cache_stats[name] = {'hits': 0, 'misses': 0}
+
+  @functools.wraps(factory)
+  def cached_factory(*args, **kwargs):
+    # Binds the arguments so that positional and keyword invocations of
+    # the same parameters share one entry.
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    key = (name, tuple(bound.arguments.values()))
+    try:
+      msg_type = _msg_type_cache.get(key)
+    except TypeError:
+      # Unhashable parameters are not cached.
+      return factory(*args, **kwargs)
+    if msg_type is not None:
+      _msg_type_cache_stats[name]['hits'] += 1
+      return msg_type
+    _msg_type_cache_stats[name]['misses'] += 1
+    msg_type = factory(*args, **kwargs)
+    _msg_type_cache[key] = msg_type
+    return msg_type
+
+  return cached_factory
+
+def get_msg_type_cache_stats():
+  return {name: dict(stats) for name, stats in _msg_type_cache_stats.items()}
+
+def clear_msg_type_cache():
+  _msg_type_cache.clear()
+  for stats in _msg_type_cache_stats.values():
+    stats['hits'] = 0
+    stats['misses'] = 0
+
 #=========================================================================
 # Generic data message
 #=========================================================================
 
+@cache_msg_type
 def mk_data(payload_nbits=16, predicate_nbits=1, bypass_nbits=1,
             prefix="CgraData"):
 
@@ -66,6 +118,7 @@ def mk_predicate( payload_nbits=1, predicate_nbits=1, prefix="CGRAData" ):
 # Generic config message
 #=========================================================================
 
+@cache_msg_type
 def mk_ctrl(num_fu_inports = 4,
             num_fu_outports = 2,
             num_tile_inports = 5,
@@ -194,6 +247,7 @@ def mk_cmd(num_commands = 12,
 # Multi-cgra oriented inter-/intra-cgra data/config/cmd packet payload
 #=========================================================================
 
+@cache_msg_type
 def mk_cgra_payload(DataType,
                     DataAddrType,
                     CtrlType,
@@ -221,6 +275,7 @@ def mk_cgra_payload(DataType,
 # For both ring- and mesh-based multi-cgra NoC packet.
 #=========================================================================
 
+@cache_msg_type
 def mk_inter_cgra_pkt(num_cgra_columns,
                       num_cgra_rows,
                       num_tiles,
@@ -238,6 +293,7 @@ def mk_inter_cgra_pkt(num_cgra_columns,
   OpqType = mk_bits(opaque_nbits)
   num_vcs = 4
   VcIdType = mk_bits(clog2(num_vcs))
+  TileGroupType = mk_bits(clog2(NUM_TILE_GROUPS))
 
   new_name = f"{prefix}_{num_cgra_columns*num_cgra_rows}_" \
              f"{num_cgra_columns}x{num_cgra_rows}_{num_tiles}_" \
@@ -256,13 +312,15 @@ def mk_inter_cgra_pkt(num_cgra_columns,
   field_dict[kAttrOpaque] = OpqType
   field_dict[kAttrVcId] = VcIdType
   field_dict[kAttrPayload] = CgraPayloadType
+  # Multicast group of the dst tiles, see TILE_GROUP_*.
+  field_dict[kAttrDstGroup] = TileGroupType
 
   def str_func(s):
     return f"InterCgraPkt: {s.src}->{s.dst} || " \
            f"({s.src_x},{s.src_y})->({s.dst_x},{s.dst_y}) || " \
            f"tileid:{s.src_tile_id}->{s.dst_tile_id} || " \
            f"remote_src_port:{s.remote_src_port} || " \
-           f"{s.opaque}:{s.vc_id} || " \
+           f"{s.opaque}:{s.vc_id} || group:{s.dst_group} || " \
            f"payload:{s.payload}\n"
 
   return mk_bitstruct(new_name, field_dict,
@@ -274,6 +332,7 @@ def mk_inter_cgra_pkt(num_cgra_columns,
 # ctrl signal related messages.
 #=========================================================================
 
+@cache_msg_type
 def mk_intra_cgra_pkt(num_cgra_columns,
                       num_cgra_rows,
                       num_tiles,
@@ -289,6 +348,7 @@ def mk_intra_cgra_pkt(num_cgra_columns,
   OpqType = mk_bits(opaque_nbits)
   num_vcs = 2
   VcIdType = mk_bits(clog2(num_vcs))
+  TileGroupType = mk_bits(clog2(NUM_TILE_GROUPS))
 
   new_name = f"{prefix}_{num_cgra_columns*num_cgra_rows}_" \
              f"{num_cgra_columns}x{num_cgra_rows}_{num_tiles}_" \
@@ -297,7 +357,7 @@ def mk_intra_cgra_pkt(num_cgra_columns,
   def str_func(s):
     return f"IntraCgraPkt: {s.src}->{s.dst} || " \
            f"cgra_id:{s.src_cgra_id}({s.src_cgra_x}, {s.src_cgra_y})->{s.dst_cgra_id}({s.dst_cgra_x}, {s.dst_cgra_y}) || " \
-           f"{s.opaque}:{s.vc_id} || " \
+           f"{s.opaque}:{s.vc_id} || group:{s.dst_group} || " \
            f"payload:{s.payload}\n"
 
   field_dict = {}
@@ -312,6 +372,8 @@ def mk_intra_cgra_pkt(num_cgra_columns,
   field_dict[kAttrOpaque] = OpqType
   field_dict[kAttrVcId] = VcIdType
   field_dict[kAttrPayload] = CgraPayloadType
+  # Multicast group of the dst tiles, see TILE_GROUP_*.
+  field_dict[kAttrDstGroup] = TileGroupType
 
   return mk_bitstruct(new_name, field_dict,
     namespace = {'__str__': str_func}
@@ -370,6 +432,7 @@ def mk_tile_sram_xbar_pkt(number_src = 5,
     namespace = {'__str__': str_func}
   )
 
+@cache_msg_type
 def mk_mem_access_pkt(DataType,
                       number_src = 5,
                       number_dst = 5,
@@ -407,12 +470,17 @@ def mk_mem_access_pkt(DataType,
 # Crossbar (controller <-> NoC) packet
 #=========================================================================
 
+@cache_msg_type
 def mk_controller_noc_xbar_pkt(InterCgraPktType,
+                               num_outports = 1,
                                prefix="ControllerNocXbarPacket"):
 
-  DstType = mk_bits(1) # clog2(number_outports))
+  # The outport, i.e., the injection port towards the NoC.
+  DstType = mk_bits(max(clog2(num_outports), 1))
 
   new_name = f"{prefix}_InterCgraPktType"
+  if num_outports > 1:
+    new_name = f"{prefix}_{num_outports}_InterCgraPktType"
 
   def str_func(s):
     return f"->{s.dst}:(inter_cgra_pkt){s.inter_cgra_pkt}"
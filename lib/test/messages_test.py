@@ -0,0 +1,77 @@
+"""
+==========================================================================
+messages_test.py
+==========================================================================
+Test cases for the message type cache.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import pytest
+from .. import messages
+from ..messages import *
+
+# Starts each test with an empty cache and puts the types built by the
+# other tests back afterwards, so that their types stay identical.
+@pytest.fixture(autouse = True)
+def empty_cache():
+  cache = dict(messages._msg_type_cache)
+  stats = get_msg_type_cache_stats()
+  clear_msg_type_cache()
+  yield
+  messages._msg_type_cache.clear()
+  messages._msg_type_cache.update(cache)
+  for name, counts in stats.items():
+    messages._msg_type_cache_stats[name].update(counts)
+
+num_test_msg_calls = 0
+
+@cache_msg_type
+def mk_test_msg(fields, prefix = "TestMsg"):
+  global num_test_msg_calls
+  num_test_msg_calls += 1
+  return mk_bitstruct(prefix, {name: mk_bits(nbits)
+                               for name, nbits in fields})
+
+def test_same_object():
+  DataType = mk_data(32, 1)
+  assert mk_data(32, 1) is DataType
+  assert mk_data(16, 1) is not DataType
+  CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+  assert mk_cgra_payload(DataType, mk_bits(4), CtrlType, mk_bits(4)) is \
+         mk_cgra_payload(DataType, mk_bits(4), CtrlType, mk_bits(4))
+
+def test_positional_and_keyword():
+  DataType = mk_data(32, 1)
+  assert mk_data(payload_nbits = 32, predicate_nbits = 1) is DataType
+  assert mk_data(32, predicate_nbits = 1) is DataType
+  # The defaults are bound as well.
+  assert mk_data(32) is DataType
+  assert get_msg_type_cache_stats()['mk_data'] == {'hits': 3, 'misses': 1}
+
+def test_unhashable():
+  # A list is not hashable, so the factory is invoked every time.
+  fields = [('a', 4), ('b', 8)]
+  num_calls = num_test_msg_calls
+  mk_test_msg(fields)
+  mk_test_msg(fields)
+  assert num_test_msg_calls == num_calls + 2
+  assert get_msg_type_cache_stats()['mk_test_msg'] == {'hits': 0, 'misses': 0}
+  assert mk_test_msg(tuple(fields)) is mk_test_msg(tuple(fields))
+  assert num_test_msg_calls == num_calls + 3
+  assert get_msg_type_cache_stats()['mk_test_msg'] == {'hits': 1, 'misses': 1}
+
+def test_stats():
+  mk_data(32, 1)
+  mk_data(32, 1)
+  mk_data(16, 1)
+  mk_ctrl(2, 2, 4, 4, 16)
+  stats = get_msg_type_cache_stats()
+  assert stats['mk_data'] == {'hits': 1, 'misses': 2}
+  assert stats['mk_ctrl'] == {'hits': 0, 'misses': 1}
+
+  clear_msg_type_cache()
+  assert get_msg_type_cache_stats()['mk_data'] == {'hits': 0, 'misses': 0}
+  mk_data(32, 1)
+  assert get_msg_type_cache_stats()['mk_data'] == {'hits': 0, 'misses': 1}
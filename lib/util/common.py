@@ -25,12 +25,24 @@ LINK_NO_MEM   = 0
 LINK_FROM_MEM = 1
 LINK_TO_MEM   = 2
 
+# Constants for the tile groups of the ctrl packets. Group 0 indicates
+# the unicast packets (towards the dst tile), the last group includes all
+# the tiles (i.e., broadcast), and the tiles join the other groups via
+# CMD_CONFIG_TILE_GROUP.
+NUM_TILE_GROUPS = 8
+TILE_GROUP_UNICAST = 0
+TILE_GROUP_ALL = NUM_TILE_GROUPS - 1
+
 # Constant for maximum control-message count.
 MAX_CTRL_COUNT = 1024
 
 # Constant for prologue max count.
 PROLOGUE_MAX_COUNT = 7
 
+# Maximum number of ctrl signals (i.e., consecutive ctrl addresses)
+# carried by a CMD_CONFIG_DELTA (see ctrl_delta_helper.py).
+CTRL_DELTA_MAX_WORDS = 16
+
 # Constant for number of inports on the controller xbar towards NoC.
 # Crossbar with 6 inports (load and store requests towards remote
 # memory, load response from local memory, ctrl&data packet from cpu,
@@ -39,8 +51,81 @@ PROLOGUE_MAX_COUNT = 7
 # out per cycle).
 CONTROLLER_CROSSBAR_INPORTS = 6
 
+# Arbitration of the packets towards the inter-CGRA NoC (see
+# ControllerRTL and NocArbiterRTL). The round robin one is the original
+# XbarRTL, and the others are:
+#   - fixed priority:       the higher traffic class (see NOC_CLASS_*)
+#                           always goes first, then the lower inport;
+#   - weighted round robin: an inport is granted up to its weight (see
+#                           NOC_CLASS_WEIGHTS) in a row;
+#   - vc classes:           the higher traffic class goes first, and the
+#                           inports of the same class take turns, i.e.,
+#                           each class is arbitrated as a virtual channel
+#                           of the crossbar. The vc_id of the packets is
+#                           left to the NoC.
+NOC_ARBITER_ROUND_ROBIN = "RoundRobin"
+NOC_ARBITER_FIXED_PRIORITY = "FixedPriority"
+NOC_ARBITER_WEIGHTED_ROUND_ROBIN = "WeightedRoundRobin"
+NOC_ARBITER_VC_CLASSES = "VcClasses"
+NOC_ARBITERS = [NOC_ARBITER_ROUND_ROBIN, NOC_ARBITER_FIXED_PRIORITY,
+                NOC_ARBITER_WEIGHTED_ROUND_ROBIN, NOC_ARBITER_VC_CLASSES]
+
+# Traffic classes of the packets towards the NoC, from the highest
+# priority, i.e., the latency-critical load responses (and reduced data),
+# the requests and commands, and the bulk ctrl/data from the CPU. With
+# multiple injection ports, the class i goes through the port
+# min(i, num_noc_ports - 1).
+NOC_CLASS_RESPONSE = 0
+NOC_CLASS_REQUEST = 1
+NOC_CLASS_CONFIG = 2
+NUM_NOC_CLASSES = 3
+NOC_CLASS_WEIGHTS = [4, 2, 1]
+
 GLOBAL_REDUCE_MAX_COUNT = 4
 
+# Number of global reductions that can be in flight at the same time,
+# i.e., the GlobalReduceUnitRTL instances of each controller, indexed by
+# the reduction id (in data_addr) of the packets.
+NUM_GLOBAL_REDUCE_SLOTS = 4
+
+# Global reduction modes of the multi-CGRA fabric (see ControllerRTL):
+# all the participants send their data to the root controller, or each
+# controller merges the partial results of its subtree along a spanning
+# tree (see reduce_tree_helper.py) before forwarding them to the parent.
+GLOBAL_REDUCE_CENTRALIZED = "Centralized"
+GLOBAL_REDUCE_TREE = "Tree"
+GLOBAL_REDUCE_MODES = [GLOBAL_REDUCE_CENTRALIZED, GLOBAL_REDUCE_TREE]
+
 # Cgra Topology
 MESH = "Mesh"
 KING_MESH = "KingMesh"
+
+# Intra-CGRA ctrl network topology, i.e., how the controller reaches the
+# tiles for config delivery and CMD_COMPLETE collection.
+CTRL_RING = "Ring"
+CTRL_BIDIRECTIONAL_RING = "BidirectionalRing"
+CTRL_TREE = "Tree"
+CTRL_MESH = "MeshOverlay"
+CTRL_NETWORK_TOPOLOGIES = [CTRL_RING, CTRL_BIDIRECTIONAL_RING, CTRL_TREE,
+                           CTRL_MESH]
+
+# Number of children of each router in the CTRL_TREE topology.
+CTRL_TREE_ARITY = 4
+
+# Mapping of the local data memory addresses onto the banks of a CGRA
+# (see DataMemControllerRTL and data_mem_helper.py).
+BANK_MAPPING_BLOCK = "Block"
+BANK_MAPPING_LOW_ORDER = "LowOrder"
+BANK_MAPPING_XOR = "Xor"
+BANK_MAPPINGS = [BANK_MAPPING_BLOCK, BANK_MAPPING_LOW_ORDER, BANK_MAPPING_XOR]
+
+# Ids of the performance counters of a tile (see TilePerfCountersRTL),
+# read via CMD_READ_PERF_COUNTERS. The cycles waiting on each inport of
+# the routing crossbar start from PERF_XBAR_INPORT_WAIT_BASE.
+PERF_CYCLES = 0
+PERF_CTRL_STEPS = 1
+PERF_CTRL_STALLS = 2
+PERF_FU_BUSY = 3
+PERF_MEM_STALLS = 4
+PERF_REG_READS = 5
+PERF_XBAR_INPORT_WAIT_BASE = 6
@@ -0,0 +1,628 @@
+"""
+=========================================================================
+config_assembler.py
+=========================================================================
+Assembler of the config programs (i.e., IntraCgraPkt streams) of CGRAs.
+
+Instead of hand-building every IntraCgraPktType for CMD_CONST, CMD_CONFIG,
+the ctrl counts and the prologue counts, a test describes the schedule of
+each tile:
+
+  asm = ConfigAssembler(IntraCgraPktType, num_tiles)
+  asm.store(0, 10)
+  tile = asm.tile(5)
+  tile.const(3)
+  tile.ctrl(0, OPT_ADD_CONST, fu_in = [1, 2],
+            routing_xbar = {asm.fu_inport(0): PORT_WEST},
+            fu_xbar = {PORT_EAST: 0},
+            write_reg = {1: (WRITE_REG_FROM_FU_XBAR, 0)},
+            read_reg = {0: 0})
+  tile.count_per_iter(4)
+  tile.total_ctrl_count(10)
+  tile.prologue_routing_xbar(0, PORT_WEST, 1)
+  tile.launch()
+  pkts = asm.assemble()
+  print(asm.format_report())
+
+or optimizes an existing stream with asm.add_pkts(pkts).
+
+The assembler:
+  - deduplicates redundant writes (e.g., the same ctrl address or count
+    written more than once, or zero prologue counts on a freshly reset
+    CGRA), keeping the last one,
+  - orders the packets to minimize the config-load cycles over the ctrl
+    ring: the tiles farther away from the controller are configured
+    first, and the packets towards the tiles at the same distance are
+    interleaved, so that their ring hops overlap. The data preloading
+    goes after the configs, and the launches go last (again farthest
+    first), so no tile starts before the data memory is ready. The data
+    memory accesses that come after a launch in the stream given to
+    add_pkts() (e.g., CMD_LOAD_REQUEST of the results) stay after the
+    launches, in their original order,
+  - optionally (i.e., multicast = True) merges the writes shared by all
+    the tiles of a CGRA into single TILE_GROUP_ALL packets, which the
+    ctrl ring copies to every tile,
+  - optionally (i.e., dma = True) coalesces the stores and the loads to
+    consecutive addresses into DMA bursts (i.e., CMD_DMA_STORE_REQUEST
+    followed by the CMD_DMA_STORE_DATA words, and CMD_DMA_LOAD_REQUEST),
+    which the data memory handles without the per-word address. A burst
+    is expected not to cross the address space of a CGRA,
+  - optionally (i.e., compress = True) packs the ctrl signals of a tile
+    into CMD_CONFIG_DELTA packets (see ctrl_delta_helper.py), which
+    carry several (sparse/delta encoded) ctrl signals each,
+  - optionally (i.e., num_ctrl_patterns > 0) checks that the ctrl
+    signals of each bank of a tile take no more routing patterns than the
+    pattern table of its ctrl memory holds (see CtrlPatternRegFileRTL),
+    as the ctrl memory rejects the ones missing a full table. The table
+    is assumed to only hold the patterns of this program, i.e., the CGRA
+    is freshly reset or the program clears it, and the clears
+    (CMD_CLEAR_CTRL_PATTERNS) of a tile go ahead of its ctrl signals,
+  - estimates the config-load latency, assuming the controller injects
+    one packet per cycle and each ring hop takes hop_latency cycles.
+
+The hops default to the bidirectional ctrl ring. For the other ctrl
+network topologies (see CtrlNetworkRTL), pass
+hops = ctrl_network_hops(topology, num_tiles, num_columns) from
+ctrl_network_helper.py.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from ..cmd_type import *
+from .common import *
+from .ctrl_delta_helper import CtrlDeltaFormat
+from .data_struct_attr import *
+
+# Write-register sources of the ctrl signal (see RegisterClusterRTL).
+WRITE_REG_FROM_ROUTING_XBAR = PORT_ROUTING_CROSSBAR + 1
+WRITE_REG_FROM_FU_XBAR = PORT_FU_CROSSBAR + 1
+WRITE_REG_FROM_CONST = PORT_CONST + 1
+
+# Commands whose last write wins.
+_SETTING_CMDS = [CMD_CONFIG_COUNT_PER_ITER,
+                 CMD_CONFIG_TOTAL_CTRL_COUNT,
+                 CMD_CONFIG_CTRL_LOWER_BOUND,
+                 CMD_CONFIG_TILE_GROUP]
+
+_PROLOGUE_CMDS = [CMD_CONFIG_PROLOGUE_FU,
+                  CMD_CONFIG_PROLOGUE_FU_CROSSBAR,
+                  CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR]
+
+# Bulk data-memory commands, which are handled by the controller.
+_DMA_CMDS = [CMD_DMA_STORE_REQUEST,
+             CMD_DMA_STORE_DATA,
+             CMD_DMA_LOAD_REQUEST]
+
+# Returns the number of hops from the controller to each tile on the ctrl
+# ring of CgraRTL, i.e., the controller sits at position num_tiles of the
+# (num_tiles + 1)-router ring and each packet takes the shorter direction.
+def ring_hops(num_tiles):
+  return lambda tile_id: min(tile_id + 1, num_tiles - tile_id)
+
+# Returns the routing pattern of the ctrl signal, i.e., the fields kept
+# in the pattern table of CtrlPatternRegFileRTL.
+def ctrl_pattern(ctrl):
+  return tuple(int(value)
+               for name in ['fu_in', 'routing_xbar_outport', 'fu_xbar_outport']
+               for value in getattr(ctrl, name))
+
+# Sets the (index, value) pairs of a list field of the ctrl signal.
+def _set_fields(field, items):
+  for i, value in items:
+    field[i] = type(field[i])(value)
+
+#-------------------------------------------------------------------------
+# TileProgram
+#-------------------------------------------------------------------------
+
+class TileProgram:
+
+  def __init__(s, assembler, tile_id, header):
+    s.assembler = assembler
+    s.tile_id = tile_id
+    s.header = header
+    s.consts = []
+    # cmd -> payload of the pattern table clears.
+    s.clears = {}
+    # ctrl_addr -> payload.
+    s.ctrls = {}
+    # cmd -> payload.
+    s.settings = {}
+    # (cmd, ctrl_addr, port) -> payload.
+    s.prologues = {}
+    # Other commands (e.g., CMD_RECORD_PHI_ADDR), kept in order.
+    s.others = []
+    s.launched = False
+
+  def _payload(s, cmd, data = 0, ctrl = None, ctrl_addr = 0):
+    asm = s.assembler
+    return asm.CgraPayloadType(cmd, data = asm.DataType(data, 1),
+                               ctrl = ctrl if ctrl is not None else asm.CtrlType(),
+                               ctrl_addr = ctrl_addr)
+
+  def const(s, value, predicate = 1):
+    s.add(s.assembler.CgraPayloadType(
+        CMD_CONST, data = s.assembler.DataType(value, predicate)))
+    return s
+
+  # Configures the ctrl signal at ctrl_addr. Crossbar connections are
+  # given as {outport: inport}, where the outports of the routing/FU
+  # crossbars are either tile outports (e.g., PORT_EAST) or
+  # fu_inport(i), and the inports are tile inports or FU outports.
+  # Register writes are given as {fu_inport: (source, reg_idx)} and reads
+  # as {fu_inport: reg_idx}.
+  def ctrl(s, ctrl_addr, operation, fu_in = None, routing_xbar = {},
+           fu_xbar = {}, write_reg = {}, read_reg = {},
+           vector_factor_power = 0, is_last_ctrl = 0):
+    asm = s.assembler
+    ctrl = asm.CtrlType()
+    ctrl.operation = type(ctrl.operation)(operation)
+    if fu_in is None:
+      fu_in = [x + 1 for x in range(asm.num_fu_inports)]
+    _set_fields(ctrl.fu_in, enumerate(fu_in))
+    _set_fields(ctrl.routing_xbar_outport,
+                [(outport, inport + 1)
+                 for outport, inport in routing_xbar.items()])
+    _set_fields(ctrl.fu_xbar_outport,
+                [(outport, fu_outport + 1)
+                 for outport, fu_outport in fu_xbar.items()])
+    _set_fields(ctrl.write_reg_from,
+                [(i, source) for i, (source, _) in write_reg.items()])
+    _set_fields(ctrl.write_reg_idx,
+                [(i, reg_idx) for i, (_, reg_idx) in write_reg.items()])
+    _set_fields(ctrl.read_reg_from, [(i, 1) for i in read_reg])
+    _set_fields(ctrl.read_reg_idx, read_reg.items())
+    ctrl.vector_factor_power = \
+        type(ctrl.vector_factor_power)(vector_factor_power)
+    ctrl.is_last_ctrl = type(ctrl.is_last_ctrl)(is_last_ctrl)
+    s.add(s._payload(CMD_CONFIG, ctrl = ctrl, ctrl_addr = ctrl_addr))
+    return s
+
+  def count_per_iter(s, count):
+    s.add(s._payload(CMD_CONFIG_COUNT_PER_ITER, count))
+    return s
+
+  def total_ctrl_count(s, count):
+    s.add(s._payload(CMD_CONFIG_TOTAL_CTRL_COUNT, count))
+    return s
+
+  def lower_bound(s, ctrl_addr):
+    s.add(s._payload(CMD_CONFIG_CTRL_LOWER_BOUND, ctrl_addr))
+    return s
+
+  def prologue_fu(s, ctrl_addr, count):
+    s.add(s._payload(CMD_CONFIG_PROLOGUE_FU, count, ctrl_addr = ctrl_addr))
+    return s
+
+  def prologue_routing_xbar(s, ctrl_addr, inport, count):
+    ctrl = s.assembler.CtrlType()
+    _set_fields(ctrl.routing_xbar_outport, [(0, inport)])
+    s.add(s._payload(CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR, count, ctrl,
+                     ctrl_addr))
+    return s
+
+  def prologue_fu_xbar(s, ctrl_addr, fu_outport, count):
+    ctrl = s.assembler.CtrlType()
+    _set_fields(ctrl.fu_xbar_outport, [(0, fu_outport)])
+    s.add(s._payload(CMD_CONFIG_PROLOGUE_FU_CROSSBAR, count, ctrl,
+                     ctrl_addr))
+    return s
+
+  # Makes the tile join the given groups (see TILE_GROUP_*).
+  def tile_groups(s, groups):
+    mask = 0
+    for group in groups:
+      mask |= 1 << group
+    s.add(s._payload(CMD_CONFIG_TILE_GROUP, mask))
+    return s
+
+  # Returns the groups (as a mask) the tile has joined so far.
+  def groups(s):
+    payload = s.settings.get(CMD_CONFIG_TILE_GROUP)
+    return 0 if payload is None else int(payload.data.payload)
+
+  def launch(s):
+    s.add(s.assembler.CgraPayloadType(CMD_LAUNCH))
+    return s
+
+  # Adds a payload towards this tile, replacing the redundant earlier
+  # write (if any).
+  def add(s, payload):
+    cmd = int(payload.cmd)
+    if s.launched:
+      raise ValueError(f"tile {s.tile_id} receives "
+                       f"{CMD_SYMBOL_DICT.get(cmd, cmd)} after its launch, "
+                       f"which cannot be reordered")
+    if cmd == CMD_CONST:
+      s.consts.append(payload)
+    elif cmd == CMD_CONFIG:
+      s._replace(s.ctrls, int(payload.ctrl_addr), payload)
+    elif cmd == CMD_CONFIG_DELTA:
+      # Expands into the carried ctrl signals, whose addresses wrap around
+      # the ctrl memory the same way CtrlMemDynamicRTL expands them.
+      asm = s.assembler
+      for i, ctrl in enumerate(asm.ctrl_delta.decode(
+          payload.ctrl, int(payload.data.payload))):
+        ctrl_addr = (int(payload.ctrl_addr) + i) % asm.ctrl_mem_size
+        s._replace(s.ctrls, ctrl_addr,
+                   s._payload(CMD_CONFIG, ctrl = ctrl, ctrl_addr = ctrl_addr))
+    elif cmd in [CMD_CLEAR_CTRL_PATTERNS, CMD_CLEAR_SHADOW_CTRL_PATTERNS]:
+      s._replace(s.clears, cmd, payload)
+    elif cmd in _SETTING_CMDS:
+      s._replace(s.settings, cmd, payload)
+    elif cmd in _PROLOGUE_CMDS:
+      if cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR:
+        port = int(payload.ctrl.routing_xbar_outport[0])
+      elif cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR:
+        port = int(payload.ctrl.fu_xbar_outport[0])
+      else:
+        port = 0
+      s._replace(s.prologues, (cmd, int(payload.ctrl_addr), port), payload)
+    elif cmd == CMD_LAUNCH:
+      s.launched = True
+    else:
+      s.others.append(payload)
+
+  def _replace(s, writes, key, payload):
+    if key in writes:
+      s.assembler.num_redundant += 1
+    writes[key] = payload
+
+  # Returns the payloads of the config (i.e., except the launch) with the
+  # redundant writes and the (attr, key) writes in `shared` removed.
+  def config_payloads(s, shared = ()):
+    asm = s.assembler
+    payloads = list(s.consts) + list(s.clears.values())
+    ctrls = {addr: s.ctrls[addr] for addr in sorted(s.ctrls)
+             if ('ctrls', addr) not in shared}
+    if asm.compress:
+      for cmd, addr, count, ctrl in asm.ctrl_delta.encode(
+          {addr: payload.ctrl for addr, payload in ctrls.items()}):
+        payloads.append(s._payload(cmd, count, ctrl, addr)
+                        if cmd == CMD_CONFIG_DELTA else ctrls[addr])
+    else:
+      payloads += list(ctrls.values())
+    for attr in ['settings', 'prologues']:
+      for key, payload in getattr(s, attr).items():
+        if (attr, key) in shared:
+          continue
+        if asm.is_reset_write(payload):
+          asm.num_reset_writes += 1
+          continue
+        payloads.append(payload)
+    return payloads + s.others
+
+  # Raises if the ctrl signals of either bank take more routing patterns
+  # than the pattern table holds.
+  def check_patterns(s):
+    num_ctrl_patterns = s.assembler.num_ctrl_patterns
+    shadow_ctrls = {int(payload.ctrl_addr): payload.ctrl
+                    for payload in s.others
+                    if int(payload.cmd) == CMD_CONFIG_SHADOW}
+    banks = [('active', [payload.ctrl for payload in s.ctrls.values()]),
+             ('shadow', shadow_ctrls.values())]
+    for bank, ctrls in banks:
+      num_patterns = len(set(ctrl_pattern(ctrl) for ctrl in ctrls))
+      if num_patterns > num_ctrl_patterns:
+        raise ValueError(f"tile {s.tile_id} takes {num_patterns} routing "
+                         f"patterns in its {bank} bank, more than the "
+                         f"pattern table size {num_ctrl_patterns}")
+
+#-------------------------------------------------------------------------
+# ConfigAssembler
+#-------------------------------------------------------------------------
+
+class ConfigAssembler:
+
+  # num_ctrl/total_steps are the reset values of the count per iteration
+  # and the total ctrl count of the CGRA (i.e., the corresponding
+  # CgraRTL parameters), which are used to drop the redundant writes when
+  # assume_reset_state is set. ctrl_mem_size defaults to the range of the
+  # ctrl_addr field. num_ctrl_patterns is the pattern table size of the
+  # ctrl memories (i.e., the CgraRTL parameter), 0 for no table.
+  def __init__(s, IntraCgraPktType, num_tiles, num_tile_ports = 4,
+               num_fu_inports = 4, num_ctrl = None, total_steps = None,
+               hops = None, hop_latency = 1, assume_reset_state = True,
+               multicast = False, dma = False, compress = False,
+               ctrl_mem_size = None, num_ctrl_patterns = 0):
+    s.IntraCgraPktType = IntraCgraPktType
+    s.CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+    s.DataType = s.CgraPayloadType.get_field_type(kAttrData)
+    s.CtrlType = s.CgraPayloadType.get_field_type(kAttrCtrl)
+    s.num_tiles = num_tiles
+    s.num_tile_ports = num_tile_ports
+    s.num_fu_inports = num_fu_inports
+    s.num_routing_outports = num_tile_ports + num_fu_inports
+    s.hops = hops if hops is not None else ring_hops(num_tiles)
+    s.hop_latency = hop_latency
+    s.assume_reset_state = assume_reset_state
+    s.multicast = multicast
+    s.dma = dma
+    s.compress = compress
+    s.ctrl_delta = CtrlDeltaFormat(s.CtrlType)
+    s.ctrl_mem_size = ctrl_mem_size if ctrl_mem_size is not None else \
+        1 << s.CgraPayloadType.get_field_type(kAttrCtrlAddr).nbits
+    s.num_ctrl_patterns = num_ctrl_patterns
+    s.reset_settings = {CMD_CONFIG_CTRL_LOWER_BOUND: 0,
+                        CMD_CONFIG_TILE_GROUP: 0}
+    if num_ctrl is not None:
+      s.reset_settings[CMD_CONFIG_COUNT_PER_ITER] = num_ctrl
+    if total_steps is not None:
+      s.reset_settings[CMD_CONFIG_TOTAL_CTRL_COUNT] = total_steps
+
+    # (dst_cgra_id, tile_id) -> TileProgram.
+    s.tiles = {}
+    # (header, data_addr) -> payload of the data preloading.
+    s.stores = {}
+    # Packets handled by the controller other than the stores.
+    s.others = []
+    # Packets handled by the controller after a launch, which are not
+    # reordered.
+    s.post_launch = []
+    s.seen_launch = False
+    # Overwritten writes and writes of the reset values.
+    s.num_redundant = 0
+    s.num_reset_writes = 0
+    s.num_input_pkts = 0
+    s.pkts = []
+
+  # Returns the routing outport of the i-th FU inport.
+  def fu_inport(s, i):
+    return s.num_tile_ports + i
+
+  def tile(s, tile_id, dst_cgra_id = 0, dst_cgra_x = 0, dst_cgra_y = 0):
+    key = (dst_cgra_id, tile_id)
+    if key not in s.tiles:
+      header = (0, tile_id, 0, dst_cgra_id, 0, 0, dst_cgra_x, dst_cgra_y)
+      s.tiles[key] = TileProgram(s, tile_id, header)
+    return s.tiles[key]
+
+  def store(s, data_addr, value, predicate = 1, dst_cgra_id = 0,
+            dst_cgra_x = 0, dst_cgra_y = 0):
+    header = (0, 0, 0, dst_cgra_id, 0, 0, dst_cgra_x, dst_cgra_y)
+    s._add_store(header, s.CgraPayloadType(
+        CMD_STORE_REQUEST, data = s.DataType(value, predicate),
+        data_addr = data_addr))
+    return s
+
+  def _add_store(s, header, payload):
+    key = (header, int(payload.data_addr))
+    if key in s.stores:
+      s.num_redundant += 1
+      # Keeps the order of the last write.
+      del s.stores[key]
+    s.stores[key] = payload
+
+  # Adds the packets of an existing config program.
+  def add_pkts(s, pkts):
+    for pkt in pkts:
+      s.num_input_pkts += 1
+      header = (int(pkt.src), int(pkt.dst), int(pkt.src_cgra_id),
+                int(pkt.dst_cgra_id), int(pkt.src_cgra_x),
+                int(pkt.src_cgra_y), int(pkt.dst_cgra_x),
+                int(pkt.dst_cgra_y))
+      cmd = int(pkt.payload.cmd)
+      if s.seen_launch and (cmd == CMD_STORE_REQUEST or cmd in _DMA_CMDS or
+                            cmd == CMD_LOAD_REQUEST):
+        s.post_launch.append(pkt)
+      elif cmd == CMD_STORE_REQUEST:
+        s._add_store(header, pkt.payload)
+      elif cmd in _DMA_CMDS or cmd == CMD_LOAD_REQUEST:
+        s.others.append(pkt)
+      elif int(pkt.dst_group) == TILE_GROUP_UNICAST:
+        tile = s.tile(int(pkt.dst), int(pkt.dst_cgra_id),
+                      int(pkt.dst_cgra_x), int(pkt.dst_cgra_y))
+        tile.header = header
+        tile.add(pkt.payload)
+      else:
+        # Expands the multicast packets to the tiles of the group.
+        group = int(pkt.dst_group)
+        for tile_id in range(s.num_tiles):
+          tile = s.tile(tile_id, int(pkt.dst_cgra_id),
+                        int(pkt.dst_cgra_x), int(pkt.dst_cgra_y))
+          if group == TILE_GROUP_ALL or (tile.groups() >> group) & 1:
+            tile.add(pkt.payload)
+      if cmd == CMD_LAUNCH:
+        s.seen_launch = True
+    return s
+
+  def is_reset_write(s, payload):
+    cmd = int(payload.cmd)
+    if not s.assume_reset_state:
+      return False
+    if cmd in _SETTING_CMDS:
+      return int(payload.data.payload) == s.reset_settings.get(cmd)
+    if cmd in _PROLOGUE_CMDS:
+      return int(payload.data.payload) == 0
+    return False
+
+  def _pkt(s, header, payload, dst_group = TILE_GROUP_UNICAST):
+    return s.IntraCgraPktType(*header, payload = payload,
+                              dst_group = dst_group)
+
+  # Returns the (attr, key) writes shared by all the tiles of each CGRA
+  # and the corresponding broadcast packets.
+  def _extract_broadcasts(s):
+    cgras = {}
+    for (cgra_id, _), tile in s.tiles.items():
+      cgras.setdefault(cgra_id, []).append(tile)
+    shared = {}
+    pkts = []
+    for cgra_id, tiles in cgras.items():
+      shared[cgra_id] = set()
+      if len(tiles) < s.num_tiles:
+        continue
+      header = (0, 0) + tiles[0].header[2:]
+      for attr in ['ctrls', 'settings', 'prologues']:
+        writes = [getattr(tile, attr) for tile in tiles]
+        for key, payload in writes[0].items():
+          if s.is_reset_write(payload):
+            continue
+          if all(key in w and w[key] == payload for w in writes[1:]):
+            shared[cgra_id].add((attr, key))
+            pkts.append(s._pkt(header, payload, TILE_GROUP_ALL))
+    return shared, pkts
+
+  # Orders the config packets (see the header). Returns the packet
+  # stream.
+  def assemble(s):
+    s.num_reset_writes = 0
+    tiles = sorted(s.tiles.values(), key = lambda tile: -s.hops(tile.tile_id))
+    if s.num_ctrl_patterns > 0:
+      for tile in tiles:
+        tile.check_patterns()
+
+    # Groups the tiles at the same distance, and interleaves their
+    # packets.
+    shared, pkts = s._extract_broadcasts() if s.multicast else ({}, [])
+    groups = {}
+    for tile in tiles:
+      groups.setdefault(s.hops(tile.tile_id), []).append(tile)
+    for hops in sorted(groups, reverse = True):
+      queues = [[s._pkt(tile.header, payload)
+                 for payload in tile.config_payloads(
+                     shared.get(tile.header[3], ()))]
+                for tile in groups[hops]]
+      for i in range(max(len(queue) for queue in queues)):
+        for queue in queues:
+          if i < len(queue):
+            pkts.append(queue[i])
+
+    if s.dma:
+      pkts += s._dma_store_pkts()
+      pkts += s._dma_load_pkts(s.others)
+    else:
+      pkts += [s._pkt(header, payload)
+               for (header, _), payload in s.stores.items()]
+      pkts += s.others
+    launch = s.CgraPayloadType(CMD_LAUNCH)
+    for cgra_id in sorted(shared):
+      cgra_tiles = [tile for tile in tiles if tile.header[3] == cgra_id]
+      if len(cgra_tiles) == s.num_tiles and \
+         all(tile.launched for tile in cgra_tiles):
+        header = (0, 0) + cgra_tiles[0].header[2:]
+        pkts.append(s._pkt(header, launch, TILE_GROUP_ALL))
+      else:
+        pkts += [s._pkt(tile.header, launch)
+                 for tile in cgra_tiles if tile.launched]
+    if not s.multicast:
+      pkts += [s._pkt(tile.header, launch)
+               for tile in tiles if tile.launched]
+    pkts += s._dma_load_pkts(s.post_launch) if s.dma else s.post_launch
+    s.pkts = pkts
+    return pkts
+
+  # Returns the (header, base, length) runs of consecutive addresses.
+  def _runs(s, addrs):
+    runs = []
+    for header, addr in addrs:
+      if runs and runs[-1][0] == header and \
+         runs[-1][1] + runs[-1][2] == addr:
+        runs[-1][2] += 1
+      else:
+        runs.append([header, addr, 1])
+    return runs
+
+  def _dma_store_pkts(s):
+    pkts = []
+    # The stores to different addresses are independent, so they are
+    # sorted to maximize the bursts.
+    for header, base, length in s._runs(sorted(s.stores)):
+      if length == 1:
+        pkts.append(s._pkt(header, s.stores[(header, base)]))
+        continue
+      pkts.append(s._pkt(header, s.CgraPayloadType(
+          CMD_DMA_STORE_REQUEST, data = s.DataType(length, 1),
+          data_addr = base)))
+      for addr in range(base, base + length):
+        payload = s.stores[(header, addr)]
+        pkts.append(s._pkt(header, s.CgraPayloadType(
+            CMD_DMA_STORE_DATA, data = payload.data)))
+    return pkts
+
+  # Merges the runs of loads to consecutive addresses, keeping the order
+  # of the responses.
+  def _dma_load_pkts(s, others):
+    pkts = []
+    i = 0
+    while i < len(others):
+      pkt = others[i]
+      if int(pkt.payload.cmd) != CMD_LOAD_REQUEST:
+        pkts.append(pkt)
+        i += 1
+        continue
+      j = i + 1
+      while j < len(others) and \
+            int(others[j].payload.cmd) == CMD_LOAD_REQUEST and \
+            others[j].dst_cgra_id == pkt.dst_cgra_id and \
+            int(others[j].payload.data_addr) == \
+            int(pkt.payload.data_addr) + j - i:
+        j += 1
+      if j - i == 1:
+        pkts.append(pkt)
+      else:
+        pkts.append(s.IntraCgraPktType(
+            pkt.src, pkt.dst, pkt.src_cgra_id, pkt.dst_cgra_id,
+            pkt.src_cgra_x, pkt.src_cgra_y, pkt.dst_cgra_x, pkt.dst_cgra_y,
+            payload = s.CgraPayloadType(
+                CMD_DMA_LOAD_REQUEST, data = s.DataType(j - i, 1),
+                data_addr = pkt.payload.data_addr)))
+      i = j
+    return pkts
+
+  #-----------------------------------------------------------------------
+  # Latency estimation
+  #-----------------------------------------------------------------------
+
+  # Returns the cycle each packet arrives at its destination, assuming the
+  # controller injects one packet per cycle.
+  def arrival_cycles(s, pkts):
+    cycles = []
+    for cycle, pkt in enumerate(pkts):
+      cmd = int(pkt.payload.cmd)
+      if cmd in _DMA_CMDS or cmd == CMD_STORE_REQUEST or \
+         cmd == CMD_LOAD_REQUEST:
+        hops = 0
+      elif int(pkt.dst_group) != TILE_GROUP_UNICAST:
+        hops = max(s.hops(tile_id) for tile_id in range(s.num_tiles))
+      else:
+        hops = s.hops(int(pkt.dst))
+      cycles.append(cycle + 1 + hops * s.hop_latency)
+    return cycles
+
+  # Returns the expected number of cycles to load the config program.
+  def estimate_latency(s, pkts = None):
+    cycles = s.arrival_cycles(s.pkts if pkts is None else pkts)
+    return max(cycles) if cycles else 0
+
+  def report(s, pkts = None):
+    pkts = s.pkts if pkts is None else pkts
+    cycles = s.arrival_cycles(pkts)
+    tile_ready = {}
+    for cycle, pkt in zip(cycles, pkts):
+      if int(pkt.payload.cmd) in [CMD_STORE_REQUEST, CMD_LOAD_REQUEST] + \
+                                 _DMA_CMDS:
+        continue
+      tile_ids = [int(pkt.dst)] \
+                 if int(pkt.dst_group) == TILE_GROUP_UNICAST \
+                 else range(s.num_tiles)
+      for tile_id in tile_ids:
+        key = (int(pkt.dst_cgra_id), tile_id)
+        tile_ready[key] = max(tile_ready.get(key, 0), cycle)
+    return {'num_pkts'         : len(pkts),
+            'num_input_pkts'   : s.num_input_pkts,
+            'num_redundant'    : s.num_redundant + s.num_reset_writes,
+            'latency'          : max(cycles) if cycles else 0,
+            'tile_ready_cycles': tile_ready}
+
+  def format_report(s, pkts = None):
+    report = s.report(pkts)
+    lines = [f"Config program: {report['num_pkts']} packets "
+             f"({report['num_redundant']} redundant writes removed), "
+             f"expected load latency {report['latency']} cycles"]
+    for (cgra_id, tile_id), cycle in sorted(report['tile_ready_cycles'].items()):
+      lines.append(f"  cgra{cgra_id}_tile{tile_id}: ready at cycle {cycle}")
+    return "\n".join(lines)
+
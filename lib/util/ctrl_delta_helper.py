@@ -0,0 +1,157 @@
+"""
+=========================================================================
+ctrl_delta_helper.py
+=========================================================================
+Compressed format of the ctrl signals, i.e., CMD_CONFIG_DELTA, which
+CtrlMemDynamicRTL expands into its register file.
+
+Most fields of a ctrl signal are zero, and the consecutive ctrl signals
+of a tile share most of their fields, so a CMD_CONFIG_DELTA carries up
+to CTRL_DELTA_MAX_WORDS ctrl signals (i.e., data.payload of them, from
+ctrl_addr on) as a list of (field, value) entries packed into the bits
+of its ctrl field:
+  - the first ctrl signal is the zero one with the listed fields set
+    (i.e., sparse),
+  - each of the following ones is the previous ctrl signal with the
+    listed fields set (i.e., delta), unless its entries start with the
+    clear (i.e., the field num_fields + 1 without value), which makes it
+    sparse as well,
+  - the entries of each ctrl signal end with the separator, i.e., the
+    field num_fields without value.
+
+The fields are the (list items of the) fields of the ctrl signal in the
+order of mk_ctrl, e.g., operation, fu_in[0], fu_in[1], ..., and each
+entry takes field_nbits bits for the field followed by the bits of the
+value (i.e., as many as the field has), from the lowest bits on.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from ..cmd_type import *
+from .common import *
+
+class CtrlDeltaFormat:
+
+  def __init__(s, CtrlType):
+    s.CtrlType = CtrlType
+    s.ctrl_nbits = CtrlType.nbits
+    # (lo, hi) bits of each field within the ctrl signal.
+    s.field_slices = []
+    for name, field_type in CtrlType.__bitstruct_fields__.items():
+      if isinstance(field_type, list):
+        s.field_slices += [s._field_slice(name, i)
+                           for i in range(len(field_type))]
+      else:
+        s.field_slices.append(s._field_slice(name, None))
+    s.num_fields = len(s.field_slices)
+    s.separator = s.num_fields
+    s.clear = s.num_fields + 1
+    s.field_nbits = clog2(s.num_fields + 2)
+
+  # Finds the bits of the field by setting it to all ones.
+  def _field_slice(s, name, index):
+    ctrl = s.CtrlType()
+    if index is None:
+      field = getattr(ctrl, name)
+      setattr(ctrl, name, type(field)(-1))
+    else:
+      field = getattr(ctrl, name)[index]
+      getattr(ctrl, name)[index] = type(field)(-1)
+    value = int(ctrl.to_bits())
+    lo = (value & -value).bit_length() - 1
+    return (lo, lo + field.nbits)
+
+  # Returns the number of bits taken by the entry of the field.
+  def entry_nbits(s, field):
+    if field >= s.separator:
+      return s.field_nbits
+    lo, hi = s.field_slices[field]
+    return s.field_nbits + hi - lo
+
+  # Returns the values of the fields of the ctrl signal.
+  def fields(s, ctrl):
+    value = int(ctrl.to_bits())
+    return [(value >> lo) & ((1 << (hi - lo)) - 1)
+            for lo, hi in s.field_slices]
+
+  # Returns the (field, value) entries turning base (i.e., the values of
+  # the fields, None for the zero ctrl signal) into the ctrl signal,
+  # starting from the zero one instead if it takes fewer bits.
+  def diff(s, base, ctrl):
+    values = s.fields(ctrl)
+    sparse = [(field, value) for field, value in enumerate(values)
+              if value != 0]
+    if base is None:
+      return sparse
+    delta = [(field, value) for field, (old, value) in
+             enumerate(zip(base, values)) if old != value]
+    sparse = [(s.clear, 0)] + sparse
+    if s.words_nbits([sparse]) < s.words_nbits([delta]):
+      return sparse
+    return delta
+
+  # Returns the number of bits taken by the entries of the ctrl signals.
+  def words_nbits(s, words):
+    return sum(s.entry_nbits(field) for entries in words
+               for field, _ in entries) + len(words) * s.field_nbits
+
+  # Packs the entries of each ctrl signal into the ctrl field.
+  def pack(s, words):
+    assert s.words_nbits(words) <= s.ctrl_nbits
+    value = 0
+    lo = 0
+    for entries in words:
+      for field, field_value in entries + [(s.separator, 0)]:
+        value |= ((field_value << s.field_nbits) | field) << lo
+        lo += s.entry_nbits(field)
+    return s.CtrlType.from_bits(mk_bits(s.ctrl_nbits)(value))
+
+  # Returns the count ctrl signals carried by the ctrl field of a
+  # CMD_CONFIG_DELTA, i.e., the behavior of CtrlMemDynamicRTL.
+  def decode(s, ctrl, count):
+    value = int(ctrl.to_bits())
+    ctrls = []
+    word_value = 0
+    lo = 0
+    while len(ctrls) < max(count, 1) and lo < s.ctrl_nbits:
+      field = (value >> lo) & ((1 << s.field_nbits) - 1)
+      if field == s.separator:
+        ctrls.append(s.CtrlType.from_bits(
+            mk_bits(s.ctrl_nbits)(word_value)))
+      elif field == s.clear:
+        word_value = 0
+      elif field < s.num_fields:
+        field_lo, field_hi = s.field_slices[field]
+        mask = ((1 << (field_hi - field_lo)) - 1) << field_lo
+        field_value = value >> (lo + s.field_nbits)
+        word_value = (word_value & ~mask) | \
+                     ((field_value << field_lo) & mask)
+      lo += s.entry_nbits(min(field, s.clear))
+    return ctrls
+
+  # Returns the (cmd, ctrl_addr, number of ctrl signals, ctrl) of the
+  # packets carrying the {ctrl_addr: ctrl}, i.e., CMD_CONFIG_DELTA, or
+  # CMD_CONFIG for the ctrl signal with too many fields set.
+  def encode(s, ctrls):
+    groups = []
+    base = None
+    for addr in sorted(ctrls):
+      if groups and groups[-1][0] == CMD_CONFIG_DELTA and \
+         groups[-1][1] + len(groups[-1][2]) == addr and \
+         len(groups[-1][2]) < CTRL_DELTA_MAX_WORDS:
+        words = groups[-1][2] + [s.diff(base, ctrls[addr])]
+        if s.words_nbits(words) <= s.ctrl_nbits:
+          groups[-1][2] = words
+          base = s.fields(ctrls[addr])
+          continue
+      words = [s.diff(None, ctrls[addr])]
+      if s.words_nbits(words) <= s.ctrl_nbits:
+        groups.append([CMD_CONFIG_DELTA, addr, words])
+      else:
+        groups.append([CMD_CONFIG, addr, ctrls[addr]])
+      base = s.fields(ctrls[addr])
+    return [(cmd, addr, len(words), s.pack(words))
+            if cmd == CMD_CONFIG_DELTA else (cmd, addr, 1, words)
+            for cmd, addr, words in groups]
@@ -13,8 +13,8 @@ Author : Cheng Tan
 
 from .map_helper import *
 from ..messages import *
+from .json_cache import load_json
 from ...fu.flexible.FlexibleFuRTL import FlexibleFuRTL
-import json
 
 class TileCtrl:
 
@@ -55,56 +55,47 @@ class CGRACtrl:
   def __init__( s, json_file_name, CtrlType, RouteType, width, height,
                 num_fu_in, num_inports, num_outports, II ):
     s.tiles = []
+    # Tiles indexed by their (x, y).
+    s.tile_index = {}
     # X is the horizontal axis while Y is the vertical axis
     for y in range( height ):
       for x in range( width ):
-        s.tiles.append( TileCtrl( FlexibleFuRTL, CtrlType, RouteType,
-                                  x, y, num_fu_in, num_inports, num_outports,
-                                  II ) )
+        tile = TileCtrl( FlexibleFuRTL, CtrlType, RouteType,
+                         x, y, num_fu_in, num_inports, num_outports, II )
+        s.tiles.append( tile )
+        s.tile_index[( x, y )] = tile
 
     FuInType     = mk_bits( clog2( num_fu_in + 1 ) )
-    pickRegister = [ FuInType( x+1 ) for x in range( num_fu_in ) ]
-
-    with open( json_file_name ) as json_file:
-      ctrls = json.load( json_file )
-      for ctrl in ctrls:
-        tile  = get_tile( ctrl['x'], ctrl['y'], s.tiles )
-        reg = None
-        reg = [ FuInType( 0 ) for x in range( num_fu_in ) ]
-        if ctrl['opt'] != "OPT_NAH":
-          reg[0] = FuInType( 1 )
-          reg[1] = FuInType( 2 )
-        route = []
-#        reg[2] = FuInType( 0 )
-#        reg[3] = FuInType( 0 )
-        for i in range( num_outports ):
-          out = ctrl['out_'+str(i)]
-          out = RouteType( int(out) + 1 ) if out != "none" else RouteType( 0 )
-          route.append( out )
 
+    ctrls = load_json( json_file_name )
+    for ctrl in ctrls:
+      tile = s.tile_index.get( ( ctrl['x'], ctrl['y'] ) )
+      reg = [ 0 ] * num_fu_in
+      if ctrl['opt'] != "OPT_NAH":
+        reg[0] = 1
+        reg[1] = 2
+      route = []
+      for i in range( num_outports ):
+        out = ctrl['out_'+str(i)]
+        route.append( int(out) + 1 if out != "none" else 0 )
+
+      if any( 'fu_in_'+str(i) in ctrl for i in range( num_fu_in ) ):
         for i in range( num_fu_in ):
-          if 'fu_in_'+str(i) in ctrl:
-            for j in range( num_fu_in ):
-              reg[j] = FuInType( 0 )
-            break
-
-        for i in range( num_fu_in ):
-          if 'fu_in_'+str(i) in ctrl:
-            fu_in = ctrl['fu_in_'+str(i)]
-            reg[i] = FuInType( fu_in )
-
-        predicate_in = []
-        if 'predicate_in' in ctrl:
-          for i in range( num_inports ):
-            if i in ctrl['predicate_in']:
-              predicate_in.append( b1( 1 ) )
-            else:
-              predicate_in.append( b1( 0 ) )
-
-        tile.update_ctrl( ctrl['cycle']%II, CtrlType( opt_map[ ctrl['opt'] ],
-                                                      ctrl['predicate'], reg,
-                                                      route, predicate_in ) )
-#          print( tile.ctrl )
+          reg[i] = ctrl.get( 'fu_in_'+str(i), 0 )
+
+      predicate_in = ()
+      if 'predicate_in' in ctrl:
+        predicate_in_set = set( ctrl['predicate_in'] )
+        predicate_in = tuple( int( i in predicate_in_set )
+                              for i in range( num_inports ) )
+
+      # Each entry gets its own CtrlType (and Bits), as the ctrl signals
+      # are mutable and may be modified per tile afterwards.
+      tile.update_ctrl( ctrl['cycle']%II,
+                        CtrlType( opt_map[ ctrl['opt'] ], ctrl['predicate'],
+                                  [ FuInType( x ) for x in reg ],
+                                  [ RouteType( x ) for x in route ],
+                                  [ b1( x ) for x in predicate_in ] ) )
 
   def get_ctrl( s ):
     ctrls = []
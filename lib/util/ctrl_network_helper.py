@@ -0,0 +1,66 @@
+"""
+=========================================================================
+ctrl_network_helper.py
+=========================================================================
+Layouts of the intra-CGRA ctrl network topologies (see
+noc/CtrlNetworkRTL.py), shared by the RTL networks and the host-side
+models (e.g., the hop count used by ConfigAssembler).
+
+In all the topologies, the tiles are attached to routers [0, num_tiles)
+and the controller to router num_tiles.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from .common import *
+
+# Returns {router: [(child, lo, hi), ...]} of the CTRL_TREE topology. The
+# controller is the root, and each subtree covers a contiguous range of
+# tile ids [lo, hi), rooted at tile lo, so that the routers only compare
+# the dst against the ranges of their children.
+def ctrl_tree_children(num_tiles, arity = CTRL_TREE_ARITY):
+  children = {router: [] for router in range(num_tiles + 1)}
+
+  def split(parent, lo, hi):
+    num_subtrees = min(arity, hi - lo)
+    bounds = [lo + j * (hi - lo) // num_subtrees
+              for j in range(num_subtrees)] + [hi]
+    for j in range(num_subtrees):
+      child = bounds[j]
+      children[parent].append((child, child, bounds[j + 1]))
+      split(child, child + 1, bounds[j + 1])
+
+  if num_tiles > 0:
+    split(num_tiles, 0, num_tiles)
+  return children
+
+# Returns the depth of each router in the CTRL_TREE topology.
+def ctrl_tree_depths(num_tiles, arity = CTRL_TREE_ARITY):
+  children = ctrl_tree_children(num_tiles, arity)
+  depths = {num_tiles: 0}
+  pending = [num_tiles]
+  while pending:
+    parent = pending.pop()
+    for child, _, _ in children[parent]:
+      depths[child] = depths[parent] + 1
+      pending.append(child)
+  return depths
+
+# Returns a function giving the number of hops from the controller to
+# each tile, i.e., the hops argument of ConfigAssembler.
+def ctrl_network_hops(topology, num_tiles, num_columns = None):
+  if topology == CTRL_RING:
+    return lambda tile_id: tile_id + 1
+  if topology == CTRL_BIDIRECTIONAL_RING:
+    return lambda tile_id: min(tile_id + 1, num_tiles - tile_id)
+  if topology == CTRL_TREE:
+    depths = ctrl_tree_depths(num_tiles)
+    return lambda tile_id: depths[tile_id]
+  if topology == CTRL_MESH:
+    # The controller is attached to tile 0, i.e., one hop plus the
+    # Manhattan distance.
+    return lambda tile_id: 1 + tile_id // num_columns + \
+                           tile_id % num_columns
+  raise ValueError(f"Unknown ctrl network topology: {topology}")
+
@@ -0,0 +1,88 @@
+"""
+=========================================================================
+data_mem_helper.py
+=========================================================================
+Mapping of the local data memory addresses (i.e., the offsets from the
+address_lower of a CGRA) onto the banks, shared by DataMemControllerRTL,
+DataMemWrapperRTL and the host-side models:
+  - BANK_MAPPING_BLOCK:     bank = offset / data_mem_size_per_bank, i.e.,
+                            each bank holds a contiguous block;
+  - BANK_MAPPING_LOW_ORDER: bank = offset % num_banks, i.e., the
+                            consecutive words go to consecutive banks;
+  - BANK_MAPPING_XOR:       bank = (offset ^ (offset / num_banks)) %
+                            num_banks, i.e., low-order interleaving hashed
+                            with the next address bits, which also spreads
+                            the strides of multiple of num_banks.
+
+Both interleaved mappings need num_banks to be a power of two, and the
+address_lower to be aligned with the memory size of a CGRA.
+
+It also defines the ids of the crossbar statistics counters (see
+XbarStatsRTL), which are read via CMD_READ_MEM_STATS.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from .common import *
+
+# Returns (bank_shift, bank_mask, xor_shift, xor_mask, index_shift), so
+# that the bank of an offset is
+#   ((offset >> bank_shift) & bank_mask) ^ ((offset >> xor_shift) & xor_mask)
+# and the index within the bank is
+#   (offset >> index_shift) % data_mem_size_per_bank.
+def bank_mapping_params(bank_mapping, num_banks, data_mem_size_per_bank):
+  assert(bank_mapping in BANK_MAPPINGS)
+  per_bank_addr_nbits = clog2(data_mem_size_per_bank)
+  if bank_mapping == BANK_MAPPING_BLOCK:
+    return per_bank_addr_nbits, (1 << clog2(num_banks + 1)) - 1, 0, 0, 0
+  bank_nbits = clog2(num_banks)
+  assert(2 ** bank_nbits == num_banks)
+  bank_mask = num_banks - 1
+  if bank_mapping == BANK_MAPPING_LOW_ORDER:
+    return 0, bank_mask, 0, 0, bank_nbits
+  return 0, bank_mask, bank_nbits, bank_mask, bank_nbits
+
+# Returns the (bank, index within the bank) of a local address.
+def data_mem_bank(addr, address_lower, num_banks, data_mem_size_per_bank,
+                  bank_mapping = BANK_MAPPING_BLOCK):
+  bank_shift, bank_mask, xor_shift, xor_mask, index_shift = \
+      bank_mapping_params(bank_mapping, num_banks, data_mem_size_per_bank)
+  offset = addr - address_lower
+  bank = ((offset >> bank_shift) & bank_mask) ^ \
+         ((offset >> xor_shift) & xor_mask)
+  return bank, (offset >> index_shift) % data_mem_size_per_bank
+
+# Crossbars of DataMemControllerRTL, and the counters kept for each of
+# their ports.
+MEM_STATS_XBARS = ["read", "write", "response"]
+MEM_STATS_KINDS = ["requests", "grants", "conflicts", "max_occupancy"]
+
+# Returns the (num_inports, num_outports) of each crossbar, i.e., the
+# additional port of each side is towards/from the NoC.
+def mem_stats_xbar_ports(num_banks, num_rd_tiles, num_wr_tiles):
+  return {
+    "read"    : (num_rd_tiles + 1, num_banks + 1),
+    "write"   : (num_wr_tiles + 1, num_banks + 1),
+    "response": (num_banks + 1, num_rd_tiles + 1),
+  }
+
+# Returns the list of (xbar, side, port, kind) of all the counters, where
+# side is either "in" or "out". The position in the list is the counter
+# id carried by CMD_READ_MEM_STATS.
+def mem_stats_layout(num_banks, num_rd_tiles, num_wr_tiles):
+  xbar_ports = mem_stats_xbar_ports(num_banks, num_rd_tiles, num_wr_tiles)
+  layout = []
+  for xbar in MEM_STATS_XBARS:
+    num_inports, num_outports = xbar_ports[xbar]
+    for side, num_ports in [("in", num_inports), ("out", num_outports)]:
+      for port in range(num_ports):
+        for kind in MEM_STATS_KINDS:
+          layout.append((xbar, side, port, kind))
+  return layout
+
+def mem_stats_id(xbar, side, port, kind, num_banks, num_rd_tiles,
+                 num_wr_tiles):
+  return mem_stats_layout(num_banks, num_rd_tiles, num_wr_tiles).index(
+      (xbar, side, port, kind))
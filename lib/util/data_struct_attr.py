@@ -30,6 +30,7 @@ kAttrDstTileId = 'dst_tile_id'
 kAttrRemoteSrcPort = 'remote_src_port'
 kAttrOpaque = 'opaque'
 kAttrVcId = 'vc_id'
+kAttrDstGroup = 'dst_group'
 kAttrSrcCgra = 'src_cgra'
 kAttrDstCgra = 'dst_cgra'
 kAttrSrcCgraId = 'src_cgra_id'
@@ -10,9 +10,14 @@ Author : Cheng Tan
 """
 
 
+from .json_cache import load_json
 from .map_helper import *
 from ..messages import *
-import json
+
+NodeDataType = mk_data( 16, 1 )
+# The initial value of the inputs/outputs of all the nodes. It is shared,
+# as the values are always replaced rather than updated in place.
+_node_zero   = NodeDataType( 0, 0 )
 
 
 class Node:
@@ -27,18 +32,16 @@ class Node:
     s.const_index          = const_index
     s.num_const            = len( const_index )
     s.num_input            = len( input_node  )
-    DataType               = mk_data( 16, 1 )
     s.input_node           = input_node
     s.input_predicate_node = input_predicate_node
-    s.input_value          = [ DataType( 0, 0 ) ] * s.num_input
+    s.input_value          = [ _node_zero ] * s.num_input
     s.input_predicate      = 1
 
     # 2D array for output since there will be multiple results generated,
     # and each of them will route to different successors.
     s.output_node  = output_node
     s.num_output   = [ len( array ) for array in output_node ]
-    s.output_value = [ [ DataType( 0, 0 ) for _ in array ]
-                         for array in output_node ]
+    s.output_value = [ [ _node_zero ] * len( array ) for array in output_node ]
 
     # We manually or automatically pick one BRH node to insert a live_out_ctrl
     # output, which will indicate the 'exit' point.
@@ -79,6 +82,8 @@ class DFG:
 
   def __init__( s, json_file_name, const_list, data_spm ):
     s.nodes       = []
+    # Position of each node in s.nodes indexed by its id.
+    s.node_index  = {}
     s.num_const   = 0
     s.num_input   = 0
 #    s.num_output  = 0
@@ -86,46 +91,76 @@ class DFG:
     s.num_liveout = 1
     s.const_list  = const_list
     s.data_spm    = data_spm
-    with open(json_file_name) as json_file:
-      dfg = json.load(json_file)
-      for i in range( len(dfg) ):
-        node = Node( dfg[i]['id'],
-                     getUnitType(dfg[i]['fu']),
-                     getOptType(dfg[i]['opt']),
-                     dfg[i]['opt_predicate'],
-                     dfg[i]['in_const'],
-                     dfg[i]['in'],
-                     dfg[i]['in_predicate'],
-                     dfg[i]['out'] )
-        s.nodes.append( node )
-        max_layer = -1
-        print("cur_node: ", node.id, " pre: ", (node.input_node+node.input_predicate_node))
-        for input_node in (node.input_node+node.input_predicate_node):
-          pre_node = get_node( input_node, s.nodes )
-          if( pre_node != None ):
-            if pre_node.layer > max_layer:
-              max_layer = pre_node.layer
-        node.layer = max_layer + 1
-          
-        s.num_const  += node.num_const
-        s.num_input  += node.num_input
-#        s.num_output += node.num_output
-        if 'live_out_ctrl' in dfg[i].keys():
-          node.live_out_ctrl = 1
-        if 'live_out_val' in dfg[i].keys():
-          node.live_out_val = 1
+    dfg = load_json( json_file_name )
+    for i in range( len(dfg) ):
+      node = Node( dfg[i]['id'],
+                   getUnitType(dfg[i]['fu']),
+                   getOptType(dfg[i]['opt']),
+                   dfg[i]['opt_predicate'],
+                   dfg[i]['in_const'],
+                   dfg[i]['in'],
+                   dfg[i]['in_predicate'],
+                   dfg[i]['out'] )
+      s.node_index.setdefault( node.id, len( s.nodes ) )
+      s.nodes.append( node )
+      # Only the predecessors that appear so far are taken into account
+      # (i.e., back edges are ignored), so the layers are computed in the
+      # same pass.
+      max_layer = -1
+      for input_node in (node.input_node+node.input_predicate_node):
+        pre_index = s.node_index.get( input_node )
+        if pre_index is not None:
+          pre_layer = s.nodes[pre_index].layer
+          if pre_layer > max_layer:
+            max_layer = pre_layer
+      node.layer = max_layer + 1
+
+      s.num_const  += node.num_const
+      s.num_input  += node.num_input
+#      s.num_output += node.num_output
+      if 'live_out_ctrl' in dfg[i]:
+        node.live_out_ctrl = 1
+      if 'live_out_val' in dfg[i]:
+        node.live_out_val = 1
 
     s.layer_diff_list = [ 0 ] * s.num_input
     channel_index= 0
     for node in s.nodes:
       for node_id in node.input_node:
-        layer_diff = node.layer - get_node( node_id, s.nodes ).layer
+        layer_diff = node.layer - s.get_node( node_id ).layer
         if layer_diff > 0:
           s.layer_diff_list[channel_index] = layer_diff
         else:
           s.layer_diff_list[channel_index] = 1
         channel_index += 1
 
-  def get_node( s, node_id ):
-    return get_node( node_id, s.nodes)
+    s.build_adjacency()
 
+  # ---------------------------------------------------------------------
+  # Builds the CSR adjacency of the graph (by node position), i.e., the
+  # successors of the node at position i are
+  # succ_indices[succ_offsets[i]:succ_offsets[i+1]], in the order of its
+  # output_node, and similarly for the predecessors with input_node.
+  # ---------------------------------------------------------------------
+  def build_adjacency( s ):
+    s.succ_offsets = [ 0 ]
+    s.succ_indices = []
+    s.pred_offsets = [ 0 ]
+    s.pred_indices = []
+    for node in s.nodes:
+      for array in node.output_node:
+        s.succ_indices.extend( s.node_index[node_id] for node_id in array )
+      s.succ_offsets.append( len( s.succ_indices ) )
+      s.pred_indices.extend( s.node_index[node_id]
+                             for node_id in node.input_node )
+      s.pred_offsets.append( len( s.pred_indices ) )
+
+  def get_successors( s, index ):
+    return s.succ_indices[s.succ_offsets[index]:s.succ_offsets[index+1]]
+
+  def get_predecessors( s, index ):
+    return s.pred_indices[s.pred_offsets[index]:s.pred_offsets[index+1]]
+
+  def get_node( s, node_id ):
+    index = s.node_index.get( node_id )
+    return s.nodes[index] if index is not None else None
@@ -0,0 +1,164 @@
+"""
+=========================================================================
+elaboration_profiler.py
+=========================================================================
+Opt-in profiler for the elaboration phase. While active, it hooks the
+construct() of every PyMTL component and records, per component class:
+  - the number of instances,
+  - the cumulative construct time (exclusive of the children, which are
+    constructed in the middle of their parent's construct),
+  - the number of Wires and Ports created directly by the component,
+  - the peak (and total) memory allocated by a single construct call
+    (exclusive of the children), when memory tracing is enabled.
+
+Usage:
+
+  with ElaborationProfiler() as profiler:
+    th.elaborate()
+  print(profiler.report())
+  profiler.dump_json("elaboration_profile.json")
+
+or simply profile_elaboration(th, "elaboration_profile.json").
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import json
+import time
+import tracemalloc
+from pymtl3 import *
+from pymtl3.dsl.Connectable import Interface, Signal
+
+class ElaborationProfiler:
+
+  def __init__(s, trace_memory = True):
+    s.trace_memory = trace_memory
+    s.stats = {}
+    s.total_time = 0.0
+    s.peak_memory = 0
+    # Each frame is [start_time, children_time, start_mem, children_mem].
+    s._stack = []
+    s._original_construct = None
+    s._started_tracemalloc = False
+
+  def __enter__(s):
+    profiler = s
+    s._original_construct = original_construct = Component._construct
+
+    def _profiled_construct(component):
+      if component._dsl.constructed:
+        return original_construct(component)
+      profiler._enter_construct()
+      try:
+        original_construct(component)
+      finally:
+        profiler._exit_construct(component)
+
+    if s.trace_memory and not tracemalloc.is_tracing():
+      tracemalloc.start()
+      s._started_tracemalloc = True
+    Component._construct = _profiled_construct
+    s._start_time = time.perf_counter()
+    return s
+
+  def __exit__(s, *exc):
+    s.total_time += time.perf_counter() - s._start_time
+    Component._construct = s._original_construct
+    if s.trace_memory:
+      s.peak_memory = max(s.peak_memory, tracemalloc.get_traced_memory()[1])
+    if s._started_tracemalloc:
+      tracemalloc.stop()
+      s._started_tracemalloc = False
+    return False
+
+  def _current_memory(s):
+    return tracemalloc.get_traced_memory()[0] if s.trace_memory else 0
+
+  def _enter_construct(s):
+    s._stack.append([time.perf_counter(), 0.0, s._current_memory(), 0])
+
+  def _exit_construct(s, component):
+    start_time, children_time, start_mem, children_mem = s._stack.pop()
+    elapsed = time.perf_counter() - start_time
+    allocated = s._current_memory() - start_mem
+    if s._stack:
+      s._stack[-1][1] += elapsed
+      s._stack[-1][3] += allocated
+
+    name = component.__class__.__name__
+    if name not in s.stats:
+      s.stats[name] = {'instances'      : 0,
+                       'construct_time' : 0.0,
+                       'wires'          : 0,
+                       'ports'          : 0,
+                       'total_mem_bytes': 0,
+                       'peak_mem_bytes' : 0}
+    num_wires, num_ports = _count_signals(component)
+    own_mem = max(0, allocated - children_mem)
+    entry = s.stats[name]
+    entry['instances'] += 1
+    entry['construct_time'] += elapsed - children_time
+    entry['wires'] += num_wires
+    entry['ports'] += num_ports
+    entry['total_mem_bytes'] += own_mem
+    entry['peak_mem_bytes'] = max(entry['peak_mem_bytes'], own_mem)
+
+  def sorted_stats(s, key = 'construct_time'):
+    return sorted(s.stats.items(), key = lambda item: item[1][key],
+                  reverse = True)
+
+  def report(s, key = 'construct_time', top = None):
+    rows = s.sorted_stats(key)
+    if top is not None:
+      rows = rows[:top]
+    lines = [f"Elaboration profile: {s.total_time:.3f}s total, "
+             f"peak memory {s.peak_memory / 1024 / 1024:.1f} MiB "
+             f"(sorted by {key})",
+             f"{'component':<32}{'instances':>10}{'time(s)':>10}"
+             f"{'wires':>10}{'ports':>10}{'peak(KiB)':>12}"]
+    for name, entry in rows:
+      lines.append(f"{name:<32}{entry['instances']:>10}"
+                   f"{entry['construct_time']:>10.3f}{entry['wires']:>10}"
+                   f"{entry['ports']:>10}"
+                   f"{entry['peak_mem_bytes'] / 1024:>12.1f}")
+    return "\n".join(lines)
+
+  def to_json(s):
+    return json.dumps({'total_time': s.total_time,
+                       'peak_memory': s.peak_memory,
+                       'components': dict(s.sorted_stats())}, indent = 2)
+
+  def dump_json(s, path):
+    with open(path, 'w') as f:
+      f.write(s.to_json())
+
+# Counts the Wires and Ports directly created by the component, including
+# those inside its interfaces (but not those of its child components).
+def _count_signals(component):
+  num_wires = 0
+  num_ports = 0
+  pending = list(component.__dict__.values())
+  while pending:
+    obj = pending.pop()
+    if isinstance(obj, list):
+      pending.extend(obj)
+    elif isinstance(obj, Signal):
+      if isinstance(obj, Wire):
+        num_wires += 1
+      else:
+        num_ports += 1
+    elif isinstance(obj, Interface):
+      pending.extend(obj.__dict__.values())
+  return num_wires, num_ports
+
+def profile_elaboration(top, json_path = None, trace_memory = True,
+                        print_report = True):
+  with ElaborationProfiler(trace_memory) as profiler:
+    top.elaborate()
+  if print_report:
+    print(profiler.report())
+  if json_path is not None:
+    profiler.dump_json(json_path)
+  return profiler
+
@@ -0,0 +1,76 @@
+"""
+=========================================================================
+json_cache.py
+=========================================================================
+Cached JSON loading for the DFG/ctrl loaders.
+
+The DFGs and mapped configs emitted by the compiler can be tens of MBs of
+JSON, and parsing them dominates repeated loads. load_json() keeps the
+parsed content in a compact binary (marshal) form keyed on the absolute
+path, size and modification time of the JSON file, both within a run
+(in-memory) and across runs (on-disk), so that reloading an unchanged file
+skips the JSON parsing.
+
+The on-disk cache is opt-in: it only lives in VECTORCGRA_JSON_CACHE_DIR
+if that is set (e.g., to ~/.cache/vectorcgra/json), otherwise only the
+in-memory cache is used.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import sys
+
+DEFAULT_JSON_CACHE_DIR = os.environ.get("VECTORCGRA_JSON_CACHE_DIR")
+
+# In-run memoization: key -> marshaled content.
+_json_memo = {}
+
+def _get_key(json_file_name):
+  path = os.path.abspath(json_file_name)
+  stat = os.stat(path)
+  # The marshal format is only stable within the same Python version.
+  content = f"{path}|{stat.st_size}|{stat.st_mtime_ns}|" \
+            f"{marshal.version}|{sys.version_info[:2]}"
+  return hashlib.sha256(content.encode()).hexdigest()
+
+# Returns the parsed content of the JSON file. Each call returns a fresh
+# copy, so callers are free to modify it.
+def load_json(json_file_name, cache_dir = DEFAULT_JSON_CACHE_DIR):
+  key = _get_key(json_file_name)
+  if key in _json_memo:
+    return marshal.loads(_json_memo[key])
+
+  cache_path = os.path.join(cache_dir, key + ".marshal") if cache_dir else None
+  if cache_path is not None and os.path.exists(cache_path):
+    with open(cache_path, 'rb') as f:
+      data = f.read()
+    try:
+      content = marshal.loads(data)
+      _json_memo[key] = data
+      return content
+    except (EOFError, ValueError, TypeError):
+      # Falls back to parsing the JSON file if the cache is corrupted.
+      pass
+
+  with open(json_file_name) as json_file:
+    content = json.load(json_file)
+  data = marshal.dumps(content)
+  _json_memo[key] = data
+  if cache_path is not None:
+    os.makedirs(cache_dir, exist_ok = True)
+    # Writes then renames so that concurrent readers never observe
+    # partial files.
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+      f.write(data)
+    os.replace(tmp_path, cache_path)
+  return content
+
+def clear_json_memo():
+  _json_memo.clear()
+
@@ -0,0 +1,75 @@
+"""
+=========================================================================
+line_trace_helper.py
+=========================================================================
+Tiered line-trace control shared by the CGRA components and the
+simulation harnesses (run_sim).
+
+Trace levels:
+  - TRACE_OFF:     line_trace() formats nothing and run_sim() prints
+                   nothing, which keeps long regressions cheap.
+  - TRACE_SUMMARY: one compact status string per component (e.g., ctrl
+                   address and handshake of each tile), no memory dumps.
+  - TRACE_FULL:    the complete per-signal trace (default, i.e., the
+                   original behavior).
+
+On top of the level, an interval N only formats the trace every N cycles.
+Both can be set programmatically via set_trace_level() or through the
+environment variables VECTORCGRA_TRACE (off/summary/full) and
+VECTORCGRA_TRACE_INTERVAL.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import os
+
+TRACE_OFF     = 0
+TRACE_SUMMARY = 1
+TRACE_FULL    = 2
+
+TRACE_LEVEL_DICT = {
+  "off"     : TRACE_OFF,
+  "summary" : TRACE_SUMMARY,
+  "full"    : TRACE_FULL,
+}
+
+_trace_level = TRACE_LEVEL_DICT.get(
+    os.environ.get("VECTORCGRA_TRACE", "full").lower(), TRACE_FULL)
+_trace_interval = max(1, int(os.environ.get("VECTORCGRA_TRACE_INTERVAL", "1")))
+
+def set_trace_level(level, interval = 1):
+  global _trace_level, _trace_interval
+  if isinstance(level, str):
+    assert level.lower() in TRACE_LEVEL_DICT, \
+           f"Unknown trace level '{level}', expects one of {list(TRACE_LEVEL_DICT)}"
+    level = TRACE_LEVEL_DICT[level.lower()]
+  assert level in (TRACE_OFF, TRACE_SUMMARY, TRACE_FULL)
+  assert interval >= 1
+  _trace_level = level
+  _trace_interval = interval
+
+def get_trace_level():
+  return _trace_level
+
+def get_trace_interval():
+  return _trace_interval
+
+def trace_is_off():
+  return _trace_level == TRACE_OFF
+
+def trace_is_summary():
+  return _trace_level == TRACE_SUMMARY
+
+# Returns whether the trace of the given cycle needs to be formatted at all,
+# so that harnesses never pay for building strings that are thrown away.
+def should_trace(ncycles):
+  return _trace_level != TRACE_OFF and ncycles % _trace_interval == 0
+
+# Prints the line trace of the component for the given cycle if the current
+# level and interval require it. The component's line_trace() is only
+# invoked when the trace is actually printed.
+def print_line_trace(ncycles, component, prefix = "cycle "):
+  if should_trace(ncycles):
+    print("{}{}:{}".format(prefix, ncycles, component.line_trace()))
+
@@ -0,0 +1,71 @@
+"""
+=========================================================================
+reduce_tree_helper.py
+=========================================================================
+Spanning tree of the global reductions in GLOBAL_REDUCE_TREE mode (see
+ControllerRTL), derived from the idTo2d_map of the multi-CGRA mesh.
+
+The tree is rooted at the CGRA on (0, 0). A CGRA on (x, y) merges into
+the one on (x with its lowest set bit cleared, y), or, once x is 0, into
+the one on (0, y with its lowest set bit cleared). So the depth is
+bounded by clog2(columns) + clog2(rows), and each partial result only
+travels along a row or a column.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+# Returns {cgra_id: parent_id} of the reduction tree, the parent of the
+# root is None.
+def reduce_tree_parents(idTo2d_map):
+  xy2id = {tuple(xy): cgra_id for cgra_id, xy in idTo2d_map.items()}
+  assert (0, 0) in xy2id, "The reduction tree is rooted at (0, 0)."
+  parents = {}
+  for cgra_id, (x, y) in idTo2d_map.items():
+    if x > 0:
+      parent_xy = (x & (x - 1), y)
+    elif y > 0:
+      parent_xy = (0, y & (y - 1))
+    else:
+      parents[cgra_id] = None
+      continue
+    assert parent_xy in xy2id, f"CGRA {cgra_id} has no parent on {parent_xy}."
+    parents[cgra_id] = xy2id[parent_xy]
+  return parents
+
+# Returns the id of the root of the reduction tree.
+def reduce_tree_root(idTo2d_map):
+  parents = reduce_tree_parents(idTo2d_map)
+  return [cgra_id for cgra_id, parent in parents.items() if parent is None][0]
+
+# Returns {cgra_id: [child_id, ...]} of the reduction tree.
+def reduce_tree_children(idTo2d_map):
+  parents = reduce_tree_parents(idTo2d_map)
+  children = {cgra_id: [] for cgra_id in parents}
+  for cgra_id, parent in parents.items():
+    if parent is not None:
+      children[parent].append(cgra_id)
+  return children
+
+# Returns the depth (i.e., number of merging levels below the root) of
+# the reduction tree.
+def reduce_tree_depth(idTo2d_map):
+  parents = reduce_tree_parents(idTo2d_map)
+  def depth(cgra_id):
+    return 0 if parents[cgra_id] is None else depth(parents[cgra_id]) + 1
+  return max(depth(cgra_id) for cgra_id in parents)
+
+# Returns {cgra_id: count} to configure via CMD_GLOBAL_REDUCE_COUNT, i.e.,
+# the number of packets each controller merges, given the number of the
+# participating tiles of each CGRA ({cgra_id: num}). The CGRAs without
+# participants still forward the partial results of their children, and
+# the subtrees without any participant are left out (i.e., count 0).
+def reduce_tree_counts(idTo2d_map, num_local_participants):
+  children = reduce_tree_children(idTo2d_map)
+  counts = {}
+  def count(cgra_id):
+    counts[cgra_id] = num_local_participants.get(cgra_id, 0) + \
+                      sum(1 for child in children[cgra_id] if count(child) > 0)
+    return counts[cgra_id]
+  count(reduce_tree_root(idTo2d_map))
+  return counts
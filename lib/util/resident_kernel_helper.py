@@ -0,0 +1,293 @@
+"""
+=========================================================================
+resident_kernel_helper.py
+=========================================================================
+Host-side manager of the kernels resident in the ctrl memories (see
+num_resident_kernels of TileRTL and CtrlMemDynamicRTL).
+
+Each kernel is given as its config program, i.e., the IntraCgraPkt
+stream with the ctrl addresses starting from 0 and the CMD_LAUNCH of
+each tile. The first launch of a kernel places it into a free kernel id
+and a free range of the ctrl memory (the same range on all the tiles),
+i.e., the ctrl addresses (CMD_CONFIG, the prologue counts, etc.) and the
+lower bound are rebased, and the kernel id is attached (as data_addr) to
+the counts and the launches. Once the kernel is resident, launching it
+again only takes the CMD_LAUNCH packets:
+
+  manager = ResidentKernelManager(IntraCgraPktType, ctrl_mem_size, 4,
+                                  num_ctrl, total_steps)
+  pkts = manager.launch('fir', fir_pkts)   # config + launch
+  pkts = manager.launch('relu', relu_pkts) # config + launch
+  pkts = manager.launch('fir', fir_pkts)   # launch only
+
+If there is no free kernel id or range left, the least recently launched
+kernels are evicted, i.e., their ids and ranges are reused by the new
+kernel. As the ctrl memory keeps the prologue counts of an address until
+they are configured again, the counts left by the evicted kernels in the
+reused range are zeroed along with the config of the new kernel.
+
+With num_ctrl_patterns > 0, the ctrl memories keep the routing
+patterns in a table (see CtrlPatternRegFileRTL), which is not freed by
+the eviction. The table of a tile keeps the patterns of all the kernels
+loaded since its last clear, and a kernel whose patterns do not fit in
+it evicts all the other kernels and clears (CMD_CLEAR_CTRL_PATTERNS)
+the tables of the tiles it does not fit, as the clear drops the
+patterns the other kernels refer to. Like the evicted ranges, the
+evicted kernels are expected to be complete by then.
+
+The other packets of the program (e.g., CMD_STORE_REQUEST) are only sent
+along with the config. As the const memory of a tile is neither
+partitioned among the kernels nor cleared, only one kernel can carry
+CMD_CONST, whose consts are not sent again once it is reloaded.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from collections import OrderedDict
+from ..cmd_type import *
+from .config_assembler import ctrl_pattern
+from .ctrl_delta_helper import CtrlDeltaFormat
+from .data_struct_attr import *
+
+# Commands carrying a ctrl address to be rebased.
+_CTRL_ADDR_CMDS = [CMD_CONFIG,
+                   CMD_CONFIG_DELTA,
+                   CMD_CONFIG_SHADOW,
+                   CMD_CONFIG_PROLOGUE_FU,
+                   CMD_CONFIG_PROLOGUE_FU_CROSSBAR,
+                   CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR,
+                   CMD_RECORD_PHI_ADDR]
+
+# Commands configuring a prologue count of a ctrl address.
+_PROLOGUE_CMDS = [CMD_CONFIG_PROLOGUE_FU,
+                  CMD_CONFIG_PROLOGUE_FU_CROSSBAR,
+                  CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR]
+
+# Commands configuring the kernel indicated by the data_addr.
+_KERNEL_CMDS = [CMD_CONFIG_COUNT_PER_ITER,
+                CMD_CONFIG_TOTAL_CTRL_COUNT,
+                CMD_CONFIG_CTRL_LOWER_BOUND,
+                CMD_LAUNCH]
+
+class ResidentKernel:
+
+  def __init__(s, name, kernel_id, base, size):
+    s.name = name
+    s.kernel_id = kernel_id
+    # The range of the ctrl memory, i.e., [base, base + size).
+    s.base = base
+    s.size = size
+    s.launch_pkts = []
+
+class ResidentKernelManager:
+
+  # num_ctrl/total_steps are the count per iteration and the total ctrl
+  # count of a kernel not configuring them (i.e., the corresponding
+  # CgraRTL parameters), as a reused kernel id keeps the counts of the
+  # evicted kernel. num_ctrl_patterns is the pattern table size of the
+  # ctrl memories, 0 for no table.
+  def __init__(s, IntraCgraPktType, ctrl_mem_size, num_kernels,
+               num_ctrl, total_steps, num_ctrl_patterns = 0):
+    s.IntraCgraPktType = IntraCgraPktType
+    s.CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+    s.DataType = s.CgraPayloadType.get_field_type(kAttrData)
+    s.DataAddrType = s.CgraPayloadType.get_field_type(kAttrDataAddr)
+    s.CtrlAddrType = s.CgraPayloadType.get_field_type(kAttrCtrlAddr)
+    s.ctrl_delta = CtrlDeltaFormat(
+        s.CgraPayloadType.get_field_type(kAttrCtrl))
+    s.ctrl_mem_size = ctrl_mem_size
+    s.num_kernels = num_kernels
+    s.num_ctrl = num_ctrl
+    s.total_steps = total_steps
+    s.num_ctrl_patterns = num_ctrl_patterns
+    # name -> ResidentKernel, from the least recently launched one.
+    s.kernels = OrderedDict()
+    # (tile, ctrl_addr, cmd, port) -> packet of each non-zero prologue
+    # count configured in the ctrl memories.
+    s.prologue_pkts = {}
+    # The kernel whose consts are loaded into the const memories.
+    s.const_kernel = None
+    # Tile -> routing patterns loaded into its table since the last clear.
+    s.table_patterns = {}
+    s.num_hits = 0
+    s.num_misses = 0
+    s.num_evictions = 0
+    s.num_pattern_clears = 0
+
+  def is_resident(s, name):
+    return name in s.kernels
+
+  # Returns the names of the resident kernels, from the least recently
+  # launched one.
+  def resident_kernels(s):
+    return list(s.kernels)
+
+  # Returns the packets to launch the kernel, along with its config if
+  # it is not resident.
+  def launch(s, name, pkts):
+    if name in s.kernels:
+      s.num_hits += 1
+      s.kernels.move_to_end(name)
+      return [pkt.clone() for pkt in s.kernels[name].launch_pkts]
+
+    s.num_misses += 1
+    # A CMD_CONFIG_DELTA carries data.payload ctrl signals.
+    size = max([int(pkt.payload.ctrl_addr) +
+                (max(int(pkt.payload.data.payload), 1)
+                 if int(pkt.payload.cmd) == CMD_CONFIG_DELTA else 1)
+                for pkt in pkts
+                if int(pkt.payload.cmd) in _CTRL_ADDR_CMDS] + [1])
+    if size > s.ctrl_mem_size:
+      raise ValueError(f"kernel {name} takes {size} ctrl signals, more "
+                       f"than the ctrl memory size {s.ctrl_mem_size}")
+    if any(int(pkt.payload.cmd) == CMD_CONST for pkt in pkts):
+      if s.const_kernel is None:
+        s.const_kernel = name
+      elif s.const_kernel != name:
+        raise ValueError(f"kernel {name} carries CMD_CONST, while the "
+                         f"const memory is taken by {s.const_kernel}")
+      else:
+        pkts = [pkt for pkt in pkts if int(pkt.payload.cmd) != CMD_CONST]
+
+    clear_pkts = s._clear_patterns(name, pkts)
+    kernel_id, base = s._allocate(size)
+    while kernel_id is None:
+      del s.kernels[next(iter(s.kernels))]
+      s.num_evictions += 1
+      kernel_id, base = s._allocate(size)
+
+    kernel = ResidentKernel(name, kernel_id, base, size)
+    s.kernels[name] = kernel
+    return clear_pkts + s._rebase(kernel, pkts)
+
+  # Returns tile -> routing patterns of the ctrl signals of the program.
+  def _patterns(s, pkts):
+    patterns = {}
+    for pkt in pkts:
+      cmd = int(pkt.payload.cmd)
+      if cmd == CMD_CONFIG:
+        ctrls = [pkt.payload.ctrl]
+      elif cmd == CMD_CONFIG_DELTA:
+        ctrls = s.ctrl_delta.decode(pkt.payload.ctrl,
+                                    int(pkt.payload.data.payload))
+      else:
+        continue
+      tile = (int(pkt.dst_cgra_id), int(pkt.dst))
+      patterns.setdefault(tile, set()).update(
+          ctrl_pattern(ctrl) for ctrl in ctrls)
+    return patterns
+
+  # Evicts all the resident kernels and returns the packets clearing the
+  # pattern tables the patterns of the kernel do not fit in, if any.
+  def _clear_patterns(s, name, pkts):
+    if s.num_ctrl_patterns == 0:
+      return []
+    patterns = s._patterns(pkts)
+    for tile, tile_patterns in patterns.items():
+      if len(tile_patterns) > s.num_ctrl_patterns:
+        raise ValueError(f"kernel {name} takes {len(tile_patterns)} "
+                         f"routing patterns on tile {tile}, more than the "
+                         f"pattern table size {s.num_ctrl_patterns}")
+    full_tiles = [tile for tile, tile_patterns in patterns.items()
+                  if len(s.table_patterns.get(tile, set()) |
+                         tile_patterns) > s.num_ctrl_patterns]
+    clear_pkts = []
+    if full_tiles:
+      s.num_evictions += len(s.kernels)
+      s.kernels.clear()
+      s.num_pattern_clears += 1
+      for pkt in pkts:
+        tile = (int(pkt.dst_cgra_id), int(pkt.dst))
+        if tile in full_tiles and tile in s.table_patterns:
+          del s.table_patterns[tile]
+          clear_pkt = pkt.clone()
+          clear_pkt.payload = s.CgraPayloadType(CMD_CLEAR_CTRL_PATTERNS)
+          clear_pkts.append(clear_pkt)
+    for tile, tile_patterns in patterns.items():
+      s.table_patterns.setdefault(tile, set()).update(tile_patterns)
+    return clear_pkts
+
+  # Returns (kernel_id, base) of a free kernel id and the first free
+  # range fitting the size, or (None, None).
+  def _allocate(s, size):
+    used_ids = set(kernel.kernel_id for kernel in s.kernels.values())
+    free_ids = [i for i in range(s.num_kernels) if i not in used_ids]
+    if not free_ids:
+      return None, None
+    base = 0
+    for kernel in sorted(s.kernels.values(), key = lambda k: k.base):
+      if kernel.base - base >= size:
+        break
+      base = max(base, kernel.base + kernel.size)
+    if base + size > s.ctrl_mem_size:
+      return None, None
+    return free_ids[0], base
+
+  # Returns the key of the prologue count configured by the packet.
+  def _prologue_key(s, pkt):
+    cmd = int(pkt.payload.cmd)
+    port = 0
+    if cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR:
+      port = int(pkt.payload.ctrl.routing_xbar_outport[0])
+    elif cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR:
+      port = int(pkt.payload.ctrl.fu_xbar_outport[0])
+    return ((int(pkt.dst_cgra_id), int(pkt.dst)),
+            int(pkt.payload.ctrl_addr), cmd, port)
+
+  def _rebase(s, kernel, pkts):
+    config_pkts = []
+    # Tile -> settings of the kernel configured by the program.
+    settings = {}
+    # The prologue counts configured by the program.
+    prologue_keys = set()
+    for pkt in pkts:
+      cmd = int(pkt.payload.cmd)
+      tile = (int(pkt.dst_cgra_id), int(pkt.dst))
+      pkt = pkt.clone()
+      if cmd in _CTRL_ADDR_CMDS:
+        pkt.payload.ctrl_addr = \
+            s.CtrlAddrType(int(pkt.payload.ctrl_addr) + kernel.base)
+      if cmd in _PROLOGUE_CMDS:
+        key = s._prologue_key(pkt)
+        prologue_keys.add(key)
+        s.prologue_pkts.pop(key, None)
+        if int(pkt.payload.data.payload) != 0:
+          s.prologue_pkts[key] = pkt.clone()
+      if cmd == CMD_CONFIG_CTRL_LOWER_BOUND:
+        pkt.payload.data = s.DataType(
+            int(pkt.payload.data.payload) + kernel.base, 1)
+      if cmd in _KERNEL_CMDS:
+        pkt.payload.data_addr = s.DataAddrType(kernel.kernel_id)
+        settings.setdefault(tile, set()).add(cmd)
+
+      if cmd != CMD_LAUNCH:
+        config_pkts.append(pkt)
+        continue
+
+      # The reused kernel id keeps the settings of the evicted kernel,
+      # so the ones missing from the program are written explicitly.
+      defaults = {CMD_CONFIG_CTRL_LOWER_BOUND: kernel.base,
+                  CMD_CONFIG_COUNT_PER_ITER: s.num_ctrl,
+                  CMD_CONFIG_TOTAL_CTRL_COUNT: s.total_steps}
+      for setting_cmd, value in defaults.items():
+        if setting_cmd not in settings[tile]:
+          setting_pkt = pkt.clone()
+          setting_pkt.payload = s.CgraPayloadType(
+              setting_cmd, data = s.DataType(value, 1),
+              data_addr = kernel.kernel_id)
+          config_pkts.append(setting_pkt)
+      kernel.launch_pkts.append(pkt)
+
+    # Zeroes the prologue counts left in the range by the evicted kernels.
+    stale_pkts = []
+    for key in sorted(s.prologue_pkts):
+      _, addr, _, _ = key
+      if kernel.base <= addr < kernel.base + kernel.size and \
+         key not in prologue_keys:
+        pkt = s.prologue_pkts.pop(key)
+        pkt.payload.data = s.DataType(0, 1)
+        stale_pkts.append(pkt)
+
+    return stale_pkts + config_pkts + \
+           [pkt.clone() for pkt in kernel.launch_pkts]
@@ -0,0 +1,165 @@
+"""
+=========================================================================
+sim_recorder.py
+=========================================================================
+Post-mortem recorder for the CGRA simulation harnesses.
+
+Instead of formatting a line trace every cycle, SimRecorder captures a
+compact raw snapshot of selected ports (val/rdy bits, msg packed as int,
+and the ctrl memory read address of each tile) into a fixed-size circular
+buffer. The snapshots are only decoded and formatted -- into the same
+[cgraX_tileY] layout as the line traces -- when a test sink raises
+PyMTLTestSinkError or the simulation hits max_cycles.
+
+Works with CgraRTL, CgraWithContextSwitchRTL and MeshMultiCgraRTL duts.
+If the dut has been translated/imported (i.e., its hierarchy is not
+visible), only its top-level ports are recorded.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from collections import deque
+from pymtl3 import *
+from pymtl3.datatypes import is_bitstruct_class, is_bitstruct_inst
+from pymtl3.stdlib.test_utils.test_helpers import finalize_verilator
+from ..basic.val_rdy.SinkRTL import PyMTLTestSinkError
+from .line_trace_helper import trace_is_off
+
+DEFAULT_RECORDER_DEPTH = 256
+
+# Top-level val/rdy ports recorded for each cgra (and the dut itself).
+_RECORDED_TOP_PORTS = ['recv_from_cpu_pkt', 'send_to_cpu_pkt']
+
+# Val/rdy ports recorded for each controller.
+_RECORDED_CONTROLLER_PORTS = ['recv_from_cpu_pkt',
+                              'send_to_cpu_pkt',
+                              'send_to_ctrl_ring_pkt',
+                              'recv_from_ctrl_ring_pkt',
+                              'send_to_inter_cgra_noc',
+                              'recv_from_inter_cgra_noc']
+
+class SimRecorder:
+
+  def __init__(s, dut, depth = DEFAULT_RECORDER_DEPTH):
+    # Each group is (label, [(name, ifc_or_signal, is_ifc)]).
+    s.groups = _collect_groups(dut)
+    s.snapshots = deque(maxlen = depth)
+    # Message types are resolved lazily from the first snapshot, so that
+    # recording never needs the declared port types.
+    s.msg_types = {}
+
+  # Captures the raw values of all probes for the given cycle. Nothing is
+  # formatted here.
+  def record(s, ncycles):
+    values = []
+    for _, probes in s.groups:
+      for _, probe, is_ifc in probes:
+        if is_ifc:
+          msg = probe.msg
+          values.append((int(probe.val), int(probe.rdy),
+                         int(msg.to_bits()) if is_bitstruct_inst(msg) else int(msg)))
+          if id(probe) not in s.msg_types:
+            s.msg_types[id(probe)] = type(msg)
+        else:
+          values.append(int(probe))
+    s.snapshots.append((ncycles, values))
+
+  def _decode(s, probe, value):
+    Type = s.msg_types[id(probe)]
+    if is_bitstruct_class(Type):
+      return Type.from_bits(mk_bits(Type.nbits)(value))
+    return Type(value)
+
+  def format_snapshot(s, ncycles, values):
+    res = []
+    idx = 0
+    for label, probes in s.groups:
+      probe_strs = []
+      for name, probe, is_ifc in probes:
+        if is_ifc:
+          val, rdy, msg = values[idx]
+          msg_str = str(s._decode(probe, msg)) if val else "-"
+          probe_strs.append(f"{name}: ({msg_str}, val: {val}, rdy: {rdy})")
+        else:
+          probe_strs.append(f"{name}: {values[idx]}")
+        idx += 1
+      res.append(f"\n[{label}]: " + " || ".join(probe_strs))
+    return "cycle {}:{}".format(ncycles, "||".join(res))
+
+  def format(s):
+    return "\n".join([s.format_snapshot(ncycles, values)
+                      for ncycles, values in s.snapshots])
+
+  def dump(s, reason = ""):
+    print(f"\n========== post-mortem trace of the last {len(s.snapshots)} cycles"
+          f"{' (' + reason + ')' if reason else ''} ==========")
+    print(s.format())
+
+def _collect_groups(dut):
+  groups = []
+
+  def _ports(component, names):
+    return [(name, getattr(component, name), True)
+            for name in names if hasattr(component, name)]
+
+  top_ports = _ports(dut, _RECORDED_TOP_PORTS)
+  if top_ports:
+    groups.append(("dut", top_ports))
+
+  cgras = list(dut.cgra) if hasattr(dut, 'cgra') else [dut]
+  for cgra_id, cgra in enumerate(cgras):
+    for tile_id, tile in enumerate(getattr(cgra, 'tile', [])):
+      probes = []
+      if hasattr(tile, 'ctrl_mem'):
+        probes.append(('ctrl_raddr', tile.ctrl_mem.reg_file.raddr[0], False))
+        probes.append(('send_ctrl', tile.ctrl_mem.send_ctrl, True))
+      probes += [(f"recv_data[{i}]", port, True) for i, port in enumerate(tile.recv_data)]
+      probes += [(f"send_data[{i}]", port, True) for i, port in enumerate(tile.send_data)]
+      groups.append((f"cgra{cgra_id}_tile{tile_id}", probes))
+    if hasattr(cgra, 'controller'):
+      groups.append((f"cgra{cgra_id}_controller",
+                     _ports(cgra.controller, _RECORDED_CONTROLLER_PORTS)))
+  return groups
+
+#-------------------------------------------------------------------------
+# run_sim_with_recorder
+#-------------------------------------------------------------------------
+# Drop-in replacement of run_sim() for the CGRA harnesses that dumps the
+# recorded snapshots on sink error or timeout. The per-cycle line trace is
+# printed the same way as run_sim() does, unless VECTORCGRA_TRACE is off or
+# print_trace is False, in which case each cycle is only recorded.
+
+def run_sim_with_recorder(test_harness, max_cycles = 10000,
+                          depth = DEFAULT_RECORDER_DEPTH,
+                          print_trace = None):
+  if print_trace is None:
+    print_trace = not trace_is_off()
+  test_harness.apply(DefaultPassGroup(linetrace = print_trace))
+  test_harness.sim_reset()
+  recorder = SimRecorder(test_harness.dut, depth)
+
+  # Runs simulation.
+  ncycles = 0
+  try:
+    recorder.record(ncycles)
+    while not test_harness.done() and ncycles < max_cycles:
+      test_harness.sim_tick()
+      ncycles += 1
+      recorder.record(ncycles)
+
+    # Checks timeout.
+    if ncycles >= max_cycles:
+      recorder.dump(f"timeout after {max_cycles} cycles")
+    assert ncycles < max_cycles
+
+    test_harness.sim_tick()
+    test_harness.sim_tick()
+    test_harness.sim_tick()
+
+  except PyMTLTestSinkError:
+    recorder.dump("sink error")
+    raise
+
+  finally:
+    finalize_verilator(test_harness)
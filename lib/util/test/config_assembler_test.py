@@ -0,0 +1,131 @@
+"""
+==========================================================================
+config_assembler_test.py
+==========================================================================
+Test cases for the ordering of the assembled config programs.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import pytest
+from pymtl3 import *
+from ..config_assembler import ConfigAssembler
+from ..ctrl_delta_helper import CtrlDeltaFormat
+from ...cmd_type import *
+from ...messages import *
+from ...opt_type import *
+
+num_tiles = 4
+num_fu_inports = 4
+num_fu_outports = 2
+num_tile_ports = 4
+ctrl_mem_size = 4
+data_mem_size_global = 32
+
+DataType = mk_data(32, 1)
+DataAddrType = mk_bits(clog2(data_mem_size_global))
+CtrlType = mk_ctrl(num_fu_inports, num_fu_outports, num_tile_ports,
+                   num_tile_ports)
+CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                  CtrlAddrType)
+IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+def mk_pkt(cmd, dst = 0, data = 0, data_addr = 0, ctrl_addr = 0):
+  return IntraCgraPktType(0, dst, payload = CgraPayloadType(
+      cmd, data = DataType(data, 1), data_addr = data_addr,
+      ctrl_addr = ctrl_addr))
+
+def summary(pkts):
+  return [(CMD_SYMBOL_DICT[int(pkt.payload.cmd)], int(pkt.dst),
+           int(pkt.payload.data_addr)) for pkt in pkts]
+
+def mk_stream():
+  return [mk_pkt(CMD_STORE_REQUEST, data = 1, data_addr = 0),
+          mk_pkt(CMD_LOAD_REQUEST, data_addr = 0),
+          mk_pkt(CMD_CONST, dst = 1, data = 5),
+          mk_pkt(CMD_CONFIG_COUNT_PER_ITER, dst = 1, data = 2),
+          mk_pkt(CMD_LAUNCH, dst = 1),
+          mk_pkt(CMD_CONST, dst = 2, data = 6),
+          mk_pkt(CMD_LAUNCH, dst = 2),
+          # The results, only valid once the kernel runs.
+          mk_pkt(CMD_LOAD_REQUEST, data_addr = 9),
+          mk_pkt(CMD_LOAD_REQUEST, data_addr = 10),
+          mk_pkt(CMD_STORE_REQUEST, data = 2, data_addr = 0),
+          mk_pkt(CMD_LOAD_REQUEST, data_addr = 0)]
+
+def test_post_launch_accesses_stay_after_the_launches():
+  asm = ConfigAssembler(IntraCgraPktType, num_tiles, num_tile_ports,
+                        num_fu_inports)
+  pkts = asm.add_pkts(mk_stream()).assemble()
+  launches = [i for i, pkt in enumerate(pkts)
+              if pkt.payload.cmd == CMD_LAUNCH]
+  assert summary(pkts[max(launches) + 1:]) == \
+         [("(LOAD_REQUEST)", 0, 9),
+          ("(LOAD_REQUEST)", 0, 10),
+          ("(STORE_REQUEST)", 0, 0),
+          ("(LOAD_REQUEST)", 0, 0)]
+  # The accesses before the first launch still go before the launches.
+  assert summary(pkts[:min(launches)])[-2:] == \
+         [("(STORE_REQUEST)", 0, 0), ("(LOAD_REQUEST)", 0, 0)]
+
+def test_post_launch_loads_are_coalesced():
+  asm = ConfigAssembler(IntraCgraPktType, num_tiles, num_tile_ports,
+                        num_fu_inports, dma = True)
+  pkts = asm.add_pkts(mk_stream()).assemble()
+  launches = [i for i, pkt in enumerate(pkts)
+              if pkt.payload.cmd == CMD_LAUNCH]
+  tail = pkts[max(launches) + 1:]
+  assert summary(tail) == \
+         [("(DMA_LOAD_REQUEST)", 0, 9),
+          ("(STORE_REQUEST)", 0, 0),
+          ("(LOAD_REQUEST)", 0, 0)]
+  assert int(tail[0].payload.data.payload) == 2
+
+def test_config_delta_wraps_around():
+  # Three ctrl signals from the last ctrl address, i.e., 3, 0 and 1.
+  ctrls = {addr: CtrlType(operation) for addr, operation in
+           [(3, OPT_ADD), (4, OPT_SUB), (5, OPT_MUL)]}
+  encoded = CtrlDeltaFormat(CtrlType).encode(ctrls)
+  assert [(cmd, addr, count) for cmd, addr, count, _ in encoded] == \
+         [(CMD_CONFIG_DELTA, 3, 3)]
+  _, addr, count, ctrl = encoded[0]
+  delta_pkt = IntraCgraPktType(0, 1, payload = CgraPayloadType(
+      CMD_CONFIG_DELTA, data = DataType(count, 1), ctrl = ctrl,
+      ctrl_addr = addr))
+
+  # The ctrl signal at 0 is then overwritten.
+  asm = ConfigAssembler(IntraCgraPktType, num_tiles, num_tile_ports,
+                        num_fu_inports)
+  pkts = asm.add_pkts([delta_pkt, mk_pkt(CMD_CONFIG, dst = 1),
+                       mk_pkt(CMD_LAUNCH, dst = 1)]).assemble()
+  assert [(int(pkt.payload.ctrl_addr), int(pkt.payload.ctrl.operation))
+          for pkt in pkts if pkt.payload.cmd == CMD_CONFIG] == \
+         [(0, OPT_START), (1, OPT_MUL), (3, OPT_ADD)]
+  assert asm.num_redundant == 1
+
+def test_ctrl_pattern_overflow():
+  TileInType = mk_bits(clog2(num_tile_ports + 1))
+  def mk_config(ctrl_addr, inport, cmd = CMD_CONFIG):
+    routing = [TileInType(inport)] + [TileInType(0)] * 7
+    return IntraCgraPktType(0, 1, payload = CgraPayloadType(
+        cmd, ctrl = CtrlType(OPT_ADD, routing_xbar_outport = routing),
+        ctrl_addr = ctrl_addr))
+
+  # Two routing patterns in the active bank, one in the shadow bank.
+  pkts = [mk_config(0, 1), mk_config(1, 2), mk_config(2, 1),
+          mk_config(0, 3, CMD_CONFIG_SHADOW),
+          mk_pkt(CMD_CLEAR_CTRL_PATTERNS, dst = 1),
+          mk_pkt(CMD_LAUNCH, dst = 1)]
+  asm = ConfigAssembler(IntraCgraPktType, num_tiles, num_tile_ports,
+                        num_fu_inports, num_ctrl_patterns = 1)
+  with pytest.raises(ValueError):
+    asm.add_pkts(pkts).assemble()
+
+  # The clear goes ahead of the ctrl signals.
+  asm = ConfigAssembler(IntraCgraPktType, num_tiles, num_tile_ports,
+                        num_fu_inports, num_ctrl_patterns = 2)
+  assert summary(asm.add_pkts(pkts).assemble())[:2] == \
+         [("(CLEAR_CTRL_PATTERNS)", 1, 0),
+          ("(PRELOADING_KERNEL_CONFIG)", 1, 0)]
@@ -0,0 +1,62 @@
+"""
+==========================================================================
+ctrl_helper_test.py
+==========================================================================
+Test cases for the loader of the mapped ctrl signals.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import json
+from pymtl3 import *
+from ..ctrl_helper import CGRACtrl
+from ...opt_type import *
+
+num_fu_in = 2
+num_inports = 4
+num_outports = 4
+II = 2
+
+RouteType = mk_bits(clog2(num_inports + 1))
+FuInType = mk_bits(clog2(num_fu_in + 1))
+CtrlType = mk_bitstruct("TestCGRACtrl", {
+  'operation'   : mk_bits(clog2(NUM_OPTS)),
+  'predicate'   : Bits1,
+  'fu_in'       : [FuInType for _ in range(num_fu_in)],
+  'outport'     : [RouteType for _ in range(num_outports)],
+  'predicate_in': [Bits1 for _ in range(num_inports)],
+})
+
+def mk_entry(x, y, cycle, opt, outs):
+  entry = {"x": x, "y": y, "cycle": cycle, "opt": opt, "predicate": 0,
+           "predicate_in": [0]}
+  for i, out in enumerate(outs):
+    entry[f"out_{i}"] = out
+  return entry
+
+def test_identical_entries_do_not_alias(tmp_path):
+  # The same (NAH) entry on two tiles, and an ADD on the first one.
+  ctrls = [mk_entry(0, 0, 0, "OPT_NAH", ["none"] * num_outports),
+           mk_entry(1, 0, 0, "OPT_NAH", ["none"] * num_outports),
+           mk_entry(0, 0, 1, "OPT_ADD", ["1", "none", "none", "0"])]
+  json_file_name = tmp_path / "ctrl.json"
+  with open(json_file_name, 'w') as json_file:
+    json.dump(ctrls, json_file)
+  cgra_ctrl = CGRACtrl(json_file_name, CtrlType, RouteType, 2, 1,
+                       num_fu_in, num_inports, num_outports, II)
+  tile0, tile1 = cgra_ctrl.get_ctrl()
+
+  assert tile0[0] == tile1[0]
+  assert tile0[0] is not tile1[0]
+  assert tile0[1].operation == OPT_ADD
+  assert tile0[1].fu_in == [FuInType(1), FuInType(2)]
+  assert tile0[1].outport == [RouteType(2), RouteType(0), RouteType(0),
+                              RouteType(1)]
+  assert tile0[1].predicate_in == [b1(1), b1(0), b1(0), b1(0)]
+
+  # Modifying the ctrl signal of one tile leaves the other one intact.
+  tile0[0].operation = OPT_PAS
+  tile0[0].outport[0] @= 3
+  assert tile1[0].operation == OPT_NAH
+  assert tile1[0].outport[0] == 0
@@ -0,0 +1,65 @@
+"""
+==========================================================================
+dfg_helper_test.py
+==========================================================================
+Test cases for the DFG loader and its CSR adjacency.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import json
+from ..dfg_helper import DFG
+
+# Corresponding DFG (ids are not contiguous, and 40 -> 10 is a back edge):
+#
+#   10(phi) <---------┐
+#     |     \         |
+#   20(+)   30(ld)    |
+#     |    /  |       |
+#   40(x) <---┘-------┘
+kDFG = [
+  {"id": 10, "fu": "Phi",     "opt": "OPT_PHI", "opt_predicate": 0,
+   "in_const": [0], "in": [40],           "in_predicate": [],
+   "out": [[20, 30]]},
+  {"id": 20, "fu": "Adder",   "opt": "OPT_ADD", "opt_predicate": 0,
+   "in_const": [1], "in": [10],           "in_predicate": [],
+   "out": [[40]]},
+  {"id": 30, "fu": "MemUnit", "opt": "OPT_LD",  "opt_predicate": 0,
+   "in_const": [],  "in": [10],           "in_predicate": [],
+   "out": [[40], [40]]},
+  {"id": 40, "fu": "Mul",     "opt": "OPT_MUL", "opt_predicate": 0,
+   "in_const": [],  "in": [20, 30, 30],   "in_predicate": [],
+   "out": [[10]], "live_out_val": 1},
+]
+
+def build_dfg(tmp_path):
+  json_file_name = tmp_path / "dfg.json"
+  with open(json_file_name, 'w') as json_file:
+    json.dump(kDFG, json_file)
+  return DFG(json_file_name, [], [0] * 4)
+
+def test_csr_matches_the_node_lists(tmp_path):
+  dfg = build_dfg(tmp_path)
+  for i, node in enumerate(dfg.nodes):
+    assert [dfg.nodes[j].id for j in dfg.get_successors(i)] == \
+           [node_id for array in node.output_node for node_id in array]
+    assert [dfg.nodes[j].id for j in dfg.get_predecessors(i)] == \
+           node.input_node
+
+def test_csr_by_position(tmp_path):
+  dfg = build_dfg(tmp_path)
+  assert [dfg.get_successors(i) for i in range(4)] == \
+         [[1, 2], [3], [3, 3], [0]]
+  assert [dfg.get_predecessors(i) for i in range(4)] == \
+         [[3], [0], [0], [1, 2, 2]]
+  assert dfg.succ_offsets == [0, 2, 3, 5, 6]
+  assert dfg.pred_offsets == [0, 1, 2, 3, 6]
+
+def test_get_node_and_layers(tmp_path):
+  dfg = build_dfg(tmp_path)
+  assert dfg.get_node(30) is dfg.nodes[2]
+  assert dfg.get_node(50) is None
+  # The back edge (40 -> 10) is ignored by the layers.
+  assert [node.layer for node in dfg.nodes] == [0, 1, 1, 2]
+  assert dfg.nodes[3].live_out_val == 1
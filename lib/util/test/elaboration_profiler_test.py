@@ -0,0 +1,98 @@
+"""
+==========================================================================
+elaboration_profiler_test.py
+==========================================================================
+Test cases for the opt-in elaboration profiler.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import json
+import pytest
+from pymtl3 import *
+from ..elaboration_profiler import ElaborationProfiler, profile_elaboration
+from ...basic.val_rdy.ifcs import RecvIfcRTL
+
+#-------------------------------------------------------------------------
+# Components under profiling
+#-------------------------------------------------------------------------
+
+class Leaf(Component):
+
+  def construct(s):
+    s.in_ = InPort(Bits8)
+    s.out = OutPort(Bits8)
+    s.w = Wire(Bits8)
+    s.recv = RecvIfcRTL(Bits8)
+    s.w //= s.in_
+    s.out //= s.w
+
+class Top(Component):
+
+  def construct(s, num_leaves = 2):
+    s.in_ = InPort(Bits8)
+    s.outs = [OutPort(Bits8) for _ in range(num_leaves)]
+    s.leaves = [Leaf() for _ in range(num_leaves)]
+    for i in range(num_leaves):
+      s.leaves[i].in_ //= s.in_
+      s.outs[i] //= s.leaves[i].out
+
+class BrokenTop(Component):
+
+  def construct(s):
+    s.leaf = Leaf()
+    raise ValueError("broken construct")
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+def test_counts():
+  original_construct = Component._construct
+  top = Top(3)
+  with ElaborationProfiler(trace_memory = False) as profiler:
+    top.elaborate()
+  assert Component._construct is original_construct
+
+  assert set(profiler.stats) == {'Top', 'Leaf'}
+  leaf = profiler.stats['Leaf']
+  assert leaf['instances'] == 3
+  # One Wire per instance. The ports are clk/reset, in_/out and the
+  # val/rdy/msg of the interface.
+  assert leaf['wires'] == 3
+  assert leaf['ports'] == 3 * 7
+  top_stats = profiler.stats['Top']
+  assert top_stats['instances'] == 1
+  assert top_stats['wires'] == 0
+  assert top_stats['ports'] == 2 + 1 + 3
+  for entry in profiler.stats.values():
+    assert 0.0 <= entry['construct_time'] <= profiler.total_time
+  assert sum(entry['construct_time'] for entry in profiler.stats.values()) \
+         <= profiler.total_time
+  assert profiler.peak_memory == 0
+
+  report = json.loads(profiler.to_json())
+  assert report['components']['Leaf']['instances'] == 3
+
+def test_memory():
+  profiler = profile_elaboration(Top(), trace_memory = True,
+                                 print_report = False)
+  assert profiler.peak_memory > 0
+  for entry in profiler.stats.values():
+    assert 0 <= entry['peak_mem_bytes'] <= entry['total_mem_bytes']
+
+def test_restored_on_exception():
+  original_construct = Component._construct
+  with pytest.raises(ValueError):
+    with ElaborationProfiler(trace_memory = False) as profiler:
+      BrokenTop().elaborate()
+  assert Component._construct is original_construct
+  # The child finished its construct before the parent raised.
+  assert profiler.stats['Leaf']['instances'] == 1
+  assert profiler.stats['BrokenTop']['instances'] == 1
+  assert profiler._stack == []
+
+  # Elaboration outside of the profiler is not recorded anymore.
+  Top().elaborate()
+  assert 'Top' not in profiler.stats
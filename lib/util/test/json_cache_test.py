@@ -0,0 +1,91 @@
+"""
+==========================================================================
+json_cache_test.py
+==========================================================================
+Test cases for the cached JSON loading.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import json
+import os
+import pytest
+import runpy
+from .. import json_cache
+from ..json_cache import clear_json_memo, load_json
+
+# Counts the actual JSON parsing.
+@pytest.fixture
+def num_parses(monkeypatch):
+  clear_json_memo()
+  count = [0]
+  json_load = json.load
+  def counted_load(f):
+    count[0] += 1
+    return json_load(f)
+  monkeypatch.setattr(json_cache.json, 'load', counted_load)
+  yield count
+  clear_json_memo()
+
+def write_json(path, content, mtime_ns = None):
+  with open(path, 'w') as f:
+    json.dump(content, f)
+  if mtime_ns is not None:
+    os.utime(path, ns = (mtime_ns, mtime_ns))
+
+def test_memo_returns_fresh_copies(tmp_path, num_parses):
+  path = tmp_path / "dfg.json"
+  write_json(path, [{"id": 0, "out": [[1]]}])
+  first = load_json(path, cache_dir = None)
+  first[0]["id"] = 7
+  assert load_json(path, cache_dir = None) == [{"id": 0, "out": [[1]]}]
+  assert num_parses[0] == 1
+
+def test_invalidated_on_size_change(tmp_path, num_parses):
+  path = tmp_path / "dfg.json"
+  write_json(path, [1, 2], mtime_ns = 10**18)
+  assert load_json(path, cache_dir = None) == [1, 2]
+  # Same modification time, different size.
+  write_json(path, [1, 2, 3], mtime_ns = 10**18)
+  assert load_json(path, cache_dir = None) == [1, 2, 3]
+  assert num_parses[0] == 2
+
+def test_invalidated_on_mtime_change(tmp_path, num_parses):
+  path = tmp_path / "dfg.json"
+  write_json(path, [1, 2], mtime_ns = 10**18)
+  assert load_json(path, cache_dir = None) == [1, 2]
+  # Same size, different modification time.
+  write_json(path, [3, 4], mtime_ns = 10**18 + 1)
+  assert load_json(path, cache_dir = None) == [3, 4]
+  assert num_parses[0] == 2
+
+def test_disk_cache(tmp_path, num_parses):
+  path = tmp_path / "dfg.json"
+  cache_dir = tmp_path / "cache"
+  write_json(path, {"nodes": [0, 1]})
+  assert load_json(path, cache_dir = str(cache_dir)) == {"nodes": [0, 1]}
+  assert len(os.listdir(cache_dir)) == 1
+
+  # A new run (i.e., without the in-memory cache) reuses the disk cache.
+  clear_json_memo()
+  assert load_json(path, cache_dir = str(cache_dir)) == {"nodes": [0, 1]}
+  assert num_parses[0] == 1
+
+  # A corrupted cache falls back to parsing the JSON file.
+  clear_json_memo()
+  for name in os.listdir(cache_dir):
+    (cache_dir / name).write_bytes(b"\x00")
+  assert load_json(path, cache_dir = str(cache_dir)) == {"nodes": [0, 1]}
+  assert num_parses[0] == 2
+
+def test_disk_cache_is_opt_in(tmp_path, monkeypatch):
+  monkeypatch.delenv("VECTORCGRA_JSON_CACHE_DIR", raising = False)
+  monkeypatch.setenv("HOME", str(tmp_path))
+  # Fresh copy of the module, so that the default is evaluated again.
+  fresh = runpy.run_path(json_cache.__file__)
+  assert fresh['DEFAULT_JSON_CACHE_DIR'] is None
+  path = tmp_path / "dfg.json"
+  write_json(path, [1])
+  assert fresh['load_json'](path) == [1]
+  assert os.listdir(tmp_path) == ["dfg.json"]
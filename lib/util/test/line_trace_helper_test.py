@@ -0,0 +1,84 @@
+"""
+==========================================================================
+line_trace_helper_test.py
+==========================================================================
+Test cases for the tiered line-trace control.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import importlib
+import pytest
+from .. import line_trace_helper
+from ..line_trace_helper import *
+
+class Traced:
+
+  def __init__(s):
+    s.traced = 0
+
+  def line_trace(s):
+    s.traced += 1
+    return "trace"
+
+@pytest.fixture(autouse = True)
+def restore_trace_level():
+  level, interval = get_trace_level(), get_trace_interval()
+  yield
+  set_trace_level(level, interval)
+
+def test_set_trace_level():
+  set_trace_level("off")
+  assert get_trace_level() == TRACE_OFF
+  assert trace_is_off()
+  set_trace_level("Summary", 4)
+  assert get_trace_level() == TRACE_SUMMARY
+  assert get_trace_interval() == 4
+  assert trace_is_summary()
+  set_trace_level(TRACE_FULL)
+  assert get_trace_level() == TRACE_FULL
+  assert get_trace_interval() == 1
+  assert not trace_is_off() and not trace_is_summary()
+
+def test_set_trace_level_invalid():
+  with pytest.raises(AssertionError):
+    set_trace_level("verbose")
+  with pytest.raises(AssertionError):
+    set_trace_level(TRACE_FULL, 0)
+
+def test_should_trace():
+  set_trace_level(TRACE_FULL, 3)
+  assert [ncycles for ncycles in range(10) if should_trace(ncycles)] == \
+         [0, 3, 6, 9]
+  set_trace_level(TRACE_OFF)
+  assert not any(should_trace(ncycles) for ncycles in range(10))
+
+def test_print_line_trace(capsys):
+  component = Traced()
+  set_trace_level(TRACE_SUMMARY, 2)
+  for ncycles in range(5):
+    print_line_trace(ncycles, component)
+  # The line trace is only formatted on the printed cycles.
+  assert component.traced == 3
+  assert capsys.readouterr().out == \
+         "cycle 0:trace\ncycle 2:trace\ncycle 4:trace\n"
+
+  set_trace_level(TRACE_OFF)
+  print_line_trace(0, component, prefix = "")
+  assert component.traced == 3
+  assert capsys.readouterr().out == ""
+
+def test_environment(monkeypatch):
+  monkeypatch.setenv("VECTORCGRA_TRACE", "summary")
+  monkeypatch.setenv("VECTORCGRA_TRACE_INTERVAL", "8")
+  importlib.reload(line_trace_helper)
+  assert line_trace_helper.get_trace_level() == TRACE_SUMMARY
+  assert line_trace_helper.get_trace_interval() == 8
+
+  # Unknown levels fall back to the full trace.
+  monkeypatch.setenv("VECTORCGRA_TRACE", "verbose")
+  monkeypatch.delenv("VECTORCGRA_TRACE_INTERVAL")
+  importlib.reload(line_trace_helper)
+  assert line_trace_helper.get_trace_level() == TRACE_FULL
+  assert line_trace_helper.get_trace_interval() == 1
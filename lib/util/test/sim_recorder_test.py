@@ -0,0 +1,121 @@
+"""
+==========================================================================
+sim_recorder_test.py
+==========================================================================
+Test cases for the post-mortem recorder of run_sim_with_recorder.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import pytest
+import re
+from pymtl3 import *
+from ..line_trace_helper import *
+from ..sim_recorder import run_sim_with_recorder
+from ...basic.val_rdy.ifcs import RecvIfcRTL, SendIfcRTL
+from ...basic.val_rdy.queues import NormalQueueRTL
+from ...basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...basic.val_rdy.SinkRTL import PyMTLTestSinkError
+from ...basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+
+#-------------------------------------------------------------------------
+# Dut exposing the top-level ports picked by the recorder
+#-------------------------------------------------------------------------
+
+class RecordedQueue(Component):
+
+  def construct(s, MsgType):
+    s.recv_from_cpu_pkt = RecvIfcRTL(MsgType)
+    s.send_to_cpu_pkt = SendIfcRTL(MsgType)
+    s.queue = NormalQueueRTL(MsgType, 2)
+    s.recv_from_cpu_pkt //= s.queue.recv
+    s.queue.send //= s.send_to_cpu_pkt
+
+class TestHarness(Component):
+
+  def construct(s, MsgType, src_msgs, sink_msgs):
+    s.src = TestSrcRTL(MsgType, src_msgs)
+    s.sink = TestSinkRTL(MsgType, sink_msgs)
+    s.dut = RecordedQueue(MsgType)
+    s.src.send //= s.dut.recv_from_cpu_pkt
+    s.dut.send_to_cpu_pkt //= s.sink.recv
+    s.traced = 0
+
+  def done(s):
+    return s.src.done() and s.sink.done()
+
+  def line_trace(s):
+    s.traced += 1
+    return "harness line trace"
+
+def dumped_cycles(out):
+  return [int(c) for c in re.findall(r"^cycle (\d+):", out, re.M)]
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+def test_pass_records_without_tracing(capsys):
+  th = TestHarness(Bits16, [Bits16(1), Bits16(2)], [Bits16(1), Bits16(2)])
+  th.elaborate()
+  run_sim_with_recorder(th, depth = 4, print_trace = False)
+  out = capsys.readouterr().out
+  assert th.traced == 0
+  assert "post-mortem" not in out
+  assert "harness line trace" not in out
+
+def test_sink_error_dumps_window(capsys):
+  th = TestHarness(Bits16, [Bits16(1), Bits16(2), Bits16(3)],
+                   [Bits16(1), Bits16(5), Bits16(3)])
+  th.elaborate()
+  with pytest.raises(PyMTLTestSinkError):
+    run_sim_with_recorder(th, depth = 3, print_trace = False)
+  out = capsys.readouterr().out
+  assert th.traced == 0
+  assert "post-mortem trace of the last 3 cycles (sink error)" in out
+  cycles = dumped_cycles(out)
+  assert len(cycles) == 3
+  assert cycles == list(range(cycles[0], cycles[0] + 3))
+  # The mismatching message is decoded in the dumped window.
+  assert "send_to_cpu_pkt: (0002, val: 1, rdy: 1)" in out
+
+def test_timeout_dumps_window(capsys):
+  # The sink waits for a message that is never sent.
+  th = TestHarness(Bits16, [Bits16(1)], [Bits16(1), Bits16(2)])
+  th.elaborate()
+  with pytest.raises(AssertionError):
+    run_sim_with_recorder(th, max_cycles = 10, depth = 4,
+                          print_trace = False)
+  out = capsys.readouterr().out
+  assert th.traced == 0
+  assert "post-mortem trace of the last 4 cycles (timeout after 10 cycles)" in out
+  assert dumped_cycles(out) == [7, 8, 9, 10]
+
+def test_print_trace(capsys):
+  th = TestHarness(Bits16, [Bits16(1)], [Bits16(1)])
+  th.elaborate()
+  run_sim_with_recorder(th, print_trace = True)
+  assert th.traced > 0
+  assert "harness line trace" in capsys.readouterr().out
+
+def test_default_trace(capsys):
+  # Same per-cycle trace as run_sim().
+  th = TestHarness(Bits16, [Bits16(1)], [Bits16(1)])
+  th.elaborate()
+  run_sim_with_recorder(th)
+  out = capsys.readouterr().out
+  assert "  3: harness line trace" in out
+  assert "post-mortem" not in out
+
+def test_default_trace_off(capsys):
+  level, interval = get_trace_level(), get_trace_interval()
+  set_trace_level(TRACE_OFF)
+  try:
+    th = TestHarness(Bits16, [Bits16(1)], [Bits16(1)])
+    th.elaborate()
+    run_sim_with_recorder(th)
+  finally:
+    set_trace_level(level, interval)
+  assert th.traced == 0
+  assert "harness line trace" not in capsys.readouterr().out
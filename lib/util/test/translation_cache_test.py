@@ -0,0 +1,150 @@
+"""
+==========================================================================
+translation_cache_test.py
+==========================================================================
+Test cases for the memoized Verilog translation.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import os
+import pytest
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
+from .. import translation_cache
+from ..common import *
+from ..translation_cache import (MemoizedVerilogTranslationPass,
+                                 clear_translation_memo,
+                                 get_class_source_files,
+                                 get_component_translation_key,
+                                 get_translation_cache_stats)
+
+#-------------------------------------------------------------------------
+# Components under translation
+#-------------------------------------------------------------------------
+
+class Leaf(Component):
+
+  def construct(s, nbits):
+    s.in_ = InPort(nbits)
+    s.out = OutPort(nbits)
+
+    @update_ff
+    def up_leaf():
+      s.out <<= s.in_ + 1
+
+class Mid(Component):
+
+  def construct(s):
+    s.in_ = InPort(8)
+    s.out = OutPort(8)
+    s.leaf = [Leaf(8) for _ in range(2)]
+    s.leaf[0].in_ //= s.in_
+    s.leaf[1].in_ //= s.leaf[0].out
+    s.out //= s.leaf[1].out
+
+class Top(Component):
+
+  def construct(s, nbits):
+    s.in_ = InPort(8)
+    s.out = OutPort(8)
+    s.out_wide = OutPort(nbits)
+    s.mid = Mid()
+    s.wide = Leaf(nbits)
+    s.mid.in_ //= s.in_
+    s.out //= s.mid.out
+    s.out_wide //= s.wide.out
+
+    @update
+    def up_wide():
+      s.wide.in_ @= zext(s.in_, nbits)
+
+@pytest.fixture(autouse = True)
+def fresh_memo(tmp_path, monkeypatch):
+  monkeypatch.chdir(tmp_path)
+  clear_translation_memo()
+  yield
+  clear_translation_memo()
+
+def translate(top, translation_pass):
+  top.elaborate()
+  top.set_metadata(VerilogTranslationPass.enable, True)
+  top.apply(translation_pass)
+  with open(top.get_metadata(VerilogTranslationPass.translated_filename)) as f:
+    return f.read()
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+def test_same_as_stock_translation():
+  expected = translate(Top(16), VerilogTranslationPass())
+  assert translate(Top(16), MemoizedVerilogTranslationPass(None)) == expected
+  # The duplicated Leaf(8) is translated once.
+  assert get_translation_cache_stats()['module_hits'] == 0
+
+def test_per_module_reuse():
+  translate(Top(16), MemoizedVerilogTranslationPass(None))
+
+  # Only the wide leaf of the new top needs to be translated, Mid (and its
+  # leaves) are served from the cache.
+  expected = translate(Top(32), VerilogTranslationPass())
+  assert translate(Top(32), MemoizedVerilogTranslationPass(None)) == expected
+  stats = get_translation_cache_stats()
+  assert stats['module_hits'] == 1
+  assert stats['memory_hits'] == 0
+
+  # The whole translation is reused for an identical top.
+  assert translate(Top(32), MemoizedVerilogTranslationPass(None)) == expected
+  assert get_translation_cache_stats()['memory_hits'] == 1
+
+def test_disk_cache(tmp_path):
+  cache_dir = str(tmp_path / "cache")
+  translate(Top(16), MemoizedVerilogTranslationPass(cache_dir))
+  assert any(name.endswith(".module.json") for name in os.listdir(cache_dir))
+
+  # A new run only has the on-disk cache.
+  clear_translation_memo()
+  expected = translate(Top(32), VerilogTranslationPass())
+  assert translate(Top(32), MemoizedVerilogTranslationPass(cache_dir)) == expected
+  assert get_translation_cache_stats()['module_hits'] == 1
+
+  clear_translation_memo()
+  assert translate(Top(16), MemoizedVerilogTranslationPass(cache_dir)) == \
+         translate(Top(16), VerilogTranslationPass())
+  assert get_translation_cache_stats()['disk_hits'] == 1
+
+@pytest.mark.skipif("VECTORCGRA_TRANSLATION_CACHE_DIR" in os.environ,
+                    reason = "the on-disk cache is explicitly enabled")
+def test_disk_cache_opt_in(tmp_path):
+  translation_pass = MemoizedVerilogTranslationPass()
+  assert translation_pass.cache_dir is None
+  translate(Top(16), translation_pass)
+  assert sorted(os.listdir(tmp_path)) == \
+         sorted(name for name in os.listdir(tmp_path) if name.endswith(".v"))
+
+def test_key_tracks_imported_modules(monkeypatch):
+  common_file = get_class_source_files(Leaf)
+  assert any(path.endswith(os.path.join("lib", "util", "common.py"))
+             for path in common_file)
+
+  from ....tile.TileRTL import TileRTL
+  tile_files = get_class_source_files(TileRTL)
+  for path in [os.path.join("lib", "messages.py"),
+               os.path.join("lib", "cmd_type.py"),
+               os.path.join("lib", "util", "common.py"),
+               os.path.join("tile", "TileRTL.py")]:
+    assert any(tile_file.endswith(path) for tile_file in tile_files)
+
+  top = Top(16)
+  top.elaborate()
+  key = get_component_translation_key(top)
+  assert get_component_translation_key(top) == key
+
+  # Editing an imported helper invalidates the key.
+  clear_translation_memo()
+  common_path = [path for path in common_file
+                 if path.endswith(os.path.join("util", "common.py"))][0]
+  translation_cache._file_hash_memo[common_path] = "edited"
+  assert get_component_translation_key(top) != key
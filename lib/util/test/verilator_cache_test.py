@@ -0,0 +1,215 @@
+"""
+==========================================================================
+verilator_cache_test.py
+==========================================================================
+Test cases for the content-addressed Verilator build cache. Verilator is
+not needed: the build of the shared library is stubbed.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import os
+import threading
+import time
+import pytest
+from pymtl3.passes.backends.verilog import (VerilogTranslationImportPass,
+                                            VerilogVerilatorImportPass)
+from .. import verilator_cache
+from ..verilator_cache import (CachedVerilogVerilatorImportPass,
+                               VerilatorBuildCache,
+                               enable_verilator_build_cache)
+from ....conftest import pytest_configure
+
+@pytest.fixture(autouse = True)
+def fixed_verilator_version(monkeypatch):
+  monkeypatch.setattr(verilator_cache, '_verilator_version', "Verilator 5.000")
+
+def make_cfg(**kwargs):
+  cfg = {'vl_Wno_list': ['UNSIGNED', 'WIDTH'],
+         'vl_xinit': 'zeros',
+         'vl_trace': False,
+         'c_flags': '-O1',
+         'vl_mk_dir': 'obj_dir_Dut'}
+  cfg.update(kwargs)
+  return cfg
+
+def write_entry(cache, key, nbytes, mtime):
+  entry = os.path.join(cache.cache_dir, key)
+  os.makedirs(entry)
+  with open(os.path.join(entry, "libDut.so"), 'wb') as f:
+    f.write(b'\0' * nbytes)
+  os.utime(entry, (mtime, mtime))
+
+#-------------------------------------------------------------------------
+# Key stability
+#-------------------------------------------------------------------------
+
+def test_key_stability(tmp_path):
+  cache = VerilatorBuildCache(str(tmp_path))
+  key = cache.get_key("Dut__hash", make_cfg())
+
+  # Independent of the dict order and of the local build directory.
+  reordered = dict(reversed(list(make_cfg().items())))
+  assert cache.get_key("Dut__hash", reordered) == key
+  assert cache.get_key("Dut__hash", make_cfg(vl_mk_dir = 'elsewhere')) == key
+  assert VerilatorBuildCache(str(tmp_path / "other")).get_key(
+             "Dut__hash", make_cfg()) == key
+
+  # Anything that affects the binary changes the key.
+  assert cache.get_key("Dut__other_hash", make_cfg()) != key
+  assert cache.get_key("Dut__hash", make_cfg(vl_Wno_list = ['WIDTH'])) != key
+  assert cache.get_key("Dut__hash", make_cfg(vl_trace = True)) != key
+  assert cache.get_key("Dut__hash", make_cfg(c_flags = '-O3')) != key
+
+def test_key_verilator_version(tmp_path, monkeypatch):
+  cache = VerilatorBuildCache(str(tmp_path))
+  key = cache.get_key("Dut__hash", make_cfg())
+  monkeypatch.setattr(verilator_cache, '_verilator_version', "Verilator 5.001")
+  assert cache.get_key("Dut__hash", make_cfg()) != key
+
+#-------------------------------------------------------------------------
+# Eviction
+#-------------------------------------------------------------------------
+
+def test_lru_eviction(tmp_path):
+  cache = VerilatorBuildCache(str(tmp_path), max_bytes = 3000)
+  now = time.time()
+  write_entry(cache, "oldest", 1000, now - 300)
+  write_entry(cache, "older", 1000, now - 200)
+  write_entry(cache, "old", 1000, now - 100)
+
+  # A hit refreshes the oldest entry, so "older" becomes the LRU one.
+  dst = str(tmp_path / "restored.so")
+  assert cache.restore("oldest", "libDut.so", dst)
+  assert os.path.getsize(dst) == 1000
+  assert not cache.restore("missing", "libDut.so", dst)
+  assert (cache.hits, cache.misses) == (1, 1)
+
+  src = tmp_path / "built.so"
+  src.write_bytes(b'\0' * 1500)
+  cache.store("new", "libDut.so", str(src))
+
+  remaining = sorted(name for name in os.listdir(cache.cache_dir)
+                     if os.path.isdir(os.path.join(cache.cache_dir, name)))
+  assert remaining == ["new", "oldest"]
+  assert not os.path.exists(os.path.join(cache.cache_dir, "older.lock"))
+
+def test_eviction_skips_locked_entry(tmp_path):
+  cache = VerilatorBuildCache(str(tmp_path), max_bytes = 2000)
+  now = time.time()
+  write_entry(cache, "oldest", 1000, now - 300)
+  write_entry(cache, "older", 1000, now - 200)
+  write_entry(cache, "old", 1000, now - 100)
+
+  # The oldest entry is being restored by another worker, so the next
+  # one is evicted instead.
+  lock_file = cache.acquire("oldest")
+  assert cache.acquire("oldest", blocking = False) is None
+  cache.evict()
+  cache.release(lock_file)
+  assert sorted(os.listdir(cache.cache_dir)) == \
+         [".evict.lock", "old", "oldest", "oldest.lock"]
+
+  # A worker waiting for the lock of an entry being evicted takes the lock
+  # again on the new lock file.
+  lock_file = cache.acquire("old")
+  waiter = {}
+  thread = threading.Thread(
+      target = lambda: waiter.update(lock = cache.acquire("old")))
+  thread.start()
+  time.sleep(0.1)
+  os.remove(os.path.join(cache.cache_dir, "old.lock"))
+  cache.release(lock_file)
+  thread.join()
+  assert os.fstat(waiter['lock'].fileno()).st_ino == \
+         os.stat(os.path.join(cache.cache_dir, "old.lock")).st_ino
+  cache.release(waiter['lock'])
+
+#-------------------------------------------------------------------------
+# Concurrent hit/miss
+#-------------------------------------------------------------------------
+
+class FakeImportConfig:
+
+  def __init__(s, lib_path):
+    s.translated_top_module = "Dut__hash"
+    s.lib_path = lib_path
+
+  def get_shared_lib_path(s):
+    return s.lib_path
+
+  def vprint(s, msg, nspaces = 0):
+    pass
+
+def test_concurrent_hit_miss(tmp_path, monkeypatch):
+  builds = []
+
+  def is_cached(s, m, ip_cfg):
+    return False, str(tmp_path / "config"), make_cfg()
+
+  # Stands in for verilation and C++ compilation.
+  def create_shared_lib(s, m, ph_cfg, ip_cfg, cached):
+    if not cached:
+      builds.append(ip_cfg.lib_path)
+      time.sleep(0.2)
+      with open(ip_cfg.lib_path, 'wb') as f:
+        f.write(b'shared library')
+
+  def get_imported_object(s, m):
+    cached, _, _ = s.is_cached(m, m)
+    s.create_shared_lib(m, None, m, cached)
+    return cached
+
+  monkeypatch.setattr(VerilogVerilatorImportPass, 'is_cached', is_cached)
+  monkeypatch.setattr(VerilogVerilatorImportPass, 'create_shared_lib',
+                      create_shared_lib)
+  monkeypatch.setattr(VerilogVerilatorImportPass, 'get_imported_object',
+                      get_imported_object)
+  monkeypatch.setattr(CachedVerilogVerilatorImportPass, 'build_cache',
+                      VerilatorBuildCache(str(tmp_path / "cache")))
+
+  results = {}
+  def worker(i):
+    # Each worker builds in its own directory.
+    os.makedirs(tmp_path / f"worker{i}")
+    ip_cfg = FakeImportConfig(str(tmp_path / f"worker{i}" / "libDut.so"))
+    results[i] = CachedVerilogVerilatorImportPass().get_imported_object(ip_cfg)
+
+  threads = [threading.Thread(target = worker, args = (i,)) for i in range(2)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  cache = CachedVerilogVerilatorImportPass.build_cache
+  # The second worker waits for the first build instead of compiling again.
+  assert len(builds) == 1
+  assert sorted(results.values()) == [False, True]
+  assert (cache.hits, cache.misses) == (1, 1)
+  for i in range(2):
+    assert (tmp_path / f"worker{i}" / "libDut.so").read_bytes() == \
+           b'shared library'
+
+#-------------------------------------------------------------------------
+# conftest.py hook
+#-------------------------------------------------------------------------
+
+def test_enabled_by_env(tmp_path, monkeypatch):
+  monkeypatch.setattr(VerilogTranslationImportPass, 'get_import_pass',
+                      VerilogTranslationImportPass.__dict__['get_import_pass'])
+  monkeypatch.setattr(CachedVerilogVerilatorImportPass, 'build_cache', None)
+
+  monkeypatch.delenv("VECTORCGRA_VL_CACHE_DIR", raising = False)
+  pytest_configure(None)
+  assert CachedVerilogVerilatorImportPass.build_cache is None
+  assert VerilogTranslationImportPass.get_import_pass() is VerilogVerilatorImportPass
+
+  monkeypatch.setenv("VECTORCGRA_VL_CACHE_DIR", str(tmp_path))
+  monkeypatch.setenv("VECTORCGRA_VL_CACHE_MAX_MB", "1")
+  pytest_configure(None)
+  cache = CachedVerilogVerilatorImportPass.build_cache
+  assert cache.cache_dir == str(tmp_path)
+  assert cache.max_bytes == 1024 * 1024
+  assert VerilogTranslationImportPass.get_import_pass() is \
+         CachedVerilogVerilatorImportPass
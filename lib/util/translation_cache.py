@@ -0,0 +1,403 @@
+"""
+=========================================================================
+translation_cache.py
+=========================================================================
+Memoized Verilog translation.
+
+A homogeneous CgraRTL/MeshMultiCgraRTL contains many structurally
+identical TileRTL, CrossbarRTL, RegisterBankRTL and FU instances. The
+stock translator runs the behavioral and structural translation of every
+instance, even though only one module definition is emitted per unique
+module. MemoizedVerilogTranslationPass memoizes the translation result of
+every component in the hierarchy, keyed on:
+  - its class and construct parameters,
+  - the hash of the source files of its class (and base classes) plus of
+    every repo module they transitively import (e.g., lib/messages.py,
+    lib/cmd_type.py, lib/util/common.py), and
+  - the same key of each of its children.
+Within a translation, a component whose key was already seen, or whose
+subtree is fully available in the cache, is stubbed out: its subtree is
+not translated and the cached module definitions are emitted instead.
+After a change to one module, only the components whose subtree contains
+that module are translated again.
+
+The translation results are memoized in memory within a run. Setting
+VECTORCGRA_TRANSLATION_CACHE_DIR (or passing cache_dir) additionally
+stores them on disk, so that they are reused across runs.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import re
+import sys
+from pymtl3 import *
+from pymtl3.datatypes import is_bitstruct_class
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
+from pymtl3.passes.backends.verilog.translation.VTranslator import VTranslator
+from pymtl3.passes.backends.verilog.util.utility import verilog_cmp
+from pymtl3.passes.rtlir.structural.StructuralRTLIRGenL0Pass import StructuralRTLIRGenL0Pass
+from pymtl3.version import __version__ as pymtl3_version
+
+# Disabled (i.e., in-memory only) unless explicitly set.
+DEFAULT_TRANSLATION_CACHE_DIR = os.environ.get("VECTORCGRA_TRANSLATION_CACHE_DIR")
+
+# In-run memoization: key -> (verilog source, top module name) of a whole
+# translation, and key -> module entry of a single component.
+_translation_memo = {}
+_module_memo = {}
+_translation_stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                      'module_hits': 0, 'module_misses': 0}
+_file_hash_memo = {}
+_class_hash_memo = {}
+
+def get_translation_cache_stats():
+  return dict(_translation_stats)
+
+def clear_translation_memo():
+  _translation_memo.clear()
+  _module_memo.clear()
+  _file_hash_memo.clear()
+  _class_hash_memo.clear()
+  for name in _translation_stats:
+    _translation_stats[name] = 0
+
+# Canonicalizes construct parameters, so that identical parameters hash to
+# the same string across runs (i.e., without relying on ids or reprs of
+# dynamically created classes).
+def _canonical_param(param):
+  if isinstance(param, (list, tuple)):
+    return "[" + ",".join(_canonical_param(x) for x in param) + "]"
+  if isinstance(param, dict):
+    return "{" + ",".join(f"{_canonical_param(k)}:{_canonical_param(v)}"
+                          for k, v in sorted(param.items(), key = lambda kv: repr(kv[0]))) + "}"
+  if isinstance(param, type):
+    if is_bitstruct_class(param):
+      fields = param.__bitstruct_fields__
+      return f"{param.__name__}({_canonical_param(fields)})"
+    if issubclass(param, Bits):
+      return f"b{param.nbits}"
+    return f"{param.__module__}.{param.__qualname__}"
+  return repr(param)
+
+def _file_hash(path):
+  if path not in _file_hash_memo:
+    with open(path, 'rb') as f:
+      _file_hash_memo[path] = hashlib.sha256(f.read()).hexdigest()
+  return _file_hash_memo[path]
+
+# Collects the source files of the module and of all the modules of the
+# same top-level package it transitively imports. The imports are read from
+# the source, as names imported with `from ..lib.util.common import *` (e.g.,
+# plain constants) do not keep a reference to their module.
+def _collect_module_files(module_name, root, files):
+  if module_name in files:
+    return
+  module = sys.modules.get(module_name)
+  path = getattr(module, '__file__', None)
+  files[module_name] = path
+  if path is None or not path.endswith(".py"):
+    return
+  with open(path) as f:
+    tree = ast.parse(f.read(), path)
+  package = module_name if path.endswith("__init__.py") else \
+            module_name.rpartition('.')[0]
+  deps = []
+  for node in ast.walk(tree):
+    if isinstance(node, ast.Import):
+      deps += [alias.name for alias in node.names]
+    elif isinstance(node, ast.ImportFrom):
+      try:
+        dep = importlib.util.resolve_name('.' * node.level + (node.module or ''),
+                                          package)
+      except ImportError:
+        continue
+      deps.append(dep)
+      deps += [f"{dep}.{alias.name}" for alias in node.names]
+  for dep in deps:
+    if dep.split('.')[0] == root and dep in sys.modules:
+      _collect_module_files(dep, root, files)
+
+def get_class_source_files(cls):
+  files = {}
+  for base in inspect.getmro(cls):
+    root = base.__module__.split('.')[0]
+    if base.__module__ in sys.modules and root not in ('pymtl3', 'builtins'):
+      _collect_module_files(base.__module__, root, files)
+  return sorted(path for path in files.values() if path is not None)
+
+def _class_source_hash(cls):
+  if cls not in _class_hash_memo:
+    paths = get_class_source_files(cls)
+    if paths:
+      content = "|".join(f"{path}:{_file_hash(path)}" for path in paths)
+      _class_hash_memo[cls] = hashlib.sha256(content.encode()).hexdigest()
+    else:
+      _class_hash_memo[cls] = cls.__qualname__
+  return _class_hash_memo[cls]
+
+def get_component_translation_key(m, memo = None):
+  memo = {} if memo is None else memo
+  if id(m) in memo:
+    return memo[id(m)]
+  child_keys = [get_component_translation_key(child, memo)
+                for child in m.get_child_components(repr)]
+  explicit_module_name = ''
+  if m.has_metadata(VerilogTranslationPass.explicit_module_name):
+    explicit_module_name = m.get_metadata(VerilogTranslationPass.explicit_module_name)
+  content = "|".join([pymtl3_version,
+                      f"{type(m).__module__}.{type(m).__qualname__}",
+                      _class_source_hash(type(m)),
+                      _canonical_param(list(m._dsl.args)),
+                      _canonical_param(dict(m._dsl.kwargs)),
+                      explicit_module_name] + child_keys)
+  key = hashlib.sha256(content.encode()).hexdigest()
+  memo[id(m)] = key
+  return key
+
+#-------------------------------------------------------------------------
+# MemoizedVTranslator
+#-------------------------------------------------------------------------
+# Translator that stubs out the components planned by the pass: their
+# behavioral and structural translation is skipped and the module
+# definitions of their subtree are taken from the cache.
+
+class MemoizedVTranslator(VTranslator):
+
+  def __init__(s, top, cache_pass):
+    super().__init__(top)
+    s.cache_pass = cache_pass
+
+  def translate(s, tr_top, tr_cfgs = None):
+    keys = s.cache_pass._key_memo
+    s._stubbed = set()
+    s._cached_src = {}
+    s._cached_structs = []
+    s._translated = {}
+    seen = set()
+
+    def plan(m):
+      key = get_component_translation_key(m, keys)
+      if key in seen:
+        s._stubbed.add(m)
+        return
+      if m is not tr_top:
+        entries = s.cache_pass._load_subtree(m)
+        if entries is not None:
+          s._stubbed.add(m)
+          for sub_key, entry in entries.items():
+            seen.add(sub_key)
+            s._cached_src[entry['name']] = entry['src']
+            s._cached_structs += entry['structs']
+          return
+      seen.add(key)
+      s._translated[m] = key
+      for child in m.get_child_components(repr):
+        plan(child)
+
+    plan(tr_top)
+    super().translate(tr_top, tr_cfgs)
+    s._store_translated()
+
+  def _store_translated(s):
+    struct_defs = {struct.get_name(): tplt['def']
+                   for struct, tplt in s.hierarchy.decl_type_struct.items()}
+    for m, key in s._translated.items():
+      if s.cache_pass._has_placeholder(m):
+        continue
+      name = s.structural.component_unique_name[m]
+      src = s.hierarchy.components[name]
+      s.cache_pass._store_module(key, {
+          'name': name,
+          'src': src,
+          'structs': _referenced_structs(src, struct_defs)})
+
+  # Override
+  def _gen_behavioral_trans_metadata(s, m):
+    if m not in s._stubbed:
+      super()._gen_behavioral_trans_metadata(m)
+
+  # Override
+  def translate_behavioral(s, m):
+    if m not in s._stubbed:
+      super().translate_behavioral(m)
+
+  # Override
+  def _translate_structural(s, m):
+    if m not in s._stubbed:
+      return super()._translate_structural(m)
+    # Only the module name is needed to instantiate a stubbed component.
+    def set_unique_name(m):
+      m_rtype = m.get_metadata(StructuralRTLIRGenL0Pass.rtlir_type)
+      s.structural.component_unique_name[m] = \
+          s.rtlir_tr_component_unique_name(m_rtype)
+      for child in m.get_child_components(repr):
+        set_unique_name(child)
+    set_unique_name(m)
+
+  # Override
+  def rtlir_tr_component(s, behavioral, structural):
+    if structural.component_unique_name in s._cached_src:
+      return s._cached_src[structural.component_unique_name]
+    return super().rtlir_tr_component(behavioral, structural)
+
+  # Override
+  def rtlir_tr_src_layout(s, hierarchy):
+    ret = super().rtlir_tr_src_layout(hierarchy)
+    # Adds the BitStructs only used inside the stubbed components.
+    declared = {struct.get_name() for struct in hierarchy.decl_type_struct}
+    extra = ''
+    for name, struct_def in s._cached_structs:
+      if name not in declared:
+        declared.add(name)
+        extra += f"// PyMTL BitStruct {name} Definition\n{struct_def}\n"
+    if extra:
+      idx = ret.rfind(hierarchy.component_src)
+      ret = ret[:idx] + extra + ret[idx:]
+    return ret
+
+# Returns the (name, definition) of the BitStructs referenced by the source,
+# including the nested ones, in their declaration order.
+def _referenced_structs(src, struct_defs):
+  used = set()
+  pending = [src]
+  while pending:
+    text = pending.pop()
+    for name, struct_def in struct_defs.items():
+      if name not in used and re.search(rf"\b{re.escape(name)}\b", text):
+        used.add(name)
+        pending.append(struct_def)
+  return [[name, struct_def] for name, struct_def in struct_defs.items()
+          if name in used]
+
+#-------------------------------------------------------------------------
+# MemoizedVerilogTranslationPass
+#-------------------------------------------------------------------------
+
+class MemoizedVerilogTranslationPass(VerilogTranslationPass):
+
+  def __init__(s, cache_dir = DEFAULT_TRANSLATION_CACHE_DIR):
+    super().__init__()
+    s.cache_dir = cache_dir
+    s._key_memo = {}
+    s._placeholder_memo = {}
+
+  def __call__(s, top):
+    s.top = top
+    s.translator = MemoizedVTranslator(s.top, s)
+    s.traverse_hierarchy(top)
+
+  def _read_disk(s, name):
+    if s.cache_dir:
+      path = os.path.join(s.cache_dir, name)
+      if os.path.exists(path):
+        with open(path) as f:
+          return f.read()
+    return None
+
+  # Writes then renames so that concurrent readers never observe partial
+  # files.
+  def _write_disk(s, name, content):
+    if s.cache_dir:
+      os.makedirs(s.cache_dir, exist_ok = True)
+      tmp_path = os.path.join(s.cache_dir, f"{name}.tmp{os.getpid()}")
+      with open(tmp_path, 'w') as f:
+        f.write(content)
+      os.replace(tmp_path, os.path.join(s.cache_dir, name))
+
+  def _load(s, key):
+    if key in _translation_memo:
+      _translation_stats['memory_hits'] += 1
+      return _translation_memo[key]
+    meta = s._read_disk(key + ".json")
+    src = s._read_disk(key + ".v")
+    if meta is not None and src is not None:
+      _translation_memo[key] = (src, json.loads(meta)['top_module'])
+      _translation_stats['disk_hits'] += 1
+      return _translation_memo[key]
+    _translation_stats['misses'] += 1
+    return None
+
+  def _store(s, key, src, module_name):
+    _translation_memo[key] = (src, module_name)
+    s._write_disk(key + ".v", src)
+    s._write_disk(key + ".json", json.dumps({'top_module': module_name}))
+
+  def _load_module(s, key):
+    if key not in _module_memo:
+      entry = s._read_disk(key + ".module.json")
+      if entry is None:
+        return None
+      _module_memo[key] = json.loads(entry)
+    return _module_memo[key]
+
+  def _store_module(s, key, entry):
+    if key not in _module_memo:
+      _module_memo[key] = entry
+      s._write_disk(key + ".module.json", json.dumps(entry))
+
+  def _has_placeholder(s, m):
+    if m not in s._placeholder_memo:
+      s._placeholder_memo[m] = isinstance(m, Placeholder) or \
+          any(s._has_placeholder(child) for child in m.get_child_components(repr))
+    return s._placeholder_memo[m]
+
+  # Returns the cached module entries of all the unique components of the
+  # subtree rooted at m, or None if any of them is missing.
+  def _load_subtree(s, m):
+    if s._has_placeholder(m):
+      return None
+    entries = {}
+    def collect(m):
+      key = get_component_translation_key(m, s._key_memo)
+      if key in entries:
+        return True
+      entry = s._load_module(key)
+      if entry is None:
+        return False
+      entries[key] = entry
+      return all(collect(child) for child in m.get_child_components(repr))
+    if not collect(m):
+      _translation_stats['module_misses'] += 1
+      return None
+    _translation_stats['module_hits'] += 1
+    return entries
+
+  def traverse_hierarchy(s, m):
+    c = s.__class__
+
+    # Components with explicit file names are left to the original pass.
+    if not (m.has_metadata(c.enable) and m.get_metadata(c.enable)) or \
+       (m.has_metadata(c.explicit_file_name) and
+        m.get_metadata(c.explicit_file_name)):
+      return super().traverse_hierarchy(m)
+
+    key = get_component_translation_key(m, s._key_memo)
+    cached = s._load(key)
+    if cached is None:
+      super().traverse_hierarchy(m)
+      with open(m.get_metadata(c.translated_filename)) as f:
+        s._store(key, f.read(), m.get_metadata(c.translated_top_module))
+      return
+
+    src, module_name = cached
+    output_file = f"{module_name}__pickled.v"
+    temporary_file = output_file + '.tmp'
+    with open(temporary_file, 'w') as output:
+      output.write(src)
+    is_same = os.path.exists(output_file) and \
+              verilog_cmp(temporary_file, output_file)
+    os.replace(temporary_file, output_file)
+
+    m.set_metadata(c.translate_config, s.gen_tr_cfgs(m))
+    m.set_metadata(c.is_same, is_same)
+    m.set_metadata(c.translator, s.translator)
+    m.set_metadata(c.translated, True)
+    m.set_metadata(c.translated_filename, output_file)
+    m.set_metadata(c.translated_top_module, module_name)
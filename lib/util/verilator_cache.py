@@ -0,0 +1,227 @@
+"""
+=========================================================================
+verilator_cache.py
+=========================================================================
+Content-addressed cache of Verilator-compiled shared libraries.
+
+Many tests translate and verilate identical duts that only differ in the
+packets fed by the harness. CachedVerilogVerilatorImportPass wraps
+VerilogVerilatorImportPass and keys the compiled shared library on the
+hash of the translated Verilog plus the import configurations (e.g.,
+vl_Wno_list, xinit, trace, C flags) and the Verilator version. On a hit,
+the shared library is copied into the working directory and both
+verilation and C++ compilation are skipped. The C/Python wrappers are
+still regenerated as they are cheap.
+
+The cache directory is shared across test functions, pytest-xdist
+workers and separate runs:
+  - each entry is built under an exclusive file lock, so concurrent
+    workers building the same dut wait for the first one instead of
+    compiling it again,
+  - entries are evicted in LRU order (hits refresh the entry's mtime)
+    once the cache exceeds its size bound. An entry is only evicted under
+    its own lock (entries being built or restored are skipped), and is
+    renamed away before it is deleted.
+
+The cache is enabled with enable_verilator_build_cache(), or by setting
+VECTORCGRA_VL_CACHE_DIR (and optionally VECTORCGRA_VL_CACHE_MAX_MB) when
+running pytest.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from pymtl3.passes.backends.verilog import (VerilogTranslationImportPass,
+                                            VerilogVerilatorImportPass)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                                 "vectorcgra", "verilator")
+DEFAULT_CACHE_MAX_MB = 4096
+
+# Configurations that only name local paths and do not affect the binary.
+_PATH_ONLY_CONFIGS = ['vl_mk_dir']
+
+_verilator_version = None
+
+def _get_verilator_version():
+  global _verilator_version
+  if _verilator_version is None:
+    try:
+      _verilator_version = subprocess.check_output(
+          ['verilator', '--version'], stderr = subprocess.STDOUT,
+          universal_newlines = True).strip()
+    except (OSError, subprocess.CalledProcessError):
+      _verilator_version = "unknown"
+  return _verilator_version
+
+class VerilatorBuildCache:
+
+  def __init__(s, cache_dir = DEFAULT_CACHE_DIR,
+               max_bytes = DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+    s.cache_dir = cache_dir
+    s.max_bytes = max_bytes
+    s.hits = 0
+    s.misses = 0
+    os.makedirs(s.cache_dir, exist_ok = True)
+
+  def get_key(s, top_module, cfg):
+    keyed_cfg = {k: v for k, v in cfg.items() if k not in _PATH_ONLY_CONFIGS}
+    keyed_cfg['translated_top_module'] = top_module
+    keyed_cfg['verilator_version'] = _get_verilator_version()
+    content = json.dumps(keyed_cfg, sort_keys = True, default = str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+  def _entry_path(s, key):
+    return os.path.join(s.cache_dir, key)
+
+  def _lock_path(s, key):
+    return os.path.join(s.cache_dir, key + ".lock")
+
+  # Acquires the per-entry lock. Returns the open lock file, which must be
+  # released by release(), or None if blocking is False and the lock is
+  # held by someone else.
+  def acquire(s, key, blocking = True):
+    lock_path = s._lock_path(key)
+    while True:
+      lock_file = open(lock_path, 'w')
+      try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else
+                               fcntl.LOCK_EX | fcntl.LOCK_NB)
+      except BlockingIOError:
+        lock_file.close()
+        return None
+      # Eviction removes the lock file of the entry while holding it, in
+      # which case the lock is taken again on the new file.
+      try:
+        if os.stat(lock_path).st_ino == os.fstat(lock_file.fileno()).st_ino:
+          return lock_file
+      except FileNotFoundError:
+        pass
+      lock_file.close()
+
+  def release(s, lock_file):
+    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    lock_file.close()
+
+  # Copies the cached shared library to dst_path. Returns False on miss.
+  def restore(s, key, lib_name, dst_path):
+    cached_lib = os.path.join(s._entry_path(key), lib_name)
+    try:
+      shutil.copy2(cached_lib, dst_path)
+    except FileNotFoundError:
+      s.misses += 1
+      return False
+    # Refreshes the entry for LRU eviction.
+    os.utime(s._entry_path(key))
+    s.hits += 1
+    return True
+
+  def store(s, key, lib_name, src_path):
+    entry = s._entry_path(key)
+    os.makedirs(entry, exist_ok = True)
+    # Copies then renames so that readers never observe partial files.
+    tmp_path = os.path.join(entry, lib_name + f".tmp{os.getpid()}")
+    shutil.copy2(src_path, tmp_path)
+    os.replace(tmp_path, os.path.join(entry, lib_name))
+    os.utime(entry)
+    s.evict()
+
+  def evict(s):
+    lock_file = s.acquire(".evict")
+    try:
+      entries = []
+      total_bytes = 0
+      for name in os.listdir(s.cache_dir):
+        path = s._entry_path(name)
+        if not os.path.isdir(path):
+          continue
+        # Leftover of an interrupted eviction.
+        if ".evict" in name:
+          shutil.rmtree(path, ignore_errors = True)
+          continue
+        try:
+          size = sum(os.path.getsize(os.path.join(path, f))
+                     for f in os.listdir(path))
+          mtime = os.path.getmtime(path)
+        except FileNotFoundError:
+          # Changed by a concurrent store(), it is not the LRU one anyway.
+          continue
+        entries.append((mtime, size, name))
+        total_bytes += size
+      # Removes the least recently used entries first.
+      for _, size, name in sorted(entries):
+        if total_bytes <= s.max_bytes:
+          break
+        # Skips the entries being built or restored, including the one
+        # the caller of store() still holds.
+        entry_lock = s.acquire(name, blocking = False)
+        if entry_lock is None:
+          continue
+        # Renames the entry away first, so that it disappears at once,
+        # then removes the lock file before releasing it.
+        evicted_path = s._entry_path(name) + f".evict{os.getpid()}"
+        try:
+          os.replace(s._entry_path(name), evicted_path)
+          os.remove(s._lock_path(name))
+        finally:
+          s.release(entry_lock)
+        shutil.rmtree(evicted_path, ignore_errors = True)
+        total_bytes -= size
+    finally:
+      s.release(lock_file)
+
+class CachedVerilogVerilatorImportPass(VerilogVerilatorImportPass):
+
+  # Set by enable_verilator_build_cache().
+  build_cache = None
+
+  def get_imported_object(s, m):
+    s._cache_key = None
+    s._cache_lock = None
+    try:
+      return super().get_imported_object(m)
+    finally:
+      if s._cache_lock is not None:
+        s.build_cache.release(s._cache_lock)
+        s._cache_lock = None
+
+  def is_cached(s, m, ip_cfg):
+    cached, config_file, new_cfg = super().is_cached(m, ip_cfg)
+    cache = s.build_cache
+    if cached or cache is None:
+      return cached, config_file, new_cfg
+
+    key = cache.get_key(ip_cfg.translated_top_module, new_cfg)
+    # Holds the lock until the shared library is built (or restored), so
+    # that other workers building the same dut wait and then hit.
+    s._cache_lock = cache.acquire(key)
+    lib_path = ip_cfg.get_shared_lib_path()
+    if cache.restore(key, os.path.basename(lib_path), lib_path):
+      ip_cfg.vprint(f"Restored {lib_path} from verilator build cache {key}", 2)
+      return True, config_file, new_cfg
+
+    s._cache_key = key
+    return False, config_file, new_cfg
+
+  def create_shared_lib(s, m, ph_cfg, ip_cfg, cached):
+    super().create_shared_lib(m, ph_cfg, ip_cfg, cached)
+    if not cached and s._cache_key is not None:
+      lib_path = ip_cfg.get_shared_lib_path()
+      s.build_cache.store(s._cache_key, os.path.basename(lib_path), lib_path)
+
+# Makes every VerilogTranslationImportPass (e.g., the one applied by
+# config_model_with_cmdline_opts()) go through the build cache.
+def enable_verilator_build_cache(cache_dir = DEFAULT_CACHE_DIR,
+                                 max_mb = DEFAULT_CACHE_MAX_MB):
+  CachedVerilogVerilatorImportPass.build_cache = \
+      VerilatorBuildCache(cache_dir, max_mb * 1024 * 1024)
+  VerilogTranslationImportPass.get_import_pass = \
+      staticmethod(lambda: CachedVerilogVerilatorImportPass)
+  return CachedVerilogVerilatorImportPass.build_cache
+
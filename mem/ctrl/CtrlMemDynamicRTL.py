@@ -5,6 +5,53 @@ CtrlMemDynamicRTL.py
 Control memory with dynamic reconfigurability (e.g., receiving control
 signals, halt/terminate signals) for each CGRA tile.
 
+With has_shadow_bank, the control memory is double-buffered: the tile
+executes the active bank, while the ctrl signals and counts of the next
+kernel are written into the other (i.e., shadow) bank via
+CMD_CONFIG_SHADOW*. Once the current kernel completes (or if nothing is
+running), CMD_SWAP_CTRL_BANK atomically swaps the banks (along with
+their counts, lower bounds and prologue counts) and launches the new
+active one from its lower bound, so that the config loading of the next
+kernel overlaps with the execution of the current one. The
+CMD_SWAP_CTRL_BANK is dequeued right away and kept pending until then,
+and a CMD_TERMINATE drops it along with the running kernel. Only the
+commands writing the shadow bank (and a CMD_LAUNCH) wait for the pending
+swap, so the CMD_TERMINATE of a kernel running forever goes ahead of
+the next shadow configs.
+
+With num_kernels > 1, several kernels stay resident at different base
+addresses (i.e., lower bounds) of the control memory, each with its own
+count per iteration, total ctrl count and (per address) prologue
+counts. The CMD_CONFIG_COUNT_PER_ITER/TOTAL_CTRL_COUNT/CTRL_LOWER_BOUND
+configure the kernel indicated by the data_addr, and CMD_LAUNCH starts
+the kernel indicated by its data_addr from its lower bound, restoring
+its prologue counts (see resident_kernel_helper.py for the host side).
+Such a CMD_LAUNCH is dequeued right away and kept pending until the
+running kernel completes, so that the commands behind it are still
+handled (e.g., a CMD_TERMINATE of a kernel running forever, which drops
+the pending launch as well), and only a second CMD_LAUNCH waits for the
+pending one. With a single kernel, the CMD_LAUNCH only starts over an
+idle (i.e., completed or terminated) kernel.
+
+A CMD_CONFIG_DELTA (see ctrl_delta_helper.py) is expanded one entry per
+cycle, and each of its ctrl signals is written into the register file
+(at the consecutive addresses from ctrl_addr) on its separator.
+
+With num_ctrl_patterns > 0, the register file (of each bank) keeps the
+routing patterns in a table shared by its entries (see
+CtrlPatternRegFileRTL), so that a deeper ctrl memory fits in the same
+area. CMD_CLEAR_CTRL_PATTERNS empties the table of the active bank, and
+CMD_CLEAR_SHADOW_CTRL_PATTERNS the one of the shadow bank. A ctrl signal
+missing a full table is rejected, and the first one (till the table is
+cleared) is reported to the controller via CMD_CTRL_PATTERN_OVERFLOW.
+
+The prologue counts (of the FU and of each inport of the crossbars) of
+an address are packed into one word of a register file, and only the
+ones of the current address are evaluated and provided to the tile,
+while the crossbars indicate the inports stepping through the prologue.
+The configured counts are kept in another register file, and a launch
+restores them by flagging every address.
+
 Author : Cheng Tan
   Date : Dec 20, 2024
 """
@@ -18,7 +65,10 @@ from ...lib.basic.val_rdy.queues import NormalQueueRTL
 from ...lib.cmd_type import *
 from ...lib.opt_type import *
 from ...lib.util.common import *
+from ...lib.util.ctrl_delta_helper import CtrlDeltaFormat
 from ...lib.util.data_struct_attr import *
+from ...lib.util.line_trace_helper import *
+from .CtrlPatternRegFileRTL import CtrlPatternRegFileRTL
 
 class CtrlMemDynamicRTL(Component):
 
@@ -26,10 +76,13 @@ class CtrlMemDynamicRTL(Component):
                 ctrl_mem_size, num_fu_inports, num_fu_outports,
                 num_tile_inports, num_tile_outports, num_cgras,
                 num_tiles, ctrl_count_per_iter = 4,
-                total_ctrl_steps = 4):
+                total_ctrl_steps = 4, has_shadow_bank = False,
+                num_kernels = 1, num_ctrl_patterns = 0):
 
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
     CtrlType = CgraPayloadType.get_field_type(kAttrCtrl)
+    DataAddrType = CgraPayloadType.get_field_type(kAttrDataAddr)
+    assert(clog2(num_kernels) <= DataAddrType.nbits)
     # The total_ctrl_steps indicates the number of steps the ctrl
     # signals should proceed. For example, if the number of ctrl
     # signals is 4 and they need to repeat 5 times, then the total
@@ -44,6 +97,34 @@ class CtrlMemDynamicRTL(Component):
     PrologueCountType = mk_bits(clog2(PROLOGUE_MAX_COUNT + 1))
     TileInPortType = mk_bits(clog2(num_tile_inports))
     FuOutPortType = mk_bits(clog2(num_fu_outports))
+    # The prologue counts of an address are packed into one word, i.e.,
+    # the FU's, then the routing crossbar's (per tile inport), then the
+    # FU crossbar's (per FU outport).
+    num_prologue_counts = 1 + num_tile_inports + num_fu_outports
+    routing_crossbar_prologue_base = 1
+    fu_crossbar_prologue_base = 1 + num_tile_inports
+    PrologueIdxType = mk_bits(clog2(num_prologue_counts))
+    PrologueWordType = mk_bits(num_prologue_counts * PrologueCountType.nbits)
+    # The prologue counts are banked along with the ctrl signals, i.e.,
+    # addressed by the bank and the ctrl address.
+    if has_shadow_bank:
+      PrologueAddrType = mk_bits(CtrlAddrType.nbits + 1)
+      num_prologue_addrs = 1 << PrologueAddrType.nbits
+    else:
+      PrologueAddrType = CtrlAddrType
+      num_prologue_addrs = ctrl_mem_size
+    PrologueFlagsType = mk_bits(num_prologue_addrs)
+    KernelIdType = mk_bits(max(clog2(num_kernels), 1))
+    delta = CtrlDeltaFormat(CtrlType)
+    CtrlBitsType = mk_bits(CtrlType.nbits)
+    DeltaWordType = mk_bits(clog2(CTRL_DELTA_MAX_WORDS))
+    DeltaFieldType = mk_bits(delta.field_nbits)
+    delta_field_nbits = delta.field_nbits
+    delta_num_fields = delta.num_fields
+    delta_separator = delta.separator
+    delta_clear = delta.clear
+    DeltaPtrType = mk_bits(clog2(CtrlType.nbits + 1))
+    DeltaCountType = mk_bits(clog2(CTRL_DELTA_MAX_WORDS + 1))
     num_routing_outports = num_tile_outports + num_fu_inports
 
     # Interfaces.
@@ -63,31 +144,341 @@ class CtrlMemDynamicRTL(Component):
     s.ctrl_addr_outport = OutPort(CtrlAddrType)
 
     # Components.
-    s.reg_file = RegisterFile(CtrlType, ctrl_mem_size, 1, 1)
+    s.num_ctrl_patterns = num_ctrl_patterns
+    if num_ctrl_patterns > 0:
+      s.reg_file = CtrlPatternRegFileRTL(CtrlType, ctrl_mem_size,
+                                         num_ctrl_patterns)
+    else:
+      s.reg_file = RegisterFile(CtrlType, ctrl_mem_size, 1, 1)
+    if has_shadow_bank:
+      if num_ctrl_patterns > 0:
+        s.reg_file_bank1 = CtrlPatternRegFileRTL(CtrlType, ctrl_mem_size,
+                                                 num_ctrl_patterns)
+      else:
+        s.reg_file_bank1 = RegisterFile(CtrlType, ctrl_mem_size, 1, 1)
+    # The bank being executed, i.e., reg_file (0) or reg_file_bank1 (1),
+    # the other one is the shadow bank.
+    s.active_bank = Wire(b1)
+    # The bank written by the CMD_CONFIG(_SHADOW).
+    s.write_bank = Wire(b1)
+    s.swap_bank = Wire(b1)
+    # Expansion of the CMD_CONFIG_DELTA, i.e., the index of the ctrl
+    # signal being expanded, the position of the current entry, and the
+    # ctrl signal with the entries so far.
+    s.delta_word = Wire(DeltaWordType)
+    s.delta_ptr = Wire(DeltaPtrType)
+    s.delta_ctrl = Wire(CtrlBitsType)
+    s.delta_addr_offset = Wire(CtrlAddrType)
+    s.delta_bits = Wire(CtrlBitsType)
+    s.delta_entry = Wire(CtrlBitsType)
+    s.delta_field = Wire(DeltaFieldType)
+    s.delta_entry_nbits = Wire(DeltaPtrType)
+    s.delta_next_ctrl = Wire(CtrlBitsType)
+    s.delta_separator = Wire(b1)
+    # Constant position, mask and entry size of each field.
+    s.delta_field_lo = [Wire(CtrlBitsType) for _ in range(delta.num_fields)]
+    s.delta_field_mask = [Wire(CtrlBitsType) for _ in range(delta.num_fields)]
+    s.delta_field_entry_nbits = [Wire(DeltaPtrType) for _ in range(delta.num_fields)]
+    s.delta_last = Wire(b1)
     s.recv_pkt_from_controller_queue = NormalQueueRTL(IntraCgraPktType)
     s.recv_from_element_queue = NormalQueueRTL(CgraPayloadType)
     s.times = Wire(TimeType)
     s.start_iterate_ctrl = Wire(b1)
     s.sent_complete = Wire(b1)
+    # The counts of the active kernel.
     s.ctrl_count_per_iter_val = Wire(PCType)
     s.ctrl_count_lower_bound = Wire(CtrlAddrType)
     s.ctrl_count_upper_bound = Wire(UpperBoundType)
     s.total_ctrl_steps_val = Wire(TimeType)
-
-    s.prologue_count_reg_fu = [Wire(PrologueCountType) for _ in range(ctrl_mem_size)]
+    # The counts of each resident kernel.
+    s.kernel_count_per_iter = [Wire(PCType) for _ in range(num_kernels)]
+    s.kernel_lower_bound = [Wire(CtrlAddrType) for _ in range(num_kernels)]
+    s.kernel_total_ctrl_steps = [Wire(TimeType) for _ in range(num_kernels)]
+    s.active_kernel = Wire(KernelIdType)
+    # The kernel indicated by the received command.
+    s.cmd_kernel = Wire(KernelIdType)
+    s.kernel_idle = Wire(b1)
+    s.recv_launch = Wire(b1)
+    s.recv_terminate = Wire(b1)
+    s.launch_kernel = Wire(b1)
+    # The kernel being launched, i.e., the pending or the received one.
+    s.launch_kernel_id = Wire(KernelIdType)
+    s.launch_rdy = Wire(b1)
+    # The CMD_LAUNCH waiting for the completion of the running kernel.
+    s.launch_pending = Wire(b1)
+    s.pending_kernel = Wire(KernelIdType)
+    s.shadow_ctrl_count_per_iter_val = Wire(PCType)
+    s.shadow_ctrl_count_lower_bound = Wire(CtrlAddrType)
+    s.shadow_total_ctrl_steps_val = Wire(TimeType)
+    s.recv_swap = Wire(b1)
+    # The CMD_SWAP_CTRL_BANK waiting for the completion of the running
+    # kernel, and whether the received command writing the shadow bank
+    # waits for it.
+    s.swap_pending = Wire(b1)
+    s.shadow_stall = Wire(b1)
+
+    # The remaining prologue counts at the current address.
     s.prologue_count_outport_fu = OutPort(PrologueCountType)
-    s.prologue_count_outport_fu_crossbar = \
-        [[OutPort(PrologueCountType) for _ in range(num_fu_outports)] for _ in range(ctrl_mem_size)]
     s.prologue_count_outport_routing_crossbar = \
-        [[OutPort(PrologueCountType) for _ in range(num_tile_inports)] for _ in range(ctrl_mem_size)]
-
-    s.prologue_count_reg_fu_crossbar = \
-        [[Wire(PrologueCountType) for _ in range(num_fu_outports)] for _ in range(ctrl_mem_size)]
-    s.prologue_count_reg_routing_crossbar = \
-        [[Wire(PrologueCountType) for _ in range(num_tile_inports)] for _ in range(ctrl_mem_size)]
+        [OutPort(PrologueCountType) for _ in range(num_tile_inports)]
+    s.prologue_count_outport_fu_crossbar = \
+        [OutPort(PrologueCountType) for _ in range(num_fu_outports)]
+    # The inports of the crossbars that consume a prologue step at the
+    # current address.
+    s.prologue_step_inport_routing_crossbar = \
+        [InPort(b1) for _ in range(num_tile_inports)]
+    s.prologue_step_inport_fu_crossbar = \
+        [InPort(b1) for _ in range(num_fu_outports)]
+    # Restores the prologue counts of the crossbars, e.g., to resume the
+    # progress after a context switch.
+    s.clear_prologue_crossbar = InPort(b1)
+
+    # The configured (i.e., initial) and the remaining prologue counts of
+    # each address, of which only the current address is evaluated. The
+    # configured ones are also read at the address of the received
+    # CMD_CONFIG_PROLOGUE_*, as each command updates one count of a word.
+    s.prologue_init = RegisterFile(PrologueWordType, num_prologue_addrs, 2, 1)
+    s.prologue_remaining = RegisterFile(PrologueWordType, num_prologue_addrs, 1, 1)
+    # The prologue address of the current ctrl signal, and the one
+    # configured by the received command.
+    s.prologue_raddr = Wire(PrologueAddrType)
+    s.prologue_config_addr = Wire(PrologueAddrType)
+    # Whether each address has been configured (i.e., its configured
+    # counts are valid), and whether its remaining FU/crossbar counts are
+    # still the configured ones, so that a launch restores all of them at
+    # once.
+    s.prologue_configured = Wire(PrologueFlagsType)
+    s.prologue_fresh_fu = Wire(PrologueFlagsType)
+    s.prologue_fresh_crossbar = Wire(PrologueFlagsType)
+    s.prologue_configured_next = Wire(PrologueFlagsType)
+    s.prologue_fresh_fu_next = Wire(PrologueFlagsType)
+    s.prologue_fresh_crossbar_next = Wire(PrologueFlagsType)
+    s.prologue_init_word = Wire(PrologueWordType)
+    s.prologue_config_word = Wire(PrologueWordType)
+    s.prologue_next_word = Wire(PrologueWordType)
+    s.prologue_new_config_word = Wire(PrologueWordType)
+    s.prologue_init_count = [Wire(PrologueCountType) for _ in range(num_prologue_counts)]
+    s.prologue_remaining_count = [Wire(PrologueCountType) for _ in range(num_prologue_counts)]
+    s.prologue_count = [Wire(PrologueCountType) for _ in range(num_prologue_counts)]
+    s.prologue_step = [Wire(b1) for _ in range(num_prologue_counts)]
+    s.prologue_next_count = [Wire(PrologueCountType) for _ in range(num_prologue_counts)]
+    s.prologue_config_count = [Wire(PrologueCountType) for _ in range(num_prologue_counts)]
+    s.prologue_new_config_count = [Wire(PrologueCountType) for _ in range(num_prologue_counts)]
+    s.prologue_config_idx = Wire(PrologueIdxType)
+    s.config_prologue_fu = Wire(b1)
+    s.config_prologue_crossbar = Wire(b1)
+    # Whether the received command configures the shadow bank's prologue
+    # counts.
+    s.config_prologue_shadow = Wire(b1)
 
     # Connections.
-    s.send_ctrl.msg //= s.reg_file.rdata[0]
+    if has_shadow_bank:
+      @update
+      def update_bank1():
+        s.reg_file_bank1.raddr[0] @= s.reg_file.raddr[0]
+        s.reg_file_bank1.waddr[0] @= s.reg_file.waddr[0]
+        s.reg_file_bank1.wdata[0] @= s.reg_file.wdata[0]
+        s.reg_file_bank1.wen[0] @= 0
+        if s.recv_pkt_from_controller_queue.send.val & ~s.shadow_stall & \
+           (((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG) | \
+             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW) | \
+             ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_DELTA) & s.delta_separator))):
+          s.reg_file_bank1.wen[0] @= s.write_bank
+        s.send_ctrl.msg @= s.reg_file.rdata[0]
+        if s.active_bank:
+          s.send_ctrl.msg @= s.reg_file_bank1.rdata[0]
+
+      s.recv_swap //= lambda: s.recv_pkt_from_controller_queue.send.val & \
+                              (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_SWAP_CTRL_BANK)
+      # The swap waits for the running kernel in the pending register
+      # rather than at the head of the queue.
+      s.swap_bank //= lambda: s.kernel_idle & \
+                              ((s.swap_pending & ~s.recv_terminate) | \
+                               (s.recv_swap & ~s.launch_pending))
+
+      @update_ff
+      def update_swap_pending():
+        if s.reset:
+          s.swap_pending <<= 0
+        elif s.recv_terminate:
+          s.swap_pending <<= 0
+        elif s.recv_swap & ~s.swap_pending & ~s.launch_pending & ~s.kernel_idle:
+          s.swap_pending <<= 1
+        elif s.swap_bank:
+          s.swap_pending <<= 0
+
+      s.config_prologue_shadow //= lambda: \
+          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU) | \
+          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU_CROSSBAR) | \
+          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_ROUTING_CROSSBAR)
+      s.shadow_stall //= lambda: s.swap_pending & \
+          ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW) | \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT) | \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_COUNT_PER_ITER) | \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND) | \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CLEAR_SHADOW_CTRL_PATTERNS) | \
+           s.config_prologue_shadow)
+      s.prologue_raddr //= lambda: concat(s.active_bank, s.reg_file.raddr[0])
+      s.prologue_config_addr //= lambda: concat(s.active_bank ^ s.config_prologue_shadow,
+                                                s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr)
+
+      @update_ff
+      def update_active_bank():
+        if s.reset:
+          s.active_bank <<= 0
+        elif s.swap_bank:
+          s.active_bank <<= ~s.active_bank
+    else:
+      s.send_ctrl.msg //= s.reg_file.rdata[0]
+      s.active_bank //= 0
+      s.recv_swap //= 0
+      s.swap_bank //= 0
+      s.swap_pending //= 0
+      s.shadow_stall //= 0
+      s.config_prologue_shadow //= 0
+      s.prologue_raddr //= lambda: s.reg_file.raddr[0]
+      s.prologue_config_addr //= lambda: s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr
+
+    # The pattern tables are cleared per bank, and the first ctrl signal
+    # rejected by a full table is reported.
+    s.report_overflow = Wire(b1)
+    s.overflow_addr = Wire(CtrlAddrType)
+    if num_ctrl_patterns > 0:
+      s.clear_ctrl_patterns = Wire(b1)
+      s.clear_shadow_ctrl_patterns = Wire(b1)
+      s.reject_ctrl = Wire(b1)
+      s.clear_ctrl_patterns //= lambda: s.recv_pkt_from_controller_queue.send.val & \
+                                        (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CLEAR_CTRL_PATTERNS)
+      s.clear_shadow_ctrl_patterns //= lambda: s.recv_pkt_from_controller_queue.send.val & ~s.shadow_stall & \
+                                               (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CLEAR_SHADOW_CTRL_PATTERNS)
+      if has_shadow_bank:
+        s.reg_file.clear //= lambda: (s.clear_ctrl_patterns & ~s.active_bank) | \
+                                     (s.clear_shadow_ctrl_patterns & s.active_bank)
+        s.reg_file_bank1.clear //= lambda: (s.clear_ctrl_patterns & s.active_bank) | \
+                                           (s.clear_shadow_ctrl_patterns & ~s.active_bank)
+        s.reject_ctrl //= lambda: (s.reg_file.reject & ~s.reg_file.overflow) | \
+                                  (s.reg_file_bank1.reject & ~s.reg_file_bank1.overflow)
+      else:
+        s.reg_file.clear //= s.clear_ctrl_patterns
+        s.reject_ctrl //= lambda: s.reg_file.reject & ~s.reg_file.overflow
+
+      @update_ff
+      def update_report_overflow():
+        if s.reset:
+          s.report_overflow <<= 0
+          s.overflow_addr <<= CtrlAddrType(0)
+        elif s.reject_ctrl:
+          s.report_overflow <<= 1
+          s.overflow_addr <<= s.reg_file.waddr[0]
+        elif s.send_pkt_to_controller.val & s.send_pkt_to_controller.rdy & \
+             (s.send_pkt_to_controller.msg.payload.cmd == CMD_CTRL_PATTERN_OVERFLOW):
+          s.report_overflow <<= 0
+    else:
+      s.report_overflow //= 0
+      s.overflow_addr //= 0
+
+    s.write_bank //= lambda: s.active_bank ^ \
+                             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW)
+
+    if num_kernels > 1:
+      s.cmd_kernel //= lambda: trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data_addr,
+                                     KernelIdType)
+    else:
+      s.cmd_kernel //= 0
+    s.kernel_idle //= lambda: ~s.start_iterate_ctrl | s.sent_complete
+    s.recv_launch //= lambda: s.recv_pkt_from_controller_queue.send.val & \
+                              (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH)
+    s.recv_terminate //= lambda: s.recv_pkt_from_controller_queue.send.val & \
+                                 (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_TERMINATE)
+    # Only the launch of a resident kernel waits for the running one, in
+    # the pending register rather than at the head of the queue. A single
+    # kernel is (re)launched right away as before, so that a kernel
+    # running forever (i.e., total ctrl count 0) does not hold the launch,
+    # which then only starts over an idle kernel.
+    if num_kernels > 1:
+      s.launch_kernel //= lambda: s.kernel_idle & \
+                                  ((s.launch_pending & ~s.recv_terminate) | \
+                                   (s.recv_launch & ~s.swap_pending))
+      s.launch_rdy //= lambda: ~s.launch_pending & ~s.swap_pending
+
+      @update
+      def update_launch_kernel_id():
+        s.launch_kernel_id @= s.cmd_kernel
+        if s.launch_pending:
+          s.launch_kernel_id @= s.pending_kernel
+
+      @update_ff
+      def update_launch_pending():
+        if s.reset:
+          s.launch_pending <<= 0
+          s.pending_kernel <<= 0
+        elif s.recv_terminate:
+          s.launch_pending <<= 0
+        elif s.recv_launch & ~s.launch_pending & ~s.swap_pending & ~s.kernel_idle:
+          s.launch_pending <<= 1
+          s.pending_kernel <<= s.cmd_kernel
+        elif s.launch_kernel:
+          s.launch_pending <<= 0
+    else:
+      s.launch_kernel //= lambda: s.recv_launch & s.kernel_idle & ~s.swap_pending
+      s.launch_kernel_id //= 0
+      s.launch_rdy //= lambda: ~s.swap_pending
+      s.launch_pending //= 0
+      s.pending_kernel //= 0
+
+    for f in range(delta.num_fields):
+      lo, hi = delta.field_slices[f]
+      s.delta_field_lo[f] //= CtrlBitsType(lo)
+      s.delta_field_mask[f] //= CtrlBitsType(((1 << (hi - lo)) - 1) << lo)
+      s.delta_field_entry_nbits[f] //= DeltaPtrType(delta.entry_nbits(f))
+
+    if DeltaWordType.nbits <= CtrlAddrType.nbits:
+      s.delta_addr_offset //= lambda: zext(s.delta_word, CtrlAddrType)
+    else:
+      s.delta_addr_offset //= lambda: trunc(s.delta_word, CtrlAddrType)
+    s.delta_separator //= lambda: s.delta_field == DeltaFieldType(delta_separator)
+    s.delta_last //= lambda: s.delta_separator & \
+                             (zext(s.delta_word, DeltaCountType) + DeltaCountType(1) >= \
+                              trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, DeltaCountType))
+
+    @update
+    def expand_ctrl_delta():
+      s.delta_bits @= 0
+      s.delta_entry @= 0
+      s.delta_next_ctrl @= s.delta_ctrl
+      s.delta_entry_nbits @= DeltaPtrType(delta_field_nbits)
+      if s.recv_pkt_from_controller_queue.send.val & \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_DELTA):
+        s.delta_bits @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl
+        s.delta_entry @= s.delta_bits >> zext(s.delta_ptr, CtrlBitsType)
+      s.delta_field @= s.delta_entry[0:delta_field_nbits]
+      if s.delta_field == DeltaFieldType(delta_clear):
+        s.delta_next_ctrl @= 0
+      for f in range(delta_num_fields):
+        if s.delta_field == DeltaFieldType(f):
+          s.delta_next_ctrl @= (s.delta_next_ctrl & ~s.delta_field_mask[f]) | \
+                               (((s.delta_entry >> CtrlBitsType(delta_field_nbits)) << \
+                                 s.delta_field_lo[f]) & s.delta_field_mask[f])
+          s.delta_entry_nbits @= s.delta_field_entry_nbits[f]
+
+    @update_ff
+    def update_delta_ctrl():
+      if s.reset:
+        s.delta_word <<= 0
+        s.delta_ptr <<= 0
+        s.delta_ctrl <<= 0
+      elif s.recv_pkt_from_controller_queue.send.val & \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_DELTA):
+        if s.delta_last:
+          s.delta_word <<= 0
+          s.delta_ptr <<= 0
+          s.delta_ctrl <<= 0
+        else:
+          if s.delta_separator:
+            s.delta_word <<= s.delta_word + DeltaWordType(1)
+          s.delta_ptr <<= s.delta_ptr + s.delta_entry_nbits
+          s.delta_ctrl <<= s.delta_next_ctrl
+
     s.recv_pkt_from_controller //= s.recv_pkt_from_controller_queue.recv
     s.recv_from_element //= s.recv_from_element_queue.recv
 
@@ -112,8 +503,10 @@ class CtrlMemDynamicRTL(Component):
       s.reg_file.wdata[0].vector_factor_power @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.vector_factor_power
       s.reg_file.wdata[0].is_last_ctrl @= 0
 
-      if s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG):
-        s.reg_file.wen[0] @= 1
+      if s.recv_pkt_from_controller_queue.send.val & ~s.shadow_stall & \
+         ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG) | \
+          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW)):
+        s.reg_file.wen[0] @= ~s.write_bank
         s.reg_file.waddr[0] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr
         # Fills the fields of the control signal.
         s.reg_file.wdata[0].operation @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.operation
@@ -128,9 +521,17 @@ class CtrlMemDynamicRTL(Component):
           s.reg_file.wdata[0].fu_xbar_outport[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_xbar_outport[i]
         s.reg_file.wdata[0].vector_factor_power @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.vector_factor_power
         s.reg_file.wdata[0].is_last_ctrl @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.is_last_ctrl
+      elif s.recv_pkt_from_controller_queue.send.val & \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_DELTA) & \
+           s.delta_separator:
+        s.reg_file.wen[0] @= ~s.write_bank
+        s.reg_file.waddr[0] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr + s.delta_addr_offset
+        s.reg_file.wdata[0] @= s.delta_ctrl
       elif s.recv_pkt_from_controller_queue.send.val & \
            ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD_RESPONSE) | \
-            (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL_RESPONSE)):
+            (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL_RESPONSE) | \
+            (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX_RESPONSE) | \
+            (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN_RESPONSE)):
         s.send_to_element.msg @= s.recv_pkt_from_controller_queue.send.msg.payload
         s.send_to_element.val @= 1
 
@@ -138,7 +539,6 @@ class CtrlMemDynamicRTL(Component):
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR) | \
-         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_TERMINATE) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_PAUSE) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_PRESERVE) | \
@@ -146,10 +546,31 @@ class CtrlMemDynamicRTL(Component):
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_COUNT_PER_ITER) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU_CROSSBAR) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_ROUTING_CROSSBAR) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_RECORD_PHI_ADDR) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CLEAR_CTRL_PATTERNS) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CLEAR_SHADOW_CTRL_PATTERNS) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD_RESPONSE) | \
-         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL_RESPONSE):
-        s.recv_pkt_from_controller_queue.send.rdy @= 1
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL_RESPONSE) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX_RESPONSE) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN_RESPONSE):
+        s.recv_pkt_from_controller_queue.send.rdy @= ~s.shadow_stall
+      # The CMD_CONFIG_DELTA is dequeued once its last ctrl signal is
+      # written, i.e., on the last separator.
+      if s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_DELTA:
+        s.recv_pkt_from_controller_queue.send.rdy @= s.delta_last
+      # The launch waits for the pending launch/swap, and the swap (like
+      # the other commands writing the shadow bank) for the pending swap.
+      if s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH:
+        s.recv_pkt_from_controller_queue.send.rdy @= s.launch_rdy
+      if s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_SWAP_CTRL_BANK:
+        s.recv_pkt_from_controller_queue.send.rdy @= ~s.swap_pending & ~s.launch_pending
       # TODO: Extend for the other commands. Maybe another queue to
       # handle complicated actions.
       # else:
@@ -161,22 +582,29 @@ class CtrlMemDynamicRTL(Component):
     @update
     def update_send_pkt_to_controller():
       s.send_pkt_to_controller.val @= 0
-      s.send_pkt_to_controller.msg @= IntraCgraPktType(0, num_tiles, 0, 0, 0, 0, 0, 0, 0, 0, CgraPayloadType(CMD_COMPLETE, 0, 0, 0, 0))
+      s.send_pkt_to_controller.msg @= IntraCgraPktType(0, num_tiles, 0, 0, 0, 0, 0, 0, 0, 0, CgraPayloadType(CMD_COMPLETE, 0, 0, 0, 0), 0)
       s.recv_from_element_queue.send.rdy @= 0
       if s.start_iterate_ctrl == b1(1):
         if s.recv_from_element_queue.send.val & (~s.sent_complete):
           s.send_pkt_to_controller.msg @= \
               IntraCgraPktType(s.tile_id, num_tiles, 0, 0, 0, 0, 0, 0, 0, 0,
-                               s.recv_from_element_queue.send.msg)
+                               s.recv_from_element_queue.send.msg, 0)
           s.send_pkt_to_controller.val @= 1
           s.recv_from_element_queue.send.rdy @= s.send_pkt_to_controller.rdy
         elif ((s.total_ctrl_steps_val > 0) & (s.times == s.total_ctrl_steps_val)) | \
-           (s.reg_file.rdata[0].operation == OPT_START):
+           (s.send_ctrl.msg.operation == OPT_START):
           # Sends COMPLETE signal to Controller when the last ctrl signal is done.
           if ~s.sent_complete & (s.total_ctrl_steps_val > 0) & (s.times == s.total_ctrl_steps_val) & s.start_iterate_ctrl:
             s.send_pkt_to_controller.msg @= \
-                IntraCgraPktType(s.tile_id, num_tiles, 0, 0, 0, 0, 0, 0, 0, 0, CgraPayloadType(CMD_COMPLETE, 0, 0, 0, 0))
+                IntraCgraPktType(s.tile_id, num_tiles, 0, 0, 0, 0, 0, 0, 0, 0, CgraPayloadType(CMD_COMPLETE, 0, 0, 0, 0), 0)
             s.send_pkt_to_controller.val @= 1
+      # The overflow of the routing pattern table goes ahead of the others.
+      if s.report_overflow:
+        s.send_pkt_to_controller.msg @= \
+            IntraCgraPktType(s.tile_id, num_tiles, 0, 0, 0, 0, 0, 0, 0, 0,
+                             CgraPayloadType(CMD_CTRL_PATTERN_OVERFLOW, 0, 0, 0, s.overflow_addr), 0)
+        s.send_pkt_to_controller.val @= 1
+        s.recv_from_element_queue.send.rdy @= 0
 
     @update
     def update_send_ctrl():
@@ -185,7 +613,7 @@ class CtrlMemDynamicRTL(Component):
         if s.sent_complete:
           s.send_ctrl.val @= 0
         elif ((s.total_ctrl_steps_val > 0) & (s.times == s.total_ctrl_steps_val)) | \
-           (s.reg_file.rdata[0].operation == OPT_START):
+           (s.send_ctrl.msg.operation == OPT_START):
           s.send_ctrl.val @= b1(0)
         else:
           s.send_ctrl.val @= 1
@@ -198,9 +626,10 @@ class CtrlMemDynamicRTL(Component):
       if s.reset:
         s.start_iterate_ctrl <<= 0
       else:
-        if s.recv_pkt_from_controller_queue.send.val:
-          if (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH) | \
-                  (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_RESUME):
+        if s.launch_kernel | s.swap_bank:
+          s.start_iterate_ctrl <<= 1
+        elif s.recv_pkt_from_controller_queue.send.val:
+          if s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_RESUME:
             s.start_iterate_ctrl <<= 1
     # TODO: issue #191, stop iterate ctrl after 10 cycels during pausing status, 
     # so as to clear channels safely.
@@ -216,27 +645,32 @@ class CtrlMemDynamicRTL(Component):
            s.send_pkt_to_controller.rdy & \
            (s.send_pkt_to_controller.msg.payload.cmd == CMD_COMPLETE):
           s.sent_complete <<= 1
-        elif s.recv_pkt_from_controller_queue.send.val & ( (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH) | \
-                (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_RESUME) ):
+        elif s.launch_kernel | s.swap_bank | \
+             (s.recv_pkt_from_controller_queue.send.val & \
+              (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_RESUME)):
           s.sent_complete <<= 0
 
     @update_ff
-    def update_raddr_and_fu_prologue():
+    def update_raddr():
       if s.reset:
         s.times <<= 0
         s.reg_file.raddr[0] <<= 0
-        for i in range(ctrl_mem_size):
-          s.prologue_count_reg_fu[i] <<= 0
+      elif s.launch_kernel:
+        # Starts over the launched kernel from its lower bound.
+        s.times <<= TimeType(0)
+        for k in range(num_kernels):
+          if s.launch_kernel_id == KernelIdType(k):
+            s.reg_file.raddr[0] <<= s.kernel_lower_bound[k]
+      elif s.swap_bank:
+        # The new active bank starts over from its lower bound.
+        s.times <<= TimeType(0)
+        s.reg_file.raddr[0] <<= s.shadow_ctrl_count_lower_bound
       elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND):
-        s.reg_file.raddr[0] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
+        if s.cmd_kernel == s.active_kernel:
+          s.reg_file.raddr[0] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
       elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_TERMINATE):
         s.times <<= TimeType(0)
       else:
-        if s.recv_pkt_from_controller_queue.send.val & \
-           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU):
-          s.prologue_count_reg_fu[s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr] <<= \
-              trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PrologueCountType)
-
         if s.start_iterate_ctrl == b1(1):
           if ((s.total_ctrl_steps_val == 0) | \
               (s.times < s.total_ctrl_steps_val)) & \
@@ -249,51 +683,194 @@ class CtrlMemDynamicRTL(Component):
               s.reg_file.raddr[0] <<= s.ctrl_count_lower_bound
             else:
               s.reg_file.raddr[0] <<= s.reg_file.raddr[0] + CtrlAddrType(1)
-            if s.prologue_count_reg_fu[s.reg_file.raddr[0]] > 0:
-              s.prologue_count_reg_fu[s.reg_file.raddr[0]] <<= s.prologue_count_reg_fu[s.reg_file.raddr[0]] - 1
+
+    # Unpacks/packs the prologue words.
+    for k in range(num_prologue_counts):
+      lo = k * PrologueCountType.nbits
+      hi = lo + PrologueCountType.nbits
+      s.prologue_init_count[k] //= s.prologue_init_word[lo:hi]
+      s.prologue_remaining_count[k] //= s.prologue_remaining.rdata[0][lo:hi]
+      s.prologue_next_word[lo:hi] //= s.prologue_next_count[k]
+      s.prologue_config_count[k] //= s.prologue_config_word[lo:hi]
+      s.prologue_new_config_word[lo:hi] //= s.prologue_new_config_count[k]
+
+    s.prologue_count_outport_fu //= s.prologue_count[0]
+    for i in range(num_tile_inports):
+      s.prologue_count_outport_routing_crossbar[i] //= \
+          s.prologue_count[routing_crossbar_prologue_base + i]
+    for i in range(num_fu_outports):
+      s.prologue_count_outport_fu_crossbar[i] //= \
+          s.prologue_count[fu_crossbar_prologue_base + i]
+
+    # The shadow ones are dropped without a shadow bank.
+    s.config_prologue_fu //= lambda: s.recv_pkt_from_controller_queue.send.val & ~s.shadow_stall & \
+                                     ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
+                                      (s.config_prologue_shadow & \
+                                       (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU)))
+    s.config_prologue_crossbar //= lambda: s.recv_pkt_from_controller_queue.send.val & ~s.shadow_stall & \
+                                           ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR) | \
+                                            (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
+                                            (s.config_prologue_shadow & \
+                                             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd != CMD_CONFIG_SHADOW_PROLOGUE_FU)))
+
+    @update
+    def update_prologue_count():
+      s.prologue_init.raddr[0] @= s.prologue_raddr
+      s.prologue_remaining.raddr[0] @= s.prologue_raddr
+      s.prologue_init_word @= 0
+      if s.prologue_configured[s.prologue_raddr]:
+        s.prologue_init_word @= s.prologue_init.rdata[0]
+      s.prologue_count[0] @= s.prologue_remaining_count[0]
+      if s.prologue_fresh_fu[s.prologue_raddr]:
+        s.prologue_count[0] @= s.prologue_init_count[0]
+      for k in range(1, num_prologue_counts):
+        s.prologue_count[k] @= s.prologue_remaining_count[k]
+        if s.prologue_fresh_crossbar[s.prologue_raddr]:
+          s.prologue_count[k] @= s.prologue_init_count[k]
+      # The FU steps once the current ctrl signal is done.
+      s.prologue_step[0] @= s.send_ctrl.rdy & s.send_ctrl.val & \
+                            (s.prologue_count[0] > 0)
+      for i in range(num_tile_inports):
+        s.prologue_step[routing_crossbar_prologue_base + i] @= \
+            s.prologue_step_inport_routing_crossbar[i]
+      for i in range(num_fu_outports):
+        s.prologue_step[fu_crossbar_prologue_base + i] @= \
+            s.prologue_step_inport_fu_crossbar[i]
+      for k in range(num_prologue_counts):
+        s.prologue_next_count[k] @= s.prologue_count[k]
+        if s.prologue_step[k]:
+          s.prologue_next_count[k] @= s.prologue_count[k] - PrologueCountType(1)
+
+      s.prologue_remaining.waddr[0] @= s.prologue_raddr
+      s.prologue_remaining.wdata[0] @= s.prologue_next_word
+      s.prologue_remaining.wen[0] @= 0
+      for k in range(num_prologue_counts):
+        if s.prologue_step[k] & ~s.launch_kernel & ~s.swap_bank:
+          s.prologue_remaining.wen[0] @= 1
+
+    @update
+    def update_prologue_config():
+      s.prologue_init.raddr[1] @= s.prologue_config_addr
+      s.prologue_config_word @= 0
+      if s.prologue_configured[s.prologue_config_addr]:
+        s.prologue_config_word @= s.prologue_init.rdata[1]
+      s.prologue_config_idx @= 0
+      if (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_ROUTING_CROSSBAR):
+        s.prologue_config_idx @= PrologueIdxType(routing_crossbar_prologue_base) + \
+            zext(trunc(s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.routing_xbar_outport[0], TileInPortType), PrologueIdxType)
+      elif (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU_CROSSBAR):
+        s.prologue_config_idx @= PrologueIdxType(fu_crossbar_prologue_base) + \
+            zext(trunc(s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_xbar_outport[0], FuOutPortType), PrologueIdxType)
+      for k in range(num_prologue_counts):
+        s.prologue_new_config_count[k] @= s.prologue_config_count[k]
+        if s.prologue_config_idx == PrologueIdxType(k):
+          s.prologue_new_config_count[k] @= \
+              trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PrologueCountType)
+      s.prologue_init.waddr[0] @= s.prologue_config_addr
+      s.prologue_init.wdata[0] @= s.prologue_new_config_word
+      s.prologue_init.wen[0] @= s.config_prologue_fu | s.config_prologue_crossbar
 
     @update
-    def update_prologue_outport():
-      s.prologue_count_outport_fu @= s.prologue_count_reg_fu[s.reg_file.raddr[0]]
-      for addr in range(ctrl_mem_size):
-        for i in range(num_tile_inports):
-          s.prologue_count_outport_routing_crossbar[addr][i] @= \
-              s.prologue_count_reg_routing_crossbar[addr][i]
-        for i in range(num_fu_outports):
-          s.prologue_count_outport_fu_crossbar[addr][i] @= \
-              s.prologue_count_reg_fu_crossbar[addr][i]
+    def update_prologue_flags_next():
+      s.prologue_configured_next @= s.prologue_configured
+      s.prologue_fresh_fu_next @= s.prologue_fresh_fu
+      s.prologue_fresh_crossbar_next @= s.prologue_fresh_crossbar
+      # The remaining counts of the current address are written back.
+      if s.prologue_remaining.wen[0]:
+        s.prologue_fresh_fu_next[s.prologue_raddr] @= 0
+        s.prologue_fresh_crossbar_next[s.prologue_raddr] @= 0
+      if s.config_prologue_fu | s.config_prologue_crossbar:
+        s.prologue_configured_next[s.prologue_config_addr] @= 1
+      if s.config_prologue_fu:
+        s.prologue_fresh_fu_next[s.prologue_config_addr] @= 1
+      if s.config_prologue_crossbar:
+        s.prologue_fresh_crossbar_next[s.prologue_config_addr] @= 1
+      # A launch (or swap) restores all the prologue counts.
+      if s.launch_kernel | s.swap_bank:
+        s.prologue_fresh_fu_next @= ~PrologueFlagsType(0)
+      if s.launch_kernel | s.swap_bank | s.clear_prologue_crossbar:
+        s.prologue_fresh_crossbar_next @= ~PrologueFlagsType(0)
 
     @update_ff
-    def update_prologue_reg():
+    def update_prologue_flags():
       if s.reset:
-        for addr in range(ctrl_mem_size):
-          for i in range(num_tile_inports):
-            s.prologue_count_reg_routing_crossbar[addr][i] <<= 0
-          for i in range(num_fu_outports):
-            s.prologue_count_reg_fu_crossbar[addr][i] <<= 0
+        s.prologue_configured <<= 0
+        s.prologue_fresh_fu <<= ~PrologueFlagsType(0)
+        s.prologue_fresh_crossbar <<= ~PrologueFlagsType(0)
       else:
-        if s.recv_pkt_from_controller_queue.send.val & \
-           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR):
-          temp_routing_crossbar_in = s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.routing_xbar_outport[0]
-          s.prologue_count_reg_routing_crossbar[s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr][trunc(temp_routing_crossbar_in, TileInPortType)] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PrologueCountType)
-        elif s.recv_pkt_from_controller_queue.send.val & \
-           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR):
-          temp_fu_crossbar_in = s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_xbar_outport[0]
-          s.prologue_count_reg_fu_crossbar[s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr][trunc(temp_fu_crossbar_in, FuOutPortType)] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PrologueCountType)
+        s.prologue_configured <<= s.prologue_configured_next
+        s.prologue_fresh_fu <<= s.prologue_fresh_fu_next
+        s.prologue_fresh_crossbar <<= s.prologue_fresh_crossbar_next
+
+    @update
+    def update_active_kernel_counts():
+      s.ctrl_count_per_iter_val @= 0
+      s.ctrl_count_lower_bound @= 0
+      s.total_ctrl_steps_val @= 0
+      for k in range(num_kernels):
+        if s.active_kernel == KernelIdType(k):
+          s.ctrl_count_per_iter_val @= s.kernel_count_per_iter[k]
+          s.ctrl_count_lower_bound @= s.kernel_lower_bound[k]
+          s.total_ctrl_steps_val @= s.kernel_total_ctrl_steps[k]
+
+    @update_ff
+    def update_active_kernel():
+      if s.reset:
+        s.active_kernel <<= 0
+      elif s.launch_kernel:
+        s.active_kernel <<= s.launch_kernel_id
 
     @update_ff
     def update_ctrl_count_per_iter():
       if s.reset:
-        s.ctrl_count_per_iter_val <<= PCType(ctrl_count_per_iter)
+        for k in range(num_kernels):
+          s.kernel_count_per_iter[k] <<= PCType(ctrl_count_per_iter)
+        s.shadow_ctrl_count_per_iter_val <<= PCType(ctrl_count_per_iter)
+      elif s.swap_bank:
+        # A config of the running kernel at the swap goes with it into
+        # the shadow bank.
+        for k in range(num_kernels):
+          if s.active_kernel == KernelIdType(k):
+            s.kernel_count_per_iter[k] <<= s.shadow_ctrl_count_per_iter_val
+          elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) & (s.cmd_kernel == KernelIdType(k)):
+            s.kernel_count_per_iter[k] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PCType)
+        if s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) & (s.cmd_kernel == s.active_kernel):
+          s.shadow_ctrl_count_per_iter_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PCType)
+        else:
+          s.shadow_ctrl_count_per_iter_val <<= s.ctrl_count_per_iter_val
       elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER):
-        s.ctrl_count_per_iter_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PCType)
+        for k in range(num_kernels):
+          if s.cmd_kernel == KernelIdType(k):
+            s.kernel_count_per_iter[k] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PCType)
+      elif s.recv_pkt_from_controller_queue.send.val & ~s.shadow_stall & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_COUNT_PER_ITER):
+        s.shadow_ctrl_count_per_iter_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PCType)
 
     @update_ff
     def update_lower_bound():
       if s.reset:
-        s.ctrl_count_lower_bound <<= CtrlAddrType(0)
+        for k in range(num_kernels):
+          s.kernel_lower_bound[k] <<= CtrlAddrType(0)
+        s.shadow_ctrl_count_lower_bound <<= CtrlAddrType(0)
+      elif s.swap_bank:
+        # A config of the running kernel at the swap goes with it into
+        # the shadow bank.
+        for k in range(num_kernels):
+          if s.active_kernel == KernelIdType(k):
+            s.kernel_lower_bound[k] <<= s.shadow_ctrl_count_lower_bound
+          elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND) & (s.cmd_kernel == KernelIdType(k)):
+            s.kernel_lower_bound[k] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
+        if s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND) & (s.cmd_kernel == s.active_kernel):
+          s.shadow_ctrl_count_lower_bound <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
+        else:
+          s.shadow_ctrl_count_lower_bound <<= s.ctrl_count_lower_bound
       elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND):
-        s.ctrl_count_lower_bound <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
+        for k in range(num_kernels):
+          if s.cmd_kernel == KernelIdType(k):
+            s.kernel_lower_bound[k] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
+      elif s.recv_pkt_from_controller_queue.send.val & ~s.shadow_stall & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND):
+        s.shadow_ctrl_count_lower_bound <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
 
     @update
     def update_upper_bound():
@@ -302,11 +879,34 @@ class CtrlMemDynamicRTL(Component):
     @update_ff
     def update_total_ctrl_steps():
       if s.reset:
-        s.total_ctrl_steps_val <<= TimeType(total_ctrl_steps)
+        for k in range(num_kernels):
+          s.kernel_total_ctrl_steps[k] <<= TimeType(total_ctrl_steps)
+        s.shadow_total_ctrl_steps_val <<= TimeType(total_ctrl_steps)
+      elif s.swap_bank:
+        # A config of the running kernel at the swap goes with it into
+        # the shadow bank.
+        for k in range(num_kernels):
+          if s.active_kernel == KernelIdType(k):
+            s.kernel_total_ctrl_steps[k] <<= s.shadow_total_ctrl_steps_val
+          elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) & (s.cmd_kernel == KernelIdType(k)):
+            s.kernel_total_ctrl_steps[k] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, TimeType)
+        if s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) & (s.cmd_kernel == s.active_kernel):
+          s.shadow_total_ctrl_steps_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, TimeType)
+        else:
+          s.shadow_total_ctrl_steps_val <<= s.total_ctrl_steps_val
       elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT):
-        s.total_ctrl_steps_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, TimeType)
+        for k in range(num_kernels):
+          if s.cmd_kernel == KernelIdType(k):
+            s.kernel_total_ctrl_steps[k] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, TimeType)
+      elif s.recv_pkt_from_controller_queue.send.val & ~s.shadow_stall & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT):
+        s.shadow_total_ctrl_steps_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, TimeType)
 
   def line_trace(s):
-    config_mem_str  = "|".join([str(data) for data in s.reg_file.regs])
+    if trace_is_off():
+      return ""
+    if trace_is_summary():
+      return f"@{s.reg_file.raddr[0]} x{s.times} ctrl: {s.send_ctrl.msg.operation} ({int(s.send_ctrl.val)}/{int(s.send_ctrl.rdy)})"
+    regs = s.reg_file.entries.regs if s.num_ctrl_patterns > 0 else s.reg_file.regs
+    config_mem_str  = "|".join([str(data) for data in regs])
     return f'reg_file.raddr[0]: {s.reg_file.raddr[0]} || sent_complete: {s.sent_complete} || times: {s.times} || total_ctrl_steps_val: {s.total_ctrl_steps_val} || start_iterate_ctrl: {s.start_iterate_ctrl}|| recv_pkt: {s.recv_pkt_from_controller.msg}.recv_rdy:{s.recv_pkt_from_controller.rdy} || control signal content: [{config_mem_str}] || ctrl_out: {s.send_ctrl.msg}, send_ctrl.val: {s.send_ctrl.val}, send_ctrl.rdy: {s.send_ctrl.rdy}, send_pkt.msg.payload.cmd: {s.send_pkt_to_controller.msg.payload.cmd}, send_pkt.val: {s.send_pkt_to_controller.val}, ctrl_count_per_iter_val: {s.ctrl_count_per_iter_val}, ctrl_count_lower_bound: {s.ctrl_count_lower_bound}'
 
@@ -0,0 +1,136 @@
+"""
+==========================================================================
+CtrlPatternRegFileRTL.py
+==========================================================================
+Dictionary-encoded storage of the ctrl signals, with the same ports as
+the RegisterFile(CtrlType, ctrl_mem_size, 1, 1) of CtrlMemDynamicRTL.
+
+The routing patterns (i.e., fu_in, routing_xbar_outport and
+fu_xbar_outport, the widest and most repeated fields of a ctrl signal)
+are kept once in a table of num_patterns entries, and each of the
+ctrl_mem_size entries only keeps the other fields (i.e., operation,
+register fields, etc.) along with the index of its pattern. A write
+looks up the pattern in the table, and appends it on a miss. The table
+is emptied by clear (i.e., CMD_CLEAR_CTRL_PATTERNS), and a write missing
+a full table is rejected, i.e., the entry keeps its previous ctrl
+signal, reject is raised along with the write, and overflow is set till
+the next clear.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from pymtl3.stdlib.primitive import RegisterFile
+
+# Returns the (lo, hi) bits of the routing pattern within the ctrl
+# signal, i.e., the fields of the pattern need to be adjacent.
+def ctrl_pattern_slice(CtrlType):
+  ctrl = CtrlType()
+  for name in ['fu_in', 'routing_xbar_outport', 'fu_xbar_outport']:
+    field = getattr(ctrl, name)
+    for i in range(len(field)):
+      field[i] = type(field[i])(-1)
+  value = int(ctrl.to_bits())
+  lo = (value & -value).bit_length() - 1
+  hi = value.bit_length()
+  assert(value == ((1 << hi) - (1 << lo)))
+  assert(0 < lo and hi < CtrlType.nbits)
+  return lo, hi
+
+class CtrlPatternRegFileRTL(Component):
+
+  def construct(s, CtrlType, ctrl_mem_size, num_patterns):
+
+    # Constants.
+    AddrType = mk_bits(clog2(ctrl_mem_size))
+    lo, hi = ctrl_pattern_slice(CtrlType)
+    CtrlBitsType = mk_bits(CtrlType.nbits)
+    PatternType = mk_bits(hi - lo)
+    PatternIdxType = mk_bits(max(clog2(num_patterns), 1))
+    PatternCountType = mk_bits(clog2(num_patterns + 1))
+    EntryType = mk_bits(CtrlType.nbits - (hi - lo) + PatternIdxType.nbits)
+    idx_hi = lo + PatternIdxType.nbits
+
+    # Interfaces.
+    s.raddr = [InPort(AddrType)]
+    s.rdata = [OutPort(CtrlType)]
+    s.waddr = [InPort(AddrType)]
+    s.wdata = [InPort(CtrlType)]
+    s.wen = [InPort(b1)]
+    s.clear = InPort(b1)
+    s.reject = OutPort(b1)
+    s.overflow = OutPort(b1)
+
+    # Components.
+    s.entries = RegisterFile(EntryType, ctrl_mem_size, 1, 1)
+    s.patterns = [Wire(PatternType) for _ in range(num_patterns)]
+    s.num_used = Wire(PatternCountType)
+
+    s.wbits = Wire(CtrlBitsType)
+    s.wpattern = Wire(PatternType)
+    s.hit = Wire(b1)
+    s.hit_idx = Wire(PatternIdxType)
+    s.widx = Wire(PatternIdxType)
+    s.full = Wire(b1)
+    s.rentry = Wire(EntryType)
+    s.ridx = Wire(PatternIdxType)
+    s.rpattern = Wire(PatternType)
+    s.rbits = Wire(CtrlBitsType)
+
+    s.full //= lambda: s.num_used == PatternCountType(num_patterns)
+    s.reject //= lambda: s.wen[0] & ~s.hit & s.full
+
+    # Looks up the pattern being written.
+    @update
+    def lookup_pattern():
+      s.wbits @= s.wdata[0]
+      s.wpattern @= s.wbits[lo:hi]
+      s.hit @= 0
+      s.hit_idx @= 0
+      if s.wen[0]:
+        for i in range(num_patterns):
+          if (PatternCountType(i) < s.num_used) & (s.patterns[i] == s.wpattern):
+            s.hit @= 1
+            s.hit_idx @= PatternIdxType(i)
+      s.widx @= s.hit_idx
+      if ~s.hit:
+        s.widx @= trunc(s.num_used, PatternIdxType)
+
+    @update
+    def update_entries():
+      s.entries.raddr[0] @= s.raddr[0]
+      s.entries.waddr[0] @= s.waddr[0]
+      s.entries.wen[0] @= s.wen[0] & ~s.reject
+      s.entries.wdata[0] @= concat(s.wbits[hi:CtrlType.nbits], s.widx,
+                                   s.wbits[0:lo])
+
+    @update_ff
+    def update_patterns():
+      if s.reset | s.clear:
+        s.num_used <<= 0
+        s.overflow <<= 0
+      elif s.wen[0] & ~s.hit:
+        if s.full:
+          s.overflow <<= 1
+        else:
+          for i in range(num_patterns):
+            if s.num_used == PatternCountType(i):
+              s.patterns[i] <<= s.wpattern
+          s.num_used <<= s.num_used + PatternCountType(1)
+
+    # Restores the ctrl signal with its pattern.
+    @update
+    def read_entry():
+      s.rentry @= s.entries.rdata[0]
+      s.ridx @= s.rentry[lo:idx_hi]
+      s.rpattern @= 0
+      for i in range(num_patterns):
+        if s.ridx == PatternIdxType(i):
+          s.rpattern @= s.patterns[i]
+      s.rbits @= concat(s.rentry[idx_hi:EntryType.nbits], s.rpattern,
+                        s.rentry[0:lo])
+      s.rdata[0] @= s.rbits
+
+  def line_trace(s):
+    return f"patterns:{int(s.num_used)}{'!' if s.overflow else ''}"
@@ -7,6 +7,9 @@ Test cases for control memory with command-based action handling.
 Author : Cheng Tan
   Date : Dec 21, 2024
 """
+import pytest
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
+
 from ..CtrlMemDynamicRTL import CtrlMemDynamicRTL
 from ....fu.single.AdderRTL import AdderRTL
 from ....fu.single.RetRTL import RetRTL
@@ -15,6 +18,9 @@ from ....lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ....lib.cmd_type import *
 from ....lib.messages import *
 from ....lib.opt_type import *
+from ....lib.util.ctrl_delta_helper import CtrlDeltaFormat
+from ....lib.util.resident_kernel_helper import ResidentKernelManager
+from ....lib.util.line_trace_helper import print_line_trace
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -26,7 +32,8 @@ class TestHarness(Component):
                 num_tile_inports, num_tile_outports, src0_msgs,
                 src1_msgs, ctrl_pkts, sink_msgs, num_tiles,
                 complete_signal_sink_out, ctrl_count_per_iter,
-                total_ctrl_steps_val, FuType):
+                total_ctrl_steps_val, FuType, has_shadow_bank = False,
+                num_kernels = 1, num_ctrl_patterns = 0):
 
     CgraPayloadType = CtrlPktType.get_field_type(kAttrPayload)
     CtrlSignalType = CgraPayloadType.get_field_type(kAttrCtrl)
@@ -42,7 +49,10 @@ class TestHarness(Component):
     s.ctrl_mem = MemUnit(CtrlPktType,
                          ctrl_mem_size, num_fu_inports, num_fu_outports,
                          num_tile_inports, num_tile_outports, 1, num_tiles,
-                         ctrl_count_per_iter, total_ctrl_steps_val)
+                         ctrl_count_per_iter, total_ctrl_steps_val,
+                         has_shadow_bank = has_shadow_bank,
+                         num_kernels = num_kernels,
+                         num_ctrl_patterns = num_ctrl_patterns)
 
     # Connections.
     s.fu.send_to_ctrl_mem //= s.ctrl_mem.recv_from_element
@@ -67,12 +77,11 @@ def run_sim(test_harness, max_cycles = 20):
 
   # Runs simulation.
   ncycles = 0
-  print()
-  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  print_line_trace(ncycles, test_harness)
   while not test_harness.done() and ncycles < max_cycles:
     test_harness.sim_tick()
     ncycles += 1
-    print( "{}:{}".format(ncycles, test_harness.line_trace()))
+    print_line_trace(ncycles, test_harness)
 
   # Checks timeout.
   assert ncycles < max_cycles
@@ -333,3 +342,801 @@ def test_return():
                    total_ctrl_steps_val,
                    RetRTL)
   run_sim(th)
+
+def test_shadow_bank():
+  MemUnit = CtrlMemDynamicRTL
+  data_nbits = 16
+  DataType = mk_data(data_nbits, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+
+  data_mem_size_global = 16
+  addr_nbits = clog2(data_mem_size_global)
+  DataAddrType = mk_bits(addr_nbits)
+  num_registers_per_reg_bank = 16
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+
+  # Each kernel executes its 2 ctrl signals once.
+  ctrl_count_per_iter = 2
+  total_ctrl_steps_val = 2
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1)]
+                                 # src dst src/dst x/y       opq vc ctrl_action ctrl_addr ctrl_operation ctrl_predicate ctrl_fu_in...
+  src_ctrl_pkt = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0)),
+                  # The next kernel is loaded into the shadow bank while the first one is running.
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_SHADOW, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_SHADOW, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_SHADOW_COUNT_PER_ITER, data = DataType(ctrl_count_per_iter, 1))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT, data = DataType(total_ctrl_steps_val, 1))),
+                  # Swaps the banks and launches the second kernel once the first one completes.
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_SWAP_CTRL_BANK))]
+
+  # The outputs are 1+6, 5-1 by the first kernel, then 7-2, 6+3 by the second one.
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(5, 1), DataType(9, 1)]
+  complete_signal_sink_out = [
+      IntraCgraPktType(0,  num_tiles,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_COMPLETE)),
+      IntraCgraPktType(0,  num_tiles,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   src_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   ctrl_count_per_iter,
+                   total_ctrl_steps_val,
+                   AdderRTL,
+                   has_shadow_bank = True)
+  run_sim(th)
+
+def test_resident_kernels():
+  MemUnit = CtrlMemDynamicRTL
+  data_nbits = 16
+  DataType = mk_data(data_nbits, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+  num_kernels = 2
+
+  data_mem_size_global = 16
+  addr_nbits = clog2(data_mem_size_global)
+  DataAddrType = mk_bits(addr_nbits)
+  num_registers_per_reg_bank = 16
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+
+  ctrl_count_per_iter = 4
+  total_ctrl_steps_val = 4
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1), DataType(8, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1), DataType(4, 1)]
+  # Both kernels start from ctrl_addr 0, and execute their ctrl signals once.
+  add_sub_pkts = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_COUNT_PER_ITER, data = DataType(2, 1))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(2, 1))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH))]
+  sub_pkts = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 0)),
+              IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_COUNT_PER_ITER, data = DataType(1, 1))),
+              IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(1, 1))),
+              IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH))]
+
+  manager = ResidentKernelManager(IntraCgraPktType, ctrl_mem_size,
+                                  num_kernels, ctrl_count_per_iter,
+                                  total_ctrl_steps_val)
+  src_ctrl_pkt = manager.launch('add_sub', add_sub_pkts)
+  # The second kernel is placed right after the first one, and its launch
+  # waits for the completion of the first one.
+  src_ctrl_pkt += manager.launch('sub', sub_pkts)
+  # The first kernel is still resident, so only the launch is sent.
+  relaunch_pkts = manager.launch('add_sub', add_sub_pkts)
+  assert len(relaunch_pkts) == 1
+  assert manager.resident_kernels() == ['sub', 'add_sub']
+  src_ctrl_pkt += relaunch_pkts
+
+  # The outputs are 1+6, 5-1, then 7-2, then 6+3, 8-4.
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(5, 1), DataType(9, 1), DataType(4, 1)]
+  complete_signal_sink_out = [
+      IntraCgraPktType(0,  num_tiles,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_COMPLETE))
+      for _ in range(3)]
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   src_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   ctrl_count_per_iter,
+                   total_ctrl_steps_val,
+                   AdderRTL,
+                   num_kernels = num_kernels)
+  run_sim(th, max_cycles = 40)
+
+def test_relaunch_running_kernel():
+  MemUnit = CtrlMemDynamicRTL
+  data_nbits = 16
+  DataType = mk_data(data_nbits, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+
+  data_mem_size_global = 16
+  addr_nbits = clog2(data_mem_size_global)
+  DataAddrType = mk_bits(addr_nbits)
+  num_registers_per_reg_bank = 16
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+
+  # The kernel runs forever, i.e., never completes.
+  ctrl_count_per_iter = 2
+  total_ctrl_steps_val = 0
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1)]
+  # The second launch (without a terminate in between) is accepted right
+  # away instead of waiting for a completion that never comes, and the
+  # running kernel carries on.
+  src_ctrl_pkt = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH))]
+
+  # The outputs are 1+6, 5-1, 7+2, 6-3.
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(9, 1), DataType(3, 1)]
+  complete_signal_sink_out = []
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   src_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   ctrl_count_per_iter,
+                   total_ctrl_steps_val,
+                   AdderRTL)
+  run_sim(th)
+  # Both launches are consumed.
+  assert not th.ctrl_mem.recv_pkt_from_controller_queue.send.val
+
+def test_config_delta():
+  MemUnit = CtrlMemDynamicRTL
+  DataType = mk_data(16, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+  data_mem_size_global = 16
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CtrlType = mk_ctrl(num_fu_inports, num_fu_outports, num_tile_inports,
+                     num_tile_outports, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                    CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1)]
+
+  # Same program as test_ctrl, with the ctrl signals carried by two
+  # CMD_CONFIG_DELTA: the sparse ADD followed by the SUB, SUB (i.e.,
+  # nothing changes), and the ADD.
+  ctrls = {0: CtrlType(OPT_ADD, pick_register),
+           1: CtrlType(OPT_SUB, pick_register),
+           2: CtrlType(OPT_SUB, pick_register),
+           3: CtrlType(OPT_ADD, pick_register)}
+  delta = CtrlDeltaFormat(CtrlType)
+  encoded = delta.encode(ctrls)
+  assert [(cmd, addr, count) for cmd, addr, count, _ in encoded] == \
+         [(CMD_CONFIG_DELTA, 0, 3), (CMD_CONFIG_DELTA, 3, 1)]
+  for _, addr, count, ctrl in encoded:
+    assert delta.decode(ctrl, count) == [ctrls[addr + i] for i in range(count)]
+
+  src_ctrl_pkt = [IntraCgraPktType(0, 1, payload = CgraPayloadType(
+                      cmd, data = DataType(count, 1), ctrl = ctrl,
+                      ctrl_addr = addr))
+                  for cmd, addr, count, ctrl in encoded] + \
+                 [IntraCgraPktType(0, 1, payload = CgraPayloadType(CMD_LAUNCH))]
+
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(5, 1), DataType(9, 1)]
+  complete_signal_sink_out = [
+      IntraCgraPktType(0, num_tiles, payload = CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   src_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   len(ctrls),
+                   len(ctrls),
+                   AdderRTL)
+  # Expands one entry per cycle.
+  run_sim(th, max_cycles = 40)
+
+def test_ctrl_patterns():
+  MemUnit = CtrlMemDynamicRTL
+  DataType = mk_data(16, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+  data_mem_size_global = 16
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CtrlType = mk_ctrl(num_fu_inports, num_fu_outports, num_tile_inports,
+                     num_tile_outports, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                    CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  TileInType = mk_bits(clog2(num_tile_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1)]
+
+  # Same program as test_ctrl, with the ctrl signals taking two routing
+  # patterns (i.e., the routing of the harness is left unconnected).
+  routing = [[TileInType(1)] + [TileInType(0)] * (num_tile_outports + num_fu_inports - 1),
+             [TileInType(0)] * (num_tile_outports + num_fu_inports)]
+  ctrls = [CtrlType(OPT_ADD, pick_register, routing[0]),
+           CtrlType(OPT_SUB, pick_register, routing[1]),
+           CtrlType(OPT_SUB, pick_register, routing[0]),
+           CtrlType(OPT_ADD, pick_register, routing[1])]
+  src_ctrl_pkt = [IntraCgraPktType(0, 1, payload = CgraPayloadType(CMD_CLEAR_CTRL_PATTERNS))] + \
+                 [IntraCgraPktType(0, 1, payload = CgraPayloadType(
+                      CMD_CONFIG, ctrl = ctrl, ctrl_addr = addr))
+                  for addr, ctrl in enumerate(ctrls)] + \
+                 [IntraCgraPktType(0, 1, payload = CgraPayloadType(CMD_LAUNCH))]
+
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(5, 1), DataType(9, 1)]
+  complete_signal_sink_out = [
+      IntraCgraPktType(0, num_tiles, payload = CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   src_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   len(ctrls),
+                   len(ctrls),
+                   AdderRTL,
+                   num_ctrl_patterns = 2)
+  run_sim(th)
+  assert th.ctrl_mem.reg_file.num_used == 2
+  assert th.ctrl_mem.reg_file.overflow == 0
+
+def test_ctrl_pattern_overflow():
+  DataType = mk_data(16, 1)
+  ctrl_mem_size = 4
+  num_tiles = 4
+  CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, mk_bits(clog2(16)), CtrlType,
+                                    mk_bits(clog2(ctrl_mem_size)))
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+  TileInType = mk_bits(clog2(4 + 1))
+
+  # Each bank keeps a single routing pattern.
+  dut = CtrlMemDynamicRTL(IntraCgraPktType, ctrl_mem_size, 2, 2, 4, 4, 1,
+                          num_tiles, 2, 0, has_shadow_bank = True,
+                          num_ctrl_patterns = 1)
+  dut.elaborate()
+  dut.apply(DefaultPassGroup())
+  dut.sim_reset()
+  dut.send_ctrl.rdy @= 0
+  dut.send_pkt_to_controller.rdy @= 0
+
+  def send(cmd, **kwargs):
+    dut.recv_pkt_from_controller.val @= 1
+    dut.recv_pkt_from_controller.msg @= \
+        IntraCgraPktType(0, 1, payload = CgraPayloadType(cmd, **kwargs))
+    dut.sim_tick()
+    dut.recv_pkt_from_controller.val @= 0
+    dut.sim_tick()
+    dut.sim_eval_combinational()
+
+  routing = [[TileInType(i)] + [TileInType(0)] * 5 for i in range(2)]
+  send(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, routing_xbar_outport = routing[0]),
+       ctrl_addr = 0)
+  send(CMD_CONFIG_SHADOW, ctrl = CtrlType(OPT_SUB, routing_xbar_outport = routing[1]),
+       ctrl_addr = 0)
+  assert not dut.send_pkt_to_controller.val
+
+  # The second pattern of the active bank is rejected and reported.
+  send(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, routing_xbar_outport = routing[1]),
+       ctrl_addr = 1)
+  assert dut.reg_file.overflow == 1
+  assert dut.send_pkt_to_controller.val
+  assert dut.send_pkt_to_controller.msg.payload.cmd == CMD_CTRL_PATTERN_OVERFLOW
+  assert dut.send_pkt_to_controller.msg.payload.ctrl_addr == 1
+  dut.send_pkt_to_controller.rdy @= 1
+  dut.sim_tick()
+  dut.sim_eval_combinational()
+  assert not dut.send_pkt_to_controller.val
+
+  # The clears only empty the table of their bank.
+  send(CMD_CLEAR_SHADOW_CTRL_PATTERNS)
+  assert dut.reg_file_bank1.num_used == 0
+  assert dut.reg_file.num_used == 1
+  send(CMD_CLEAR_CTRL_PATTERNS)
+  assert dut.reg_file.num_used == 0
+  assert dut.reg_file.overflow == 0
+
+  def mk_pkts(routing_idxs):
+    return [IntraCgraPktType(0, 1, payload = CgraPayloadType(
+                CMD_CONFIG, ctrl = CtrlType(OPT_NAH, routing_xbar_outport = routing[i]),
+                ctrl_addr = addr))
+            for addr, i in enumerate(routing_idxs)] + \
+           [IntraCgraPktType(0, 1, payload = CgraPayloadType(CMD_LAUNCH))]
+
+  # The manager only clears the table of a tile along with the eviction of
+  # the kernels whose patterns it keeps.
+  manager = ResidentKernelManager(IntraCgraPktType, ctrl_mem_size, 2, 1, 0,
+                                  num_ctrl_patterns = 1)
+  with pytest.raises(ValueError):
+    manager.launch('ab', mk_pkts([0, 1]))
+  a_pkts = manager.launch('a', mk_pkts([0]))
+  assert CMD_CLEAR_CTRL_PATTERNS not in [int(pkt.payload.cmd) for pkt in a_pkts]
+  for pkt in a_pkts:
+    send(pkt.payload.cmd, ctrl = pkt.payload.ctrl, ctrl_addr = pkt.payload.ctrl_addr,
+         data = pkt.payload.data, data_addr = pkt.payload.data_addr)
+  send(CMD_TERMINATE)
+  b_pkts = manager.launch('b', mk_pkts([1]))
+  assert int(b_pkts[0].payload.cmd) == CMD_CLEAR_CTRL_PATTERNS
+  assert manager.resident_kernels() == ['b']
+  assert manager.num_pattern_clears == 1
+  for pkt in b_pkts:
+    send(pkt.payload.cmd, ctrl = pkt.payload.ctrl, ctrl_addr = pkt.payload.ctrl_addr,
+         data = pkt.payload.data, data_addr = pkt.payload.data_addr)
+  assert dut.reg_file.num_used == 1
+  assert dut.reg_file.overflow == 0
+
+  # A kernel sharing the pattern stays resident along with b.
+  assert CMD_CLEAR_CTRL_PATTERNS not in \
+         [int(pkt.payload.cmd) for pkt in manager.launch('c', mk_pkts([1, 1]))]
+  assert manager.resident_kernels() == ['b', 'c']
+
+def test_prologue_counts():
+  DataType = mk_data(16, 1)
+  ctrl_mem_size = 4
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+  DataAddrType = mk_bits(clog2(16))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CtrlType = mk_ctrl(num_fu_inports, num_fu_outports, num_tile_inports,
+                     num_tile_outports, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                    CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+  TileInType = mk_bits(clog2(num_tile_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  num_routing_outports = num_tile_outports + num_fu_inports
+
+  dut = CtrlMemDynamicRTL(IntraCgraPktType, ctrl_mem_size, num_fu_inports,
+                          num_fu_outports, num_tile_inports,
+                          num_tile_outports, 1, num_tiles, 2, 0)
+  dut.elaborate()
+  dut.apply(DefaultPassGroup())
+  dut.sim_reset()
+  dut.send_ctrl.rdy @= 0
+  dut.send_pkt_to_controller.rdy @= 1
+
+  def send(cmd, **kwargs):
+    dut.recv_pkt_from_controller.val @= 1
+    dut.recv_pkt_from_controller.msg @= \
+        IntraCgraPktType(0, 1, payload = CgraPayloadType(cmd, **kwargs))
+    dut.sim_tick()
+    dut.recv_pkt_from_controller.val @= 0
+    dut.sim_tick()
+
+  def counts():
+    dut.sim_eval_combinational()
+    return (int(dut.prologue_count_outport_fu),
+            [int(x) for x in dut.prologue_count_outport_routing_crossbar],
+            [int(x) for x in dut.prologue_count_outport_fu_crossbar])
+
+  def tick(routing_step = None, fu_step = None, fire = 0, clear = 0):
+    for i in range(num_tile_inports):
+      dut.prologue_step_inport_routing_crossbar[i] @= int(i == routing_step)
+    for i in range(num_fu_outports):
+      dut.prologue_step_inport_fu_crossbar[i] @= int(i == fu_step)
+    dut.send_ctrl.rdy @= fire
+    dut.clear_prologue_crossbar @= clear
+    dut.sim_tick()
+    dut.send_ctrl.rdy @= 0
+    dut.clear_prologue_crossbar @= 0
+    for port in dut.prologue_step_inport_routing_crossbar + \
+                dut.prologue_step_inport_fu_crossbar:
+      port @= 0
+
+  # Address 0 skips 2 FU steps and 1 step of the routing crossbar's
+  # inport 1, address 1 skips 3 steps of the FU crossbar's inport 0.
+  for addr in range(2):
+    send(CMD_CONFIG, ctrl = CtrlType(OPT_NAH), ctrl_addr = addr)
+  send(CMD_CONFIG_PROLOGUE_FU, data = DataType(2, 1), ctrl_addr = 0)
+  routing_xbar = [TileInType(1)] + [TileInType(0)] * (num_routing_outports - 1)
+  send(CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR, data = DataType(1, 1),
+       ctrl_addr = 0, ctrl = CtrlType(OPT_NAH, routing_xbar_outport = routing_xbar))
+  fu_xbar = [FuOutType(0)] * num_routing_outports
+  send(CMD_CONFIG_PROLOGUE_FU_CROSSBAR, data = DataType(3, 1),
+       ctrl_addr = 1, ctrl = CtrlType(OPT_NAH, fu_xbar_outport = fu_xbar))
+  send(CMD_LAUNCH)
+  assert counts() == (2, [0, 1, 0, 0], [0, 0])
+
+  # The routing crossbar steps while the ctrl signal stalls.
+  tick(routing_step = 1)
+  assert counts() == (2, [0, 0, 0, 0], [0, 0])
+  # The FU steps once the ctrl signal is done.
+  tick(fire = 1)
+  assert counts() == (0, [0, 0, 0, 0], [3, 0])
+  tick(fu_step = 0, fire = 1)
+  assert counts() == (1, [0, 0, 0, 0], [0, 0])
+  tick(fire = 1)
+  assert counts() == (0, [0, 0, 0, 0], [2, 0])
+
+  # Clearing restores the counts of the crossbars only.
+  tick(clear = 1)
+  assert counts() == (0, [0, 0, 0, 0], [3, 0])
+  tick(fire = 1)
+  assert counts() == (0, [0, 1, 0, 0], [0, 0])
+
+  # Relaunching restores all the counts.
+  send(CMD_TERMINATE)
+  send(CMD_LAUNCH)
+  assert counts() == (2, [0, 1, 0, 0], [0, 0])
+
+def test_evicted_prologue_counts():
+  DataType = mk_data(16, 1)
+  ctrl_mem_size = 4
+  num_tiles = 4
+  CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, mk_bits(clog2(16)), CtrlType,
+                                    mk_bits(clog2(ctrl_mem_size)))
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+  dut = CtrlMemDynamicRTL(IntraCgraPktType, ctrl_mem_size, 2, 2, 4, 4, 1,
+                          num_tiles, 2, 0)
+  dut.elaborate()
+  dut.apply(DefaultPassGroup())
+  dut.sim_reset()
+  dut.send_ctrl.rdy @= 0
+  dut.send_pkt_to_controller.rdy @= 1
+
+  def send(pkts):
+    for pkt in pkts:
+      dut.recv_pkt_from_controller.val @= 1
+      dut.recv_pkt_from_controller.msg @= pkt
+      dut.sim_tick()
+    dut.recv_pkt_from_controller.val @= 0
+    dut.sim_tick()
+    dut.sim_eval_combinational()
+
+  def mk_pkts(cmds):
+    return [IntraCgraPktType(0, 1, payload = CgraPayloadType(cmd, **kwargs))
+            for cmd, kwargs in cmds]
+
+  # Kernel a skips 2 FU steps at its first address, kernel b does not
+  # configure any prologue count, and takes the same range once a is
+  # evicted.
+  a_pkts = mk_pkts([(CMD_CONFIG, dict(ctrl = CtrlType(OPT_NAH), ctrl_addr = 0)),
+                    (CMD_CONFIG_PROLOGUE_FU, dict(data = DataType(2, 1), ctrl_addr = 0)),
+                    (CMD_LAUNCH, {})])
+  b_pkts = mk_pkts([(CMD_CONFIG, dict(ctrl = CtrlType(OPT_NAH), ctrl_addr = 0)),
+                    (CMD_LAUNCH, {})])
+  manager = ResidentKernelManager(IntraCgraPktType, ctrl_mem_size, 1, 2, 0)
+  send(manager.launch('a', a_pkts))
+  assert int(dut.prologue_count_outport_fu) == 2
+
+  send(mk_pkts([(CMD_TERMINATE, {})]))
+  b_config_pkts = manager.launch('b', b_pkts)
+  assert manager.num_evictions == 1
+  assert [int(pkt.payload.cmd) for pkt in b_config_pkts].count(
+             CMD_CONFIG_PROLOGUE_FU) == 1
+  send(b_config_pkts)
+  assert int(dut.prologue_count_outport_fu) == 0
+
+  # Nothing is left to zero once a is loaded again.
+  send(mk_pkts([(CMD_TERMINATE, {})]))
+  send(manager.launch('a', a_pkts))
+  assert int(dut.prologue_count_outport_fu) == 2
+  assert [int(pkt.payload.cmd) for pkt in manager.launch('b', b_pkts)].count(
+             CMD_CONFIG_PROLOGUE_FU) == 1
+
+def test_terminate_pending_launch():
+  DataType = mk_data(16, 1)
+  ctrl_mem_size = 4
+  num_tiles = 4
+  CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, mk_bits(clog2(16)), CtrlType,
+                                    mk_bits(clog2(ctrl_mem_size)))
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+  # Two resident kernels running forever (i.e., total ctrl count 0).
+  dut = CtrlMemDynamicRTL(IntraCgraPktType, ctrl_mem_size, 2, 2, 4, 4, 1,
+                          num_tiles, 1, 0, num_kernels = 2)
+  dut.elaborate()
+  dut.apply(DefaultPassGroup())
+  dut.sim_reset()
+  dut.send_ctrl.rdy @= 1
+  dut.send_pkt_to_controller.rdy @= 1
+
+  def send(cmd, **kwargs):
+    dut.recv_pkt_from_controller.val @= 1
+    dut.recv_pkt_from_controller.msg @= \
+        IntraCgraPktType(0, 1, payload = CgraPayloadType(cmd, **kwargs))
+    dut.sim_tick()
+    dut.recv_pkt_from_controller.val @= 0
+    dut.sim_tick()
+
+  send(CMD_CONFIG, ctrl = CtrlType(OPT_NAH), ctrl_addr = 0)
+  send(CMD_CONFIG, ctrl = CtrlType(OPT_NAH), ctrl_addr = 1)
+  send(CMD_CONFIG_CTRL_LOWER_BOUND, data = DataType(1, 1), data_addr = 1)
+  send(CMD_LAUNCH, data_addr = 0)
+  assert dut.start_iterate_ctrl == 1
+  assert dut.active_kernel == 0
+
+  # The launch of kernel 1 is dequeued and kept pending, so that the
+  # terminate behind it still stops the running kernel (and drops the
+  # pending launch).
+  send(CMD_LAUNCH, data_addr = 1)
+  assert dut.launch_pending == 1
+  assert dut.active_kernel == 0
+  send(CMD_TERMINATE)
+  assert dut.start_iterate_ctrl == 0
+  assert dut.launch_pending == 0
+  assert not dut.recv_pkt_from_controller_queue.send.val
+
+  # A pending launch starts once the running kernel completes.
+  send(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(2, 1), data_addr = 0)
+  dut.send_ctrl.rdy @= 0
+  send(CMD_LAUNCH, data_addr = 0)
+  send(CMD_LAUNCH, data_addr = 1)
+  assert dut.launch_pending == 1
+  dut.send_ctrl.rdy @= 1
+  for _ in range(4):
+    dut.sim_tick()
+  assert dut.launch_pending == 0
+  assert dut.active_kernel == 1
+  assert dut.start_iterate_ctrl == 1
+  assert dut.reg_file.raddr[0] == 1
+
+def test_swap_pending():
+  DataType = mk_data(16, 1)
+  ctrl_mem_size = 4
+  num_tiles = 4
+  CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, mk_bits(clog2(16)), CtrlType,
+                                    mk_bits(clog2(ctrl_mem_size)))
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+  # The active bank runs forever (i.e., total ctrl count 0).
+  dut = CtrlMemDynamicRTL(IntraCgraPktType, ctrl_mem_size, 2, 2, 4, 4, 1,
+                          num_tiles, 2, 0, has_shadow_bank = True)
+  dut.elaborate()
+  dut.apply(DefaultPassGroup())
+  dut.sim_reset()
+  dut.send_ctrl.rdy @= 0
+  dut.send_pkt_to_controller.rdy @= 1
+
+  def send(cmd, **kwargs):
+    dut.recv_pkt_from_controller.val @= 1
+    dut.recv_pkt_from_controller.msg @= \
+        IntraCgraPktType(0, 1, payload = CgraPayloadType(cmd, **kwargs))
+    dut.sim_tick()
+    dut.recv_pkt_from_controller.val @= 0
+    dut.sim_tick()
+    dut.sim_eval_combinational()
+
+  for addr in range(2):
+    send(CMD_CONFIG, ctrl = CtrlType(OPT_NAH), ctrl_addr = addr)
+  send(CMD_CONFIG_PROLOGUE_FU, data = DataType(2, 1), ctrl_addr = 0)
+  send(CMD_LAUNCH)
+  assert dut.prologue_count_outport_fu == 2
+
+  # The shadow kernel starts from its own lower bound, with its own
+  # prologue counts, which leave the running ones alone.
+  for addr in range(3):
+    send(CMD_CONFIG_SHADOW, ctrl = CtrlType(OPT_NAH), ctrl_addr = addr)
+  send(CMD_CONFIG_SHADOW_PROLOGUE_FU, data = DataType(1, 1), ctrl_addr = 1)
+  send(CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND, data = DataType(1, 1))
+  send(CMD_CONFIG_SHADOW_COUNT_PER_ITER, data = DataType(2, 1))
+  send(CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT, data = DataType(2, 1))
+  assert dut.prologue_count_outport_fu == 2
+  assert dut.reg_file.raddr[0] == 0
+
+  # The swap is dequeued and kept pending, so that the terminate behind
+  # it still stops the running kernel (and drops the pending swap).
+  send(CMD_SWAP_CTRL_BANK)
+  assert dut.swap_pending == 1
+  assert not dut.recv_pkt_from_controller_queue.send.val
+  send(CMD_TERMINATE)
+  assert dut.swap_pending == 0
+  assert dut.start_iterate_ctrl == 0
+  assert dut.active_bank == 0
+
+  send(CMD_SWAP_CTRL_BANK)
+  assert dut.active_bank == 1
+  assert dut.start_iterate_ctrl == 1
+  assert dut.reg_file.raddr[0] == 1
+  assert dut.prologue_count_outport_fu == 1
+
+  # The shadow configs behind a pending swap wait for it.
+  send(CMD_SWAP_CTRL_BANK)
+  assert dut.swap_pending == 1
+  send(CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND, data = DataType(3, 1))
+  assert dut.recv_pkt_from_controller_queue.send.val
+  assert dut.shadow_ctrl_count_lower_bound == 0
+  dut.send_ctrl.rdy @= 1
+  for _ in range(6):
+    dut.sim_tick()
+  assert dut.swap_pending == 0
+  assert dut.active_bank == 0
+  assert not dut.recv_pkt_from_controller_queue.send.val
+  assert dut.shadow_ctrl_count_lower_bound == 3
+
+# The delta expander is always there, next to the shadow bank, the
+# resident kernels, and the ctrl patterns.
+@pytest.mark.parametrize('has_shadow_bank, num_kernels, num_ctrl_patterns',
+                         [(False, 1, 0), (True, 1, 0), (False, 2, 0),
+                          (False, 1, 2), (True, 1, 2)])
+def test_translate(has_shadow_bank, num_kernels, num_ctrl_patterns,
+                   tmp_path, monkeypatch):
+  DataType = mk_data(16, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+  DataAddrType = mk_bits(clog2(16))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CtrlType = mk_ctrl(num_fu_inports, num_fu_outports, num_tile_inports,
+                     num_tile_outports, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                    CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+  monkeypatch.chdir(tmp_path)
+  dut = CtrlMemDynamicRTL(IntraCgraPktType, ctrl_mem_size, num_fu_inports,
+                          num_fu_outports, num_tile_inports,
+                          num_tile_outports, 1, num_tiles, 4, 4,
+                          has_shadow_bank = has_shadow_bank,
+                          num_kernels = num_kernels,
+                          num_ctrl_patterns = num_ctrl_patterns)
+  module_name = f'CtrlMemDynamicRTL_{int(has_shadow_bank)}_{num_kernels}_' \
+                f'{num_ctrl_patterns}'
+  dut.set_metadata(VerilogTranslationPass.explicit_module_name, module_name)
+  dut.elaborate()
+  dut.set_metadata(VerilogTranslationPass.enable, True)
+  dut.apply(VerilogTranslationPass())
+  with open(dut.get_metadata(
+      VerilogTranslationPass.translated_filename)) as f:
+    verilog = f.read()
+  assert f'module {module_name}' in verilog
+  assert 'delta_next_ctrl' in verilog
+  if num_ctrl_patterns > 0:
+    assert 'module CtrlPatternRegFileRTL' in verilog
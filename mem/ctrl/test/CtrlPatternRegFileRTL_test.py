@@ -0,0 +1,106 @@
+"""
+==========================================================================
+CtrlPatternRegFileRTL_test.py
+==========================================================================
+Test cases for the dictionary-encoded storage of the ctrl signals.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
+from ..CtrlPatternRegFileRTL import CtrlPatternRegFileRTL
+from ....lib.messages import *
+from ....lib.opt_type import *
+
+num_fu_inports = 4
+num_tile_ports = 8
+CtrlType = mk_ctrl(num_fu_inports, 2, num_tile_ports, num_tile_ports, 16)
+TileInType = mk_bits(clog2(num_tile_ports + 1))
+FuOutType = mk_bits(clog2(2 + 1))
+FuInType = mk_bits(clog2(num_fu_inports + 1))
+num_routing_outports = num_tile_ports + num_fu_inports
+
+# Returns the ctrl signal routing the inport to the routing outport,
+# with the given read register.
+def mk_ctrl_signal(operation, outport, inport, read_reg_idx = 0):
+  fu_in = [FuInType(x + 1) for x in range(num_fu_inports)]
+  routing_xbar = [TileInType(0) for _ in range(num_routing_outports)]
+  routing_xbar[outport] = TileInType(inport)
+  fu_xbar = [FuOutType(0) for _ in range(num_routing_outports)]
+  read_reg_from = [b1(1)] + [b1(0)] * (num_fu_inports - 1)
+  ctrl = CtrlType(operation, fu_in, routing_xbar, fu_xbar,
+                  read_reg_from = read_reg_from)
+  ctrl.read_reg_idx[0] = type(ctrl.read_reg_idx[0])(read_reg_idx)
+  return ctrl
+
+def write(dut, addr, ctrl):
+  dut.wen[0] @= 1
+  dut.waddr[0] @= addr
+  dut.wdata[0] @= ctrl
+  dut.sim_tick()
+  dut.wen[0] @= 0
+
+def read(dut, addr):
+  dut.raddr[0] @= addr
+  dut.sim_eval_combinational()
+  return dut.rdata[0]
+
+def test_patterns():
+  ctrl_mem_size = 16
+  dut = CtrlPatternRegFileRTL(CtrlType, ctrl_mem_size, 2)
+  dut.elaborate()
+  dut.apply(DefaultPassGroup())
+  dut.sim_reset()
+  dut.clear @= 0
+
+  # Four ctrl signals sharing two routing patterns.
+  ctrls = [mk_ctrl_signal(OPT_ADD, 0, 1, 2),
+           mk_ctrl_signal(OPT_MUL, 9, 3, 5),
+           mk_ctrl_signal(OPT_SUB, 0, 1, 7),
+           mk_ctrl_signal(OPT_NAH, 9, 3)]
+  for addr, ctrl in enumerate(ctrls):
+    write(dut, addr, ctrl)
+  assert dut.num_used == 2
+  assert dut.overflow == 0
+  for addr, ctrl in enumerate(ctrls):
+    assert read(dut, addr) == ctrl
+
+  # A third pattern overflows the table, i.e., the write is rejected and
+  # the entry keeps its ctrl signal.
+  dut.wen[0] @= 1
+  dut.waddr[0] @= 0
+  dut.wdata[0] @= mk_ctrl_signal(OPT_ADD, 5, 2)
+  dut.sim_eval_combinational()
+  assert dut.reject == 1
+  dut.sim_tick()
+  dut.wen[0] @= 0
+  assert dut.num_used == 2
+  assert dut.overflow == 1
+  assert read(dut, 0) == ctrls[0]
+  # The known patterns are still written.
+  write(dut, 0, ctrls[3])
+  assert read(dut, 0) == ctrls[3]
+
+  # Starts over once the table is cleared.
+  dut.clear @= 1
+  dut.sim_tick()
+  dut.clear @= 0
+  assert dut.num_used == 0
+  assert dut.overflow == 0
+  write(dut, 0, mk_ctrl_signal(OPT_ADD, 5, 2))
+  assert dut.num_used == 1
+  assert read(dut, 0) == mk_ctrl_signal(OPT_ADD, 5, 2)
+
+def test_translate(tmp_path, monkeypatch):
+  monkeypatch.chdir(tmp_path)
+  dut = CtrlPatternRegFileRTL(CtrlType, 16, 2)
+  dut.set_metadata(VerilogTranslationPass.explicit_module_name,
+                   'CtrlPatternRegFileRTL')
+  dut.elaborate()
+  dut.set_metadata(VerilogTranslationPass.enable, True)
+  dut.apply(VerilogTranslationPass())
+  with open(dut.get_metadata(
+      VerilogTranslationPass.translated_filename)) as f:
+    assert 'module CtrlPatternRegFileRTL' in f.read()
@@ -16,6 +16,7 @@ from ....lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ....lib.messages import *
 from ....lib.cmd_type import *
 from ....lib.opt_type import *
+from ....lib.util.line_trace_helper import print_line_trace
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -68,12 +69,11 @@ def run_sim(test_harness, max_cycles = 40):
 
   # Runs simulation.
   ncycles = 0
-  print()
-  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  print_line_trace(ncycles, test_harness)
   while not test_harness.done() and ncycles < max_cycles:
     test_harness.sim_tick()
     ncycles += 1
-    print("{}:{}".format( ncycles, test_harness.line_trace()))
+    print_line_trace(ncycles, test_harness)
 
   # Checks timeout.
   assert ncycles < max_cycles
@@ -11,6 +11,10 @@ which can be used for multi-CGRA fabric.
    - E.g., dynamic rescheduling.
    - The cmd can be originally derived from a runtime scheduler.
 
+The local addresses are mapped onto the banks in blocks (by default), or
+interleaved across the banks (see bank_mapping in data_mem_helper.py) so
+that the unit-stride streams spread over the banks.
+
 In addition, it contains a crossbar to handle multi-bank conflicts.
  - Crossbar contains an arbitor, i.e., stall may happen on certain port.
    - Therefore, bypass queue is leveraged on the input port.
@@ -22,16 +26,35 @@ In addition, it contains a crossbar to handle multi-bank conflicts.
        - Remote accessed data.
    - Blocking and non-blocking might be configurabled in a dynamic way.
 
+It also contains a DMA engine for bulk preload/readback from the CPU:
+ - CMD_DMA_STORE_REQUEST carries the base address (data_addr) and the
+   length (data.payload), followed by `length` CMD_DMA_STORE_DATA packets
+   that are written to the consecutive addresses.
+ - CMD_DMA_LOAD_REQUEST carries the base address and the length, and is
+   responded with `length` CMD_LOAD_RESPONSE packets, one word per cycle,
+   streamed back to the requester (i.e., the CPU).
+ - The DMA range is expected to stay within the local address space.
+
+With has_stats, each crossbar is monitored by XbarStatsRTL (requests,
+grants, conflict cycles and max occupancy of each port). The counters
+can be read by CMD_READ_MEM_STATS, which carries the counter id (see
+mem_stats_layout in data_mem_helper.py) in data and is answered by a
+CMD_LOAD_RESPONSE, or dumped from the simulation via dump_stats().
+
 Author : Cheng Tan
   Date : Aug 28, 2025
 """
 
 from .DataMemWrapperRTL import DataMemWrapperRTL
+from .XbarStatsRTL import XbarStatsRTL
 from ...lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
 from ...lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
 from ...lib.messages import *
 from ...noc.PyOCN.pymtl3_net.xbar.XbarBypassQueueRTL import XbarBypassQueueRTL
+from ...lib.util.common import *
+from ...lib.util.data_mem_helper import *
 from ...lib.util.data_struct_attr import *
+from ...lib.util.line_trace_helper import *
 
 class DataMemControllerRTL(Component):
   def construct(s,
@@ -45,7 +68,9 @@ class DataMemControllerRTL(Component):
                 multi_cgra_columns = 2,
                 num_tiles = 16,
                 mem_access_is_combinational = True,
-                idTo2d_map = {0: [0, 0]}):
+                idTo2d_map = {0: [0, 0]},
+                bank_mapping = BANK_MAPPING_BLOCK,
+                has_stats = False):
 
     CgraPayloadType = NocPktType.get_field_type(kAttrPayload)
     DataType = CgraPayloadType.get_field_type(kAttrData)
@@ -69,8 +94,15 @@ class DataMemControllerRTL(Component):
     num_xbar_out_rd_ports = num_banks_per_cgra + 1
     num_xbar_out_wr_ports = num_banks_per_cgra + 1
     num_cgras = multi_cgra_rows * multi_cgra_columns
+    # One more bit so that the length can cover the entire memory.
+    DmaCountType = mk_bits(global_addr_nbits + 1)
     XbarOutRdType = mk_bits(clog2(num_xbar_out_rd_ports))
     XbarOutWrType = mk_bits(clog2(num_xbar_out_wr_ports))
+    bank_shift, bank_mask, xor_shift, xor_mask, _ = \
+        bank_mapping_params(bank_mapping, num_banks_per_cgra,
+                            data_mem_size_per_bank)
+    bank_mask = AddrType(bank_mask)
+    xor_mask = AddrType(xor_mask)
     MemReadPktType = \
         mk_mem_access_pkt(DataType,
                           num_xbar_in_rd_ports,
@@ -88,6 +120,11 @@ class DataMemControllerRTL(Component):
                           num_tiles,
                           num_rd_tiles)
 
+    StatsCountType = DataType.get_field_type(kAttrPayload)
+    s.stats_layout = mem_stats_layout(num_banks_per_cgra, num_rd_tiles,
+                                      num_wr_tiles)
+    StatsIdType = mk_bits(clog2(len(s.stats_layout)))
+
     # Reverses the source and destination for response packet.
     MemResponsePktType = \
         mk_mem_access_pkt(DataType,
@@ -122,7 +159,8 @@ class DataMemControllerRTL(Component):
 
     # Components.
     s.memory_wrapper = [DataMemWrapperRTL(DataType, MemReadPktType, MemWritePktType, MemResponsePktType,
-                                          data_mem_size_global, data_mem_size_per_bank, mem_access_is_combinational)
+                                          data_mem_size_global, data_mem_size_per_bank, mem_access_is_combinational,
+                                          num_banks_per_cgra, bank_mapping)
                   for _ in range(num_banks_per_cgra)]
     # The additional 1 on inports indicates the read/write from NoC.
     # The additional 1 on outports indicates the request out of bound of
@@ -142,6 +180,28 @@ class DataMemControllerRTL(Component):
     s.address_lower = InPort(AddrType)
     s.address_upper = InPort(AddrType)
 
+    # DMA engine states. The load engine occupies the NoC read port of the
+    # crossbar until `dma_rd_count` words are requested.
+    s.dma_rd_addr = Wire(AddrType)
+    s.dma_rd_count = Wire(DmaCountType)
+    s.dma_rd_src_cgra = Wire(MemReadPktType.get_field_type(kAttrSrcCgra))
+    s.dma_rd_src_tile = Wire(MemReadPktType.get_field_type(kAttrSrcTile))
+    s.dma_rd_remote_src_port = \
+        Wire(MemReadPktType.get_field_type(kAttrRemoteSrcPort))
+    s.dma_wr_addr = Wire(AddrType)
+    s.dma_wr_count = Wire(DmaCountType)
+    s.dma_rd_active = Wire(1)
+
+    # Target address and bank of each crossbar inport.
+    s.rd_addr = [Wire(AddrType) for _ in range(num_xbar_in_rd_ports)]
+    s.rd_bank = [Wire(XbarOutRdType) for _ in range(num_xbar_in_rd_ports)]
+    s.wr_addr = [Wire(AddrType) for _ in range(num_xbar_in_wr_ports)]
+    s.wr_bank = [Wire(XbarOutWrType) for _ in range(num_xbar_in_wr_ports)]
+
+    # Statistics counter requested by CMD_READ_MEM_STATS.
+    s.stats_id = Wire(StatsIdType)
+    s.stats_value = Wire(StatsCountType)
+
     # Constructs the idTo2d lut.
     s.idTo2d_x_lut= [Wire(XType) for _ in range(multi_cgra_columns * multi_cgra_rows)]
     s.idTo2d_y_lut= [Wire(YType) for _ in range(multi_cgra_columns * multi_cgra_rows)]
@@ -156,72 +216,141 @@ class DataMemControllerRTL(Component):
       s.write_crossbar.send[i] //= s.memory_wrapper[i].recv_wr
       s.memory_wrapper[i].send //= s.response_crossbar.recv[i]
 
+    s.stats_id //= lambda: trunc(s.recv_from_noc_load_request.msg.payload.data.payload, StatsIdType)
+
+    if has_stats:
+      s.has_stats = True
+      # Monitors the read, write and response crossbars, in the order of
+      # MEM_STATS_XBARS.
+      def mk_xbar_stats(x, crossbar, PktType):
+        return XbarStatsRTL(PktType, len(crossbar.recv), len(crossbar.send),
+                            StatsCountType, StatsIdType,
+                            s.stats_layout.index((MEM_STATS_XBARS[x], "in", 0,
+                                                  MEM_STATS_KINDS[0])))
+      s.read_xbar_stats = mk_xbar_stats(0, s.read_crossbar, MemReadPktType)
+      s.write_xbar_stats = mk_xbar_stats(1, s.write_crossbar, MemWritePktType)
+      s.response_xbar_stats = mk_xbar_stats(2, s.response_crossbar,
+                                            MemResponsePktType)
+      s.read_xbar_stats.read_idx //= s.stats_id
+      s.write_xbar_stats.read_idx //= s.stats_id
+      s.response_xbar_stats.read_idx //= s.stats_id
+
+      @update
+      def observe_xbars():
+        for i in range(num_xbar_in_rd_ports):
+          s.read_xbar_stats.in_val[i] @= s.read_crossbar.recv[i].val
+          s.read_xbar_stats.in_rdy[i] @= s.read_crossbar.recv[i].rdy
+          s.read_xbar_stats.in_dst[i] @= s.read_crossbar.recv[i].msg.dst
+          s.response_xbar_stats.out_val[i] @= s.response_crossbar.send[i].val
+          s.response_xbar_stats.out_rdy[i] @= s.response_crossbar.send[i].rdy
+          s.response_xbar_stats.out_src[i] @= s.response_crossbar.send[i].msg.src
+        for o in range(num_xbar_out_rd_ports):
+          s.read_xbar_stats.out_val[o] @= s.read_crossbar.send[o].val
+          s.read_xbar_stats.out_rdy[o] @= s.read_crossbar.send[o].rdy
+          s.read_xbar_stats.out_src[o] @= s.read_crossbar.send[o].msg.src
+          s.response_xbar_stats.in_val[o] @= s.response_crossbar.recv[o].val
+          s.response_xbar_stats.in_rdy[o] @= s.response_crossbar.recv[o].rdy
+          s.response_xbar_stats.in_dst[o] @= s.response_crossbar.recv[o].msg.dst
+        for i in range(num_xbar_in_wr_ports):
+          s.write_xbar_stats.in_val[i] @= s.write_crossbar.recv[i].val
+          s.write_xbar_stats.in_rdy[i] @= s.write_crossbar.recv[i].rdy
+          s.write_xbar_stats.in_dst[i] @= s.write_crossbar.recv[i].msg.dst
+        for o in range(num_xbar_out_wr_ports):
+          s.write_xbar_stats.out_val[o] @= s.write_crossbar.send[o].val
+          s.write_xbar_stats.out_rdy[o] @= s.write_crossbar.send[o].rdy
+          s.write_xbar_stats.out_src[o] @= s.write_crossbar.send[o].msg.src
+
+      # Each monitor only drives the bits of its own entries.
+      s.stats_value //= lambda: s.read_xbar_stats.read_data | \
+                                s.write_xbar_stats.read_data | \
+                                s.response_xbar_stats.read_data
+
+    else:
+      # The counters are compiled out, and read as 0.
+      s.has_stats = False
+      s.stats_value //= 0
+
     @update
-    def assemble_xbar_pkt():
-      for i in range(num_xbar_in_rd_ports):
-        s.rd_pkt[i] @= MemReadPktType(i, 0, 0, DataType(0, 0, 0, 0), 0, 0, i)
+    def update_xbar_addr():
+      for i in range(num_rd_tiles):
+        s.rd_addr[i] @= s.recv_raddr[i].msg
+      # The ongoing DMA load takes over the NoC read port.
+      s.dma_rd_active @= s.dma_rd_count != DmaCountType(0)
+      if s.dma_rd_active:
+        s.rd_addr[num_rd_tiles] @= s.dma_rd_addr
+      else:
+        s.rd_addr[num_rd_tiles] @= s.recv_from_noc_load_request.msg.payload.data_addr
+
+      for i in range(num_wr_tiles):
+        s.wr_addr[i] @= s.recv_waddr[i].msg
+      # The DMA store words carry no address, and go to the consecutive
+      # addresses following the base of the DMA store request.
+      if s.recv_from_noc_store_request.msg.payload.cmd == CMD_DMA_STORE_DATA:
+        s.wr_addr[num_wr_tiles] @= s.dma_wr_addr
+      else:
+        s.wr_addr[num_wr_tiles] @= s.recv_from_noc_store_request.msg.payload.data_addr
 
+    # Calculates the target bank index based on the bank_mapping (see
+    # data_mem_helper.py). The requests out of the local address space
+    # target the NoC, i.e., the additional outport.
+    @update
+    def map_bank():
+      for i in range(num_xbar_in_rd_ports):
+        s.rd_bank[i] @= XbarOutRdType(num_banks_per_cgra)
+        if (s.rd_addr[i] >= s.address_lower) & (s.rd_addr[i] <= s.address_upper):
+          s.rd_bank[i] @= trunc((((s.rd_addr[i] - s.address_lower) >> bank_shift) & bank_mask) ^
+                                (((s.rd_addr[i] - s.address_lower) >> xor_shift) & xor_mask), XbarOutRdType)
       for i in range(num_xbar_in_wr_ports):
-        s.wr_pkt[i] @= MemWritePktType(i, 0, 0, DataType(0, 0, 0, 0), 0, 0, i)
+        s.wr_bank[i] @= XbarOutWrType(num_banks_per_cgra)
+        if (s.wr_addr[i] >= s.address_lower) & (s.wr_addr[i] <= s.address_upper):
+          s.wr_bank[i] @= trunc((((s.wr_addr[i] - s.address_lower) >> bank_shift) & bank_mask) ^
+                                (((s.wr_addr[i] - s.address_lower) >> xor_shift) & xor_mask), XbarOutWrType)
 
+    @update
+    def assemble_xbar_pkt():
       for i in range(num_rd_tiles):
-        recv_raddr = s.recv_raddr[i].msg
-        # Calculates the target bank index for load.
-        if (recv_raddr >= s.address_lower) & (recv_raddr <= s.address_upper):
-          bank_index_load_local = trunc((recv_raddr - s.address_lower) >> per_bank_addr_nbits, XbarOutRdType)
-        else:
-          bank_index_load_local = XbarOutRdType(num_banks_per_cgra)
         # FIXME: change to exact tile id.
         s.rd_pkt[i] @= MemReadPktType(i,                       # src
-                                      bank_index_load_local,   # dst
-                                      recv_raddr,              # addr
+                                      s.rd_bank[i],            # dst
+                                      s.rd_addr[i],            # addr
                                       DataType(0, 0, 0, 0),    # data
                                       s.cgra_id,               # src_cgra
                                       0,                       # src_tile
                                       i)                       # remote_src_port
 
-      recv_raddr_from_noc = s.recv_from_noc_load_request.msg.payload.data_addr
-      # Calculates the target bank index.
-      if (recv_raddr_from_noc >= s.address_lower) & (recv_raddr_from_noc <= s.address_upper):
-        bank_index_load_from_noc = trunc((recv_raddr_from_noc - s.address_lower) >> per_bank_addr_nbits, XbarOutRdType)
+      if s.dma_rd_active:
+        s.rd_pkt[num_rd_tiles] @= MemReadPktType(num_rd_tiles,              # src
+                                                 s.rd_bank[num_rd_tiles],   # dst
+                                                 s.rd_addr[num_rd_tiles],   # addr
+                                                 DataType(0, 0, 0, 0),      # data
+                                                 s.dma_rd_src_cgra,         # src_cgra
+                                                 s.dma_rd_src_tile,         # src_tile
+                                                 s.dma_rd_remote_src_port)  # remote_src_port
       else:
-        bank_index_load_from_noc = XbarOutRdType(num_banks_per_cgra)
-      s.rd_pkt[num_rd_tiles] @= MemReadPktType(num_rd_tiles,                                     # src
-                                               bank_index_load_from_noc,                         # dst
-                                               recv_raddr_from_noc,                              # addr
-                                               DataType(0, 0, 0, 0),                             # data
-                                               s.recv_from_noc_load_request.msg.src,             # src_cgra
-                                               s.recv_from_noc_load_request.msg.src_tile_id,     # src_tile
-                                               s.recv_from_noc_load_request.msg.remote_src_port) # remote_src_port
+        s.rd_pkt[num_rd_tiles] @= MemReadPktType(num_rd_tiles,                                     # src
+                                                 s.rd_bank[num_rd_tiles],                          # dst
+                                                 s.rd_addr[num_rd_tiles],                          # addr
+                                                 DataType(0, 0, 0, 0),                             # data
+                                                 s.recv_from_noc_load_request.msg.src,             # src_cgra
+                                                 s.recv_from_noc_load_request.msg.src_tile_id,     # src_tile
+                                                 s.recv_from_noc_load_request.msg.remote_src_port) # remote_src_port
 
       for i in range(num_wr_tiles):
-        recv_waddr = s.recv_waddr[i].msg
-        # Calculates the target bank index for store.
-        if (recv_waddr >= s.address_lower) & (recv_waddr <= s.address_upper):
-          bank_index_store_local = trunc((recv_waddr - s.address_lower) >> per_bank_addr_nbits, XbarOutWrType)
-        else:
-          bank_index_store_local = XbarOutWrType(num_banks_per_cgra)
         s.wr_pkt[i] @= MemWritePktType(i,                       # src
-                                       bank_index_store_local,  # dst
-                                       recv_waddr,              # addr
+                                       s.wr_bank[i],            # dst
+                                       s.wr_addr[i],            # addr
                                        s.recv_wdata[i].msg,     # data
                                        0,                       # src_cgra
                                        0,                       # src_tile
                                        i)                       # remote_src_port
 
-      recv_waddr_from_noc = s.recv_from_noc_store_request.msg.payload.data_addr
-      recv_wdata_from_noc = s.recv_from_noc_store_request.msg.payload.data
-      if (recv_waddr_from_noc >= s.address_lower) & (recv_waddr_from_noc <= s.address_upper):
-        bank_index_store_from_noc = trunc((recv_waddr_from_noc - s.address_lower) >> per_bank_addr_nbits, XbarOutWrType)
-      else:
-        bank_index_store_from_noc = XbarOutWrType(num_banks_per_cgra)
-      s.wr_pkt[num_wr_tiles] @= MemWritePktType(num_wr_tiles,               # src
-                                                bank_index_store_from_noc,  # dst
-                                                recv_waddr_from_noc,        # addr
-                                                recv_wdata_from_noc,        # data
-                                                0,                          # src_cgra
-                                                0,                          # src_tile
-                                                num_wr_tiles)               # remote_src_port
+      s.wr_pkt[num_wr_tiles] @= MemWritePktType(num_wr_tiles,                                 # src
+                                                s.wr_bank[num_wr_tiles],                      # dst
+                                                s.wr_addr[num_wr_tiles],                      # addr
+                                                s.recv_from_noc_store_request.msg.payload.data, # data
+                                                0,                                            # src_cgra
+                                                0,                                            # src_tile
+                                                num_wr_tiles)                                 # remote_src_port
 
     # Connects xbar with the memory wrapper.
     @update
@@ -254,7 +383,8 @@ class DataMemControllerRTL(Component):
                      0, # remote_src_port
                      0, # opaque
                      0, # vc_id
-                     CgraPayloadType(0, 0, 0, 0, 0))
+                     CgraPayloadType(0, 0, 0, 0, 0),
+                     0) # dst_group
 
 
       for i in range(num_wr_tiles):
@@ -272,7 +402,8 @@ class DataMemControllerRTL(Component):
                      0, # remote_src_port
                      0, # opaque
                      0, # vc_id
-                     CgraPayloadType(0, 0, 0, 0, 0))
+                     CgraPayloadType(0, 0, 0, 0, 0),
+                     0) # dst_group
 
       s.send_to_noc_store_pkt.val @= 0
 
@@ -298,7 +429,8 @@ class DataMemControllerRTL(Component):
                      0, # remote_src_port
                      0, # opaque
                      0, # vc_id
-                     CgraPayloadType(0, 0, 0, 0, 0))
+                     CgraPayloadType(0, 0, 0, 0, 0),
+                     0) # dst_group
 
       s.send_to_noc_load_request_pkt.val @= 0
 
@@ -307,9 +439,16 @@ class DataMemControllerRTL(Component):
           s.read_crossbar.recv[i].val @= s.recv_raddr[i].val
           s.read_crossbar.recv[i].msg @= s.rd_pkt[i]
           s.recv_raddr[i].rdy @= s.read_crossbar.recv[i].rdy
-      s.read_crossbar.recv[num_rd_tiles].val @= s.recv_from_noc_load_request.val
       s.read_crossbar.recv[num_rd_tiles].msg @= s.rd_pkt[num_rd_tiles]
-      s.recv_from_noc_load_request.rdy @= s.read_crossbar.recv[num_rd_tiles].rdy
+      if s.dma_rd_active:
+        # Issues one DMA load per cycle, and holds the following requests.
+        s.read_crossbar.recv[num_rd_tiles].val @= 1
+      elif s.recv_from_noc_load_request.msg.payload.cmd == CMD_DMA_LOAD_REQUEST:
+        # The DMA load request is consumed by the DMA engine.
+        s.recv_from_noc_load_request.rdy @= 1
+      elif s.recv_from_noc_load_request.msg.payload.cmd != CMD_READ_MEM_STATS:
+        s.read_crossbar.recv[num_rd_tiles].val @= s.recv_from_noc_load_request.val
+        s.recv_from_noc_load_request.rdy @= s.read_crossbar.recv[num_rd_tiles].rdy
       
       # Connects the store request ports (from tiles and NoC) to the xbar targetting memory and NoC.
       for i in range(num_wr_tiles):
@@ -317,9 +456,17 @@ class DataMemControllerRTL(Component):
         s.write_crossbar.recv[i].msg @= s.wr_pkt[i]
         s.recv_waddr[i].rdy @= s.write_crossbar.recv[i].rdy
         s.recv_wdata[i].rdy @= s.write_crossbar.recv[i].rdy
-      s.write_crossbar.recv[num_wr_tiles].val @= s.recv_from_noc_store_request.val
       s.write_crossbar.recv[num_wr_tiles].msg @= s.wr_pkt[num_wr_tiles]
-      s.recv_from_noc_store_request.rdy @= s.write_crossbar.recv[num_wr_tiles].rdy
+      if s.recv_from_noc_store_request.msg.payload.cmd == CMD_DMA_STORE_REQUEST:
+        # The DMA store request is consumed by the DMA engine.
+        s.recv_from_noc_store_request.rdy @= 1
+      elif (s.recv_from_noc_store_request.msg.payload.cmd == CMD_DMA_STORE_DATA) & \
+           (s.dma_wr_count == DmaCountType(0)):
+        # Drops the words beyond the length of the DMA store.
+        s.recv_from_noc_store_request.rdy @= 1
+      else:
+        s.write_crossbar.recv[num_wr_tiles].val @= s.recv_from_noc_store_request.val
+        s.recv_from_noc_store_request.rdy @= s.write_crossbar.recv[num_wr_tiles].rdy
 
       # Connects the response ports to tiles and NoC from the xbar.
       # Number of load responses is expected to be the same as the number of load requests.
@@ -347,11 +494,40 @@ class DataMemControllerRTL(Component):
                     CgraPayloadType(
                         CMD_LOAD_RESPONSE,
                         s.response_crossbar.send[i].msg.data,
-                        s.response_crossbar.send[i].msg.addr, 0, 0))
+                        s.response_crossbar.send[i].msg.addr, 0, 0),
+                    0) # dst_group
 
           s.send_to_noc_load_response_pkt.val @= s.response_crossbar.send[i].val
           s.response_crossbar.send[i].rdy @= s.send_to_noc_load_response_pkt.rdy
 
+      # The statistics counter is returned when the load responses are
+      # not using the port towards the NoC.
+      if s.recv_from_noc_load_request.val & \
+         (s.recv_from_noc_load_request.msg.payload.cmd == CMD_READ_MEM_STATS) & \
+         ~s.response_crossbar.send[num_rd_tiles].val:
+        s.send_to_noc_load_response_pkt.msg @= \
+              NocPktType(
+                  s.cgra_id, # src_cgra_id
+                  s.recv_from_noc_load_request.msg.src, # dst_cgra_id
+                  s.idTo2d_x_lut[s.cgra_id], # src_cgra_x
+                  s.idTo2d_y_lut[s.cgra_id], # src_cgra_y
+                  s.idTo2d_x_lut[s.recv_from_noc_load_request.msg.src], # dst_cgra_x
+                  s.idTo2d_y_lut[s.recv_from_noc_load_request.msg.src], # dst_cgra_y
+                  0, # src_tile_id
+                  s.recv_from_noc_load_request.msg.src_tile_id, # dst_tile_id
+                  s.recv_from_noc_load_request.msg.remote_src_port, # remote_src_port
+                  s.recv_from_noc_load_request.msg.opaque, # opaque
+                  0, # vc_id
+                  CgraPayloadType(
+                      CMD_LOAD_RESPONSE,
+                      0,
+                      s.recv_from_noc_load_request.msg.payload.data_addr, 0, 0),
+                  0) # dst_group
+        s.send_to_noc_load_response_pkt.msg.payload.data.payload @= s.stats_value
+        s.send_to_noc_load_response_pkt.msg.payload.data.predicate @= 1
+        s.send_to_noc_load_response_pkt.val @= 1
+        s.recv_from_noc_load_request.rdy @= s.send_to_noc_load_response_pkt.rdy
+
       # Handles the request (not response) towards the others via the NoC. The dst would be
       # updated in the controller.
       s.send_to_noc_load_request_pkt.msg @= \
@@ -369,7 +545,8 @@ class DataMemControllerRTL(Component):
                       CgraPayloadType(
                           CMD_LOAD_REQUEST,
                           0,
-                          s.read_crossbar.send[num_banks_per_cgra].msg.addr, 0, 0))
+                          s.read_crossbar.send[num_banks_per_cgra].msg.addr, 0, 0),
+                      0) # dst_group
 
       s.send_to_noc_load_request_pkt.val @= s.read_crossbar.send[num_banks_per_cgra].val 
       # TODO: https://github.com/tancheng/VectorCGRA/issues/26 -- Modify this part for non-blocking access.
@@ -404,12 +581,72 @@ class DataMemControllerRTL(Component):
                       CgraPayloadType(
                           CMD_STORE_REQUEST,
                           s.write_crossbar.send[num_banks_per_cgra].msg.data,
-                          s.write_crossbar.send[num_banks_per_cgra].msg.addr, 0, 0))
+                          s.write_crossbar.send[num_banks_per_cgra].msg.addr, 0, 0),
+                      0) # dst_group
 
       s.send_to_noc_store_pkt.val @= s.write_crossbar.send[num_banks_per_cgra].val
       s.write_crossbar.send[num_banks_per_cgra].rdy @= s.send_to_noc_store_pkt.rdy
 
+    @update_ff
+    def update_dma():
+      if s.reset:
+        s.dma_rd_addr <<= 0
+        s.dma_rd_count <<= 0
+        s.dma_rd_src_cgra <<= 0
+        s.dma_rd_src_tile <<= 0
+        s.dma_rd_remote_src_port <<= 0
+        s.dma_wr_addr <<= 0
+        s.dma_wr_count <<= 0
+      else:
+        if s.dma_rd_active:
+          if s.read_crossbar.recv[num_rd_tiles].rdy:
+            s.dma_rd_addr <<= s.dma_rd_addr + AddrType(1)
+            s.dma_rd_count <<= s.dma_rd_count - DmaCountType(1)
+        elif s.recv_from_noc_load_request.val & \
+             (s.recv_from_noc_load_request.msg.payload.cmd == CMD_DMA_LOAD_REQUEST):
+          s.dma_rd_addr <<= s.recv_from_noc_load_request.msg.payload.data_addr
+          s.dma_rd_count <<= \
+              trunc(s.recv_from_noc_load_request.msg.payload.data.payload, DmaCountType)
+          s.dma_rd_src_cgra <<= s.recv_from_noc_load_request.msg.src
+          s.dma_rd_src_tile <<= s.recv_from_noc_load_request.msg.src_tile_id
+          s.dma_rd_remote_src_port <<= \
+              s.recv_from_noc_load_request.msg.remote_src_port
+
+        if s.recv_from_noc_store_request.val:
+          if s.recv_from_noc_store_request.msg.payload.cmd == CMD_DMA_STORE_REQUEST:
+            s.dma_wr_addr <<= s.recv_from_noc_store_request.msg.payload.data_addr
+            s.dma_wr_count <<= \
+                trunc(s.recv_from_noc_store_request.msg.payload.data.payload, DmaCountType)
+          elif (s.recv_from_noc_store_request.msg.payload.cmd == CMD_DMA_STORE_DATA) & \
+               (s.dma_wr_count != DmaCountType(0)) & \
+               s.write_crossbar.recv[num_wr_tiles].rdy:
+            s.dma_wr_addr <<= s.dma_wr_addr + AddrType(1)
+            s.dma_wr_count <<= s.dma_wr_count - DmaCountType(1)
+
+  # Returns the crossbar statistics, i.e., {(xbar, side, port, kind):
+  # value} following mem_stats_layout, which are all 0 without has_stats.
+  def get_stats(s):
+    stats = {key: 0 for key in s.stats_layout}
+    if s.has_stats:
+      xbar_stats_list = [s.read_xbar_stats, s.write_xbar_stats,
+                         s.response_xbar_stats]
+      for xbar, xbar_stats in zip(MEM_STATS_XBARS, xbar_stats_list):
+        for (side, port, kind), value in xbar_stats.get_stats().items():
+          stats[(xbar, side, port, kind)] = value
+    return stats
+
+  def dump_stats(s):
+    return "\n".join([f"{xbar}.{side}[{port}].{kind}: {value}"
+                      for (xbar, side, port, kind), value
+                      in s.get_stats().items()])
+
   def line_trace(s):
+    if trace_is_off():
+      return ""
+    if trace_is_summary():
+      rd_str = "".join([str(int(x.val)) for x in s.recv_raddr])
+      wr_str = "".join([str(int(x.val)) for x in s.recv_waddr])
+      return f"rd: {rd_str}, wr: {wr_str}, noc_ld: {int(s.send_to_noc_load_request_pkt.val)}, noc_st: {int(s.send_to_noc_store_pkt.val)}, dma_rd: {int(s.dma_rd_count)}, dma_wr: {int(s.dma_wr_count)}"
     recv_raddr_str = "recv_from_tile_read_addr: {"
     recv_waddr_str = "recv_from_tile_write_addr: {"
     recv_wdata_str = "recv_from_tile_write_data: {"
@@ -14,6 +14,9 @@ from ...lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
 from ...lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.common import *
+from ...lib.util.data_mem_helper import *
+from ...lib.util.line_trace_helper import *
 from ...noc.PyOCN.pymtl3_net.channel.ChannelRTL import ChannelRTL
 
 class DataMemWrapperRTL(Component):
@@ -25,11 +28,16 @@ class DataMemWrapperRTL(Component):
                 MemResponseType,
                 global_data_mem_size,
                 per_bank_data_mem_size,
-                is_combinational = True):
+                is_combinational = True,
+                num_banks = 1,
+                bank_mapping = BANK_MAPPING_BLOCK):
 
     # Constant.
     GlobalAddrType = mk_bits(clog2(global_data_mem_size))
     PerBankAddrType = mk_bits(clog2(per_bank_data_mem_size))
+    # The interleaved mappings skip the bank bits of the address.
+    _, _, _, _, index_shift = bank_mapping_params(bank_mapping, num_banks,
+                                                  per_bank_data_mem_size)
 
     # Interface.
     s.recv_rd = RecvIfcRTL(MemReadType)
@@ -78,10 +86,10 @@ class DataMemWrapperRTL(Component):
 
       if s.channel_rd.send.val:
         s.memory.raddr[0] @= \
-          trunc(s.channel_rd.send.msg.addr % per_bank_data_mem_size, PerBankAddrType)
+          trunc((s.channel_rd.send.msg.addr >> index_shift) % per_bank_data_mem_size, PerBankAddrType)
       if s.channel_wr.send.val:
         s.memory.waddr[0] @= \
-          trunc(s.channel_wr.send.msg.addr % per_bank_data_mem_size, PerBankAddrType)
+          trunc((s.channel_wr.send.msg.addr >> index_shift) % per_bank_data_mem_size, PerBankAddrType)
         s.memory.wdata[0] @= s.channel_wr.send.msg.data
         s.memory.wen[0]   @= 1
 
@@ -99,6 +107,10 @@ class DataMemWrapperRTL(Component):
       s.send.val @= s.channel_rd.send.val
 
   def line_trace(s):
+    if trace_is_off():
+      return ""
+    if trace_is_summary():
+      return f"rd: {int(s.recv_rd.val)}, wr: {int(s.recv_wr.val)}, send: {int(s.send.val)}"
     recv_rd_str = "recv_rd_msg: " + str(s.recv_rd.msg)
     recv_wr_str = "recv_wr_msg: " + str(s.recv_wr.msg)
     content_str = "content: " + "|".join([str(data) for data in s.memory.regs])
@@ -0,0 +1,143 @@
+"""
+==========================================================================
+XbarStatsRTL.py
+==========================================================================
+Statistics counters of a crossbar with queued inports (e.g., the
+XbarBypassQueueRTL instances of DataMemControllerRTL). It only observes
+the val/rdy handshakes and the routing fields (i.e., dst of the accepted
+packets and src of the delivered ones) on the crossbar boundary.
+
+For each inport and outport, it keeps (in the order of MEM_STATS_KINDS):
+  - requests:      packets accepted by the crossbar (towards the outport);
+  - grants:        packets delivered (from the inport);
+  - conflicts:     cycles in which a packet of the port is left waiting;
+  - max_occupancy: max number of packets waiting at the same time.
+
+The counters are read one at a time via read_idx/read_data. The ids
+start from base_idx, with the inports first, then the outports, each
+with MEM_STATS_KINDS. The read_data is 0 for the ids out of the range,
+so that multiple instances can share the same read_idx and OR their
+read_data.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from ...lib.util.data_mem_helper import *
+from ...lib.util.data_struct_attr import *
+
+class XbarStatsRTL(Component):
+
+  def construct(s, PktType, num_inports, num_outports, CountType,
+                IdxType, base_idx = 0):
+
+    # Constants.
+    InDstType = PktType.get_field_type(kAttrDst)
+    OutSrcType = PktType.get_field_type(kAttrSrc)
+    num_kinds = len(MEM_STATS_KINDS)
+    assert(base_idx + (num_inports + num_outports) * num_kinds <=
+           2 ** IdxType.nbits)
+    s.num_inports = num_inports
+    s.num_outports = num_outports
+
+    # Interfaces.
+    s.in_val = [InPort(1) for _ in range(num_inports)]
+    s.in_rdy = [InPort(1) for _ in range(num_inports)]
+    s.in_dst = [InPort(InDstType) for _ in range(num_inports)]
+    s.out_val = [InPort(1) for _ in range(num_outports)]
+    s.out_rdy = [InPort(1) for _ in range(num_outports)]
+    s.out_src = [InPort(OutSrcType) for _ in range(num_outports)]
+    s.read_idx = InPort(IdxType)
+    s.read_data = OutPort(CountType)
+
+    # Per-cycle events.
+    s.in_fire = [Wire(1) for _ in range(num_inports)]
+    s.in_deq = [Wire(1) for _ in range(num_inports)]
+    s.out_fire = [Wire(1) for _ in range(num_outports)]
+    s.out_enq = [Wire(CountType) for _ in range(num_outports)]
+
+    # Counters, and the number of packets currently in the crossbar.
+    s.in_counters = [[Wire(CountType) for _ in range(num_kinds)]
+                     for _ in range(num_inports)]
+    s.out_counters = [[Wire(CountType) for _ in range(num_kinds)]
+                      for _ in range(num_outports)]
+    s.in_occupancy = [Wire(CountType) for _ in range(num_inports)]
+    s.out_occupancy = [Wire(CountType) for _ in range(num_outports)]
+
+    @update
+    def update_events():
+      for i in range(num_inports):
+        s.in_fire[i] @= s.in_val[i] & s.in_rdy[i]
+        s.in_deq[i] @= 0
+      for o in range(num_outports):
+        s.out_fire[o] @= s.out_val[o] & s.out_rdy[o]
+        s.out_enq[o] @= 0
+        for i in range(num_inports):
+          if s.in_fire[i] & (s.in_dst[i] == InDstType(o)):
+            s.out_enq[o] @= s.out_enq[o] + CountType(1)
+        for i in range(num_inports):
+          if s.out_fire[o] & (s.out_src[o] == OutSrcType(i)):
+            s.in_deq[i] @= 1
+
+    @update
+    def update_read_data():
+      s.read_data @= 0
+      for i in range(num_inports):
+        for k in range(num_kinds):
+          if s.read_idx == IdxType(base_idx + i * num_kinds + k):
+            s.read_data @= s.in_counters[i][k]
+      for o in range(num_outports):
+        for k in range(num_kinds):
+          if s.read_idx == IdxType(base_idx + (num_inports + o) * num_kinds + k):
+            s.read_data @= s.out_counters[o][k]
+
+    @update_ff
+    def update_counters():
+      if s.reset:
+        for i in range(num_inports):
+          s.in_occupancy[i] <<= 0
+          for k in range(num_kinds):
+            s.in_counters[i][k] <<= 0
+        for o in range(num_outports):
+          s.out_occupancy[o] <<= 0
+          for k in range(num_kinds):
+            s.out_counters[o][k] <<= 0
+      else:
+        for i in range(num_inports):
+          s.in_occupancy[i] <<= s.in_occupancy[i] + zext(s.in_fire[i], CountType) - \
+                                zext(s.in_deq[i], CountType)
+          s.in_counters[i][0] <<= s.in_counters[i][0] + zext(s.in_fire[i], CountType)
+          s.in_counters[i][1] <<= s.in_counters[i][1] + zext(s.in_deq[i], CountType)
+          # The inport holds a packet, either arriving or queued, that
+          # does not leave in this cycle.
+          if (s.in_val[i] | (s.in_occupancy[i] != CountType(0))) & ~s.in_deq[i]:
+            s.in_counters[i][2] <<= s.in_counters[i][2] + CountType(1)
+          if s.in_occupancy[i] > s.in_counters[i][3]:
+            s.in_counters[i][3] <<= s.in_occupancy[i]
+
+        for o in range(num_outports):
+          s.out_occupancy[o] <<= s.out_occupancy[o] + s.out_enq[o] - \
+                                 zext(s.out_fire[o], CountType)
+          s.out_counters[o][0] <<= s.out_counters[o][0] + s.out_enq[o]
+          s.out_counters[o][1] <<= s.out_counters[o][1] + zext(s.out_fire[o], CountType)
+          # More packets towards the outport than the one it takes.
+          if s.out_occupancy[o] + s.out_enq[o] > zext(s.out_fire[o], CountType):
+            s.out_counters[o][2] <<= s.out_counters[o][2] + CountType(1)
+          if s.out_occupancy[o] > s.out_counters[o][3]:
+            s.out_counters[o][3] <<= s.out_occupancy[o]
+
+  # Returns the counters of each port, i.e.,
+  # {(side, port, kind): value}, for dumping from the simulation.
+  def get_stats(s):
+    stats = {}
+    for side, counters in [("in", s.in_counters), ("out", s.out_counters)]:
+      for port, port_counters in enumerate(counters):
+        for kind, counter in zip(MEM_STATS_KINDS, port_counters):
+          stats[(side, port, kind)] = int(counter)
+    return stats
+
+  def line_trace(s):
+    in_str = "|".join([f"{int(c[0])}/{int(c[2])}" for c in s.in_counters])
+    out_str = "|".join([f"{int(c[0])}/{int(c[2])}" for c in s.out_counters])
+    return f"({in_str}:{out_str})"
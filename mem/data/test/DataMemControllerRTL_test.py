@@ -8,6 +8,7 @@ Author : Cheng Tan
   Date : Aug 28, 2025
 """
 
+import pytest
 from pymtl3.passes.backends.verilog import (VerilogTranslationPass)
 from pymtl3.stdlib.test_utils import config_model_with_cmdline_opts
 
@@ -16,6 +17,9 @@ from ....lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ....lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ....lib.messages import *
 from ....lib.opt_type import *
+from ....lib.util.common import *
+from ....lib.util.data_mem_helper import *
+from ....lib.util.line_trace_helper import print_line_trace
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -29,7 +33,11 @@ class TestHarness(Component):
                 num_tiles,
                 read_addr, read_data, write_addr,
                 write_data, noc_recv_load,
-                send_to_noc_load_request_pkt, send_to_noc_store_pkt):
+                send_to_noc_load_request_pkt, send_to_noc_store_pkt,
+                noc_load_request = [], noc_store_request = [],
+                noc_load_response = [], noc_load_request_delay = 0,
+                bank_mapping = BANK_MAPPING_BLOCK,
+                has_stats = False):
 
     CgraPayloadType = NocPktType.get_field_type(kAttrPayload)
     DataType = CgraPayloadType.get_field_type(kAttrData)
@@ -52,6 +60,12 @@ class TestHarness(Component):
     s.send_to_noc_load_request_pkt = TestSinkRTL(NocPktType, send_to_noc_load_request_pkt)
     s.send_to_noc_store_pkt = TestSinkRTL(NocPktType, send_to_noc_store_pkt)
 
+    # Requests from the NoC (e.g., CPU or remote CGRAs).
+    s.recv_from_noc_load_request = TestSrcRTL(NocPktType, noc_load_request,
+                                              noc_load_request_delay)
+    s.recv_from_noc_store_request = TestSrcRTL(NocPktType, noc_store_request)
+    s.send_to_noc_load_response_pkt = TestSinkRTL(NocPktType, noc_load_response)
+
     s.mem_controller = DataMemControllerRTL(NocPktType,
                                         data_mem_size_global,
                                         data_mem_size_per_bank,
@@ -61,7 +75,9 @@ class TestHarness(Component):
                                         num_cgra_rows,
                                         num_cgra_columns,
                                         num_tiles,
-                                        mem_access_is_combinational = True)
+                                        mem_access_is_combinational = True,
+                                        bank_mapping = bank_mapping,
+                                        has_stats = has_stats)
 
     for i in range(rd_tiles):
       s.mem_controller.recv_raddr[i] //= s.recv_raddr[i].send
@@ -74,6 +90,9 @@ class TestHarness(Component):
     s.mem_controller.recv_from_noc_load_response_pkt //= s.recv_from_noc.send
     s.mem_controller.send_to_noc_load_request_pkt //= s.send_to_noc_load_request_pkt.recv
     s.mem_controller.send_to_noc_store_pkt //= s.send_to_noc_store_pkt.recv
+    s.mem_controller.recv_from_noc_load_request //= s.recv_from_noc_load_request.send
+    s.mem_controller.recv_from_noc_store_request //= s.recv_from_noc_store_request.send
+    s.mem_controller.send_to_noc_load_response_pkt //= s.send_to_noc_load_response_pkt.recv
 
     s.mem_controller.address_lower //= 0
     s.mem_controller.address_upper //= 31
@@ -94,6 +113,11 @@ class TestHarness(Component):
        not s.recv_from_noc.done():
       return False
 
+    if not s.recv_from_noc_load_request.done() or \
+       not s.recv_from_noc_store_request.done() or \
+       not s.send_to_noc_load_response_pkt.done():
+      return False
+
     return True
 
   def line_trace(s):
@@ -106,12 +130,11 @@ def run_sim(test_harness, max_cycles = 40):
   # Run simulation
 
   ncycles = 0
-  print()
-  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  print_line_trace(ncycles, test_harness)
   while not test_harness.done() and ncycles < max_cycles:
     test_harness.sim_tick()
     ncycles += 1
-    print("{}:{}".format(ncycles, test_harness.line_trace()))
+    print_line_trace(ncycles, test_harness)
 
   # Check timeout
   assert ncycles < max_cycles
@@ -235,3 +258,280 @@ def test_mem_controller(cmdline_opts):
 
   run_sim(th)
 
+
+def test_mem_controller_dma(cmdline_opts):
+  DataType = mk_data(32, 1)
+  data_mem_size_global = 64
+  data_mem_size_per_bank = 16
+  num_banks = 2
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+  num_tiles = 4
+  rd_tiles = 4
+  wr_tiles = 4
+  ctrl_mem_size = 6
+  # The DMA requests come from the CPU, i.e., the tile id next to the
+  # last tile.
+  kCpuTileId = num_tiles
+
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CtrlType = mk_ctrl(4, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+  InterCgraPktType = mk_inter_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       rd_tiles,
+                                       CgraPayloadType)
+
+  # Writes 4 consecutive words across the boundary of the banks, i.e.,
+  # addresses 14 and 15 on bank 0, 16 and 17 on bank 1. The word beyond
+  # the length is dropped.
+  values = [0xa0, 0xa1, 0xa2, 0xa3]
+  noc_store_request = [
+                     # src  dst src_x src_y dst_x dst_y src_tile    dst_tile remote_src_port opq vc
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    kCpuTileId, 0,       0,              0,  0,
+                       CgraPayloadType(CMD_DMA_STORE_REQUEST, DataType(len(values), 1), 14)),
+  ] + [
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    kCpuTileId, 0,       0,              0,  0,
+                       CgraPayloadType(CMD_DMA_STORE_DATA, DataType(value, 1)))
+      for value in values + [0xff]
+  ]
+
+  # Reads them back (together with the untouched address 18) once the
+  # stores are done.
+  noc_load_request = [
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    kCpuTileId, 0,       0,              0,  0,
+                       CgraPayloadType(CMD_DMA_LOAD_REQUEST, DataType(len(values) + 1, 1), 14)),
+  ]
+  read_data = [DataType(value, 1) for value in values] + [DataType(0, 0)]
+  noc_load_response = [
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    0,          kCpuTileId, 0,           0,  0,
+                       CgraPayloadType(CMD_LOAD_RESPONSE, data, 14 + i, 0, 0))
+      for i, data in enumerate(read_data)
+  ]
+
+  th = TestHarness(InterCgraPktType,
+                   data_mem_size_global,
+                   data_mem_size_per_bank,
+                   num_banks,
+                   rd_tiles,
+                   wr_tiles,
+                   num_cgra_rows,
+                   num_cgra_columns,
+                   num_tiles,
+                   [[] for _ in range(rd_tiles)],
+                   [[] for _ in range(rd_tiles)],
+                   [[] for _ in range(wr_tiles)],
+                   [[] for _ in range(wr_tiles)],
+                   [], [], [],
+                   noc_load_request,
+                   noc_store_request,
+                   noc_load_response,
+                   noc_load_request_delay = 10)
+
+  th.elaborate()
+  th.mem_controller.set_metadata(VerilogTranslationPass.explicit_module_name,
+                                 f'DataMemControllerRTL_dma_translation')
+  th = config_model_with_cmdline_opts( th, cmdline_opts, duts=['mem_controller'] )
+
+  run_sim(th)
+
+# Each tile port writes a strided range of addresses, which are then read
+# back through the NoC. The contents are expected to be the same no matter
+# how the addresses are mapped onto the banks.
+@pytest.mark.parametrize('bank_mapping', BANK_MAPPINGS)
+def test_mem_controller_bank_mapping(cmdline_opts, bank_mapping):
+  DataType = mk_data(32, 1)
+  data_mem_size_global = 64
+  data_mem_size_per_bank = 16
+  num_banks = 2
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+  num_tiles = 4
+  rd_tiles = 4
+  wr_tiles = 4
+  ctrl_mem_size = 6
+  kCpuTileId = num_tiles
+  # The local range is [0, 31].
+  kLocalWords = num_banks * data_mem_size_per_bank
+
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CtrlType = mk_ctrl(4, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+  InterCgraPktType = mk_inter_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       rd_tiles,
+                                       CgraPayloadType)
+
+  write_addr = [[DataAddrType(addr)
+                 for addr in range(port, kLocalWords, wr_tiles)]
+                for port in range(wr_tiles)]
+  write_data = [[DataType(0x100 + int(addr), 1) for addr in addrs]
+                for addrs in write_addr]
+
+  noc_load_request = [
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    kCpuTileId, 0,       0,              0,  0,
+                       CgraPayloadType(CMD_DMA_LOAD_REQUEST, DataType(kLocalWords, 1), 0)),
+  ]
+  noc_load_response = [
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    0,          kCpuTileId, 0,           0,  0,
+                       CgraPayloadType(CMD_LOAD_RESPONSE, DataType(0x100 + addr, 1), addr, 0, 0))
+      for addr in range(kLocalWords)
+  ]
+
+  th = TestHarness(InterCgraPktType,
+                   data_mem_size_global,
+                   data_mem_size_per_bank,
+                   num_banks,
+                   rd_tiles,
+                   wr_tiles,
+                   num_cgra_rows,
+                   num_cgra_columns,
+                   num_tiles,
+                   [[] for _ in range(rd_tiles)],
+                   [[] for _ in range(rd_tiles)],
+                   write_addr,
+                   write_data,
+                   [], [], [],
+                   noc_load_request,
+                   [],
+                   noc_load_response,
+                   noc_load_request_delay = 20,
+                   bank_mapping = bank_mapping)
+
+  th.elaborate()
+  th.mem_controller.set_metadata(VerilogTranslationPass.explicit_module_name,
+                                 f'DataMemControllerRTL_{bank_mapping}_translation')
+  th = config_model_with_cmdline_opts( th, cmdline_opts, duts=['mem_controller'] )
+
+  run_sim(th, max_cycles = 80)
+
+# Tile ports 0 and 1 compete for bank 0, while port 2 reads bank 1. The
+# counters are then read via the NoC, which are all 0 once compiled out.
+@pytest.mark.parametrize('has_stats', [False, True])
+def test_mem_controller_stats(cmdline_opts, has_stats):
+  DataType = mk_data(32, 1)
+  data_mem_size_global = 64
+  data_mem_size_per_bank = 16
+  num_banks = 2
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+  num_tiles = 4
+  rd_tiles = 4
+  wr_tiles = 4
+  ctrl_mem_size = 6
+  kCpuTileId = num_tiles
+
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CtrlType = mk_ctrl(4, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+  InterCgraPktType = mk_inter_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       rd_tiles,
+                                       CgraPayloadType)
+
+  read_addr = [[DataAddrType(addr) for addr in range(0, 4)],
+               [DataAddrType(addr) for addr in range(4, 8)],
+               [DataAddrType(16), DataAddrType(17)],
+               []]
+  read_data = [[DataType(0, 0) for _ in addrs] for addrs in read_addr]
+
+  expected_stats = [
+      (("read", "in", 0, "requests"), 4),
+      (("read", "in", 1, "grants"), 4),
+      (("read", "out", 0, "requests"), 8),
+      (("read", "out", 1, "grants"), 2),
+      (("response", "out", 2, "grants"), 2),
+      (("write", "in", 0, "requests"), 0),
+  ]
+  noc_load_request = [
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    kCpuTileId, 0,       0,              0,  0,
+                       CgraPayloadType(CMD_READ_MEM_STATS,
+                                       DataType(mem_stats_id(*key, num_banks, rd_tiles, wr_tiles), 1)))
+      for key, _ in expected_stats
+  ]
+  noc_load_response = [
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    0,          kCpuTileId, 0,           0,  0,
+                       CgraPayloadType(CMD_LOAD_RESPONSE, DataType(value if has_stats else 0, 1), 0, 0, 0))
+      for _, value in expected_stats
+  ]
+
+  th = TestHarness(InterCgraPktType,
+                   data_mem_size_global,
+                   data_mem_size_per_bank,
+                   num_banks,
+                   rd_tiles,
+                   wr_tiles,
+                   num_cgra_rows,
+                   num_cgra_columns,
+                   num_tiles,
+                   read_addr,
+                   read_data,
+                   [[] for _ in range(wr_tiles)],
+                   [[] for _ in range(wr_tiles)],
+                   [], [], [],
+                   noc_load_request,
+                   [],
+                   noc_load_response,
+                   noc_load_request_delay = 20,
+                   has_stats = has_stats)
+
+  th.elaborate()
+  th.mem_controller.set_metadata(VerilogTranslationPass.explicit_module_name,
+                                 f'DataMemControllerRTL_stats_{has_stats}_translation')
+  th = config_model_with_cmdline_opts( th, cmdline_opts, duts=['mem_controller'] )
+
+  run_sim(th, max_cycles = 60)
+
+  # Both ports wait for bank 0, which is dumped from the simulation.
+  stats = th.mem_controller.get_stats()
+  assert (stats[("read", "out", 0, "conflicts")] > 0) == has_stats
+  assert (stats[("read", "in", 1, "conflicts")] +
+          stats[("read", "in", 0, "conflicts")] > 0) == has_stats
+  assert "read.out[0].conflicts" in th.mem_controller.dump_stats()
+
+# Translates the controller along with its XbarStatsRTL instances, which
+# the simulation-only runs above do not cover by default.
+def test_translate_mem_controller_stats(tmp_path, monkeypatch):
+  DataType = mk_data(32, 1)
+  data_mem_size_global = 64
+  num_tiles = 4
+  rd_tiles = 4
+  ctrl_mem_size = 6
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CtrlType = mk_ctrl(4, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+  InterCgraPktType = mk_inter_cgra_pkt(1, 1, num_tiles, rd_tiles,
+                                       CgraPayloadType)
+
+  monkeypatch.chdir(tmp_path)
+  dut = DataMemControllerRTL(InterCgraPktType, data_mem_size_global, 16, 2,
+                             rd_tiles, 4, 1, 1, num_tiles,
+                             has_stats = True)
+  dut.set_metadata(VerilogTranslationPass.explicit_module_name,
+                   'DataMemControllerRTL_stats')
+  dut.elaborate()
+  dut.set_metadata(VerilogTranslationPass.enable, True)
+  dut.apply(VerilogTranslationPass())
+  with open(dut.get_metadata(VerilogTranslationPass.translated_filename)) as f:
+    verilog = f.read()
+  assert "module XbarStatsRTL" in verilog
+  assert "module DataMemControllerRTL_stats" in verilog
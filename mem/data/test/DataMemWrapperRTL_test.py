@@ -14,6 +14,7 @@ from ....lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ....lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ....lib.messages import *
 from ....lib.opt_type import *
+from ....lib.util.line_trace_helper import print_line_trace
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -55,12 +56,11 @@ def run_sim(test_harness, max_cycles = 20):
 
   # Run simulation
   ncycles = 0
-  print()
-  print("{}:{}".format( ncycles, test_harness.line_trace()))
+  print_line_trace(ncycles, test_harness)
   while not test_harness.done() and ncycles < max_cycles:
     test_harness.sim_tick()
     ncycles += 1
-    print("{}:{}".format(ncycles, test_harness.line_trace()))
+    print_line_trace(ncycles, test_harness)
 
   # Check timeout
   assert ncycles < max_cycles
@@ -0,0 +1,126 @@
+"""
+==========================================================================
+bank_mapping_bench.py
+==========================================================================
+Benchmark of the bank mappings of the data memory (see
+DataMemControllerRTL). For each mapping, it replays the data memory
+access streams of the kernels on the tile ports and reports the cycles
+taken, the stall cycles (i.e., a tile port holds a request that is not
+accepted due to the bank conflicts), and the conflict cycles of the
+banks collected by the crossbar statistics (see XbarStatsRTL):
+  - fir:      the loop of CgraRTL_fir_test, i.e., two tiles load the
+              input (x[i] at i) and the coefficient (c[i] at i + 2) in
+              each iteration, and another one stores the sum;
+  - systolic: the weight stationary systolic array of CgraRTL_test, i.e.,
+              each tile on the left column streams one row of the
+              activation matrix (row-major), and each tile on the bottom
+              row stores one column of the output matrix.
+
+Usage (from the parent directory of the repo):
+  python -m VectorCGRA.mem.data.test.bank_mapping_bench [--iters 16]
+                                                        [--dim 4]
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import argparse
+from .DataMemControllerRTL_test import TestHarness
+from ....lib.messages import *
+from ....lib.util.common import *
+
+kDataMemSizeGlobal = 64
+kDataMemSizePerBank = 8
+kNumBanks = 4
+kNumPorts = 4
+kNumTiles = 16
+# The local addresses are [0, 31], see TestHarness.
+kOutputBaseAddress = 16
+
+def mk_pkt_type():
+  DataType = mk_data(32, 1)
+  DataAddrType = mk_bits(clog2(kDataMemSizeGlobal))
+  CtrlType = mk_ctrl(4, 2, 4, 4, 16)
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                    mk_bits(clog2(16)))
+  return mk_inter_cgra_pkt(1, 1, kNumTiles, kNumPorts, CgraPayloadType)
+
+# Returns the read and write addresses of each tile port.
+def fir_streams(num_iters):
+  read_addr = [[i for i in range(num_iters)],
+               [i + 2 for i in range(num_iters)]]
+  write_addr = [[kOutputBaseAddress + 8] * num_iters]
+  return read_addr, write_addr
+
+def systolic_streams(dim):
+  read_addr = [[row * dim + k for k in range(dim)] for row in range(dim)]
+  write_addr = [[kOutputBaseAddress + row * dim + col
+                 for row in range(dim)] for col in range(dim)]
+  return read_addr, write_addr
+
+def bench(bank_mapping, read_addr, write_addr):
+  NocPktType = mk_pkt_type()
+  CgraPayloadType = NocPktType.get_field_type(kAttrPayload)
+  DataType = CgraPayloadType.get_field_type(kAttrData)
+  DataAddrType = CgraPayloadType.get_field_type(kAttrDataAddr)
+
+  def pad(streams):
+    return streams + [[] for _ in range(kNumPorts - len(streams))]
+
+  read_addr = pad([[DataAddrType(addr) for addr in addrs]
+                   for addrs in read_addr])
+  write_addr = pad([[DataAddrType(addr) for addr in addrs]
+                    for addrs in write_addr])
+  # The loaded addresses are never stored.
+  read_data = [[DataType(0, 0) for _ in addrs] for addrs in read_addr]
+  write_data = [[DataType(1, 1) for _ in addrs] for addrs in write_addr]
+
+  th = TestHarness(NocPktType, kDataMemSizeGlobal, kDataMemSizePerBank,
+                   kNumBanks, kNumPorts, kNumPorts, 1, 1, kNumTiles,
+                   read_addr, read_data, write_addr, write_data,
+                   [], [], [], bank_mapping = bank_mapping,
+                   has_stats = True)
+  th.elaborate()
+  th.apply(DefaultPassGroup())
+  th.sim_reset()
+
+  ports = th.mem_controller.recv_raddr + th.mem_controller.recv_waddr
+  max_cycles = 10 * sum(len(addrs) for addrs in read_addr + write_addr)
+  ncycles = 0
+  stalls = 0
+  while not th.done() and ncycles < max_cycles:
+    stalls += sum(int(port.val & ~port.rdy) for port in ports)
+    th.sim_tick()
+    ncycles += 1
+  assert ncycles < max_cycles
+
+  stats = th.mem_controller.get_stats()
+  conflicts = sum(stats[(xbar, "out", bank, "conflicts")]
+                  for xbar in ["read", "write"]
+                  for bank in range(kNumBanks))
+  return ncycles, stalls, conflicts
+
+def main():
+  parser = argparse.ArgumentParser(description = __doc__.split("\n")[4])
+  parser.add_argument('--iters', type = int, default = 16)
+  parser.add_argument('--dim', type = int, default = kNumPorts,
+                      choices = range(1, kNumPorts + 1))
+  parser.add_argument('--mappings', nargs = '+', default = BANK_MAPPINGS,
+                      choices = BANK_MAPPINGS)
+  args = parser.parse_args()
+
+  kernels = {
+    'fir'     : fir_streams(args.iters),
+    'systolic': systolic_streams(args.dim),
+  }
+
+  print(f"{'kernel':>10} {'mapping':>10} {'cycles':>8} {'stalls':>8} "
+        f"{'conflicts':>10}")
+  for kernel, (read_addr, write_addr) in kernels.items():
+    for bank_mapping in args.mappings:
+      cycles, stalls, conflicts = bench(bank_mapping, read_addr, write_addr)
+      print(f"{kernel:>10} {bank_mapping:>10} {cycles:>8} {stalls:>8} "
+            f"{conflicts:>10}", flush = True)
+
+if __name__ == '__main__':
+  main()
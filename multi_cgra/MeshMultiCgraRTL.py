@@ -17,6 +17,7 @@ from ..noc.PyOCN.pymtl3_net.meshnet.MeshNetworkRTL import MeshNetworkRTL
 from ..noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_mesh_pos
 from ..lib.messages import *
 from ..lib.util.data_struct_attr import *
+from ..lib.util.line_trace_helper import *
 
 class MeshMultiCgraRTL(Component):
 
@@ -29,7 +30,8 @@ class MeshMultiCgraRTL(Component):
                 mem_access_is_combinational,
                 FunctionUnit, FuList, per_cgra_topology,
                 controller2addr_map,
-                support_task_switching = False):
+                support_task_switching = False,
+                global_reduce = GLOBAL_REDUCE_CENTRALIZED):
 
     # Derives all types from CgraPayloadType.
     CgraDataType = CgraPayloadType.get_field_type(kAttrData)
@@ -69,6 +71,9 @@ class MeshMultiCgraRTL(Component):
         idTo2d_map[cgra_row * cgra_columns + cgra_col] = (cgra_col, cgra_row)
     
     if support_task_switching:
+      # The hierarchical global reduction is not supported with the task
+      # switching yet.
+      assert(global_reduce == GLOBAL_REDUCE_CENTRALIZED)
       s.cgra = [CgraWithContextSwitchRTL(CgraPayloadType, cgra_rows, cgra_columns,
                                          tile_columns, tile_rows,
                                          ctrl_mem_size, data_mem_size_global,
@@ -88,7 +93,8 @@ class MeshMultiCgraRTL(Component):
                         num_ctrl, total_steps,
                         mem_access_is_combinational,
                         FunctionUnit, FuList, per_cgra_topology,
-                        controller2addr_map, idTo2d_map)
+                        controller2addr_map, idTo2d_map,
+                        global_reduce = global_reduce)
                 for cgra_id in range(s.num_cgras)]
 
     # Latency is 1.
@@ -156,6 +162,10 @@ class MeshMultiCgraRTL(Component):
             s.cgra[cgra_row * cgra_columns + cgra_col].recv_data_on_boundary_east[tile_row].msg //= CgraDataType()
 
   def line_trace(s):
+    if trace_is_off():
+      return ""
+    if trace_is_summary():
+      return "\n" + "\n".join([x.line_trace() for x in s.cgra])
     res = "||\n".join([(("\n\n[cgra_"+str(i)+": ") + x.line_trace())
                        for (i,x) in enumerate(s.cgra)])
     res += " ## mesh: " + s.mesh.line_trace()
@@ -4,7 +4,9 @@ from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
 from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
 from ..lib.messages import *
 from ..lib.opt_type import *
+from ..lib.util.common import *
 from ..lib.util.data_struct_attr import *
+from ..lib.util.line_trace_helper import *
 from ..noc.PyOCN.pymtl3_net.meshnet.MeshNetworkRTL import MeshNetworkRTL
 from ..noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_mesh_pos
 
@@ -20,7 +22,10 @@ class MeshMultiCgraTemplateRTL(Component):
                 controller2addr_map, id2ctrlMemSize_map, id2cgraSize_map, 
                 id2validTiles, id2validLinks, id2dataSPM,
                 mem_access_is_combinational,
-                is_multi_cgra = True):
+                is_multi_cgra = True,
+                ctrl_network = CTRL_BIDIRECTIONAL_RING,
+                bank_mapping = BANK_MAPPING_BLOCK,
+                global_reduce = GLOBAL_REDUCE_CENTRALIZED):
 
         # Derives all types from CgraPayloadType.
         CgraDataType = CgraPayloadType.get_field_type(kAttrData)
@@ -71,7 +76,10 @@ class MeshMultiCgraTemplateRTL(Component):
                                   FunctionUnit, FuList,
                                   id2validTiles[cgra_id], id2validLinks[cgra_id], id2dataSPM[cgra_id],
                                   controller2addr_map, idTo2d_map,
-                                  is_multi_cgra
+                                  is_multi_cgra,
+                                  ctrl_network,
+                                  bank_mapping,
+                                  global_reduce = global_reduce
                                   )
                   for cgra_id in range(s.num_cgras)]
         
@@ -156,6 +164,10 @@ class MeshMultiCgraTemplateRTL(Component):
                 s.cgra[idx].send_data_on_boundary_east[tile_row].rdy //= 0
 
     def line_trace(s):
+        if trace_is_off():
+            return ""
+        if trace_is_summary():
+            return "\n" + "\n".join([x.line_trace() for x in s.cgra])
         res = "||\n".join([(("\n\n[cgra_"+str(i)+": ") + x.line_trace())
                         for (i,x) in enumerate(s.cgra)])
         res += " ## mesh: " + s.mesh.line_trace()
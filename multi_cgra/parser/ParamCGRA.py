@@ -1,11 +1,17 @@
+from ...lib.util.common import CTRL_BIDIRECTIONAL_RING
+
+
 class ParamCGRA:
-    def __init__(self, rows, columns, tiles, links, dataSPM, configMemSize):
+    def __init__(self, rows, columns, tiles, links, dataSPM, configMemSize,
+                 ctrlNetwork=CTRL_BIDIRECTIONAL_RING):
         self.rows = rows
         self.columns = columns
         self.tiles = tiles
         self.links = links
         self.dataSPM = dataSPM
         self.configMemSize = configMemSize
+        # Topology of the intra-CGRA ctrl network, see CtrlNetworkRTL.
+        self.ctrlNetwork = ctrlNetwork
 
     def getValidTiles(self):
         return self.tiles
@@ -14,5 +20,5 @@ class ParamCGRA:
         return self.links
     
     def __repr__(self) -> str:
-        return f"ParamCGRA(rows={self.rows}, columns={self.columns})"
+        return f"ParamCGRA(rows={self.rows}, columns={self.columns}, ctrlNetwork={self.ctrlNetwork})"
     
\ No newline at end of file
@@ -4,8 +4,18 @@ from ...lib.util.cgra.DataSPM import DataSPM
 from ...lib.util.cgra.Tile import Tile
 from .ParamCGRA import ParamCGRA
 from ...lib.util.cgra.cgra_helper import *
+from ...lib.util.common import *
 import copy
 
+# Topologies of the intra-CGRA ctrl network in the YAML, i.e.,
+# cgra_defaults: ctrl_network.
+CTRL_NETWORK_DICT = {
+    "ring": CTRL_RING,
+    "bidirectional_ring": CTRL_BIDIRECTIONAL_RING,
+    "tree": CTRL_TREE,
+    "mesh": CTRL_MESH,
+}
+
 
 class Parser:
     def __init__(self, yaml_file: str):
@@ -16,6 +26,17 @@ class Parser:
         per_cgra_columns = self.yaml_data['cgra_defaults']['columns']
         return DataSPM(per_cgra_columns, per_cgra_columns)
 
+    def parse_ctrl_network(self):
+        """
+        Parse the topology of the intra-CGRA ctrl network, which defaults
+        to the bidirectional ring.
+        """
+        ctrl_network = self.yaml_data['cgra_defaults'].get(
+            'ctrl_network', 'bidirectional_ring')
+        assert ctrl_network in CTRL_NETWORK_DICT, \
+            f"ctrl_network must be one of {list(CTRL_NETWORK_DICT)}, but got {ctrl_network}."
+        return CTRL_NETWORK_DICT[ctrl_network]
+
     def parse_tiles(self):
         """
         Parse the tiles in one CGRA.
@@ -67,6 +88,7 @@ class Parser:
         id2dataSPM = {}
         id2ctrlMemSize_map = {}
         ctrlMemSize = self.yaml_data['cgra_defaults']['configMemSize']
+        ctrlNetwork = self.parse_ctrl_network()
 
         for id in range(num_cgra_rows * num_cgra_columns):
             id2dataSPM[id] = dataSPM
@@ -78,7 +100,7 @@ class Parser:
             for cgraCol in range(num_cgra_columns):
                 id = cgraRow * num_cgra_columns + cgraCol
                 cgras[cgraRow].append(ParamCGRA(
-                    per_cgra_rows, per_cgra_columns, id2validTiles[id], id2validLinks[id], id2dataSPM[id], id2ctrlMemSize_map[id]))
+                    per_cgra_rows, per_cgra_columns, id2validTiles[id], id2validLinks[id], id2dataSPM[id], id2ctrlMemSize_map[id], ctrlNetwork))
 
         return cgras
 
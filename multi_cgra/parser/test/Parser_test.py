@@ -1,7 +1,31 @@
 from ..Parser import Parser
 from ...test import MeshMultiCgraTemplateRTL_test
+from ....lib.util.common import *
 import os
+import pytest
+import yaml
 
 
 def test_Parser(cmdline_opts):
     MeshMultiCgraTemplateRTL_test.test_mesh_multi_cgra_universal(cmdline_opts, arch_yaml_path="arch.yaml")
+
+
+def test_Parser_default_ctrl_network():
+    arch_file = os.path.join(os.path.dirname(__file__), "arch.yaml")
+    assert Parser(arch_file).parse_ctrl_network() == CTRL_BIDIRECTIONAL_RING
+
+
+# Runs the same multi-CGRA test on a copy of arch.yaml, which only differs
+# in the intra-CGRA ctrl network.
+@pytest.mark.parametrize("ctrl_network", ["tree", "mesh"])
+def test_Parser_ctrl_network(cmdline_opts, tmp_path, ctrl_network):
+    arch_file = os.path.join(os.path.dirname(__file__), "arch.yaml")
+    with open(arch_file, 'r') as f:
+        yaml_data = yaml.safe_load(f)
+    yaml_data['cgra_defaults']['ctrl_network'] = ctrl_network
+    arch_yaml_path = str(tmp_path / "arch.yaml")
+    with open(arch_yaml_path, 'w') as f:
+        yaml.safe_dump(yaml_data, f)
+    assert Parser(arch_yaml_path).parse_ctrl_network() == \
+        {"tree": CTRL_TREE, "mesh": CTRL_MESH}[ctrl_network]
+    MeshMultiCgraTemplateRTL_test.test_mesh_multi_cgra_universal(cmdline_opts, arch_yaml_path=arch_yaml_path)
@@ -38,6 +38,8 @@ from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.sim_recorder import run_sim_with_recorder
+from ...lib.util.translation_cache import MemoizedVerilogTranslationPass
 
 
 #-------------------------------------------------------------------------
@@ -115,23 +117,9 @@ class TestHarness(Component):
     return s.dut.line_trace()
 
 def run_sim(test_harness, max_cycles = 200):
-  test_harness.apply(DefaultPassGroup())
-  test_harness.sim_reset()
-
-  # Runs simulation.
-  ncycles = 0
-  print("cycle {}:{}".format(ncycles, test_harness.line_trace()))
-  while not test_harness.done() and ncycles < max_cycles:
-    test_harness.sim_tick()
-    ncycles += 1
-    print("cycle {}:{}".format(ncycles, test_harness.line_trace()))
-
-  # Checks timeout.
-  assert ncycles < max_cycles
-
-  test_harness.sim_tick()
-  test_harness.sim_tick()
-  test_harness.sim_tick()
+  # Records raw snapshots every cycle and only formats them on sink error
+  # or timeout.
+  run_sim_with_recorder(test_harness, max_cycles)
 
 def initialize_test_harness(cmdline_opts,
                             num_cgra_rows = 2,
@@ -3129,7 +3117,7 @@ def translate_model(top, submodules_to_translate):
     for submodule in submodules_to_translate:
       m = getattr(top, submodule)
       _enable_translate_recursively(m)
-  top.apply(VerilogTranslationPass())
+  top.apply(MemoizedVerilogTranslationPass())
 
 def test_verilog_homo_2x2_4x4(cmdline_opts):
   th = initialize_test_harness(cmdline_opts,
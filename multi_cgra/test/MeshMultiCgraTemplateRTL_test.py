@@ -39,6 +39,7 @@ from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
 from ...lib.util.common import *
+from ...lib.util.line_trace_helper import print_line_trace
 from ..parser.Parser import Parser
 import os
 
@@ -59,7 +60,7 @@ class TestHarness(Component):
                 id2validTiles, id2validLinks, id2dataSPM,
                 mem_access_is_combinational,
                 controller2addr_map, expected_sink_out_pkt,
-                cmp_func):
+                cmp_func, ctrl_network = CTRL_BIDIRECTIONAL_RING):
 
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
     s.num_terminals = cgra_rows * cgra_columns
@@ -82,7 +83,8 @@ class TestHarness(Component):
                 ctrl_steps_per_iter, ctrl_steps_total, FunctionUnit, FuList,
                 controller2addr_map, id2ctrlMemSize_map, id2cgraSize_map, 
                 id2validTiles, id2validLinks, id2dataSPM,
-                mem_access_is_combinational
+                mem_access_is_combinational,
+                ctrl_network = ctrl_network
                 )
 
     # Connections
@@ -138,11 +140,11 @@ def run_sim(test_harness, max_cycles = 200):
 
   # Runs simulation.
   ncycles = 0
-  print("cycle {}:{}".format(ncycles, test_harness.line_trace()))
+  print_line_trace(ncycles, test_harness)
   while not test_harness.done() and ncycles < max_cycles:
     test_harness.sim_tick()
     ncycles += 1
-    print("cycle {}:{}".format(ncycles, test_harness.line_trace()))
+    print_line_trace(ncycles, test_harness)
 
   # Checks timeout.
   assert ncycles < max_cycles
@@ -367,7 +369,8 @@ def test_mesh_multi_cgra_universal(cmdline_opts, arch_yaml_path = "arch.yaml"):
                    id2ctrlMemSize_map, id2cgraSize_map, 
                    id2validTiles, id2validLinks, id2dataSPM,
                    mem_access_is_combinational,
-                   controller2addr_map, expected_sink_out_pkt, cmp_func)
+                   controller2addr_map, expected_sink_out_pkt, cmp_func,
+                   singleCgraParam.ctrlNetwork)
 
   th.elaborate()
   th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
@@ -39,6 +39,8 @@ from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.line_trace_helper import print_line_trace
+from ...lib.util.translation_cache import MemoizedVerilogTranslationPass
 
 
 #-------------------------------------------------------------------------
@@ -124,11 +126,11 @@ def run_sim(test_harness, max_cycles = 400):
 
   # Runs simulation.
   ncycles = 0
-  print("cycle {}:{}".format(ncycles, test_harness.line_trace()))
+  print_line_trace(ncycles, test_harness)
   while not test_harness.done() and ncycles < max_cycles:
     test_harness.sim_tick()
     ncycles += 1
-    print("cycle {}:{}".format(ncycles, test_harness.line_trace()))
+    print_line_trace(ncycles, test_harness)
 
   # Checks timeout.
   assert ncycles < max_cycles
@@ -1749,7 +1751,7 @@ def translate_model(top, submodules_to_translate):
     for submodule in submodules_to_translate:
       m = getattr(top, submodule)
       _enable_translate_recursively(m)
-  top.apply(VerilogTranslationPass())
+  top.apply(MemoizedVerilogTranslationPass())
 
 def test_multi_CGRA_fir_scalar_fused(cmdline_opts):
   th = initialize_test_harness(cmdline_opts,
@@ -5,6 +5,12 @@ CrossbarSeparate.py
 Data-driven crossbar. Valid data is sent out only when all the input
 channels have pending data.
 
+During the prologue, an inport whose remaining prologue count (at the
+current ctrl address, provided by the ctrl memory) is non-zero is not
+waited for, and each such inport consumed by the current ctrl signal
+raises its prologue_step_outport, so that the ctrl memory decrements the
+count.
+
 Author : Cheng Tan
   Date : Nov 29, 2024
 """
@@ -25,7 +31,6 @@ class CrossbarRTL(Component):
                 num_outports = 5,
                 num_cgras = 4,
                 num_tiles = 4,
-                ctrl_mem_size = 6,
                 outport_towards_local_base_id = 4):
 
     PredicateType = DataType.get_field_type(kAttrPredicate)
@@ -33,7 +38,6 @@ class CrossbarRTL(Component):
     num_index = num_inports if num_inports != 1 else 2
     NumInportType = mk_bits(clog2(num_index))
     PrologueCountType = mk_bits(clog2(PROLOGUE_MAX_COUNT + 1))
-    CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
 
     # Interface
     s.recv_opt = RecvIfcRTL(CtrlType)
@@ -59,24 +63,14 @@ class CrossbarRTL(Component):
     s.crossbar_id = InPort(b1)
     s.compute_done = InPort(b1)
 
-    s.ctrl_addr_inport = InPort(CtrlAddrType)
-
-    s.clear = InPort(b1)
-
-    # Prologue-related wires and registers, which are used to indicate
-    # whether the prologue steps have already been satisfied.
+    # Prologue-related ports and wires. The remaining prologue count of
+    # each inport at the current ctrl address comes from the ctrl memory,
+    # which indicates whether the prologue steps have already been
+    # satisfied.
+    s.prologue_count_inport = [InPort(PrologueCountType) for _ in range(num_inports)]
+    s.prologue_step_outport = [OutPort(b1) for _ in range(num_inports)]
     s.prologue_allowing_vector = Wire(num_outports)
     s.recv_valid_or_prologue_allowing_vector = Wire(num_outports)
-    s.prologue_counter = [[Wire(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
-    s.prologue_counter_next = [[Wire(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
-    s.prologue_count_inport = [[InPort(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
-    # Wiki of "Workaround for sv2v Flattening Multi‐dimensional Arrays into One‐dimensional Vectors"
-    # https://github.com/tancheng/VectorCGRA/wiki/Workaround-for-sv2v-Flattening-Multi%E2%80%90dimensional-Arrays-into-One%E2%80%90dimensional-Vectors
-    s.prologue_count_wire = [[Wire(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
-
-    for addr in range(ctrl_mem_size):
-      for i in range(num_inports):
-        s.prologue_count_inport[addr][i] //= s.prologue_count_wire[addr][i]
 
     # Routing logic
     @update
@@ -105,31 +99,18 @@ class CrossbarRTL(Component):
         s.recv_opt.rdy @= reduce_and(s.send_rdy_vector) & \
                           reduce_and(s.recv_valid_or_prologue_allowing_vector)
 
-    @update_ff
-    def update_prologue_counter():
-      if s.reset | s.clear:
-        for addr in range(ctrl_mem_size):
-          for i in range(num_inports):
-            s.prologue_counter[addr][i] <<= 0
-      else:
-        for addr in range(ctrl_mem_size):
-          for i in range(num_inports):
-            s.prologue_counter[addr][i] <<= s.prologue_counter_next[addr][i]
-
     @update
-    def update_prologue_counter_next():
-      # Nested-loop to update the prologue counter, to avoid dynamic indexing to
+    def update_prologue_step():
+      # Nested-loop to avoid dynamic indexing on the left-hand side, to
       # work-around Yosys issue: https://github.com/tancheng/VectorCGRA/issues/148
-      for addr in range(ctrl_mem_size):
-        for i in range(num_inports):
-          s.prologue_counter_next[addr][i] @= s.prologue_counter[addr][i]
-          for j in range(num_outports):
-            if s.recv_opt.rdy & \
-              (s.in_dir[j] > 0) & \
-              (s.in_dir_local[j] == i) & \
-              (addr == s.ctrl_addr_inport) & \
-              (s.prologue_counter[addr][i] < s.prologue_count_wire[addr][i]):
-              s.prologue_counter_next[addr][i] @= s.prologue_counter[addr][i] + 1
+      for i in range(num_inports):
+        s.prologue_step_outport[i] @= 0
+        for j in range(num_outports):
+          if s.recv_opt.rdy & \
+             (s.in_dir[j] > 0) & \
+             (s.in_dir_local[j] == i) & \
+             (s.prologue_count_inport[i] > 0):
+            s.prologue_step_outport[i] @= 1
 
     @update
     def update_prologue_allowing_vector():
@@ -138,8 +119,7 @@ class CrossbarRTL(Component):
         if s.in_dir[i] > 0:
           # Records whether the prologue steps have already been satisfied.
           s.prologue_allowing_vector[i] @= \
-            (s.prologue_counter[s.ctrl_addr_inport][s.in_dir_local[i]] < \
-             s.prologue_count_wire[s.ctrl_addr_inport][s.in_dir_local[i]])
+            (s.prologue_count_inport[s.in_dir_local[i]] > 0)
         else:
           s.prologue_allowing_vector[i] @= 1
 
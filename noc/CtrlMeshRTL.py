@@ -0,0 +1,116 @@
+"""
+=========================================================================
+CtrlMeshRTL.py
+=========================================================================
+Mesh overlay delivering the ctrl packets between the controller and the
+tiles of a CGRA. The tile routers follow the tile layout, i.e., tile i
+sits at row i // num_columns and column i % num_columns, and the
+controller router is attached to tile 0. The unicast packets use YX
+routing (the rows are contiguous ranges of tile ids, so the routers only
+compare the dst against ranges), and the packets towards the controller
+are routed as if it sits next to tile 0. The multicast packets from the
+controller go along column 0 and then along each row, reaching every
+tile in num_rows + num_columns - 1 hops. The interfaces align with
+CtrlRingRTL.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from .CtrlRouterRTL import CtrlRouterRTL
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.util.common import *
+
+class CtrlMeshRTL(Component):
+
+  def construct(s, PktType, num_routers, num_columns, num_entries = 2):
+
+    # Constants.
+    num_tiles = num_routers - 1
+    controller = num_tiles
+    assert(num_tiles % num_columns == 0)
+    num_rows = num_tiles // num_columns
+
+    # Ports and routing tables of each router, in which the port of each
+    # direction is looked up by the direction.
+    ports = {}
+    unicast_ranges = {}
+    multicast_outports = {}
+    neighbor = {}
+    for router in range(num_routers):
+      ranges = {}
+      multicast = {}
+      if router == controller:
+        ranges['self'] = [(controller, controller + 1)]
+        ranges['tile'] = [(0, num_tiles)]
+        multicast['self'] = ['tile']
+        neighbor[router] = {'tile': (0, 'ctrl')}
+      else:
+        row = router // num_columns
+        col = router % num_columns
+        row_lo = row * num_columns
+        row_hi = row_lo + num_columns
+        to_controller = [(controller, controller + 1)]
+        neighbor[router] = {}
+        ranges['self'] = [(router, router + 1)]
+        if row > 0:
+          ranges['south'] = [(0, row_lo)] + to_controller
+          neighbor[router]['south'] = (router - num_columns, 'north')
+        if row < num_rows - 1:
+          ranges['north'] = [(row_hi, num_tiles)]
+          neighbor[router]['north'] = (router + num_columns, 'south')
+        if col > 0:
+          ranges['west'] = [(row_lo, router)] + \
+                           (to_controller if row == 0 else [])
+          neighbor[router]['west'] = (router - 1, 'east')
+        if col < num_columns - 1:
+          ranges['east'] = [(router + 1, row_hi)]
+          neighbor[router]['east'] = (router + 1, 'west')
+        if router == 0:
+          ranges['ctrl'] = to_controller
+          neighbor[router]['ctrl'] = (controller, 'tile')
+
+        # The multicast packets go north along column 0, and east along
+        # each row.
+        row_outports = ['self'] + [direction for direction in ['east']
+                                   if direction in ranges]
+        column_outports = row_outports + \
+                          [direction for direction in ['north']
+                           if direction in ranges]
+        if col == 0:
+          multicast['ctrl' if router == 0 else 'south'] = column_outports
+        else:
+          multicast['west'] = row_outports
+
+      ports[router] = {direction: port
+                       for port, direction in enumerate(ranges)}
+      unicast_ranges[router] = list(ranges.values())
+      multicast_outports[router] = [[] for _ in ranges]
+      for direction, outports in multicast.items():
+        multicast_outports[router][ports[router][direction]] = \
+            [ports[router][outport] for outport in outports]
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PktType) for _ in range(num_routers)]
+    s.send = [SendIfcRTL(PktType) for _ in range(num_routers)]
+
+    # Components.
+    s.router = [CtrlRouterRTL(PktType, len(unicast_ranges[router]),
+                              unicast_ranges[router],
+                              multicast_outports[router], num_entries)
+                for router in range(num_routers)]
+
+    # Connections.
+    for router in range(num_routers):
+      s.recv[router] //= s.router[router].recv[ports[router]['self']]
+      s.router[router].send[ports[router]['self']] //= s.send[router]
+      for direction, (other, other_direction) in neighbor[router].items():
+        s.router[router].send[ports[router][direction]] //= \
+            s.router[other].recv[ports[other][other_direction]]
+
+  def line_trace(s):
+    return "|".join([f"r{i}{router.line_trace()}"
+                     for i, router in enumerate(s.router)])
+
@@ -0,0 +1,61 @@
+"""
+=========================================================================
+CtrlNetworkRTL.py
+=========================================================================
+Intra-CGRA ctrl network delivering the config packets from the
+controller to the tiles and collecting CMD_COMPLETE back, with the
+topology picked at elaboration time:
+  - CTRL_RING:               unidirectional ring (see CtrlRingRTL);
+  - CTRL_BIDIRECTIONAL_RING: bidirectional ring (see CtrlRingRTL);
+  - CTRL_TREE:               tree rooted at the controller (see
+                             CtrlTreeRTL);
+  - CTRL_MESH:               mesh overlay following the tile layout
+                             (see CtrlMeshRTL).
+The tiles are connected to recv/send [0, num_tiles) and the controller
+to the last ones.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from .CtrlMeshRTL import CtrlMeshRTL
+from .CtrlRingRTL import CtrlRingRTL
+from .CtrlTreeRTL import CtrlTreeRTL
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.util.common import *
+
+class CtrlNetworkRTL(Component):
+
+  def construct(s, PktType, num_tiles, num_columns,
+                topology = CTRL_BIDIRECTIONAL_RING):
+
+    assert topology in CTRL_NETWORK_TOPOLOGIES, \
+           f"Unknown ctrl network topology: {topology}"
+
+    # Constants.
+    num_routers = num_tiles + 1
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PktType) for _ in range(num_routers)]
+    s.send = [SendIfcRTL(PktType) for _ in range(num_routers)]
+
+    # Components.
+    if topology == CTRL_RING:
+      s.network = CtrlRingRTL(PktType, num_routers, bidirectional = False)
+    elif topology == CTRL_BIDIRECTIONAL_RING:
+      s.network = CtrlRingRTL(PktType, num_routers)
+    elif topology == CTRL_TREE:
+      s.network = CtrlTreeRTL(PktType, num_routers)
+    else:
+      s.network = CtrlMeshRTL(PktType, num_routers, num_columns)
+
+    # Connections.
+    for i in range(num_routers):
+      s.recv[i] //= s.network.recv[i]
+      s.network.send[i] //= s.send[i]
+
+  def line_trace(s):
+    return s.network.line_trace()
+
@@ -0,0 +1,46 @@
+"""
+=========================================================================
+CtrlRingRTL.py
+=========================================================================
+Ring (bidirectional by default) delivering the ctrl packets between the
+controller and the tiles of a CGRA, with multicast support (see
+CtrlRingRouterRTL).
+The interfaces align with RingNetworkRTL, i.e., the tiles are connected
+to routers [0, num_tiles) and the controller to the last router.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from .CtrlRingRouterRTL import *
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+
+class CtrlRingRTL(Component):
+
+  def construct(s, PktType, num_routers, num_entries = 3,
+                bidirectional = True):
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PktType) for _ in range(num_routers)]
+    s.send = [SendIfcRTL(PktType) for _ in range(num_routers)]
+
+    # Components.
+    s.router = [CtrlRingRouterRTL(PktType, num_routers, num_entries,
+                                  bidirectional)
+                for _ in range(num_routers)]
+
+    # Connections.
+    for i in range(num_routers):
+      s.router[i].router_id //= i
+      s.recv[i] //= s.router[i].recv[kSelfIdx]
+      s.router[i].send[kSelfIdx] //= s.send[i]
+      s.router[i].send[kCwIdx] //= \
+          s.router[(i + 1) % num_routers].recv[kCwIdx]
+      s.router[i].send[kCcwIdx] //= \
+          s.router[(i - 1) % num_routers].recv[kCcwIdx]
+
+  def line_trace(s):
+    return "|".join([router.line_trace() for router in s.router])
+
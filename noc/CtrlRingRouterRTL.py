@@ -0,0 +1,222 @@
+"""
+=========================================================================
+CtrlRingRouterRTL.py
+=========================================================================
+Router of the bidirectional ctrl ring (see CtrlRingRTL), supporting both
+unicast and multicast packets.
+
+The unicast packets are injected towards the shorter direction and keep
+going in that direction until reaching the dst router. The multicast
+packets (i.e., dst_group != TILE_GROUP_UNICAST) are injected by the last
+router (i.e., the controller) and copied to every other router: the
+clockwise copy covers routers [0, num_routers // 2), and the
+counterclockwise copy covers the rest. Each router delivers a multicast
+packet locally and forwards it at the same time, so that all the tiles
+receive it within half of the ring traversal. Whether the tile belongs
+to the group is checked by the tile itself.
+
+With bidirectional = False, all the packets go clockwise, i.e., the
+multicast packets travel through the whole ring, and the
+counterclockwise ports are left unused.
+
+Each output port is buffered by a queue. The injected packets need two
+free entries while the in-transit ones need one (i.e., bubble flow
+control), which avoids the deadlock on the ring without virtual
+channels. The in-transit packets are prioritized over the injected ones,
+and the two directions take turns on the local output.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.basic.val_rdy.queues import NormalQueueRTL
+from ..lib.util.common import *
+from ..lib.util.data_struct_attr import *
+
+# Port indices. The clockwise port receives from router_id - 1 and sends
+# to router_id + 1, and the counterclockwise port the other way around.
+kCwIdx = 0
+kCcwIdx = 1
+kSelfIdx = 2
+kNumRingPorts = 3
+
+class CtrlRingRouterRTL(Component):
+
+  def construct(s, PktType, num_routers, num_entries = 3,
+                bidirectional = True):
+
+    # Bubble flow control needs at least one entry besides the injected
+    # packet.
+    assert(num_entries >= 2)
+    assert(num_routers >= 2)
+
+    # Constants.
+    RouterIdType = PktType.get_field_type(kAttrDst)
+    DistType = mk_bits(RouterIdType.nbits + 1)
+    PortsType = mk_bits(kNumRingPorts)
+    CountType = mk_bits(clog2(num_entries + 1))
+    num_cw_routers = num_routers // 2 if bidirectional else num_routers - 1
+    last_cw_router = num_cw_routers - 1
+    first_ccw_router = num_cw_routers
+    has_ccw = b1(num_cw_routers < num_routers - 1)
+    is_bidirectional = b1(bidirectional)
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PktType) for _ in range(kNumRingPorts)]
+    s.send = [SendIfcRTL(PktType) for _ in range(kNumRingPorts)]
+    s.router_id = InPort(RouterIdType)
+
+    # Components.
+    s.queue = [NormalQueueRTL(PktType, num_entries)
+               for _ in range(kNumRingPorts)]
+
+    # Requested outports of each inport.
+    s.req = [Wire(PortsType) for _ in range(kNumRingPorts)]
+    # Granted inport of each outport.
+    s.grant = [Wire(PortsType) for _ in range(kNumRingPorts)]
+    s.fire = Wire(PortsType)
+    s.cw_dist = Wire(DistType)
+    s.ccw_dist = Wire(DistType)
+    # Which direction goes first on the local outport.
+    s.self_priority = Wire(1)
+
+    # Connections.
+    for i in range(kNumRingPorts):
+      s.queue[i].send //= s.send[i]
+
+    @update
+    def compute_dist():
+      if s.recv[kSelfIdx].msg.dst >= s.router_id:
+        s.cw_dist @= zext(s.recv[kSelfIdx].msg.dst, DistType) - \
+                     zext(s.router_id, DistType)
+        s.ccw_dist @= DistType(num_routers) - s.cw_dist
+      else:
+        s.ccw_dist @= zext(s.router_id, DistType) - \
+                      zext(s.recv[kSelfIdx].msg.dst, DistType)
+        s.cw_dist @= DistType(num_routers) - s.ccw_dist
+
+    @update
+    def route():
+      for i in range(kNumRingPorts):
+        s.req[i] @= 0
+
+      # The in-transit packets either arrive, or keep going in the same
+      # direction. The multicast ones do both till the end of their
+      # range.
+      if s.recv[kCwIdx].val:
+        if s.recv[kCwIdx].msg.dst_group != TILE_GROUP_UNICAST:
+          s.req[kCwIdx][kSelfIdx] @= 1
+          if s.router_id < RouterIdType(last_cw_router):
+            s.req[kCwIdx][kCwIdx] @= 1
+        elif s.recv[kCwIdx].msg.dst == s.router_id:
+          s.req[kCwIdx][kSelfIdx] @= 1
+        else:
+          s.req[kCwIdx][kCwIdx] @= 1
+
+      if s.recv[kCcwIdx].val:
+        if s.recv[kCcwIdx].msg.dst_group != TILE_GROUP_UNICAST:
+          s.req[kCcwIdx][kSelfIdx] @= 1
+          if s.router_id > RouterIdType(first_ccw_router):
+            s.req[kCcwIdx][kCcwIdx] @= 1
+        elif s.recv[kCcwIdx].msg.dst == s.router_id:
+          s.req[kCcwIdx][kSelfIdx] @= 1
+        else:
+          s.req[kCcwIdx][kCcwIdx] @= 1
+
+      if s.recv[kSelfIdx].val:
+        if s.recv[kSelfIdx].msg.dst_group != TILE_GROUP_UNICAST:
+          s.req[kSelfIdx][kCwIdx] @= 1
+          s.req[kSelfIdx][kCcwIdx] @= has_ccw
+        elif ~is_bidirectional | (s.cw_dist <= s.ccw_dist):
+          s.req[kSelfIdx][kCwIdx] @= 1
+        else:
+          s.req[kSelfIdx][kCcwIdx] @= 1
+
+    @update
+    def arbitrate():
+      for i in range(kNumRingPorts):
+        s.grant[i] @= 0
+
+      # The in-transit packets go first on the ring.
+      if s.req[kCwIdx][kCwIdx]:
+        s.grant[kCwIdx][kCwIdx] @= 1
+      elif s.req[kSelfIdx][kCwIdx]:
+        s.grant[kCwIdx][kSelfIdx] @= 1
+
+      if s.req[kCcwIdx][kCcwIdx]:
+        s.grant[kCcwIdx][kCcwIdx] @= 1
+      elif s.req[kSelfIdx][kCcwIdx]:
+        s.grant[kCcwIdx][kSelfIdx] @= 1
+
+      # Both directions take turns on the local outport.
+      if s.req[kCwIdx][kSelfIdx] & \
+         (~s.req[kCcwIdx][kSelfIdx] | (s.self_priority == 0)):
+        s.grant[kSelfIdx][kCwIdx] @= 1
+      elif s.req[kCcwIdx][kSelfIdx]:
+        s.grant[kSelfIdx][kCcwIdx] @= 1
+
+      # An inport proceeds once all of its requested outports are
+      # granted and available. The injected packets leave one more entry
+      # on the ring.
+      s.fire[kCwIdx] @= \
+          s.recv[kCwIdx].val & \
+          (~s.req[kCwIdx][kCwIdx] | \
+           (s.grant[kCwIdx][kCwIdx] & s.queue[kCwIdx].recv.rdy)) & \
+          (~s.req[kCwIdx][kSelfIdx] | \
+           (s.grant[kSelfIdx][kCwIdx] & s.queue[kSelfIdx].recv.rdy))
+      s.fire[kCcwIdx] @= \
+          s.recv[kCcwIdx].val & \
+          (~s.req[kCcwIdx][kCcwIdx] | \
+           (s.grant[kCcwIdx][kCcwIdx] & s.queue[kCcwIdx].recv.rdy)) & \
+          (~s.req[kCcwIdx][kSelfIdx] | \
+           (s.grant[kSelfIdx][kCcwIdx] & s.queue[kSelfIdx].recv.rdy))
+      s.fire[kSelfIdx] @= \
+          s.recv[kSelfIdx].val & \
+          (~s.req[kSelfIdx][kCwIdx] | \
+           (s.grant[kCwIdx][kSelfIdx] & \
+            (s.queue[kCwIdx].count < CountType(num_entries - 1)))) & \
+          (~s.req[kSelfIdx][kCcwIdx] | \
+           (s.grant[kCcwIdx][kSelfIdx] & \
+            (s.queue[kCcwIdx].count < CountType(num_entries - 1))))
+
+      for i in range(kNumRingPorts):
+        s.recv[i].rdy @= s.fire[i]
+
+      s.queue[kCwIdx].recv.val @= \
+          (s.grant[kCwIdx][kCwIdx] & s.fire[kCwIdx]) | \
+          (s.grant[kCwIdx][kSelfIdx] & s.fire[kSelfIdx])
+      s.queue[kCwIdx].recv.msg @= s.recv[kCwIdx].msg
+      if s.grant[kCwIdx][kSelfIdx]:
+        s.queue[kCwIdx].recv.msg @= s.recv[kSelfIdx].msg
+
+      s.queue[kCcwIdx].recv.val @= \
+          (s.grant[kCcwIdx][kCcwIdx] & s.fire[kCcwIdx]) | \
+          (s.grant[kCcwIdx][kSelfIdx] & s.fire[kSelfIdx])
+      s.queue[kCcwIdx].recv.msg @= s.recv[kCcwIdx].msg
+      if s.grant[kCcwIdx][kSelfIdx]:
+        s.queue[kCcwIdx].recv.msg @= s.recv[kSelfIdx].msg
+
+      s.queue[kSelfIdx].recv.val @= \
+          (s.grant[kSelfIdx][kCwIdx] & s.fire[kCwIdx]) | \
+          (s.grant[kSelfIdx][kCcwIdx] & s.fire[kCcwIdx])
+      s.queue[kSelfIdx].recv.msg @= s.recv[kCwIdx].msg
+      if s.grant[kSelfIdx][kCcwIdx]:
+        s.queue[kSelfIdx].recv.msg @= s.recv[kCcwIdx].msg
+
+    @update_ff
+    def update_self_priority():
+      if s.reset:
+        s.self_priority <<= 0
+      elif s.grant[kSelfIdx][kCwIdx] & s.fire[kCwIdx]:
+        s.self_priority <<= 1
+      elif s.grant[kSelfIdx][kCcwIdx] & s.fire[kCcwIdx]:
+        s.self_priority <<= 0
+
+  def line_trace(s):
+    recv_str = "|".join([f"{int(x.val)}{int(x.rdy)}" for x in s.recv])
+    queue_str = "|".join([str(int(q.count)) for q in s.queue])
+    return f"r{int(s.router_id)}({recv_str}:{queue_str})"
+
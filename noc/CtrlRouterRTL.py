@@ -0,0 +1,146 @@
+"""
+=========================================================================
+CtrlRouterRTL.py
+=========================================================================
+Table-driven router of the tree and mesh ctrl networks (see
+CtrlTreeRTL and CtrlMeshRTL), supporting both unicast and multicast
+packets.
+
+The routing tables are elaboration-time constants of each router:
+  - unicast_ranges[o] lists the [lo, hi) dst ranges that go through
+    outport o (at most one outport is expected to match a dst);
+  - multicast_outports[i] lists the outports that a multicast packet
+    (i.e., dst_group != TILE_GROUP_UNICAST) received from inport i is
+    copied to. Whether the tile belongs to the group is checked by the
+    tile itself.
+
+Each output port is buffered by a queue and arbitrated in a round-robin
+manner. A multicast packet proceeds once all of its outports are granted
+and available. There is no virtual channel, so the topologies built on
+top must be free of cyclic channel dependencies (e.g., up/down routing
+in the tree, and YX routing in the mesh).
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.basic.val_rdy.queues import NormalQueueRTL
+from ..lib.util.common import *
+from ..lib.util.data_struct_attr import *
+
+class CtrlRouterRTL(Component):
+
+  def construct(s, PktType, num_ports, unicast_ranges, multicast_outports,
+                num_entries = 2):
+
+    assert(len(unicast_ranges) == num_ports)
+    assert(len(multicast_outports) == num_ports)
+
+    # Constants.
+    RouterIdType = PktType.get_field_type(kAttrDst)
+    # One more bit to hold the exclusive upper bound of the ranges.
+    RangeType = mk_bits(RouterIdType.nbits + 1)
+    PortsType = mk_bits(num_ports)
+    PriorityType = mk_bits(max(1, clog2(num_ports)))
+    num_ranges = max([1] + [len(ranges) for ranges in unicast_ranges])
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PktType) for _ in range(num_ports)]
+    s.send = [SendIfcRTL(PktType) for _ in range(num_ports)]
+
+    # Components.
+    s.queue = [NormalQueueRTL(PktType, num_entries)
+               for _ in range(num_ports)]
+
+    # Routing tables. The unused ranges are left empty, i.e., [0, 0).
+    s.range_lo = [[Wire(RangeType) for _ in range(num_ranges)]
+                  for _ in range(num_ports)]
+    s.range_hi = [[Wire(RangeType) for _ in range(num_ranges)]
+                  for _ in range(num_ports)]
+    s.multicast_outports = [Wire(PortsType) for _ in range(num_ports)]
+
+    # Requested outports of each inport.
+    s.req = [Wire(PortsType) for _ in range(num_ports)]
+    # Granted inport of each outport.
+    s.grant = [Wire(PortsType) for _ in range(num_ports)]
+    s.fire = Wire(PortsType)
+    # The inport with the highest priority on each outport.
+    s.priority_ptr = [Wire(PriorityType) for _ in range(num_ports)]
+
+    # Connections.
+    for o in range(num_ports):
+      s.queue[o].send //= s.send[o]
+      for k in range(num_ranges):
+        lo, hi = unicast_ranges[o][k] if k < len(unicast_ranges[o]) \
+                 else (0, 0)
+        s.range_lo[o][k] //= RangeType(lo)
+        s.range_hi[o][k] //= RangeType(hi)
+
+    for i in range(num_ports):
+      s.multicast_outports[i] //= \
+          PortsType(sum([1 << o for o in multicast_outports[i]]))
+
+    @update
+    def route():
+      for i in range(num_ports):
+        s.req[i] @= 0
+        if s.recv[i].val:
+          if s.recv[i].msg.dst_group != TILE_GROUP_UNICAST:
+            s.req[i] @= s.multicast_outports[i]
+          else:
+            for o in range(num_ports):
+              for k in range(num_ranges):
+                if (zext(s.recv[i].msg.dst, RangeType) >= \
+                    s.range_lo[o][k]) & \
+                   (zext(s.recv[i].msg.dst, RangeType) < \
+                    s.range_hi[o][k]):
+                  s.req[i][o] @= 1
+
+    @update
+    def arbitrate():
+      # Round-robin, starting from the inport with the highest priority.
+      for o in range(num_ports):
+        s.grant[o] @= 0
+        for i in range(num_ports):
+          if s.req[i][o] & (s.grant[o] == 0) & \
+             (PriorityType(i) >= s.priority_ptr[o]):
+            s.grant[o][i] @= 1
+        for i in range(num_ports):
+          if s.req[i][o] & (s.grant[o] == 0):
+            s.grant[o][i] @= 1
+
+      # An inport proceeds once all of its requested outports are granted
+      # and available.
+      for i in range(num_ports):
+        s.fire[i] @= s.recv[i].val
+        for o in range(num_ports):
+          if s.req[i][o] & ~(s.grant[o][i] & s.queue[o].recv.rdy):
+            s.fire[i] @= 0
+        s.recv[i].rdy @= s.fire[i]
+
+      for o in range(num_ports):
+        s.queue[o].recv.val @= 0
+        s.queue[o].recv.msg @= s.recv[0].msg
+        for i in range(num_ports):
+          if s.grant[o][i]:
+            s.queue[o].recv.val @= s.fire[i]
+            s.queue[o].recv.msg @= s.recv[i].msg
+
+    @update_ff
+    def update_priority():
+      for o in range(num_ports):
+        if s.reset:
+          s.priority_ptr[o] <<= 0
+        else:
+          for i in range(num_ports):
+            if s.grant[o][i] & s.fire[i]:
+              s.priority_ptr[o] <<= PriorityType((i + 1) % num_ports)
+
+  def line_trace(s):
+    recv_str = "|".join([f"{int(x.val)}{int(x.rdy)}" for x in s.recv])
+    queue_str = "|".join([str(int(q.count)) for q in s.queue])
+    return f"({recv_str}:{queue_str})"
+
@@ -0,0 +1,100 @@
+"""
+=========================================================================
+CtrlTreeRTL.py
+=========================================================================
+Tree delivering the ctrl packets between the controller and the tiles of
+a CGRA (see ctrl_tree_children() in lib/util/ctrl_network_helper.py for
+the layout). The controller router is the root, and each tile router
+owns a contiguous range of tile ids, so the unicast packets go up till
+the subtree covering the dst, then down. The multicast packets from the
+controller are copied down to all the subtrees, reaching every tile in
+O(log(num_tiles)) hops. The interfaces align with CtrlRingRTL.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from .CtrlRouterRTL import CtrlRouterRTL
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.util.common import *
+from ..lib.util.ctrl_network_helper import ctrl_tree_children
+
+# Port indices. The parent port is absent on the root, and the children
+# ports follow.
+kTreeSelfIdx = 0
+kTreeParentIdx = 1
+
+class CtrlTreeRTL(Component):
+
+  def construct(s, PktType, num_routers, arity = CTRL_TREE_ARITY,
+                num_entries = 2):
+
+    # Constants.
+    num_tiles = num_routers - 1
+    root = num_tiles
+    children = ctrl_tree_children(num_tiles, arity)
+
+    # Ports, subtree range and routing tables of each router.
+    parent = {}
+    parent_port = {}
+    child_port = {}
+    subtree = {root: (0, num_routers)}
+    unicast_ranges = {}
+    multicast_outports = {}
+    for router in range(num_routers):
+      first_child_port = kTreeSelfIdx + 1 if router == root \
+                         else kTreeParentIdx + 1
+      for j, (child, lo, hi) in enumerate(children[router]):
+        parent[child] = router
+        child_port[child] = first_child_port + j
+        subtree[child] = (lo, hi)
+
+    for router in range(num_routers):
+      lo, hi = subtree[router]
+      self_id = root if router == root else lo
+      ranges = [[(self_id, self_id + 1)]]
+      if router != root:
+        parent_port[router] = kTreeParentIdx
+        ranges.append([(l, h) for l, h in [(0, lo), (hi, num_routers)]
+                       if l < h])
+      ranges += [[(child_lo, child_hi)]
+                 for _, child_lo, child_hi in children[router]]
+      unicast_ranges[router] = ranges
+
+      # The multicast packets come from the parent (or the controller
+      # itself on the root), and go to all the children.
+      down = [child_port[child] for child, _, _ in children[router]]
+      outports = [[] for _ in ranges]
+      if router == root:
+        outports[kTreeSelfIdx] = down
+      else:
+        outports[kTreeParentIdx] = [kTreeSelfIdx] + down
+      multicast_outports[router] = outports
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PktType) for _ in range(num_routers)]
+    s.send = [SendIfcRTL(PktType) for _ in range(num_routers)]
+
+    # Components.
+    s.router = [CtrlRouterRTL(PktType, len(unicast_ranges[router]),
+                              unicast_ranges[router],
+                              multicast_outports[router], num_entries)
+                for router in range(num_routers)]
+
+    # Connections.
+    for router in range(num_routers):
+      s.recv[router] //= s.router[router].recv[kTreeSelfIdx]
+      s.router[router].send[kTreeSelfIdx] //= s.send[router]
+      if router != root:
+        up = s.router[parent[router]]
+        s.router[router].send[kTreeParentIdx] //= \
+            up.recv[child_port[router]]
+        up.send[child_port[router]] //= \
+            s.router[router].recv[kTreeParentIdx]
+
+  def line_trace(s):
+    return "|".join([f"r{i}{router.line_trace()}"
+                     for i, router in enumerate(s.router)])
+
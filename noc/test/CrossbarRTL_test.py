@@ -27,7 +27,6 @@ class TestHarness(Component):
                 sink_out):
 
     num_tiles = 1
-    ctrl_mem_size = 6
     s.num_inports  = num_inports
     s.num_outports = num_outports
 
@@ -38,12 +37,11 @@ class TestHarness(Component):
                   for i in range(num_outports)]
 
     s.dut = CrossbarUnit(DataType, CtrlType, num_inports,
-                         num_outports, num_tiles, ctrl_mem_size)
+                         num_outports, num_tiles)
 
     for i in range(num_inports):
       s.src_data[i].send //= s.dut.recv_data[i]
-      for addr in range(ctrl_mem_size):
-        s.dut.prologue_count_inport[addr][i] //= 0
+      s.dut.prologue_count_inport[i] //= 0
     s.src_opt.send //= s.dut.recv_opt
 
     for i in range(num_outports):
@@ -0,0 +1,172 @@
+"""
+==========================================================================
+CtrlNetworkRTL_test.py
+==========================================================================
+Test cases for the ctrl network of each topology.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import pytest
+from pymtl3 import *
+from ..CtrlNetworkRTL import CtrlNetworkRTL
+from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.cmd_type import *
+from ...lib.messages import *
+from ...lib.util.common import *
+from ...lib.util.line_trace_helper import print_line_trace
+
+#-------------------------------------------------------------------------
+# Test harness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, PktType, num_tiles, num_columns, topology, src_pkts,
+                sink_pkts, cmp_fn = lambda a, b : a == b):
+
+    num_routers = num_tiles + 1
+    s.src = [TestSrcRTL(PktType, src_pkts[i]) for i in range(num_routers)]
+    s.sink = [TestSinkRTL(PktType, sink_pkts[i], cmp_fn = cmp_fn)
+              for i in range(num_routers)]
+    s.dut = CtrlNetworkRTL(PktType, num_tiles, num_columns, topology)
+
+    for i in range(num_routers):
+      s.src[i].send //= s.dut.recv[i]
+      s.dut.send[i] //= s.sink[i].recv
+
+  def done(s):
+    return all(src.done() for src in s.src) and \
+           all(sink.done() for sink in s.sink)
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+def run_sim(test_harness, max_cycles = 500, verbose = True):
+  test_harness.elaborate()
+  test_harness.apply(DefaultPassGroup())
+  test_harness.sim_reset()
+
+  # Run simulation
+  ncycles = 0
+  if verbose:
+    print_line_trace(ncycles, test_harness)
+  while not test_harness.done() and ncycles < max_cycles:
+    test_harness.sim_tick()
+    ncycles += 1
+    if verbose:
+      print_line_trace(ncycles, test_harness)
+
+  # Check timeout
+  assert ncycles < max_cycles
+
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  return ncycles
+
+def mk_pkt_type(num_tiles):
+  DataType = mk_data(32, 1)
+  CgraPayloadType = mk_cgra_payload(DataType, mk_bits(4), mk_ctrl(),
+                                    mk_bits(3))
+  return mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+def mk_pkt(PktType, src, dst, value, cmd = CMD_CONST,
+           dst_group = TILE_GROUP_UNICAST):
+  CgraPayloadType = PktType.get_field_type(kAttrPayload)
+  DataType = CgraPayloadType.get_field_type(kAttrData)
+  return PktType(src, dst,
+                 payload = CgraPayloadType(cmd, data = DataType(value, 1)),
+                 dst_group = dst_group)
+
+# The controller sends num_pkts_per_tile packets to each tile (or
+# multicasts them), and every tile reports back.
+def mk_config_pkts(PktType, num_tiles, num_pkts_per_tile,
+                   multicast = False):
+  controller = num_tiles
+  src_pkts = [[] for _ in range(num_tiles + 1)]
+  sink_pkts = [[] for _ in range(num_tiles + 1)]
+  for value in range(num_pkts_per_tile):
+    if multicast:
+      pkt = mk_pkt(PktType, controller, 0, value,
+                   dst_group = TILE_GROUP_ALL)
+      src_pkts[controller].append(pkt)
+      for tile in range(num_tiles):
+        sink_pkts[tile].append(pkt)
+    else:
+      for tile in range(num_tiles):
+        pkt = mk_pkt(PktType, controller, tile, tile * 10 + value)
+        src_pkts[controller].append(pkt)
+        sink_pkts[tile].append(pkt)
+  return src_pkts, sink_pkts
+
+# Every tile reports CMD_COMPLETE to the controller at the same time. The
+# arrival order is up to the topology, so only the payload is checked
+# (see cmp_payload).
+def mk_complete_pkts(PktType, num_tiles):
+  controller = num_tiles
+  src_pkts = [[] for _ in range(num_tiles + 1)]
+  sink_pkts = [[] for _ in range(num_tiles + 1)]
+  for tile in range(num_tiles):
+    pkt = mk_pkt(PktType, tile, controller, 0, CMD_COMPLETE)
+    src_pkts[tile].append(pkt)
+    sink_pkts[controller].append(pkt)
+  return src_pkts, sink_pkts
+
+cmp_payload = lambda a, b : a.payload == b.payload
+
+num_tiles = 9
+num_columns = 3
+IntraCgraPktType = mk_pkt_type(num_tiles)
+
+@pytest.mark.parametrize('topology', CTRL_NETWORK_TOPOLOGIES)
+def test_config(topology):
+  src_pkts, sink_pkts = mk_config_pkts(IntraCgraPktType, num_tiles, 2)
+  run_sim(TestHarness(IntraCgraPktType, num_tiles, num_columns, topology,
+                      src_pkts, sink_pkts))
+
+@pytest.mark.parametrize('topology', CTRL_NETWORK_TOPOLOGIES)
+def test_complete(topology):
+  src_pkts, sink_pkts = mk_complete_pkts(IntraCgraPktType, num_tiles)
+  run_sim(TestHarness(IntraCgraPktType, num_tiles, num_columns, topology,
+                      src_pkts, sink_pkts, cmp_payload))
+
+@pytest.mark.parametrize('topology', CTRL_NETWORK_TOPOLOGIES)
+def test_multicast(topology):
+  src_pkts, sink_pkts = mk_config_pkts(IntraCgraPktType, num_tiles, 4,
+                                       multicast = True)
+  run_sim(TestHarness(IntraCgraPktType, num_tiles, num_columns, topology,
+                      src_pkts, sink_pkts))
+
+# Every router sends to the one `shift` routers away, all at the same
+# time.
+@pytest.mark.parametrize('topology', CTRL_NETWORK_TOPOLOGIES)
+@pytest.mark.parametrize('shift', [1, 4, 7])
+def test_all_to_all(topology, shift):
+  num_routers = num_tiles + 1
+  src_pkts = [[] for _ in range(num_routers)]
+  sink_pkts = [[] for _ in range(num_routers)]
+  for value in range(3):
+    for router in range(num_routers):
+      dst = (router + shift) % num_routers
+      pkt = mk_pkt(IntraCgraPktType, router, dst, router * 10 + value)
+      src_pkts[router].append(pkt)
+      sink_pkts[dst].append(pkt)
+  run_sim(TestHarness(IntraCgraPktType, num_tiles, num_columns, topology,
+                      src_pkts, sink_pkts))
+
+# The tree and the mesh reach the tiles in fewer hops than the rings.
+def test_multicast_latency():
+  cycles = {}
+  for topology in CTRL_NETWORK_TOPOLOGIES:
+    src_pkts, sink_pkts = mk_config_pkts(IntraCgraPktType, num_tiles, 1,
+                                         multicast = True)
+    cycles[topology] = run_sim(TestHarness(IntraCgraPktType, num_tiles,
+                                           num_columns, topology,
+                                           src_pkts, sink_pkts))
+  assert cycles[CTRL_BIDIRECTIONAL_RING] < cycles[CTRL_RING]
+  assert cycles[CTRL_TREE] < cycles[CTRL_BIDIRECTIONAL_RING]
+  assert cycles[CTRL_MESH] < cycles[CTRL_RING]
+
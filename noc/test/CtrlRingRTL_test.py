@@ -0,0 +1,134 @@
+"""
+==========================================================================
+CtrlRingRTL_test.py
+==========================================================================
+Test cases for the ctrl ring with unicast and multicast packets.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import pytest
+from pymtl3 import *
+from ..CtrlRingRTL import CtrlRingRTL
+from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.cmd_type import *
+from ...lib.messages import *
+from ...lib.util.common import *
+from ...lib.util.line_trace_helper import print_line_trace
+
+#-------------------------------------------------------------------------
+# Test harness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, PktType, num_routers, src_pkts, sink_pkts):
+
+    s.num_routers = num_routers
+    s.src = [TestSrcRTL(PktType, src_pkts[i]) for i in range(num_routers)]
+    s.sink = [TestSinkRTL(PktType, sink_pkts[i])
+              for i in range(num_routers)]
+    s.dut = CtrlRingRTL(PktType, num_routers)
+
+    for i in range(num_routers):
+      s.src[i].send //= s.dut.recv[i]
+      s.dut.send[i] //= s.sink[i].recv
+
+  def done(s):
+    return all(src.done() for src in s.src) and \
+           all(sink.done() for sink in s.sink)
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+def run_sim(test_harness, max_cycles = 200):
+  test_harness.elaborate()
+  test_harness.apply(DefaultPassGroup())
+  test_harness.sim_reset()
+
+  # Run simulation
+  ncycles = 0
+  print_line_trace(ncycles, test_harness)
+  while not test_harness.done() and ncycles < max_cycles:
+    test_harness.sim_tick()
+    ncycles += 1
+    print_line_trace(ncycles, test_harness)
+
+  # Check timeout
+  assert ncycles < max_cycles
+
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  return ncycles
+
+num_tiles = 9
+num_routers = num_tiles + 1
+kControllerId = num_tiles
+DataType = mk_data(32, 1)
+CtrlType = mk_ctrl()
+CgraPayloadType = mk_cgra_payload(DataType, mk_bits(4), CtrlType,
+                                  mk_bits(3))
+IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+def mk_pkt(src, dst, value, cmd = CMD_CONST, dst_group = TILE_GROUP_UNICAST):
+  return IntraCgraPktType(src, dst,
+                          payload = CgraPayloadType(cmd,
+                                                    data = DataType(value, 1)),
+                          dst_group = dst_group)
+
+def test_unicast():
+  src_pkts = [[] for _ in range(num_routers)]
+  sink_pkts = [[] for _ in range(num_routers)]
+  # The controller sends two packets to each tile, and the last tile
+  # reports back.
+  for value in range(2):
+    for tile in range(num_tiles):
+      pkt = mk_pkt(kControllerId, tile, tile * 10 + value)
+      src_pkts[kControllerId].append(pkt)
+      sink_pkts[tile].append(pkt)
+  pkt = mk_pkt(num_tiles - 1, kControllerId, 0, CMD_COMPLETE)
+  src_pkts[num_tiles - 1].append(pkt)
+  sink_pkts[kControllerId].append(pkt)
+  run_sim(TestHarness(IntraCgraPktType, num_routers, src_pkts, sink_pkts))
+
+# Every router sends to the one `shift` hops away clockwise, i.e., the
+# packets go clockwise for shift <= num_routers // 2, and counterclockwise
+# otherwise, all at the same time.
+@pytest.mark.parametrize('shift', [1, 3, 5, 7])
+def test_unicast_all_routers(shift):
+  src_pkts = [[] for _ in range(num_routers)]
+  sink_pkts = [[] for _ in range(num_routers)]
+  for value in range(3):
+    for router in range(num_routers):
+      dst = (router + shift) % num_routers
+      pkt = mk_pkt(router, dst, router * 10 + value)
+      src_pkts[router].append(pkt)
+      sink_pkts[dst].append(pkt)
+  run_sim(TestHarness(IntraCgraPktType, num_routers, src_pkts, sink_pkts))
+
+def test_multicast():
+  src_pkts = [[] for _ in range(num_routers)]
+  sink_pkts = [[] for _ in range(num_routers)]
+  for value in range(4):
+    pkt = mk_pkt(kControllerId, 0, value, dst_group = TILE_GROUP_ALL)
+    src_pkts[kControllerId].append(pkt)
+    for tile in range(num_tiles):
+      sink_pkts[tile].append(pkt)
+  multicast_cycles = \
+      run_sim(TestHarness(IntraCgraPktType, num_routers, src_pkts, sink_pkts))
+
+  # Delivering the same packets one tile at a time takes longer.
+  src_pkts = [[] for _ in range(num_routers)]
+  sink_pkts = [[] for _ in range(num_routers)]
+  for value in range(4):
+    for tile in range(num_tiles):
+      pkt = mk_pkt(kControllerId, tile, value)
+      src_pkts[kControllerId].append(pkt)
+      sink_pkts[tile].append(pkt)
+  unicast_cycles = \
+      run_sim(TestHarness(IntraCgraPktType, num_routers, src_pkts, sink_pkts))
+  assert multicast_cycles < unicast_cycles
+
@@ -0,0 +1,68 @@
+"""
+==========================================================================
+ctrl_network_bench.py
+==========================================================================
+Benchmark of the intra-CGRA ctrl network topologies (see CtrlNetworkRTL).
+For each topology and CGRA size, it reports the cycles taken to:
+  - config: deliver num_pkts_per_tile unicast config packets from the
+            controller to every tile;
+  - mcast:  deliver the same amount of packets as TILE_GROUP_ALL
+            multicast, i.e., the shared part of the config;
+  - done:   collect CMD_COMPLETE from all the tiles at the same time.
+
+Usage (from the parent directory of the repo):
+  python -m VectorCGRA.noc.test.ctrl_network_bench [--sizes 4 8 16]
+                                                   [--pkts-per-tile 4]
+
+The 16x16 size (included by default) takes about half an hour per
+topology in Python simulation.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import argparse
+from .CtrlNetworkRTL_test import (TestHarness, cmp_payload,
+                                  mk_complete_pkts, mk_config_pkts,
+                                  mk_pkt_type, run_sim)
+from ...lib.util.common import *
+
+def bench(size, topology, num_pkts_per_tile):
+  num_tiles = size * size
+  PktType = mk_pkt_type(num_tiles)
+  max_cycles = 100 * num_tiles * num_pkts_per_tile
+
+  def measure(src_pkts, sink_pkts, cmp_fn = lambda a, b : a == b):
+    th = TestHarness(PktType, num_tiles, size, topology, src_pkts,
+                     sink_pkts, cmp_fn)
+    return run_sim(th, max_cycles, verbose = False)
+
+  return {
+    'config': measure(*mk_config_pkts(PktType, num_tiles,
+                                      num_pkts_per_tile)),
+    'mcast' : measure(*mk_config_pkts(PktType, num_tiles,
+                                      num_pkts_per_tile, multicast = True)),
+    'done'  : measure(*mk_complete_pkts(PktType, num_tiles), cmp_payload),
+  }
+
+def main():
+  parser = argparse.ArgumentParser(description = __doc__.split("\n")[4])
+  parser.add_argument('--sizes', type = int, nargs = '+',
+                      default = [4, 8, 16])
+  parser.add_argument('--pkts-per-tile', type = int, default = 4)
+  parser.add_argument('--topologies', nargs = '+',
+                      default = CTRL_NETWORK_TOPOLOGIES,
+                      choices = CTRL_NETWORK_TOPOLOGIES)
+  args = parser.parse_args()
+
+  print(f"{'size':>6} {'topology':>18} {'config':>8} {'mcast':>8} "
+        f"{'done':>8}")
+  for size in args.sizes:
+    for topology in args.topologies:
+      cycles = bench(size, topology, args.pkts_per_tile)
+      print(f"{size:>3}x{size:<2} {topology:>18} {cycles['config']:>8} "
+            f"{cycles['mcast']:>8} {cycles['done']:>8}", flush = True)
+
+if __name__ == '__main__':
+  main()
+
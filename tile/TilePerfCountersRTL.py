@@ -0,0 +1,150 @@
+"""
+=========================================================================
+TilePerfCountersRTL.py
+=========================================================================
+Performance counters of a tile. The tile feeds the per-cycle events
+(see PERF_* in common.py), and the counters are cleared once the kernel
+is launched. The cycles since launch are counted till the CMD_COMPLETE
+is sent out.
+
+A CMD_READ_PERF_COUNTERS carrying the counter id in data is answered by
+a CMD_LOAD_RESPONSE (with the counter value in data and the counter id
+in data_addr) towards the cgra sending the request, which is eventually
+delivered to the CPU by the controller.
+
+The counters can be compiled out (i.e., enabled = False) for tapeout,
+in which case the requests are still answered but with 0s.
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+from pymtl3 import *
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.cmd_type import *
+from ..lib.util.common import *
+from ..lib.util.data_struct_attr import *
+
+
+class TilePerfCountersRTL(Component):
+
+  def construct(s, IntraCgraPktType, num_fu_inports, num_tile_inports,
+                num_tiles, enabled = True):
+
+    # Derives types from IntraCgraPktType.
+    CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+    DataType = CgraPayloadType.get_field_type(kAttrData)
+    DataAddrType = CgraPayloadType.get_field_type(kAttrDataAddr)
+    CountType = DataType.get_field_type(kAttrPayload)
+    RegReadsType = mk_bits(clog2(num_fu_inports + 1))
+
+    # Constants.
+    s.num_counters = PERF_XBAR_INPORT_WAIT_BASE + num_tile_inports
+    num_counters = s.num_counters
+    s.enabled = enabled
+
+    # Interfaces.
+    s.recv_cmd = RecvIfcRTL(IntraCgraPktType)
+    s.send_pkt = SendIfcRTL(IntraCgraPktType)
+    s.tile_id = InPort(mk_bits(clog2(num_tiles + 1)))
+
+    # Per-cycle events.
+    s.launch = InPort(1)
+    s.complete = InPort(1)
+    s.ctrl_issue = InPort(1)
+    s.ctrl_stall = InPort(1)
+    s.fu_busy = InPort(1)
+    s.mem_stall = InPort(1)
+    s.reg_reads = InPort(RegReadsType)
+    s.xbar_wait = [InPort(1) for _ in range(num_tile_inports)]
+
+    # Counters.
+    s.running = Wire(1)
+    s.counters = [Wire(CountType) for _ in range(num_counters)]
+
+    # Pending response.
+    s.read_data = Wire(CountType)
+    s.resp_val = Wire(1)
+    s.resp_pkt = Wire(IntraCgraPktType)
+
+    s.recv_cmd.rdy //= lambda: ~s.resp_val
+    s.send_pkt.val //= s.resp_val
+    s.send_pkt.msg //= s.resp_pkt
+
+    if enabled:
+      @update_ff
+      def update_counters():
+        if s.reset | s.launch:
+          s.running <<= s.launch
+          for i in range(num_counters):
+            s.counters[i] <<= 0
+        else:
+          if s.complete:
+            s.running <<= 0
+          if s.running:
+            s.counters[PERF_CYCLES] <<= s.counters[PERF_CYCLES] + CountType(1)
+          if s.ctrl_issue:
+            s.counters[PERF_CTRL_STEPS] <<= s.counters[PERF_CTRL_STEPS] + CountType(1)
+          if s.ctrl_stall:
+            s.counters[PERF_CTRL_STALLS] <<= s.counters[PERF_CTRL_STALLS] + CountType(1)
+          if s.fu_busy:
+            s.counters[PERF_FU_BUSY] <<= s.counters[PERF_FU_BUSY] + CountType(1)
+          if s.mem_stall:
+            s.counters[PERF_MEM_STALLS] <<= s.counters[PERF_MEM_STALLS] + CountType(1)
+          s.counters[PERF_REG_READS] <<= s.counters[PERF_REG_READS] + \
+                                         zext(s.reg_reads, CountType)
+          for i in range(num_tile_inports):
+            if s.xbar_wait[i]:
+              s.counters[PERF_XBAR_INPORT_WAIT_BASE + i] <<= \
+                  s.counters[PERF_XBAR_INPORT_WAIT_BASE + i] + CountType(1)
+
+    else:
+      s.running //= 0
+      for i in range(num_counters):
+        s.counters[i] //= 0
+
+    @update
+    def select_counter():
+      s.read_data @= 0
+      for i in range(num_counters):
+        if s.recv_cmd.msg.payload.data.payload == CountType(i):
+          s.read_data @= s.counters[i]
+
+    @update_ff
+    def update_response():
+      if s.reset:
+        s.resp_val <<= 0
+        s.resp_pkt <<= IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+      elif s.recv_cmd.val & ~s.resp_val:
+        s.resp_val <<= 1
+        # Goes back to the cgra sending the request.
+        s.resp_pkt <<= \
+            IntraCgraPktType(s.tile_id, # src
+                             num_tiles, # dst
+                             s.recv_cmd.msg.dst_cgra_id, # src_cgra_id
+                             s.recv_cmd.msg.src_cgra_id, # dst_cgra_id
+                             s.recv_cmd.msg.dst_cgra_x, # src_cgra_x
+                             s.recv_cmd.msg.dst_cgra_y, # src_cgra_y
+                             s.recv_cmd.msg.src_cgra_x, # dst_cgra_x
+                             s.recv_cmd.msg.src_cgra_y, # dst_cgra_y
+                             0, # opaque
+                             0, # vc_id
+                             CgraPayloadType(CMD_LOAD_RESPONSE,
+                                             DataType(s.read_data, 1, 0, 0),
+                                             trunc(s.recv_cmd.msg.payload.data.payload,
+                                                   DataAddrType),
+                                             0, 0),
+                             0) # dst_group
+      elif s.send_pkt.rdy:
+        s.resp_val <<= 0
+
+  # Returns the counters, i.e., {counter_id: value}, for dumping from the
+  # simulation.
+  def get_counters(s):
+    return {i: int(counter) for i, counter in enumerate(s.counters)}
+
+  def line_trace(s):
+    counters_str = "|".join([str(int(counter)) for counter in s.counters])
+    return f"perf[{int(s.running)}]: ({counters_str})"
+
@@ -24,6 +24,7 @@ from ..fu.single.PhiRTL import PhiRTL
 from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
 from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
 from ..lib.cmd_type import *
+from ..lib.opt_type import *
 from ..lib.util.common import *
 from ..mem.const.ConstQueueDynamicRTL import ConstQueueDynamicRTL
 from ..mem.ctrl.CtrlMemDynamicRTL import CtrlMemDynamicRTL
@@ -32,7 +33,9 @@ from ..noc.CrossbarRTL import CrossbarRTL
 from ..noc.LinkOrRTL import LinkOrRTL
 from ..noc.PyOCN.pymtl3_net.channel.ChannelRTL import ChannelRTL
 from ..rf.RegisterRTL import RegisterRTL
+from .TilePerfCountersRTL import TilePerfCountersRTL
 from ..lib.util.data_struct_attr import *
+from ..lib.util.line_trace_helper import *
 
 
 class TileRTL(Component):
@@ -43,7 +46,11 @@ class TileRTL(Component):
                 num_tile_inports, num_tile_outports, num_cgras, num_tiles,
                 num_registers_per_reg_bank = 16,
                 Fu = FlexibleFuRTL,
-                FuList = [PhiRTL, AdderRTL, CompRTL, MulRTL, GrantRTL, MemUnitRTL]):
+                FuList = [PhiRTL, AdderRTL, CompRTL, MulRTL, GrantRTL, MemUnitRTL],
+                has_perf_counters = True,
+                has_shadow_ctrl_mem = False,
+                num_resident_kernels = 1,
+                num_ctrl_patterns = 0):
 
     # Derives types from IntraCgraPktType.
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
@@ -61,6 +68,7 @@ class TileRTL(Component):
     num_fu_xbar_outports = num_fu_inports + num_tile_outports
 
     CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+    RegReadsType = mk_bits(clog2(num_fu_inports + 1))
     DataAddrType = mk_bits(clog2(data_mem_size))
 
     # Interfaces.
@@ -92,7 +100,6 @@ class TileRTL(Component):
                                      num_routing_xbar_outports,
                                      num_cgras,
                                      num_tiles,
-                                     ctrl_mem_size,
                                      num_tile_outports)
     s.fu_crossbar = CrossbarRTL(DataType,
                                 CtrlSignalType,
@@ -100,7 +107,6 @@ class TileRTL(Component):
                                 num_fu_xbar_outports,
                                 num_cgras,
                                 num_tiles,
-                                ctrl_mem_size,
                                 num_tile_outports)
     s.register_cluster = \
         RegisterClusterRTL(DataType, CtrlSignalType, num_fu_inports,
@@ -114,7 +120,17 @@ class TileRTL(Component):
                                    num_cgras,
                                    num_tiles,
                                    num_ctrl,
-                                   total_steps)
+                                   total_steps,
+                                   has_shadow_ctrl_mem,
+                                   num_resident_kernels,
+                                   num_ctrl_patterns)
+
+    # Counters are compiled out (i.e., always read as 0) if not required.
+    s.perf_counters = TilePerfCountersRTL(CtrlPktType,
+                                          num_fu_inports,
+                                          num_tile_inports,
+                                          num_tiles,
+                                          has_perf_counters)
 
     # The `tile_in_channel` indicates the outport channels that are
     # connected to the next tiles.
@@ -142,6 +158,7 @@ class TileRTL(Component):
     s.fu_crossbar.tile_id //= s.tile_id
     s.routing_crossbar.cgra_id //= s.cgra_id
     s.routing_crossbar.tile_id //= s.tile_id
+    s.perf_counters.tile_id //= s.tile_id
 
     # Assigns crossbar id.
     s.routing_crossbar.crossbar_id //= PORT_ROUTING_CROSSBAR
@@ -155,18 +172,19 @@ class TileRTL(Component):
     s.element.recv_from_ctrl_mem //= s.ctrl_mem.send_to_element
 
     # Ctrl address port.
-    s.routing_crossbar.ctrl_addr_inport //= s.ctrl_mem.ctrl_addr_outport
-    s.fu_crossbar.ctrl_addr_inport //= s.ctrl_mem.ctrl_addr_outport
 
     # Prologue port.
     s.element.prologue_count_inport //= s.ctrl_mem.prologue_count_outport_fu
-    for addr in range(ctrl_mem_size):
-      for i in range(num_routing_xbar_inports):
-        s.routing_crossbar.prologue_count_inport[addr][i] //= \
-            s.ctrl_mem.prologue_count_outport_routing_crossbar[addr][i]
-      for i in range(num_fu_xbar_inports):
-        s.fu_crossbar.prologue_count_inport[addr][i] //= \
-            s.ctrl_mem.prologue_count_outport_fu_crossbar[addr][i]
+    for i in range(num_routing_xbar_inports):
+      s.routing_crossbar.prologue_count_inport[i] //= \
+          s.ctrl_mem.prologue_count_outport_routing_crossbar[i]
+      s.ctrl_mem.prologue_step_inport_routing_crossbar[i] //= \
+          s.routing_crossbar.prologue_step_outport[i]
+    for i in range(num_fu_xbar_inports):
+      s.fu_crossbar.prologue_count_inport[i] //= \
+          s.ctrl_mem.prologue_count_outport_fu_crossbar[i]
+      s.ctrl_mem.prologue_step_inport_fu_crossbar[i] //= \
+          s.fu_crossbar.prologue_step_outport[i]
 
     for i in range(len(FuList)):
       if FuList[i] == MemUnitRTL:
@@ -226,30 +244,72 @@ class TileRTL(Component):
           s.element.recv_in[i]
       s.register_cluster.inport_opt //= s.ctrl_mem.send_ctrl.msg
 
-    # Clear ports are only useful during context switching.
-    # We connect to 0 to make sure they have drivers.
+    # Clear ports are only useful during context switching. We connect
+    # to 0 to make sure they have drivers.
     for i in range(len(FuList)):
       s.element.clear[i] //= 0
-    s.fu_crossbar.clear //= 0
-    s.routing_crossbar.clear //= 0
+    s.ctrl_mem.clear_prologue_crossbar //= 0
+
+    # Groups this tile belongs to, for the multicast ctrl packets.
+    TileGroupsType = mk_bits(NUM_TILE_GROUPS)
+    s.tile_groups = Wire(TileGroupsType)
+    s.in_dst_group = Wire(1)
+
+    @update
+    def check_dst_group():
+      s.in_dst_group @= \
+          (s.recv_from_controller_pkt.msg.dst_group == TILE_GROUP_UNICAST) | \
+          (s.recv_from_controller_pkt.msg.dst_group == TILE_GROUP_ALL) | \
+          s.tile_groups[s.recv_from_controller_pkt.msg.dst_group]
+
+    @update_ff
+    def update_tile_groups():
+      if s.reset:
+        s.tile_groups <<= 0
+      elif s.recv_from_controller_pkt.val & s.in_dst_group & \
+           (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_TILE_GROUP):
+        s.tile_groups <<= trunc(s.recv_from_controller_pkt.msg.payload.data.payload,
+                                TileGroupsType)
 
     @update
     def feed_pkt():
-        s.ctrl_mem.recv_pkt_from_controller.msg @= CtrlPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0) # , 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        s.ctrl_mem.recv_pkt_from_controller.msg @= CtrlPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0) # , 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
         s.const_mem.recv_const.msg @= DataType(0, 0, 0, 0)
         s.ctrl_mem.recv_pkt_from_controller.val @= 0
         s.const_mem.recv_const.val @= 0
+        s.perf_counters.recv_cmd.msg @= CtrlPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        s.perf_counters.recv_cmd.val @= 0
         s.recv_from_controller_pkt.rdy @= 0
 
-        if s.recv_from_controller_pkt.val & \
+        # Drops the multicast packets towards the groups this tile does
+        # not belong to.
+        if s.recv_from_controller_pkt.val & ~s.in_dst_group:
+            s.recv_from_controller_pkt.rdy @= 1
+        elif s.recv_from_controller_pkt.val & \
+             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_TILE_GROUP):
+            s.recv_from_controller_pkt.rdy @= 1
+        elif s.recv_from_controller_pkt.val & \
            ((s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_DELTA) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CLEAR_CTRL_PATTERNS) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CLEAR_SHADOW_CTRL_PATTERNS) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_COUNT_PER_ITER) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU_CROSSBAR) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_ROUTING_CROSSBAR) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_SWAP_CTRL_BANK) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD_RESPONSE) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL_RESPONSE) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX_RESPONSE) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN_RESPONSE) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_LAUNCH)):
             s.ctrl_mem.recv_pkt_from_controller.val @= 1
             s.ctrl_mem.recv_pkt_from_controller.msg @= s.recv_from_controller_pkt.msg
@@ -258,14 +318,25 @@ class TileRTL(Component):
             s.const_mem.recv_const.val @= 1
             s.const_mem.recv_const.msg @= s.recv_from_controller_pkt.msg.payload.data
             s.recv_from_controller_pkt.rdy @= s.const_mem.recv_const.rdy
+        elif s.recv_from_controller_pkt.val & \
+             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_READ_PERF_COUNTERS):
+            s.perf_counters.recv_cmd.val @= 1
+            s.perf_counters.recv_cmd.msg @= s.recv_from_controller_pkt.msg
+            s.recv_from_controller_pkt.rdy @= s.perf_counters.recv_cmd.rdy
 
     @update
     def update_send_out_signal():
         s.send_to_controller_pkt.val @= 0
-        s.send_to_controller_pkt.msg @= CtrlPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0) # , 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        s.send_to_controller_pkt.msg @= CtrlPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0) # , 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        s.perf_counters.send_pkt.rdy @= 0
+        # The packets from ctrl memory (e.g., CMD_COMPLETE) go out first.
         if s.ctrl_mem.send_pkt_to_controller.val:
             s.send_to_controller_pkt.val @= 1
             s.send_to_controller_pkt.msg @= s.ctrl_mem.send_pkt_to_controller.msg
+        elif s.perf_counters.send_pkt.val:
+            s.send_to_controller_pkt.val @= 1
+            s.send_to_controller_pkt.msg @= s.perf_counters.send_pkt.msg
+            s.perf_counters.send_pkt.rdy @= s.send_to_controller_pkt.rdy
         s.ctrl_mem.send_pkt_to_controller.rdy @= s.send_to_controller_pkt.rdy
 
     # Updates the configuration memory related signals.
@@ -313,8 +384,39 @@ class TileRTL(Component):
       s.routing_crossbar.compute_done @= s.element_done
       s.fu_crossbar.compute_done @= s.element_done
 
+    # Feeds the per-cycle events to the performance counters.
+    @update
+    def observe_perf_events():
+      s.perf_counters.launch @= s.recv_from_controller_pkt.val & \
+                                s.recv_from_controller_pkt.rdy & \
+                                s.in_dst_group & \
+                                ((s.recv_from_controller_pkt.msg.payload.cmd == CMD_LAUNCH) | \
+                                 (s.recv_from_controller_pkt.msg.payload.cmd == CMD_SWAP_CTRL_BANK))
+      s.perf_counters.complete @= s.send_to_controller_pkt.val & \
+                                  s.send_to_controller_pkt.rdy & \
+                                  (s.send_to_controller_pkt.msg.payload.cmd == CMD_COMPLETE)
+      s.perf_counters.ctrl_issue @= s.ctrl_mem.send_ctrl.val & s.ctrl_mem.send_ctrl.rdy
+      s.perf_counters.ctrl_stall @= s.ctrl_mem.send_ctrl.val & ~s.ctrl_mem.send_ctrl.rdy
+      s.perf_counters.fu_busy @= s.element.recv_opt.val & \
+                                 (s.element.recv_opt.msg.operation != OPT_START) & \
+                                 (s.element.recv_opt.msg.operation != OPT_NAH)
+      s.perf_counters.mem_stall @= (s.to_mem_raddr.val & ~s.to_mem_raddr.rdy) | \
+                                   (s.to_mem_waddr.val & ~s.to_mem_waddr.rdy)
+      s.perf_counters.reg_reads @= 0
+      if s.ctrl_mem.send_ctrl.val & s.ctrl_mem.send_ctrl.rdy:
+        for i in range(num_fu_inports):
+          if s.ctrl_mem.send_ctrl.msg.read_reg_from[i]:
+            s.perf_counters.reg_reads @= s.perf_counters.reg_reads + RegReadsType(1)
+      for i in range(num_tile_inports):
+        s.perf_counters.xbar_wait[i] @= s.routing_crossbar.recv_data[i].val & \
+                                        ~s.routing_crossbar.recv_data[i].rdy
+
   # Line trace
   def line_trace(s):
+    if trace_is_off():
+      return ""
+    if trace_is_summary():
+      return f"{s.ctrl_mem.line_trace()} done: {s.element_done}{s.fu_crossbar_done}{s.routing_crossbar_done}"
     recv_str = "|".join(["(" + str(x.msg) + ", val: " + str(x.val) + ", rdy: " + str(x.rdy) + ")" for x in s.recv_data])
     send_str = "|".join([str(x.msg) for x in s.send_data])
     tile_in_channel_recv_str = "|".join([str(x.recv.msg) for x in s.tile_in_channel])
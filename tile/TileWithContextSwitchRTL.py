@@ -29,6 +29,7 @@ from ..noc.LinkOrRTL import LinkOrRTL
 from ..noc.ChannelWithClearRTL import ChannelWithClearRTL
 from ..rf.RegisterRTL import RegisterRTL
 from ..lib.util.data_struct_attr import *
+from ..lib.util.line_trace_helper import *
 
 
 class TileWithContextSwitchRTL(Component):
@@ -90,7 +91,6 @@ class TileWithContextSwitchRTL(Component):
                                      num_routing_xbar_outports,
                                      num_cgras,
                                      num_tiles,
-                                     ctrl_mem_size,
                                      num_tile_outports)
     s.fu_crossbar = CrossbarRTL(DataType,
                                 CtrlSignalType,
@@ -98,7 +98,6 @@ class TileWithContextSwitchRTL(Component):
                                 num_fu_xbar_outports,
                                 num_cgras,
                                 num_tiles,
-                                ctrl_mem_size,
                                 num_tile_outports)
     s.register_cluster = \
         RegisterClusterRTL(DataType, CtrlSignalType, num_fu_inports,
@@ -132,7 +131,7 @@ class TileWithContextSwitchRTL(Component):
     
     # Used for:
     # Clearing the 'first' signal in PhiRTL to correctly resume the progress.
-    # Clearing the 'prologue_counter' signal in CrossbarRTL to correctly resume the progress.
+    # Restoring the prologue counts of the crossbars in CtrlMemDynamicRTL to correctly resume the progress.
     s.clear = Wire(1)
 
     s.cgra_id = InPort(mk_bits(max(1, clog2(num_cgras))))
@@ -159,8 +158,6 @@ class TileWithContextSwitchRTL(Component):
     s.element.recv_from_ctrl_mem //= s.ctrl_mem.send_to_element
 
     # Ctrl address port.
-    s.routing_crossbar.ctrl_addr_inport //= s.ctrl_mem.ctrl_addr_outport
-    s.fu_crossbar.ctrl_addr_inport //= s.ctrl_mem.ctrl_addr_outport
 
     # Connects context switch module
     s.context_switch.recv_cmd //= s.recv_from_controller_pkt.msg.payload.cmd
@@ -173,13 +170,16 @@ class TileWithContextSwitchRTL(Component):
 
     # Prologue port.
     s.element.prologue_count_inport //= s.ctrl_mem.prologue_count_outport_fu
-    for addr in range(ctrl_mem_size):
-      for i in range(num_routing_xbar_inports):
-        s.routing_crossbar.prologue_count_inport[addr][i] //= \
-            s.ctrl_mem.prologue_count_outport_routing_crossbar[addr][i]
-      for i in range(num_fu_xbar_inports):
-        s.fu_crossbar.prologue_count_inport[addr][i] //= \
-            s.ctrl_mem.prologue_count_outport_fu_crossbar[addr][i]
+    for i in range(num_routing_xbar_inports):
+      s.routing_crossbar.prologue_count_inport[i] //= \
+          s.ctrl_mem.prologue_count_outport_routing_crossbar[i]
+      s.ctrl_mem.prologue_step_inport_routing_crossbar[i] //= \
+          s.routing_crossbar.prologue_step_outport[i]
+    for i in range(num_fu_xbar_inports):
+      s.fu_crossbar.prologue_count_inport[i] //= \
+          s.ctrl_mem.prologue_count_outport_fu_crossbar[i]
+      s.ctrl_mem.prologue_step_inport_fu_crossbar[i] //= \
+          s.fu_crossbar.prologue_step_outport[i]
 
     for i in range(len(FuList)):
       if FuList[i] == MemUnitRTL:
@@ -194,14 +194,13 @@ class TileWithContextSwitchRTL(Component):
         s.element.to_mem_waddr[i].rdy //= 0
         s.element.to_mem_wdata[i].rdy //= 0
     
-    # Feed clear signal to PhiRTL and CrossbarRTL to correctly resume the progress.
+    # Feed clear signal to PhiRTL and the prologue counts of the crossbars to correctly resume the progress.
     for i in range(len(FuList)):
       if (FuList[i] == PhiRTL) | (FuList[i] == RetRTL):
         s.element.clear[i] //= s.clear
       else:
         s.element.clear[i] //= 0
-    s.fu_crossbar.clear //= s.clear
-    s.routing_crossbar.clear //= s.clear
+    s.ctrl_mem.clear_prologue_crossbar //= s.clear
     s.const_mem.clear //= s.clear
 
     # Connections on the `routing_crossbar`.
@@ -252,7 +251,7 @@ class TileWithContextSwitchRTL(Component):
 
     @update
     def feed_pkt():
-        s.ctrl_mem.recv_pkt_from_controller.msg @= CtrlPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0) # , 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        s.ctrl_mem.recv_pkt_from_controller.msg @= CtrlPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0) # , 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
         s.const_mem.recv_const.msg @= DataType(0, 0, 0, 0)
         s.ctrl_mem.recv_pkt_from_controller.val @= 0
         s.const_mem.recv_const.val @= 0
@@ -266,8 +265,21 @@ class TileWithContextSwitchRTL(Component):
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_DELTA) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CLEAR_CTRL_PATTERNS) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CLEAR_SHADOW_CTRL_PATTERNS) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_TOTAL_CTRL_COUNT) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_COUNT_PER_ITER) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_CTRL_LOWER_BOUND) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_FU_CROSSBAR) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_SHADOW_PROLOGUE_ROUTING_CROSSBAR) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_SWAP_CTRL_BANK) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD_RESPONSE) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL_RESPONSE) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_MAX_RESPONSE) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_MIN_RESPONSE) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_RECORD_PHI_ADDR) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_LAUNCH) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_PAUSE) | \
@@ -296,7 +308,7 @@ class TileWithContextSwitchRTL(Component):
     @update
     def update_send_out_signal():
         s.send_to_controller_pkt.val @= 0
-        s.send_to_controller_pkt.msg @= CtrlPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0) # , 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        s.send_to_controller_pkt.msg @= CtrlPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0) # , 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
         if s.ctrl_mem.send_pkt_to_controller.val:
             s.send_to_controller_pkt.val @= 1
             s.send_to_controller_pkt.msg @= s.ctrl_mem.send_pkt_to_controller.msg
@@ -359,6 +371,10 @@ class TileWithContextSwitchRTL(Component):
 
   # Line trace
   def line_trace(s):
+    if trace_is_off():
+      return ""
+    if trace_is_summary():
+      return f"{s.ctrl_mem.line_trace()} done: {s.element_done}{s.fu_crossbar_done}{s.routing_crossbar_done}"
     recv_str = "|".join(["(" + str(x.msg) + ", val: " + str(x.val) + ", rdy: " + str(x.rdy) + ")" for x in s.recv_data])
     send_str = "|".join([str(x.msg) for x in s.send_data])
     tile_in_channel_recv_str = "|".join([str(x.recv.msg) for x in s.tile_in_channel])
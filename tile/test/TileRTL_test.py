@@ -35,6 +35,8 @@ from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.cmd_type import *
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.common import *
+import pytest
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -47,14 +49,16 @@ class TestHarness(Component):
                 ctrl_mem_size, data_mem_size, num_fu_inports,
                 num_fu_outports, num_tile_inports,
                 num_tile_outports, num_registers_per_reg_bank, src_data,
-                src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out):
+                src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
+                ctrl_pkt_interval_delay = 0, has_perf_counters = True):
 
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
     DataType = CgraPayloadType.get_field_type(kAttrData)
     s.num_tile_inports = num_tile_inports
     s.num_tile_outports = num_tile_outports
 
-    s.src_ctrl_pkt = TestSrcRTL(IntraCgraPktType, src_ctrl_pkt)
+    s.src_ctrl_pkt = TestSrcRTL(IntraCgraPktType, src_ctrl_pkt,
+                                interval_delay = ctrl_pkt_interval_delay)
     s.src_data = [TestSrcRTL(DataType, src_data[i])
                   for i in range(num_tile_inports)]
     s.sink_out = [TestSinkRTL(DataType, sink_out[i])
@@ -65,7 +69,8 @@ class TestHarness(Component):
                 num_fu_inports, num_fu_outports, num_tile_inports,
                 num_tile_outports, 1, num_tiles,
                 num_registers_per_reg_bank,
-                FunctionUnit, FuList)
+                FunctionUnit, FuList,
+                has_perf_counters = has_perf_counters)
 
     # Connects tile id.
     s.dut.cgra_id //= 0
@@ -447,3 +452,112 @@ def test_tile_multicycle_inclusive(cmdline_opts):
                        'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
+
+@pytest.mark.parametrize('has_perf_counters', [True, False])
+def test_tile_perf_counters(cmdline_opts, has_perf_counters):
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  ctrl_mem_size = 3
+  data_mem_size_global = 16
+  num_cgra_rows = 1
+  num_cgra_columns = 1
+  num_tiles = 4
+  num_registers_per_reg_bank = 16
+  TileInType = mk_bits(clog2(num_tile_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  DUT = TileRTL
+  FunctionUnit = FlexibleFuRTL
+  FuList = [AdderRTL, MulRTL, MemUnitRTL]
+  DataType = mk_data(32, 1)
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  # Same kernel as test_tile_alu, followed by reading the counters once
+  # the kernel is done.
+  perf_ids = [PERF_CTRL_STEPS, PERF_REG_READS, PERF_MEM_STALLS]
+  src_ctrl_pkt = [
+      IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0,
+                       payload = CgraPayloadType(CMD_CONFIG, ctrl_addr = 0,
+                                                 ctrl = CtrlType(OPT_ADD,
+                                                                 [FuInType(1), FuInType(2), FuInType(0), FuInType(0)],
+                                                                 [TileInType(0), TileInType(0), TileInType(0), TileInType(0),
+                                                                  TileInType(4), TileInType(3), TileInType(0), TileInType(0)],
+                                                                 [FuOutType(0), FuOutType(0), FuOutType(0), FuOutType(1),
+                                                                  FuOutType(0), FuOutType(0), FuOutType(0), FuOutType(0)]))),
+      IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0,
+                       payload = CgraPayloadType(CMD_CONFIG, ctrl_addr = 1,
+                                                 ctrl = CtrlType(OPT_SUB,
+                                                                 [FuInType(1), FuInType(2), FuInType(0), FuInType(0)],
+                                                                 [TileInType(0), TileInType(0), TileInType(0), TileInType(0),
+                                                                  TileInType(4), TileInType(1), TileInType(0), TileInType(0)],
+                                                                 [FuOutType(1), FuOutType(0), FuOutType(0), FuOutType(1),
+                                                                  FuOutType(0), FuOutType(0), FuOutType(0), FuOutType(0)]))),
+      IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_CONST, data = DataType(5, 1))),
+      IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_CONST, data = DataType(7, 1))),
+      IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_LAUNCH))] + \
+      [IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0,
+                        payload = CgraPayloadType(CMD_READ_PERF_COUNTERS,
+                                                  data = DataType(perf_id, 1)))
+       for perf_id in perf_ids]
+
+  src_data = [[DataType(3, 1)],
+              [],
+              [DataType(4, 1)],
+              [DataType(5, 1), DataType(7, 1)]]
+
+  sink_out = [[DataType(4, 1)],
+              [],
+              [],
+              [DataType(9, 1), DataType(4, 1)]]
+
+  # 2 ctrl steps issued, without any register read or memory access. The
+  # counters are read as 0s once compiled out.
+  expected_counters = {PERF_CTRL_STEPS: 2, PERF_REG_READS: 0, PERF_MEM_STALLS: 0}
+  complete_signal_sink_out = \
+      [IntraCgraPktType(0, num_tiles, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_COMPLETE))] + \
+      [IntraCgraPktType(0, num_tiles, 0, 0, 0, 0, 0, 0,
+                        payload = CgraPayloadType(CMD_LOAD_RESPONSE,
+                                                  data = DataType(expected_counters[perf_id] if has_perf_counters else 0, 1),
+                                                  data_addr = perf_id))
+       for perf_id in perf_ids]
+
+  th = TestHarness(DUT, FunctionUnit, FuList,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global, num_fu_inports, num_fu_outports,
+                   num_tile_inports, num_tile_outports,
+                   num_registers_per_reg_bank, src_data,
+                   src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
+                   ctrl_pkt_interval_delay = 8,
+                   has_perf_counters = has_perf_counters)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+  if has_perf_counters and not cmdline_opts['test_verilog']:
+    counters = th.dut.perf_counters.get_counters()
+    assert counters[PERF_CTRL_STEPS] == 2
+    assert counters[PERF_CYCLES] >= counters[PERF_CTRL_STEPS]
+    assert counters[PERF_FU_BUSY] >= counters[PERF_CTRL_STEPS]
@@ -0,0 +1,161 @@
+"""
+==========================================================================
+prologue_bench.py
+==========================================================================
+Benchmark of the prologue machinery of a tile (i.e., the prologue counts
+in CtrlMemDynamicRTL and their use in the crossbars) over ctrl_mem_size. An 8-port (KingMesh) tile with the prologue counts
+configured at every ctrl address runs a kernel iterating over the whole
+ctrl memory.
+
+For each ctrl_mem_size, it reports the elaboration time, the simulation
+speed, the state bits (i.e., the bits written by the update_ff blocks)
+of the ctrl memory and the crossbars, and the bits of the prologue
+ports of the ctrl memory.
+
+Usage (from the parent directory of the repo):
+  python -m VectorCGRA.tile.test.prologue_bench [--sizes 16 64 256]
+                                                [--cycles 100]
+
+Author : Cheng Tan
+  Date : Oct 18, 2026
+"""
+
+import argparse
+import time
+from ..TileRTL import TileRTL
+from ...fu.single.AdderRTL import AdderRTL
+from ...fu.single.PhiRTL import PhiRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.cmd_type import *
+from ...lib.messages import *
+from ...lib.opt_type import *
+from ...lib.util.common import *
+
+num_tile_ports = 8
+num_fu_inports = 4
+num_fu_outports = 2
+num_tiles = 4
+data_mem_size = 16
+
+DataType = mk_data(32, 1)
+CtrlType = mk_ctrl(num_fu_inports, num_fu_outports, num_tile_ports,
+                   num_tile_ports, 16)
+
+class BenchHarness(Component):
+
+  def construct(s, ctrl_mem_size):
+
+    CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+    CgraPayloadType = mk_cgra_payload(DataType, mk_bits(clog2(data_mem_size)),
+                                      CtrlType, CtrlAddrType)
+    IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+
+    def mk_pkt(cmd, **kwargs):
+      return IntraCgraPktType(0, 0, payload = CgraPayloadType(cmd, **kwargs))
+
+    # Every ctrl signal is a NAH, and every address takes the prologue
+    # counts of an inport of each crossbar.
+    TileInType = mk_bits(clog2(num_tile_ports + 1))
+    FuOutType = mk_bits(clog2(num_fu_outports + 1))
+    num_routing_outports = num_tile_ports + num_fu_inports
+    pkts = []
+    for addr in range(ctrl_mem_size):
+      pkts.append(mk_pkt(CMD_CONFIG, ctrl = CtrlType(OPT_NAH),
+                         ctrl_addr = addr))
+      routing_xbar = [TileInType(addr % num_tile_ports)] + \
+                     [TileInType(0)] * (num_routing_outports - 1)
+      fu_xbar = [FuOutType(addr % num_fu_outports)] + \
+                [FuOutType(0)] * (num_routing_outports - 1)
+      pkts.append(mk_pkt(CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR,
+                         data = DataType(1, 1), ctrl_addr = addr,
+                         ctrl = CtrlType(OPT_NAH, routing_xbar_outport = routing_xbar)))
+      pkts.append(mk_pkt(CMD_CONFIG_PROLOGUE_FU_CROSSBAR,
+                         data = DataType(1, 1), ctrl_addr = addr,
+                         ctrl = CtrlType(OPT_NAH, fu_xbar_outport = fu_xbar)))
+      pkts.append(mk_pkt(CMD_CONFIG_PROLOGUE_FU, data = DataType(1, 1),
+                         ctrl_addr = addr))
+    pkts.append(mk_pkt(CMD_CONFIG_COUNT_PER_ITER,
+                       data = DataType(ctrl_mem_size, 1)))
+    pkts.append(mk_pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(0, 1)))
+    pkts.append(mk_pkt(CMD_LAUNCH))
+    s.num_config_pkts = len(pkts)
+
+    s.src_pkt = TestSrcRTL(IntraCgraPktType, pkts)
+    s.dut = TileRTL(IntraCgraPktType, ctrl_mem_size, data_mem_size,
+                    ctrl_mem_size, 0, num_fu_inports, num_fu_outports,
+                    num_tile_ports, num_tile_ports, 1, num_tiles,
+                    FuList = [AdderRTL, PhiRTL], has_perf_counters = False)
+
+    # Connections.
+    s.dut.cgra_id //= 0
+    s.dut.tile_id //= 0
+    s.src_pkt.send //= s.dut.recv_from_controller_pkt
+    s.dut.send_to_controller_pkt.rdy //= 1
+    for i in range(num_tile_ports):
+      s.dut.recv_data[i].val //= 0
+      s.dut.recv_data[i].msg //= DataType()
+      s.dut.send_data[i].rdy //= 1
+    s.dut.to_mem_raddr.rdy //= 0
+    s.dut.from_mem_rdata.val //= 0
+    s.dut.from_mem_rdata.msg //= DataType()
+    s.dut.to_mem_waddr.rdy //= 0
+    s.dut.to_mem_wdata.rdy //= 0
+
+# Returns the bits written by the update_ff blocks within the component.
+def state_nbits(top, component):
+  prefix = repr(component) + '.'
+  signals = set()
+  for blk in top.get_all_update_ff():
+    signals |= {signal for signal in top._dsl.all_upblk_writes[blk]
+                if repr(signal).startswith(prefix)}
+  return sum(signal.get_type().nbits for signal in signals)
+
+# Returns the bits of the prologue ports of the ctrl memory.
+def prologue_port_nbits(ctrl_mem):
+  return sum(port.get_type().nbits
+             for port in ctrl_mem.get_input_value_ports() +
+                         ctrl_mem.get_output_value_ports()
+             if port.get_field_name().startswith('prologue'))
+
+def bench(ctrl_mem_size, num_cycles):
+  start = time.time()
+  th = BenchHarness(ctrl_mem_size)
+  th.elaborate()
+  port_nbits = prologue_port_nbits(th.dut.ctrl_mem)
+  th.apply(DefaultPassGroup())
+  th.sim_reset()
+  elaboration = time.time() - start
+
+  for _ in range(th.num_config_pkts):
+    th.sim_tick()
+  start = time.time()
+  for _ in range(num_cycles):
+    th.sim_tick()
+  speed = num_cycles / (time.time() - start)
+
+  dut = th.dut
+  return {'elaboration': elaboration,
+          'speed': speed,
+          'ctrl_mem_bits': state_nbits(th, dut.ctrl_mem),
+          'xbar_bits': state_nbits(th, dut.routing_crossbar) +
+                       state_nbits(th, dut.fu_crossbar),
+          'port_bits': port_nbits}
+
+def main():
+  parser = argparse.ArgumentParser(description = __doc__.split("\n")[4])
+  parser.add_argument('--sizes', nargs = '+', type = int,
+                      default = [16, 64, 256])
+  parser.add_argument('--cycles', type = int, default = 100)
+  args = parser.parse_args()
+
+  print(f"{'size':>5} {'elab (s)':>9} {'cycles/s':>9} {'ctrl_mem':>9} "
+        f"{'xbars':>7} {'ports':>6}")
+  for ctrl_mem_size in args.sizes:
+    result = bench(ctrl_mem_size, args.cycles)
+    print(f"{ctrl_mem_size:>5} {result['elaboration']:>9.2f} "
+          f"{result['speed']:>9.1f} {result['ctrl_mem_bits']:>9} "
+          f"{result['xbar_bits']:>7} {result['port_bits']:>6}",
+          flush = True)
+
+if __name__ == '__main__':
+  main()